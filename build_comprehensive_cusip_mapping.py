@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import Dict, Set
 import time
 
+from shared.identifier_store import IdentifierStore, DEFAULT_STORE_PATH
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -230,6 +232,11 @@ def main():
     # Save the mapping
     mapper.save_mappings(cusip_to_ticker)
     
+    # Compile the JSON mappings into the memory-mapped lookup store
+    store = IdentifierStore.build()
+    store.save(DEFAULT_STORE_PATH)
+    logger.info(f"Compiled {len(store)} identifier records to {DEFAULT_STORE_PATH}")
+    
     # Show statistics
     logger.info("\n=== Mapping Statistics ===")
     logger.info(f"Total CUSIP-to-ticker mappings: {len(cusip_to_ticker)}")
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
 
 class BaseValidator(ABC):
     """Base class for all constraint validators."""
@@ -38,4 +39,19 @@ class BaseValidator(ABC):
             - is_allowed: True if trade is allowed, False otherwise
             - reason: None if allowed, otherwise a string explaining why it's not allowed
         """
-        pass 
\ No newline at end of file
+        pass 
+
+    def restricted_sell_mask(self, tax_lot_ids: Iterable[str]) -> np.ndarray:
+        """
+        Flag the tax lots this validator does not allow to be sold at all.
+
+        Equivalent to calling validate_sell(tax_lot_id, 0) for every lot;
+        validators override it with a vectorized check.
+
+        Args:
+            tax_lot_ids: The tax lot identifiers to check
+
+        Returns:
+            Boolean array, True where selling the lot is not allowed
+        """
+        return np.array([not self.validate_sell(tax_lot_id, 0)[0] for tax_lot_id in tax_lot_ids], dtype=bool)
@@ -1,6 +1,8 @@
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 
 from src.service.constraints.base_validator import BaseValidator
 from src.service.helpers.constants import CASH_CUSIP_ID
@@ -73,4 +75,24 @@ class CashValidator(BaseValidator):
         prob += (
             self.strategy.cash + total_sell_proceeds - total_buy_cost >= self.min_cash_amount,
             "min_cash_floor"
-        ) 
\ No newline at end of file
+        )
+
+    def add_to_model(self, model, columns) -> None:
+        """
+        Add cash constraints to a sparse model (matrix form of add_to_problem).
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+        """
+        # Never buy CASH
+        model.fix(columns.buy_cols[columns.buy_identifiers == CASH_CUSIP_ID], 0.0)
+
+        # buy cost - sell proceeds, for both the cash balance and the cash floor
+        cols = np.concatenate([columns.buy_cols, columns.sell_cols])
+        vals = np.concatenate([columns.buy_prices, -columns.sell_current_prices])
+        row = np.zeros(len(cols), dtype=np.int64)
+        net_cost = sp.coo_matrix((vals, (row, cols)), shape=(1, model.n_cols))
+
+        model.add_rows(net_cost, upper=self.strategy.cash, name="cash_balance")
+        model.add_rows(net_cost, upper=self.strategy.cash - self.min_cash_amount, name="min_cash_floor")
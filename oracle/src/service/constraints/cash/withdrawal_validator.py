@@ -1,6 +1,8 @@
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 
 from src.service.constraints.base_validator import BaseValidator
 from src.service.helpers.constants import CASH_CUSIP_ID, logger
@@ -94,4 +96,46 @@ class WithdrawalValidator(BaseValidator):
         prob += new_cash >= 0, "withdrawal_cash_constraint"
         
         if debug:
-            logger.info(f"Added withdrawal constraint: new_cash >= 0") 
\ No newline at end of file
+            logger.info(f"Added withdrawal constraint: new_cash >= 0")
+
+    def add_to_model(
+        self,
+        model,
+        columns,
+        drift: pd.DataFrame,
+        total_value: float,
+        debug: bool = True
+    ) -> None:
+        """
+        Add the withdrawal cash constraint to a sparse model (matrix form of add_to_problem).
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            drift: DataFrame with drift report
+            total_value: Total portfolio value
+            debug: Enable debug logging
+        """
+        if self.withdrawal_amount <= 0:
+            return
+
+        cash_row = drift[drift['asset_class'] == CASH_CUSIP_ID]
+        if cash_row.empty:
+            if debug:
+                logger.warning("CASH_CUSIP_ID not found in drift report for withdrawal calculation.")
+            return
+
+        current_cash = cash_row['actual_weight'].iloc[0] * total_value
+
+        # current_cash + sells - non-cash buys - withdrawal >= 0
+        non_cash = columns.buy_identifiers != CASH_CUSIP_ID
+        cols = np.concatenate([columns.sell_cols, columns.buy_cols[non_cash]])
+        vals = np.concatenate([columns.sell_prices, -columns.buy_prices[non_cash]])
+        model.add_rows(
+            sp.coo_matrix((vals, (np.zeros(len(cols), dtype=np.int64), cols)), shape=(1, model.n_cols)),
+            lower=self.withdrawal_amount - current_cash,
+            name="withdrawal_cash_constraint"
+        )
+
+        if debug:
+            logger.info(f"Added sparse withdrawal constraint: new_cash >= 0 (current cash ${current_cash:.2f})")
@@ -1,4 +1,5 @@
 import pulp
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
 from datetime import timedelta
@@ -200,6 +201,106 @@ class ConstraintsManager:
             for section, duration in timing_data.items():
                 logger.info(f"{section}: {duration:.3f} seconds")
             
+    def add_constraints_sparse(
+        self,
+        model,
+        columns,
+        gain_loss: pd.DataFrame,
+        tax_lots: pd.DataFrame,
+        min_cash_amount: float,
+        holding_time_delta: timedelta = None,
+        min_notional: float = 0,
+        range_min_weight_multiplier: float = 0.5,
+        range_max_weight_multiplier: float = 2.0,
+        enforce_wash_sale_prevention: bool = True,
+        log_time: bool = False,
+    ) -> None:
+        """
+        Add all constraints to a sparse model (matrix form of add_constraints).
+
+        Validators are registered exactly as in add_constraints, so the
+        pre-trade checks used by TLH behave the same on either path.
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            gain_loss: DataFrame with gain/loss report
+            tax_lots: DataFrame with tax lot information
+            min_cash_amount: Minimum cash amount to maintain
+            holding_time_delta: Minimum holding time for tax lots
+            min_notional: Minimum notional amount for any trade (in dollars)
+            range_min_weight_multiplier: Multiplier for minimum asset class weight
+            range_max_weight_multiplier: Multiplier for maximum asset class weight
+            enforce_wash_sale_prevention: Whether wash sale restrictions apply
+            log_time: Whether to log timing information
+        """
+        timing_data = {}
+        if log_time:
+            start_time = time.time()
+
+        if 'cash' not in self.post_trade_validators:
+            self.post_trade_validators['cash'] = CashValidator(self.strategy, min_cash_amount)
+        else:
+            self.post_trade_validators['cash'].min_cash_amount = min_cash_amount
+        self.post_trade_validators['cash'].add_to_model(model, columns)
+
+        if 'min_notional' not in self.post_trade_validators:
+            self.post_trade_validators['min_notional'] = MinNotionalValidator(self.strategy, min_notional)
+        else:
+            self.post_trade_validators['min_notional'].min_notional = min_notional
+        self.post_trade_validators['min_notional'].add_to_model(model, columns, tax_lots)
+
+        if 'no_simultaneous_trade' not in self.post_trade_validators:
+            self.post_trade_validators['no_simultaneous_trade'] = NoSimultaneousTradeValidator(self.strategy)
+        self.post_trade_validators['no_simultaneous_trade'].add_to_model(
+            model, columns, all_identifiers=self.strategy.all_identifiers
+        )
+        if log_time:
+            timing_data['trade_constraints'] = time.time() - start_time
+            restriction_start = time.time()
+
+        if 'restriction' not in self.pre_trade_validators:
+            self.pre_trade_validators['restriction'] = RestrictionValidator(self.strategy, enforce_wash_sale_prevention)
+        self.pre_trade_validators['restriction'].add_to_model(
+            model,
+            columns,
+            stock_restrictions=self.strategy.oracle.stock_restrictions,
+            wash_sale_restrictions=self.strategy.oracle.wash_sale_restrictions,
+            all_identifiers=self.strategy.all_identifiers
+        )
+        if log_time:
+            timing_data['restriction_constraints'] = time.time() - restriction_start
+
+        if holding_time_delta is not None and holding_time_delta > timedelta(days=0):
+            if 'holding_time' not in self.pre_trade_validators:
+                self.pre_trade_validators['holding_time'] = HoldingTimeValidator(self.strategy, holding_time_delta)
+            else:
+                self.pre_trade_validators['holding_time'].holding_time_delta = holding_time_delta
+            self.pre_trade_validators['holding_time'].add_to_model(
+                model, columns, tax_lots=tax_lots, current_date=self.strategy.oracle.current_date
+            )
+
+        if self.strategy.optimization_type in {self.strategy.optimization_type.PAIRS_TLH,
+                                                    self.strategy.optimization_type.DIRECT_INDEX}:
+            if 'drift' not in self.post_trade_validators:
+                self.post_trade_validators['drift'] = DriftValidator(
+                    self.strategy,
+                    range_min_weight_multiplier=range_min_weight_multiplier,
+                    range_max_weight_multiplier=range_max_weight_multiplier
+                )
+            else:
+                self.post_trade_validators['drift'].range_min_weight_multiplier = range_min_weight_multiplier
+                self.post_trade_validators['drift'].range_max_weight_multiplier = range_max_weight_multiplier
+            self.post_trade_validators['drift'].add_to_model(model, columns, drift=self.strategy.drift_report)
+
+        self.validators = {**self.pre_trade_validators, **self.post_trade_validators}
+
+        if log_time:
+            timing_data['total_time'] = time.time() - start_time
+            logger.info("=== Sparse Constraints Setup Timing Breakdown ===")
+            for section, duration in timing_data.items():
+                logger.info(f"{section}: {duration:.3f} seconds")
+
     def add_withdrawal_constraints(
         self,
         prob: pulp.LpProblem,
@@ -247,6 +348,29 @@ class ConstraintsManager:
         # Keep validators dict in sync
         self.validators = {**self.pre_trade_validators, **self.post_trade_validators}
         
+    def add_withdrawal_constraints_sparse(
+        self,
+        model,
+        columns,
+        drift: pd.DataFrame,
+        total_value: float,
+        withdrawal_amount: float,
+        debug: bool = True
+    ) -> None:
+        """Add withdrawal-related constraints to a sparse model (matrix form of add_withdrawal_constraints)."""
+        if withdrawal_amount <= 0:
+            return
+
+        if 'withdrawal' not in self.post_trade_validators:
+            self.post_trade_validators['withdrawal'] = WithdrawalValidator(self.strategy, withdrawal_amount)
+        else:
+            self.post_trade_validators['withdrawal'].withdrawal_amount = withdrawal_amount
+        self.post_trade_validators['withdrawal'].add_to_model(
+            model, columns, drift=drift, total_value=total_value, debug=debug
+        )
+
+        self.validators = {**self.pre_trade_validators, **self.post_trade_validators}
+
     def add_no_buy_constraints(
         self,
         prob: pulp.LpProblem,
@@ -300,7 +424,26 @@ class ConstraintsManager:
                 # Skip validators that don't implement individual trade validation
                 continue
         return False, None
-        
+
+    def restricted_from_selling_pre_trade_mask(self, tax_lot_ids) -> np.ndarray:
+        """
+        Vectorized is_restricted_from_selling_pre_trade over many tax lots.
+
+        Args:
+            tax_lot_ids: The tax lot identifiers to check
+
+        Returns:
+            Boolean array, True where the lot is restricted from selling
+        """
+        restricted = np.zeros(len(tax_lot_ids), dtype=bool)
+        for validator in self.pre_trade_validators.values():
+            try:
+                restricted |= validator.restricted_sell_mask(tax_lot_ids)
+            except NotImplementedError:
+                # Skip validators that don't implement individual trade validation
+                continue
+        return restricted
+
     def is_restricted_from_buying_pre_trade(self, identifier: str) -> Tuple[bool, Optional[str]]:
         """
         Check if a security is restricted from buying or selling.
@@ -1,6 +1,8 @@
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 from src.service.helpers.constants import CASH_CUSIP_ID
 from src.service.constraints.base_validator import BaseValidator
 
@@ -126,4 +128,59 @@ class DriftValidator(BaseValidator):
                         # Add maximum weight constraint for the asset class
                         prob += new_weight <= max_weight, f"max_weight_{asset_class}"
 
-    
\ No newline at end of file
+    def add_to_model(self, model, columns, drift: pd.DataFrame) -> None:
+        """
+        Add asset class drift range constraints to a sparse model (matrix form of add_to_problem).
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            drift: DataFrame with drift report containing asset class information
+        """
+        drift = drift[
+            (drift['asset_class'] != CASH_CUSIP_ID) & (drift['actual_weight'] > 0) & (drift['target_weight'] > 0)
+        ]
+        if drift.empty:
+            return
+
+        (buy_group, buy_col, buy_weight, _), (sell_group, sell_col, sell_weight, _) = \
+            columns.group_trade_terms(list(drift['identifiers']), self.strategy.total_value())
+
+        actual = drift['actual_weight'].to_numpy(dtype=float)
+        target = drift['target_weight'].to_numpy(dtype=float)
+        min_multiplier = getattr(self, 'range_min_weight_multiplier', None)
+        max_multiplier = getattr(self, 'range_max_weight_multiplier', None)
+        min_weight = min_multiplier * target if min_multiplier is not None else np.full(len(drift), np.nan)
+        max_weight = max_multiplier * target if max_multiplier is not None else np.full(len(drift), np.nan)
+
+        # Outside the range already: only allow trades that move back toward it
+        below_min = actual < min_weight
+        above_max = ~below_min & (actual > max_weight)
+        in_range = ~below_min & ~above_max
+
+        # Sell weight change == 0 below the minimum; buy weight change == 0 above the maximum
+        sell_rows = below_min[sell_group]
+        buy_rows = above_max[buy_group]
+        model.add_rows(
+            sp.coo_matrix(
+                (np.concatenate([sell_weight[sell_rows], buy_weight[buy_rows]]),
+                 (np.concatenate([sell_group[sell_rows], buy_group[buy_rows]]), np.concatenate([sell_col[sell_rows], buy_col[buy_rows]]))),
+                shape=(len(drift), model.n_cols)
+            ).tocsr()[np.flatnonzero(~in_range)],
+            lower=0.0,
+            upper=0.0,
+            name="drift_no_trade"
+        )
+
+        # min_weight <= actual + buys - sells <= max_weight
+        classes = np.flatnonzero(in_range)
+        new_weight = sp.coo_matrix(
+            (np.concatenate([buy_weight, -sell_weight]), (np.concatenate([buy_group, sell_group]), np.concatenate([buy_col, sell_col]))),
+            shape=(len(drift), model.n_cols)
+        ).tocsr()[classes]
+        model.add_rows(
+            new_weight,
+            lower=np.nan_to_num(min_weight[classes] - actual[classes], nan=-np.inf),
+            upper=np.nan_to_num(max_weight[classes] - actual[classes], nan=np.inf),
+            name="weight_range"
+        )
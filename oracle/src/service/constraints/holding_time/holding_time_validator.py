@@ -1,4 +1,5 @@
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 import pulp
 from datetime import timedelta
@@ -87,9 +88,20 @@ class HoldingTimeValidator(BaseValidator):
         if purchase_date >= before_date.date():
             days_remaining = (self.holding_time_delta - (self.strategy.oracle.current_date - purchase_date)).days
             return False, f"Tax lot must be held for {days_remaining + 1} more days"
-            
+
         return True, None
-        
+
+    def restricted_sell_mask(self, tax_lot_ids) -> np.ndarray:
+        """Vectorized validate_sell: lots bought on or after the before date."""
+        tax_lot_ids = pd.Index(tax_lot_ids)
+        if self.holding_time_delta is None or self.holding_time_delta <= timedelta(days=0):
+            return np.zeros(len(tax_lot_ids), dtype=bool)
+
+        tax_lots = self.strategy.tax_lots.drop_duplicates('tax_lot_id')
+        purchase_dates = pd.Series(pd.to_datetime(tax_lots['date']).to_numpy(), index=tax_lots['tax_lot_id'])
+        before_date = self._get_before_date(self.strategy.oracle.current_date)
+        return (purchase_dates.reindex(tax_lot_ids).dt.date >= before_date.date()).to_numpy()
+
     def add_to_problem(
         self,
         prob: pulp.LpProblem,
@@ -116,4 +128,15 @@ class HoldingTimeValidator(BaseValidator):
                 prob += (
                     sells[tax_lot_id] == 0,
                     f"No_sell_recently_bought_{tax_lot_id}"
-                )
\ No newline at end of file
+                )
+
+    def add_to_model(self, model, columns, tax_lots: pd.DataFrame, current_date: pd.Timestamp) -> None:
+        """Add holding time constraints to a sparse model (sells of recent lots pinned to zero)."""
+        if self.holding_time_delta is None or self.holding_time_delta <= timedelta(days=0):
+            return
+
+        before_date = self._get_before_date(current_date)
+        recently_bought_lots = tax_lots.loc[
+            pd.to_datetime(tax_lots["date"]).dt.date >= before_date.date(), 'tax_lot_id'
+        ]
+        model.fix(columns.sell_cols[columns.lot_positions(recently_bought_lots)], 0.0)
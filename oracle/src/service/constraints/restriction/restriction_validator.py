@@ -1,6 +1,8 @@
 from typing import Optional, Tuple, List
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 
 from src.service.constraints.base_validator import BaseValidator
 
@@ -23,7 +25,7 @@ class RestrictionValidator(BaseValidator):
         if self.strategy.oracle.stock_restrictions is not None:
             restrictions = self.strategy.oracle.stock_restrictions
             if identifier in restrictions["identifier"].values:
-                if not restrictions.loc[identifier, 'can_buy']:
+                if not restrictions.loc[restrictions["identifier"] == identifier, 'can_buy'].iloc[0]:
                     return False, f"Security {identifier} is restricted from buying"
                     
         # Check wash sale restrictions
@@ -48,14 +50,33 @@ class RestrictionValidator(BaseValidator):
                     
         # Check wash sale restrictions
         if self.enforce_wash_sale_prevention and self.strategy.oracle.wash_sale_restrictions is not None:
-            restricted_lots = self.strategy.oracle.wash_sale_restrictions.get_restricted_lots(identifier)
-            if not restricted_lots.empty:
-                for _, lot in restricted_lots.iterrows():
-                    if lot['tax_lot_id'] == tax_lot_id:
-                        return False, f"Tax lot {tax_lot_id} is restricted due to wash sale rules"
-                
+            if tax_lot_id in self.strategy.oracle.wash_sale_restrictions.get_restricted_lot_ids(identifier):
+                return False, f"Tax lot {tax_lot_id} is restricted due to wash sale rules"
+
         return True, None
-        
+
+    def restricted_sell_mask(self, tax_lot_ids) -> np.ndarray:
+        """Vectorized validate_sell: stock can_sell flags and wash sale restricted lots."""
+        tax_lot_ids = pd.Index(tax_lot_ids)
+        tax_lots = self.strategy.tax_lots.drop_duplicates('tax_lot_id')
+        identifiers = tax_lot_ids.map(pd.Series(tax_lots['identifier'].to_numpy(), index=tax_lots['tax_lot_id']))
+        restricted = np.zeros(len(tax_lot_ids), dtype=bool)
+
+        # Stock restrictions (first row per identifier, as in validate_sell)
+        if self.strategy.oracle.stock_restrictions is not None:
+            restrictions = self.strategy.oracle.stock_restrictions.drop_duplicates('identifier')
+            can_sell = pd.Series(restrictions['can_sell'].to_numpy(), index=restrictions['identifier'])
+            restricted |= ~identifiers.map(can_sell).fillna(True).astype(bool).to_numpy()
+
+        # Wash sale restrictions
+        if self.enforce_wash_sale_prevention and self.strategy.oracle.wash_sale_restrictions is not None:
+            restricted_lots = self.strategy.oracle.wash_sale_restrictions.get_all_restricted_sells()
+            if not restricted_lots.empty:
+                restricted_pairs = pd.MultiIndex.from_arrays([restricted_lots['identifier'], restricted_lots['tax_lot_id']])
+                restricted |= pd.MultiIndex.from_arrays([identifiers, tax_lot_ids]).isin(restricted_pairs)
+
+        return restricted
+
     def add_to_problem(
         self,
         prob: pulp.LpProblem,
@@ -88,6 +109,8 @@ class RestrictionValidator(BaseValidator):
                         prob += (buys[identifier] == 0), f"wash_sale_buy_{identifier}"
                 
                 # Check sell restrictions - get all restricted lots for this identifier
+                if not wash_sale_restrictions.get_restricted_lot_ids(identifier):
+                    continue
                 restricted_lots = wash_sale_restrictions.get_restricted_lots(identifier)
                 if not restricted_lots.empty:
                     # Add binary variable to track if liquidating
@@ -106,3 +129,91 @@ class RestrictionValidator(BaseValidator):
                     for _, lot in restricted_lots.iterrows():
                         if lot['tax_lot_id'] in sells:
                             prob += (sells[lot['tax_lot_id']] == (lot["quantity"] * liquidate)), f"wash_sale_sell_{lot['tax_lot_id']}"
+
+    def add_to_model(
+        self,
+        model,
+        columns,
+        stock_restrictions: pd.DataFrame,
+        wash_sale_restrictions,
+        all_identifiers: List[str]
+    ) -> None:
+        """
+        Add stock and wash sale restrictions to a sparse model (matrix form of add_to_problem).
+
+        Pinned trades become column bounds; the wash sale liquidation choice
+        keeps its binary and rows.
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            stock_restrictions: DataFrame with can_buy / can_sell flags per identifier
+            wash_sale_restrictions: WashSaleRestrictions instance (or None)
+            all_identifiers: Identifiers to check for wash sale restrictions
+        """
+        if stock_restrictions is not None and not stock_restrictions.empty:
+            no_buy = stock_restrictions.loc[~stock_restrictions['can_buy'].astype(bool), 'identifier']
+            no_sell = stock_restrictions.loc[~stock_restrictions['can_sell'].astype(bool), 'identifier']
+            model.fix(columns.buy_cols[columns.buy_positions(no_buy)], 0.0)
+            model.fix(columns.sell_cols[columns.sell_positions(no_sell)], 0.0)
+
+        if not self.enforce_wash_sale_prevention or wash_sale_restrictions is None:
+            return
+
+        all_tax_lots = self.strategy.oracle.all_tax_lots
+        all_quantities = all_tax_lots.groupby('identifier')['quantity'].sum()
+        lot_groups = pd.Series(np.arange(len(columns.sell_cols))).groupby(columns.sell_identifiers).indices
+
+        restricted_buys = []
+        liquidations = []  # (identifier, lot positions, restricted lot positions, restricted quantities)
+        for identifier in all_identifiers:
+            if wash_sale_restrictions.is_restricted_from_buying(identifier):
+                restricted_buys.append(identifier)
+
+            if not wash_sale_restrictions.get_restricted_lot_ids(identifier):
+                continue
+            restricted_lots = wash_sale_restrictions.get_restricted_lots(identifier)
+            if not restricted_lots.empty:
+                restricted_pos = columns.sell_lot_ids.get_indexer(pd.Index(restricted_lots['tax_lot_id']))
+                in_model = restricted_pos >= 0
+                liquidations.append((
+                    identifier,
+                    lot_groups.get(identifier, np.empty(0, dtype=np.int64)),
+                    restricted_pos[in_model],
+                    restricted_lots['quantity'].to_numpy(dtype=float)[in_model]
+                ))
+
+        model.fix(columns.buy_cols[columns.buy_positions(restricted_buys)], 0.0)
+        if not liquidations:
+            return
+
+        # Liquidate flag per restricted identifier: sum(sells) >= all_quantity * liquidate
+        n = len(liquidations)
+        liquidate = model.add_binary_variables(n, name="liquidate")
+        rows, cols, vals = [], [], []
+        for k, (identifier, lot_pos, _, _) in enumerate(liquidations):
+            rows.append(np.full(len(lot_pos) + 1, k))
+            cols.append(np.append(columns.sell_cols[lot_pos], liquidate[k]))
+            vals.append(np.append(np.ones(len(lot_pos)), -all_quantities.get(identifier, 0.0)))
+        model.add_rows(
+            sp.coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, model.n_cols)),
+            lower=0.0,
+            name="wash_sale_liquidate"
+        )
+
+        # Restricted lots are sold in full or not at all: sell == quantity * liquidate
+        flag = np.concatenate([np.full(len(pos), liquidate[k]) for k, (_, _, pos, _) in enumerate(liquidations)])
+        lot_cols = columns.sell_cols[np.concatenate([pos for _, _, pos, _ in liquidations]).astype(np.int64)]
+        quantities = np.concatenate([qty for _, _, _, qty in liquidations])
+        m = len(lot_cols)
+        if m:
+            index = np.arange(m)
+            model.add_rows(
+                sp.coo_matrix(
+                    (np.concatenate([np.ones(m), -quantities]), (np.concatenate([index, index]), np.concatenate([lot_cols, flag]))),
+                    shape=(m, model.n_cols)
+                ),
+                lower=0.0,
+                upper=0.0,
+                name="wash_sale_sell"
+            )
@@ -1,6 +1,7 @@
 import pandas as pd
+from bisect import bisect_left
 from datetime import date, timedelta
-from typing import Optional, List, Dict, Set, Literal
+from typing import Optional, List, Dict, Set, Literal, Iterable
 from enum import Enum
 
 class WashSaleReason(str, Enum):
@@ -8,6 +9,42 @@ class WashSaleReason(str, Enum):
     BUY_SELL_BUY = "buy-sell-buy"  # Bought, sold at loss, then bought again
     BUY_BUY_SELL = "buy-buy-sell"  # Bought, bought more, then sold first lot at loss
 
+class _ExpiryIndex:
+    """
+    Restriction end dates keyed by identifier or tax lot.
+
+    Point lookups are a dict access; the keys still restricted on a date are
+    found by a binary search over the end dates, which are sorted lazily
+    after updates.
+    """
+
+    def __init__(self):
+        self.ends: Dict[str, date] = {}
+        self._sorted_keys: Optional[List[str]] = None
+        self._sorted_ends: Optional[List[date]] = None
+
+    def update(self, keys: Iterable[str], ends: Iterable[date]) -> None:
+        """Add restrictions, keeping the later end date for keys already present."""
+        for key, end in zip(keys, ends):
+            current = self.ends.get(key)
+            if current is None or end > current:
+                self.ends[key] = end
+        self._sorted_keys = None
+
+    def is_active(self, key: str, as_of: date) -> bool:
+        """Whether key is restricted on as_of (end dates are inclusive)."""
+        end = self.ends.get(key)
+        return end is not None and as_of <= end
+
+    def active(self, as_of: date) -> List[str]:
+        """All keys restricted on as_of."""
+        if self._sorted_keys is None:
+            ordered = sorted(self.ends.items(), key=lambda item: item[1])
+            self._sorted_keys = [key for key, _ in ordered]
+            self._sorted_ends = [end for _, end in ordered]
+        return self._sorted_keys[bisect_left(self._sorted_ends, as_of):]
+
+
 class WashSaleRestrictions:
     """
     Class to handle wash sale restrictions for tax-aware portfolio optimization.
@@ -18,6 +55,11 @@ class WashSaleRestrictions:
     The class tracks two types of restrictions:
     1. Buy restrictions: Identifiers that cannot be bought due to wash sale rules
     2. Sell restrictions: Specific tax lots that cannot be sold due to wash sale rules
+    
+    Both are kept as DataFrames and indexed by identifier / tax_lot_id, so the
+    per-variable checks made while building constraints are dict lookups. One
+    instance is shared by all strategies of an Oracle; closed lots appended
+    later only extend the buy restrictions (see add_closed_lots).
     """
     
     def __init__(
@@ -67,6 +109,12 @@ class WashSaleRestrictions:
             'price'  # current price of the security
         ])
         
+        # Lookup indexes over the two DataFrames
+        self._buy_index = _ExpiryIndex()
+        self._sell_index = _ExpiryIndex()
+        self._restricted_lots_by_identifier: Dict[str, List[str]] = {}
+        self._sell_rows_by_identifier: Dict[str, List[int]] = {}
+        
         if recently_closed_lots is None:
             recently_closed_lots = pd.DataFrame(columns=[
                 'identifier', 'quantity', 'cost_basis', 
@@ -203,26 +251,69 @@ class WashSaleRestrictions:
             closed_lots: DataFrame with closed tax lots
             all_tax_lots: DataFrame containing all current tax lots across all strategies
         """
+        self._validate_closed_lots(closed_lots)
+        
+        # Identify securities that cannot be bought (due to recent loss sales)
+        self._add_buy_restrictions(self._identify_buy_restrictions(closed_lots))
+        
+        # Identify tax lots that cannot be sold (due to recent purchases)
+        sell_restrictions = self._identify_sell_restrictions(all_tax_lots, closed_lots)
+        self.restricted_from_selling = pd.concat(
+            [self.restricted_from_selling, sell_restrictions],
+            ignore_index=True
+        ).drop_duplicates()
+        self._index_sell_restrictions()
+    
+    @staticmethod
+    def _validate_closed_lots(closed_lots: pd.DataFrame) -> None:
         required_columns = {
             'identifier', 'quantity', 'cost_basis', 'date_acquired',
             'date_sold', 'proceeds', 'realized_gain'
         }
         if not set(closed_lots.columns).issuperset(required_columns):
             raise ValueError(f"Closed lots DataFrame missing required columns: {required_columns}")
-        
-        # Identify securities that cannot be bought (due to recent loss sales)
-        buy_restrictions = self._identify_buy_restrictions(closed_lots)
-        self.restricted_from_buying = pd.concat(
+    
+    def _add_buy_restrictions(self, buy_restrictions: pd.DataFrame) -> None:
+        """Merge buy restrictions in, keeping the latest end date per identifier."""
+        if buy_restrictions.empty:
+            return
+        self._buy_index.update(buy_restrictions['identifier'], buy_restrictions['restriction_ends_after'])
+        restricted_from_buying = pd.concat(
             [self.restricted_from_buying, buy_restrictions],
             ignore_index=True
         ).drop_duplicates()
+        restricted_from_buying = restricted_from_buying[
+            restricted_from_buying['restriction_ends_after'].to_numpy()
+            == restricted_from_buying['identifier'].map(self._buy_index.ends).to_numpy()
+        ].drop_duplicates(subset='identifier')
+        self.restricted_from_buying = restricted_from_buying.sort_values(
+            by='identifier', ascending=False).reset_index(drop=True)
+    
+    def _index_sell_restrictions(self) -> None:
+        """Index restricted_from_selling by tax_lot_id and identifier."""
+        restricted = self.restricted_from_selling
+        self._sell_index = _ExpiryIndex()
+        self._sell_index.update(restricted['tax_lot_id'], restricted['restriction_ends_after'])
+        self._restricted_lots_by_identifier = {}
+        self._sell_rows_by_identifier = {}
+        for row, (identifier, tax_lot_id) in enumerate(zip(restricted['identifier'], restricted['tax_lot_id'])):
+            self._sell_rows_by_identifier.setdefault(identifier, []).append(row)
+            lot_ids = self._restricted_lots_by_identifier.setdefault(identifier, [])
+            if tax_lot_id not in lot_ids:
+                lot_ids.append(tax_lot_id)
+    
+    def add_closed_lots(self, closed_lots: pd.DataFrame) -> None:
+        """
+        Add newly closed lots to existing restrictions.
         
-        # Identify tax lots that cannot be sold (due to recent purchases)
-        sell_restrictions = self._identify_sell_restrictions(all_tax_lots, closed_lots)
-        self.restricted_from_selling = pd.concat(
-            [self.restricted_from_selling, sell_restrictions],
-            ignore_index=True
-        ).drop_duplicates()
+        Only the new lots are processed: sell restrictions depend on the
+        current tax lots alone, so closed lots can only add buy restrictions.
+        
+        Args:
+            closed_lots: DataFrame of closed lots with the columns of recently_closed_lots
+        """
+        self._validate_closed_lots(closed_lots)
+        self._add_buy_restrictions(self._identify_buy_restrictions(closed_lots))
     
     def is_restricted_from_buying(self, identifier: str) -> bool:
         """
@@ -234,14 +325,7 @@ class WashSaleRestrictions:
         Returns:
             True if the security cannot be bought, False otherwise
         """
-        # Check if identifier exists and restriction hasn't ended
-        if identifier not in self.restricted_from_buying['identifier'].values:
-            return False
-            
-        restriction = self.restricted_from_buying[
-            self.restricted_from_buying['identifier'] == identifier
-        ].iloc[0]
-        return self.current_date <= restriction['restriction_ends_after']
+        return self._buy_index.is_active(identifier, self.current_date)
     
     def get_buy_restriction_reason(self, identifier: str) -> Optional[WashSaleReason]:
         """
@@ -256,11 +340,8 @@ class WashSaleRestrictions:
         if not self.is_restricted_from_buying(identifier):
             return None
             
-        restriction = self.restricted_from_buying[
-            (self.restricted_from_buying['identifier'] == identifier) &
-            (self.restricted_from_buying['restriction_ends_after'] >= self.current_date)
-        ].iloc[0]
-        return restriction['reason']
+        # Loss sales are the only source of buy restrictions
+        return WashSaleReason.BUY_SELL_BUY
     
     def is_lot_restricted_from_selling(self, identifier: str, tax_lot_id: str) -> bool:
         """
@@ -273,16 +354,26 @@ class WashSaleRestrictions:
         Returns:
             True if the lot cannot be sold, False otherwise
         """
-        matching_lots = self.restricted_from_selling[
-            (self.restricted_from_selling['identifier'] == identifier) &
-            (self.restricted_from_selling['tax_lot_id'] == tax_lot_id)
-        ]
-        
-        if matching_lots.empty:
+        if tax_lot_id not in self._restricted_lots_by_identifier.get(identifier, ()):
             return False
             
         # Check if the restriction is still active (current_date is within the restriction period)
-        return self.current_date <= matching_lots.iloc[0]['restriction_ends_after']
+        return self._sell_index.is_active(tax_lot_id, self.current_date)
+    
+    def get_restricted_lot_ids(self, identifier: str) -> Set[str]:
+        """
+        Get the tax_lot_ids of a security's lots that are restricted from selling.
+        
+        Args:
+            identifier: Security identifier
+            
+        Returns:
+            Set of tax_lot_ids whose restriction is still active
+        """
+        return {
+            tax_lot_id for tax_lot_id in self._restricted_lots_by_identifier.get(identifier, ())
+            if self._sell_index.is_active(tax_lot_id, self.current_date)
+        }
     
     def get_restricted_lots(self, identifier: str) -> pd.DataFrame:
         """
@@ -296,10 +387,8 @@ class WashSaleRestrictions:
             DataFrame containing all restricted lots for the security where
             the restriction is still active
         """
-        return self.restricted_from_selling[
-            (self.restricted_from_selling['identifier'] == identifier) &
-            (self.restricted_from_selling['restriction_ends_after'] >= self.current_date)
-        ].copy()
+        lots = self.restricted_from_selling.iloc[self._sell_rows_by_identifier.get(identifier, [])]
+        return lots[lots['restriction_ends_after'] >= self.current_date].copy()
 
     def get_all_restricted_buys(self) -> Set[str]:
         """
@@ -308,12 +397,7 @@ class WashSaleRestrictions:
         Returns:
             Set of identifiers that cannot be bought due to active wash sale restrictions
         """
-        # Get identifiers with active buy restrictions
-        active_buy_restrictions = self.restricted_from_buying[
-            self.restricted_from_buying['restriction_ends_after'] >= self.current_date
-        ]['identifier'].unique()
-        
-        return set(sorted(active_buy_restrictions))
+        return set(self._buy_index.active(self.current_date))
     
     def get_all_restricted_sells(self) -> pd.DataFrame:
         """
@@ -337,15 +421,8 @@ class WashSaleRestrictions:
             Set of identifiers that are either restricted from buying or have
             lots restricted from selling
         """
-        # Get active buy restrictions
-        active_buy_restrictions = self.restricted_from_buying[
-            self.restricted_from_buying['restriction_ends_after'] >= self.current_date
-        ]['identifier'].unique()
-        
-        # Get active sell restrictions
-        active_sell_restrictions = self.restricted_from_selling[
-            self.restricted_from_selling['restriction_ends_after'] >= self.current_date
-        ]['identifier'].unique()
-        
-        # Combine both sets of identifiers
-        return set(active_buy_restrictions) | set(active_sell_restrictions)
+        active_sell_restrictions = {
+            identifier for identifier, tax_lot_ids in self._restricted_lots_by_identifier.items()
+            if any(self._sell_index.is_active(tax_lot_id, self.current_date) for tax_lot_id in tax_lot_ids)
+        }
+        return self.get_all_restricted_buys() | active_sell_restrictions
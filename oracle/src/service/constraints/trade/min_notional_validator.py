@@ -1,7 +1,9 @@
 from collections import defaultdict
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 
 from src.service.constraints.base_validator import BaseValidator
 
@@ -92,3 +94,57 @@ class MinNotionalValidator(BaseValidator):
             # If trade_happens is 0, sell must be 0
             prob += sell_sum <= trade_happens * max_sell, f"Sell_Upper_{identifier}"
             prob += sell_sum >= (self.min_notional / price) * trade_happens, f"Sell_Min_Notional_{identifier}"
+
+    def add_to_model(self, model, columns, tax_lots: pd.DataFrame) -> None:
+        """
+        Add minimum notional constraints to a sparse model (matrix form of add_to_problem).
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            tax_lots: DataFrame with tax lot information
+        """
+        if self.min_notional <= 0:
+            return
+
+        # Buys: buy <= 1e6 * happens and buy >= (min_notional / price) * happens
+        n_buys = len(columns.buy_cols)
+        if n_buys:
+            happens = model.add_binary_variables(n_buys, name="buy_happens")
+            index = np.arange(n_buys)
+            rows = np.concatenate([index, index])
+            cols = np.concatenate([columns.buy_cols, happens])
+            model.add_rows(
+                sp.coo_matrix((np.concatenate([np.ones(n_buys), np.full(n_buys, -1e6)]), (rows, cols)), shape=(n_buys, model.n_cols)),
+                upper=0.0,
+                name="Buy_Upper"
+            )
+            model.add_rows(
+                sp.coo_matrix((np.concatenate([np.ones(n_buys), -self.min_notional / columns.buy_prices]), (rows, cols)), shape=(n_buys, model.n_cols)),
+                lower=0.0,
+                name="Buy_Min_Notional"
+            )
+
+        # Sells, per identifier: sum(sells) <= max_sell * happens and >= (min_notional / price) * happens
+        if len(columns.sell_cols):
+            group, identifiers = pd.factorize(columns.sell_identifiers)
+            n_groups = len(identifiers)
+            max_sell = tax_lots.groupby('identifier')['quantity'].sum().reindex(identifiers).to_numpy(dtype=float)
+            first_lot = pd.Series(np.arange(len(group))).groupby(group).first().to_numpy()
+            price = columns.sell_prices[first_lot]
+
+            happens = model.add_binary_variables(n_groups, name="sell_happens")
+            index = np.arange(n_groups)
+            rows = np.concatenate([group, index])
+            cols = np.concatenate([columns.sell_cols, happens])
+            ones = np.ones(len(group))
+            model.add_rows(
+                sp.coo_matrix((np.concatenate([ones, -max_sell]), (rows, cols)), shape=(n_groups, model.n_cols)),
+                upper=0.0,
+                name="Sell_Upper"
+            )
+            model.add_rows(
+                sp.coo_matrix((np.concatenate([ones, -self.min_notional / price]), (rows, cols)), shape=(n_groups, model.n_cols)),
+                lower=0.0,
+                name="Sell_Min_Notional"
+            )
@@ -1,6 +1,8 @@
 from typing import Optional, Tuple, List
+import numpy as np
 import pandas as pd
 import pulp
+import scipy.sparse as sp
 
 from src.service.constraints.base_validator import BaseValidator
 
@@ -52,4 +54,52 @@ class NoSimultaneousTradeValidator(BaseValidator):
             
             # If is_buying is 1, we cannot sell (total_sells must be 0)
             # If is_buying is 0, we can sell any amount
-            prob += total_sells <= M * (1 - is_buying), f"No_Simultaneous_{identifier}" 
\ No newline at end of file
+            prob += total_sells <= M * (1 - is_buying), f"No_Simultaneous_{identifier}"
+
+    def add_to_model(self, model, columns, all_identifiers: List[str]) -> None:
+        """
+        Add no simultaneous buy/sell constraints to a sparse model (matrix form of add_to_problem).
+
+        Args:
+            model: SparseLinearModel
+            columns: TradeColumns of the model
+            all_identifiers: Identifiers to consider
+        """
+        M = 1e6  # A large number that's bigger than any reasonable trade
+
+        # Identifiers with both a buy variable and at least one lot
+        held = pd.Index(pd.unique(columns.sell_identifiers))
+        identifiers = [identifier for identifier in all_identifiers if identifier in held]
+        buy_pos = columns.buy_identifiers.get_indexer(pd.Index(identifiers))
+        identifiers = [identifier for identifier, pos in zip(identifiers, buy_pos) if pos >= 0]
+        buy_pos = buy_pos[buy_pos >= 0]
+        n = len(identifiers)
+        if n == 0:
+            return
+
+        is_buying = model.add_binary_variables(n, name="is_buying")
+        index = np.arange(n)
+
+        # buy <= M * is_buying
+        model.add_rows(
+            sp.coo_matrix(
+                (np.concatenate([np.ones(n), np.full(n, -M)]),
+                 (np.concatenate([index, index]), np.concatenate([columns.buy_cols[buy_pos], is_buying]))),
+                shape=(n, model.n_cols)
+            ),
+            upper=0.0,
+            name="Buy_Indicator"
+        )
+
+        # sum(sells) <= M * (1 - is_buying)
+        group = pd.Index(identifiers).get_indexer(pd.Index(columns.sell_identifiers))
+        has_group = group >= 0
+        model.add_rows(
+            sp.coo_matrix(
+                (np.concatenate([np.ones(int(has_group.sum())), np.full(n, M)]),
+                 (np.concatenate([group[has_group], index]), np.concatenate([columns.sell_cols[has_group], is_buying]))),
+                shape=(n, model.n_cols)
+            ),
+            upper=M,
+            name="No_Simultaneous"
+        )
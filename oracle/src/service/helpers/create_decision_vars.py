@@ -1,8 +1,11 @@
 import pulp
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Any, Optional, Sequence
 
 from src.service.helpers.constants import logger
+from src.solvers.sparse_model import SparseLinearModel, ModelVariable
 
 def _create_buy_dataframe(
     buys: Dict[str, pulp.LpVariable],
@@ -128,3 +131,142 @@ def create_decision_variables(
     sell_df = _create_sell_dataframe(sells, gain_loss, prices)
     
     return buys, sells, buy_df, sell_df
+
+
+@dataclass
+class TradeColumns:
+    """
+    Column layout of the buy/sell decision variables in a SparseLinearModel.
+
+    Buy arrays are aligned with buy_identifiers and sell arrays with the rows of
+    the gain/loss report (one column per tax lot), so objective and constraint
+    builders can work on whole arrays instead of per-variable lookups.
+    """
+    buy_identifiers: pd.Index
+    buy_cols: np.ndarray
+    buy_prices: np.ndarray
+    sell_lot_ids: pd.Index
+    sell_cols: np.ndarray
+    sell_identifiers: np.ndarray
+    sell_prices: np.ndarray          # price from the prices table
+    sell_current_prices: np.ndarray  # current_price from the gain/loss report
+    sell_quantities: np.ndarray
+    buys: Dict[str, ModelVariable]
+    sells: Dict[str, ModelVariable]
+
+    @property
+    def trade_cols(self) -> np.ndarray:
+        return np.concatenate([self.buy_cols, self.sell_cols])
+
+    def buy_positions(self, identifiers: Sequence[str]) -> np.ndarray:
+        """Positions in the buy arrays of the identifiers that have a buy variable"""
+        positions = self.buy_identifiers.get_indexer(pd.Index(identifiers))
+        return positions[positions >= 0]
+
+    def lot_positions(self, tax_lot_ids: Sequence[str]) -> np.ndarray:
+        """Positions in the sell arrays of the tax lots that have a sell variable"""
+        positions = self.sell_lot_ids.get_indexer(pd.Index(tax_lot_ids))
+        return positions[positions >= 0]
+
+    def sell_positions(self, identifiers: Sequence[str]) -> np.ndarray:
+        """Positions in the sell arrays of all lots of the given identifiers"""
+        return np.flatnonzero(pd.Index(self.sell_identifiers).isin(list(identifiers)))
+
+    def group_trade_terms(
+        self,
+        groups: Sequence[Sequence[str]],
+        total_value: float
+    ) -> Tuple[Tuple[np.ndarray, ...], Tuple[np.ndarray, ...]]:
+        """
+        Weight change of each trade variable per group of identifiers (e.g. asset classes).
+
+        Args:
+            groups: Identifier lists, one per group
+            total_value: Total portfolio value
+
+        Returns:
+            (buy_terms, sell_terms), each a tuple of aligned arrays
+            (group, column, weight_per_share, rank) where rank is the position
+            of the identifier within its group's list
+        """
+        members = pd.DataFrame({
+            'group': np.repeat(np.arange(len(groups)), [len(g) for g in groups]),
+            'identifier': [identifier for group in groups for identifier in group],
+            'rank': [rank for group in groups for rank in range(len(group))]
+        })
+        scale = 1.0 / total_value if total_value > 0 else 0.0
+
+        buy_pos = self.buy_identifiers.get_indexer(pd.Index(members['identifier']))
+        has_buy = buy_pos >= 0
+        buy_pos = buy_pos[has_buy]
+        buy_terms = (
+            members['group'].to_numpy()[has_buy],
+            self.buy_cols[buy_pos],
+            self.buy_prices[buy_pos] * scale,
+            members['rank'].to_numpy()[has_buy]
+        )
+
+        lots = pd.DataFrame({'identifier': self.sell_identifiers, 'position': np.arange(len(self.sell_cols))})
+        sell_members = members.merge(lots, on='identifier', how='inner')
+        sell_pos = sell_members['position'].to_numpy()
+        sell_terms = (
+            sell_members['group'].to_numpy(),
+            self.sell_cols[sell_pos],
+            self.sell_prices[sell_pos] * scale,
+            sell_members['rank'].to_numpy()
+        )
+        return buy_terms, sell_terms
+
+
+def create_model_variables(
+    model: SparseLinearModel,
+    buy_identifiers: list[str],
+    gain_loss: pd.DataFrame,
+    prices: pd.DataFrame,
+    debug: bool = False
+) -> TradeColumns:
+    """
+    Add buy and sell columns to a sparse model.
+
+    Same variables as create_decision_variables (one non-negative buy per
+    identifier, one sell per tax lot bounded by its quantity), created in two
+    vectorized blocks.
+
+    Args:
+        model: Sparse model to add the columns to
+        buy_identifiers: Identifiers that can be bought
+        gain_loss: DataFrame with gain/loss report
+        prices: DataFrame with current prices
+        debug: Enable debug logging
+
+    Returns:
+        TradeColumns describing the new columns
+    """
+    price_lookup = prices.drop_duplicates('identifier').set_index('identifier')['price']
+
+    buy_index = pd.Index(list(buy_identifiers))
+    buy_cols = model.add_variables(len(buy_index), lower=0.0, name='buy')
+
+    sell_index = pd.Index(gain_loss['tax_lot_id'])
+    quantities = gain_loss['quantity'].to_numpy(dtype=float)
+    sell_cols = model.add_variables(len(sell_index), lower=0.0, upper=quantities, name='sell')
+    sell_identifiers = gain_loss['identifier'].to_numpy()
+
+    columns = TradeColumns(
+        buy_identifiers=buy_index,
+        buy_cols=buy_cols,
+        buy_prices=price_lookup.reindex(buy_index).to_numpy(dtype=float),
+        sell_lot_ids=sell_index,
+        sell_cols=sell_cols,
+        sell_identifiers=sell_identifiers,
+        sell_prices=price_lookup.reindex(sell_identifiers).to_numpy(dtype=float),
+        sell_current_prices=gain_loss['current_price'].to_numpy(dtype=float),
+        sell_quantities=quantities,
+        buys={identifier: ModelVariable(model, col, f"buy_{identifier}") for identifier, col in zip(buy_index, buy_cols)},
+        sells={tax_lot_id: ModelVariable(model, col, f"sell_{tax_lot_id}") for tax_lot_id, col in zip(sell_index, sell_cols)}
+    )
+
+    if debug:
+        logger.info(f"Created {len(buy_cols)} buy columns and {len(sell_cols)} sell columns")
+
+    return columns
@@ -1,10 +1,12 @@
 import pulp
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from typing import Dict, Tuple, List
 import logging
 
 from src.service.helpers.constants import logger
+from src.solvers.sparse_model import SparseLinearModel, LinearExpression
 
 def create_piecewise_linear_variables(
     prob: pulp.LpProblem,
@@ -156,4 +158,86 @@ def create_piecewise_deviation_variable(
     )
     
     # Total impact is sum of positive and negative impacts
-    return pos_impact + neg_impact 
\ No newline at end of file
+    return pos_impact + neg_impact
+
+
+def add_piecewise_deviation_rows(
+    model: SparseLinearModel,
+    deviation_matrix: sp.spmatrix,
+    deviation_constants: np.ndarray,
+    variable_name: str,
+    normalization: float = 1.0
+) -> LinearExpression:
+    """
+    Matrix form of create_piecewise_deviation_variable for a batch of deviations.
+
+    Row k of the deviation is deviation_matrix[k] @ x + deviation_constants[k].
+    Each deviation gets the same split (pos_dev - neg_dev), lambda and
+    right-excess columns and the same convexity/conversion rows as the PuLP
+    version, added in a few vectorized blocks.
+
+    Args:
+        model: Sparse model to add columns and rows to
+        deviation_matrix: (K x n) coefficients of the deviations over model columns
+        deviation_constants: (K,) constant part of the deviations
+        variable_name: Base name for the new columns and rows
+        normalization: Normalization factor to apply to the output
+
+    Returns:
+        Total approximated impact of all K deviations
+    """
+    deviation_constants = np.asarray(deviation_constants, dtype=float)
+    k = len(deviation_constants)
+    if k == 0:
+        return LinearExpression()
+
+    x_points, y_points = get_piecewise_breakpoints()
+    breakpoints = np.asarray(x_points)
+    values = np.asarray(y_points) * normalization
+    n = len(breakpoints)
+    index = np.arange(k)
+
+    pos_dev = model.add_variables(k, lower=0.0, name=f"pos_dev_{variable_name}")
+    neg_dev = model.add_variables(k, lower=0.0, name=f"neg_dev_{variable_name}")
+
+    # deviation == pos_dev - neg_dev  ->  D x - pos + neg == -c
+    split = sp.coo_matrix(deviation_matrix)
+    rows = np.concatenate([split.row, index, index])
+    cols = np.concatenate([split.col, pos_dev, neg_dev])
+    vals = np.concatenate([split.data, -np.ones(k), np.ones(k)])
+    model.add_rows(
+        sp.coo_matrix((vals, (rows, cols)), shape=(k, model.n_cols)),
+        lower=-deviation_constants,
+        upper=-deviation_constants,
+        name=f"dev_split_{variable_name}"
+    )
+
+    objective_cols = []
+    objective_vals = []
+    for side, side_cols in (('pos', pos_dev), ('neg', neg_dev)):
+        lambdas = model.add_variables(k * n, lower=0.0, upper=1.0, name=f"lambda_{side}_{variable_name}").reshape(k, n)
+        excess = model.add_variables(k, lower=0.0, name=f"right_excess_{side}_{variable_name}")
+
+        # Convex combination: sum(lambda) <= 1
+        model.add_rows(
+            sp.coo_matrix((np.ones(k * n), (np.repeat(index, n), lambdas.ravel())), shape=(k, model.n_cols)),
+            upper=1.0,
+            name=f"sum_lambda_{side}_{variable_name}"
+        )
+
+        # sum(b * lambda) + b_last * excess == side deviation
+        rows = np.concatenate([np.repeat(index, n), index, index])
+        cols = np.concatenate([lambdas.ravel(), excess, side_cols])
+        vals = np.concatenate([np.tile(breakpoints, k), np.full(k, breakpoints[-1]), -np.ones(k)])
+        model.add_rows(
+            sp.coo_matrix((vals, (rows, cols)), shape=(k, model.n_cols)),
+            lower=0.0,
+            upper=0.0,
+            name=f"x_conv_{side}_{variable_name}"
+        )
+
+        # y = sum(v * lambda) + v_last * excess (linear extension past the last breakpoint)
+        objective_cols.extend([lambdas.ravel(), excess])
+        objective_vals.extend([np.tile(values, k), np.full(k, values[-1])])
+
+    return LinearExpression(np.concatenate(objective_cols), np.concatenate(objective_vals))
@@ -1,5 +1,5 @@
 import pandas as pd
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 from src.service.types import OracleStrategy
 from src.service.helpers.enums import OracleOptimizationType
 import time
@@ -207,6 +207,11 @@ def _generate_explanation(
 
     return " ".join(explanation_parts)
 
+def _solver_stats(strategy: OracleStrategy) -> List[Dict[str, Any]]:
+    """Per-solve statistics (backend, nodes, gap, wall time) of the strategy's last run"""
+    return [stats.to_dict() for stats in getattr(strategy, 'solver_stats', None) or []]
+
+
 def generate_trade_summary_from_strategies(
     pre_strategy: OracleStrategy,
     is_2nd_buy_only_optimization: bool,
@@ -263,7 +268,8 @@ def generate_trade_summary_from_strategies(
             'optimization_info': {
                 'before_optimization': before_optimization,
                 'after_optimization': after_optimization,
-                'component_improvements': {}
+                'component_improvements': {},
+                'solver_stats': _solver_stats(pre_strategy)
             },
             'explanation': explanation
         }
@@ -415,7 +421,8 @@ def generate_trade_summary_from_strategies(
         'optimization_info': {
             'before_optimization': before_optimization,
             'after_optimization': after_optimization,
-            'component_improvements': component_improvements
+            'component_improvements': component_improvements,
+            'solver_stats': _solver_stats(pre_strategy)
         },
         'explanation': explanation
     }
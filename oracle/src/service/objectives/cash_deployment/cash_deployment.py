@@ -1,8 +1,11 @@
 import pulp
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from typing import Dict
 from src.service.helpers.constants import CASH_CUSIP_ID
 from src.service.helpers.constants import logger
+from src.solvers.sparse_model import SparseLinearModel, LinearExpression
 
 def calculate_cash_deployment_objective(
     prob: pulp.LpProblem,
@@ -83,6 +86,61 @@ def calculate_cash_deployment_objective(
     return pulp.lpSum(cash_terms)
 
 
+
+def calculate_cash_deployment_objective_sparse(
+    model: SparseLinearModel,
+    columns,
+    drift: pd.DataFrame,
+    total_value: float,
+    cash_normalization: float,
+    debug: bool = True,
+) -> LinearExpression:
+    """
+    Matrix form of calculate_cash_deployment_objective.
+
+    Args:
+        model: Sparse model to add the excess cash column and row to
+        columns: TradeColumns of the sparse model
+        drift: DataFrame with drift report
+        total_value: Total portfolio value
+        cash_normalization: Normalization factor for cash penalty
+        debug: Enable debug logging
+
+    Returns:
+        The cash penalty expression
+    """
+    cash_row = drift[drift['asset_class'] == CASH_CUSIP_ID]
+    if cash_row.empty:
+        if debug:
+            logger.warning("CASH_CUSIP_ID not found in drift report for cash penalty calculation.")
+        return LinearExpression()
+
+    cash_target = cash_row['target_weight'].iloc[0]
+    current_cash = cash_row['actual_weight'].iloc[0]
+    initial_excess_cash = max(0, current_cash - cash_target)
+
+    # new_cash_weight - target <= excess_cash, with
+    # new_cash_weight = current_cash + (sell proceeds - non-cash buy cost) / total_value
+    excess_cash = model.add_variables(1, lower=0.0, name="excess_cash")
+    non_cash = columns.buy_identifiers != CASH_CUSIP_ID
+    cols = np.concatenate([columns.buy_cols[non_cash], columns.sell_cols, excess_cash])
+    vals = np.concatenate([
+        -columns.buy_prices[non_cash] / total_value,
+        columns.sell_prices / total_value,
+        [-1.0]
+    ])
+    model.add_rows(
+        sp.coo_matrix((vals, (np.zeros(len(cols), dtype=np.int64), cols)), shape=(1, model.n_cols)),
+        upper=cash_target - current_cash,
+        name="cash_excess_constr"
+    )
+
+    if debug:
+        logger.info(f"Added sparse cash deployment component, initial excess cash: {initial_excess_cash:.4%}")
+
+    return LinearExpression(excess_cash, [cash_normalization], -initial_excess_cash * cash_normalization)
+
+
 def calculate_max_withdrawal_objective(
     self,
     prob: pulp.LpProblem,
@@ -1,10 +1,13 @@
 import pulp
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import time
 from typing import Dict, List
 from src.service.helpers.constants import CASH_CUSIP_ID
 from src.service.helpers.constants import logger
-from src.service.helpers.piecewise_linear import create_piecewise_deviation_variable
+from src.service.helpers.piecewise_linear import create_piecewise_deviation_variable, add_piecewise_deviation_rows
+from src.solvers.sparse_model import SparseLinearModel, LinearExpression
 from src.service.reports.drift_report import PositionStatus
 
 def get_buy_weight_change(
@@ -396,4 +399,70 @@ def calculate_drift_impact_vectorized(
     if debug:
         logger.info(f"\nTotal drift impact terms calculated: {len(drift_impacts)}")
     
-    return total_drift
\ No newline at end of file
+    return total_drift
+
+
+def calculate_drift_impact_sparse(
+    model: SparseLinearModel,
+    columns,
+    drift: pd.DataFrame,
+    total_value: float,
+    absolute_drift_normalization: float = 1.0,
+    rank_penalty_factor: float = 0.0,
+    debug: bool = True
+) -> LinearExpression:
+    """
+    Matrix form of calculate_drift_impact_vectorized (piecewise deviation).
+
+    All asset class deviations are assembled as one sparse (classes x columns)
+    matrix and passed to the piecewise builder in a single batch.
+
+    Args:
+        model: Sparse model to add columns and rows to
+        columns: TradeColumns of the sparse model
+        drift: DataFrame with drift report containing asset class groupings
+        total_value: Total portfolio value
+        absolute_drift_normalization: Normalization factor for absolute drift
+        rank_penalty_factor: Factor to penalize non-primary securities
+        debug: Enable debug logging
+
+    Returns:
+        Combined drift impact expression
+    """
+    drift = drift[drift['asset_class'] != CASH_CUSIP_ID]
+    if debug:
+        logger.info("Calculating Sparse Drift Impact ===")
+        logger.info(f"Total portfolio value: ${total_value:,.2f}")
+        logger.info(f"Asset classes: {len(drift)}, rank penalty factor: {rank_penalty_factor}")
+
+    (buy_group, buy_col, buy_weight, buy_rank), (sell_group, sell_col, sell_weight, sell_rank) = \
+        columns.group_trade_terms(list(drift['identifiers']), total_value)
+
+    # new_weight - target = actual - target + buy weight changes - sell weight changes
+    deviation_matrix = sp.coo_matrix(
+        (np.concatenate([buy_weight, -sell_weight]), (np.concatenate([buy_group, sell_group]), np.concatenate([buy_col, sell_col]))),
+        shape=(len(drift), model.n_cols)
+    )
+    deviation_constants = drift['actual_weight'].to_numpy(dtype=float) - drift['target_weight'].to_numpy(dtype=float)
+
+    drift_impact = add_piecewise_deviation_rows(
+        model=model,
+        deviation_matrix=deviation_matrix,
+        deviation_constants=deviation_constants,
+        variable_name="absolute_drift",
+        normalization=absolute_drift_normalization
+    )
+
+    # Penalize buying (and reward selling) non-primary securities by their rank
+    if rank_penalty_factor > 0:
+        penalized_buys = buy_rank > 0
+        penalized_sells = sell_rank > 0
+        drift_impact = drift_impact + LinearExpression(
+            np.concatenate([buy_col[penalized_buys], sell_col[penalized_sells]]),
+            rank_penalty_factor * np.concatenate([
+                buy_rank[penalized_buys] * buy_weight[penalized_buys],
+                -sell_rank[penalized_sells] * sell_weight[penalized_sells]
+            ])
+        )
+
+    return drift_impact
@@ -2,10 +2,12 @@ import time
 import pulp
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from typing import Dict, Tuple
 from src.service.helpers.constants import CASH_CUSIP_ID
 from src.service.helpers.constants import logger
-from src.service.helpers.piecewise_linear import create_piecewise_deviation_variable
+from src.service.helpers.piecewise_linear import create_piecewise_deviation_variable, add_piecewise_deviation_rows
+from src.solvers.sparse_model import SparseLinearModel, LinearExpression
 
 def calculate_factor_model_impact_vectorized(
     prob: pulp.LpProblem,
@@ -156,3 +158,66 @@ def calculate_factor_model_impact_vectorized(
         logger.info(f"\nTotal factor impact terms calculated: {len(factor_impacts)}")
     
     return total_factor_impact
+
+
+def calculate_factor_model_impact_sparse(
+    model: SparseLinearModel,
+    columns,
+    total_value: float,
+    factor_model: pd.DataFrame,
+    target_factors: pd.DataFrame,
+    actual_factors: pd.DataFrame,
+    factor_normalization: float,
+    debug: bool = False
+) -> LinearExpression:
+    """
+    Matrix form of calculate_factor_model_impact_vectorized (piecewise deviation).
+
+    The exposure change of factor f is (exposures[:, f] * price / total_value) @ trades,
+    so the (factors x columns) deviation matrix is built from two dense blocks.
+    Securities missing from the factor model contribute no exposure.
+
+    Args:
+        model: Sparse model to add columns and rows to
+        columns: TradeColumns of the sparse model
+        total_value: Total portfolio value
+        factor_model: DataFrame with factor exposures for each security
+        target_factors: DataFrame with target factor exposures
+        actual_factors: DataFrame with actual factor exposures
+        factor_normalization: Normalization factor for factor impact
+        debug: Enable debug logging
+
+    Returns:
+        The total factor model impact expression to minimize
+    """
+    factor_cols = [col for col in factor_model.columns if col != 'identifier']
+    if debug:
+        logger.info("Calculating Sparse Factor Model Impact ===")
+        logger.info(f"Factors: {factor_cols}")
+
+    exposures = factor_model.drop_duplicates('identifier').set_index('identifier')[factor_cols]
+    buy_exposures = exposures.reindex(columns.buy_identifiers).fillna(0).to_numpy(dtype=float)
+    sell_exposures = exposures.reindex(columns.sell_identifiers).fillna(0).to_numpy(dtype=float)
+
+    # (factors x trades) blocks: + buys, - sells
+    buy_block = (buy_exposures * (columns.buy_prices / total_value)[:, np.newaxis]).T
+    sell_block = -(sell_exposures * (columns.sell_prices / total_value)[:, np.newaxis]).T
+    block = sp.coo_matrix(np.hstack([buy_block, sell_block]))
+    trade_cols = columns.trade_cols
+    deviation_matrix = sp.coo_matrix(
+        (block.data, (block.row, trade_cols[block.col])),
+        shape=(len(factor_cols), model.n_cols)
+    )
+
+    deviation_constants = (
+        actual_factors[factor_cols].iloc[0].to_numpy(dtype=float)
+        - target_factors[factor_cols].iloc[0].to_numpy(dtype=float)
+    )
+
+    return add_piecewise_deviation_rows(
+        model=model,
+        deviation_matrix=deviation_matrix,
+        deviation_constants=deviation_constants,
+        variable_name="factor",
+        normalization=factor_normalization
+    )
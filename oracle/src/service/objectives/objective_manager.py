@@ -4,11 +4,19 @@ from typing import Dict, List, Tuple, Any, Optional
 import logging
 import time
 
-from src.service.objectives.drift.drift_optimization import calculate_drift_impact_vectorized
-from src.service.objectives.cash_deployment.cash_deployment import calculate_cash_deployment_objective, calculate_max_withdrawal_objective
-from src.service.objectives.taxes.tax_optimization import calculate_tax_impact, get_tax_cost
-from src.service.objectives.transaction_costs.transaction_optimization import calculate_transaction_costs
-from src.service.objectives.factor_model.factor_model_optimization import calculate_factor_model_impact_vectorized
+from src.service.objectives.drift.drift_optimization import calculate_drift_impact_vectorized, calculate_drift_impact_sparse
+from src.service.objectives.cash_deployment.cash_deployment import (
+    calculate_cash_deployment_objective,
+    calculate_cash_deployment_objective_sparse,
+    calculate_max_withdrawal_objective
+)
+from src.service.objectives.taxes.tax_optimization import calculate_tax_impact, calculate_tax_impact_sparse, get_tax_cost
+from src.service.objectives.transaction_costs.transaction_optimization import calculate_transaction_costs, calculate_transaction_costs_sparse
+from src.service.objectives.factor_model.factor_model_optimization import (
+    calculate_factor_model_impact_vectorized,
+    calculate_factor_model_impact_sparse
+)
+from src.solvers.sparse_model import SparseLinearModel
 from src.service.helpers.constants import CASH_CUSIP_ID
 from src.service.helpers.enums import OracleOptimizationType
 
@@ -187,6 +195,128 @@ class ObjectiveManager:
 
         return combined_objective
         
+    def calculate_objectives_sparse(
+        self,
+        model: SparseLinearModel,
+        columns,
+        drift: pd.DataFrame,
+        gain_loss: pd.DataFrame,
+        total_value: float,
+        weight_tax: float = 1.0,
+        weight_drift: float = 1.0,
+        weight_transaction: float = 1.0,
+        weight_factor_model: float = 0.0,
+        weight_cash_drag: float = 0.0,
+        rank_penalty_factor: float = 0.00,
+        enforce_wash_sale_prevention: bool = True,
+        debug: bool = True,
+        log_time: bool = False
+    ) -> None:
+        """
+        Matrix-form counterpart of calculate_objectives.
+
+        Adds the same objective terms to a SparseLinearModel as named
+        components (tax, drift, transaction, factor_model, cash_drag), which
+        extract_sparse_component_values later evaluates at a solution.
+
+        Args:
+            model: Sparse model to add the objective (and its auxiliary rows) to
+            columns: TradeColumns of the sparse model
+            drift: DataFrame with drift report
+            gain_loss: DataFrame with gain/loss report
+            total_value: Total portfolio value
+            weight_tax, weight_drift, weight_transaction, weight_factor_model, weight_cash_drag:
+                Component weights (adjusted by the optimization type)
+            rank_penalty_factor: Factor to control the strength of rank penalty
+            enforce_wash_sale_prevention: Whether losses are discounted or ignored in the tax term
+            debug: Enable debug logging
+            log_time: Whether to log timing information
+        """
+        timing_data = {}
+        if log_time:
+            start_time = time.time()
+
+        weight_tax, weight_drift, weight_transaction, weight_factor_model, weight_cash_drag = \
+            self.strategy.optimization_type.adjust_weights(
+                weight_tax, weight_drift, weight_transaction, weight_factor_model, weight_cash_drag
+            )
+
+        if weight_tax > 0:
+            if log_time:
+                tax_start = time.time()
+            model.add_objective_component('tax', calculate_tax_impact_sparse(
+                columns=columns,
+                gain_loss=gain_loss,
+                total_value=self.strategy.total_value(),
+                tax_normalization=self.strategy.TAX_NORMALIZATION * weight_tax,
+                enforce_wash_sale_prevention=enforce_wash_sale_prevention,
+            ))
+            if log_time:
+                timing_data['tax_calculation'] = time.time() - tax_start
+
+        if weight_drift > 0:
+            if log_time:
+                drift_start = time.time()
+            model.add_objective_component('drift', calculate_drift_impact_sparse(
+                model=model,
+                columns=columns,
+                drift=drift,
+                total_value=total_value,
+                absolute_drift_normalization=self.strategy.DRIFT_NORMALIZATION * weight_drift,
+                rank_penalty_factor=rank_penalty_factor,
+                debug=debug,
+            ))
+            if log_time:
+                timing_data['drift_calculation'] = time.time() - drift_start
+
+        if weight_transaction > 0:
+            if log_time:
+                transaction_start = time.time()
+            model.add_objective_component('transaction', calculate_transaction_costs_sparse(
+                columns=columns,
+                total_value=self.strategy.total_value(),
+                spreads=self.strategy.spreads,
+                transaction_normalization=self.strategy.TRANSACTION_NORMALIZATION * weight_transaction
+            ))
+            if log_time:
+                timing_data['transaction_calculation'] = time.time() - transaction_start
+
+        if weight_factor_model > 0 and self.strategy.factor_model is not None:
+            if log_time:
+                factor_start = time.time()
+            model.add_objective_component('factor_model', calculate_factor_model_impact_sparse(
+                model=model,
+                columns=columns,
+                total_value=total_value,
+                factor_model=self.strategy.factor_model,
+                target_factors=self.strategy.factor_model_target,
+                actual_factors=self.strategy.factor_model_actual,
+                factor_normalization=self.strategy.FACTOR_MODEL_NORMALIZATION * weight_factor_model,
+                debug=debug,
+            ))
+            if log_time:
+                timing_data['factor_model_calculation'] = time.time() - factor_start
+
+        if weight_cash_drag > 0 and self.strategy.withdrawal_amount <= 0:
+            if log_time:
+                cash_start = time.time()
+            model.add_objective_component('cash_drag', calculate_cash_deployment_objective_sparse(
+                model=model,
+                columns=columns,
+                drift=drift,
+                total_value=total_value,
+                cash_normalization=self.strategy.CASH_DRAG_NORMALIZATION * weight_cash_drag,
+                debug=debug
+            ))
+            if log_time:
+                timing_data['cash_drag_calculation'] = time.time() - cash_start
+
+        if log_time:
+            timing_data['total_time'] = time.time() - start_time
+            logger.info("=== Sparse Objective Calculation Timing Breakdown ===")
+            for section, duration in timing_data.items():
+                logger.info(f"{section}: {duration:.3f} seconds")
+
     def calculate_cash_deployment_objective(
         self,
         prob: pulp.LpProblem,
@@ -301,6 +431,18 @@ class ObjectiveManager:
                 if name != 'total':
                     logger.warning(f"  {name}: {value}")
                 
-        return component_values 
+        return component_values
 
+    def extract_sparse_component_values(self, model: SparseLinearModel) -> dict:
+        """
+        Evaluate each objective component of a sparse model at its current solution.
+
+        Args:
+            model: A solved SparseLinearModel
 
+        Returns:
+            Dictionary containing component values (including 'total')
+        """
+        if model.solution is None:
+            return {name: None for name in list(model.components) + ['total']}
+        return model.component_values(model.solution)
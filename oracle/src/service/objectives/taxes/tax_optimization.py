@@ -1,7 +1,10 @@
 import pulp
+import numpy as np
 import pandas as pd
 from typing import Dict
 
+from src.solvers.sparse_model import LinearExpression
+
 def get_tax_cost(
     quantity: float,
     per_share_tax_liability: float,
@@ -95,3 +98,41 @@ def calculate_tax_impact(
     total_tax_impact = pulp.lpSum(tax_impacts)
     
     return total_tax_impact
+
+
+def calculate_tax_impact_sparse(
+    columns,
+    gain_loss: pd.DataFrame,
+    total_value: float,
+    tax_normalization: float = 1.0,
+    enforce_wash_sale_prevention: bool = True
+) -> LinearExpression:
+    """
+    Matrix form of calculate_tax_impact.
+
+    The realized tax of a lot is linear in its sell variable, so the
+    coefficients go straight onto the sell columns instead of through one
+    auxiliary tax_realized variable and equality row per lot.
+
+    Args:
+        columns: TradeColumns of the sparse model
+        gain_loss: DataFrame with gain/loss report
+        total_value: Total portfolio value
+        tax_normalization: Normalization factor for tax impact
+        enforce_wash_sale_prevention: Scale (True) or drop (False) negative tax liabilities
+
+    Returns:
+        Tax impact expression over the sell columns
+    """
+    positions = columns.sell_lot_ids.get_indexer(pd.Index(gain_loss['tax_lot_id']))
+    per_share_tax = gain_loss['per_share_tax_liability'].to_numpy(dtype=float)
+
+    # Same treatment of losses as calculate_tax_impact
+    loss_scale = 1 / 5 if enforce_wash_sale_prevention else 0.0
+    per_share_tax = np.where(per_share_tax < 0, per_share_tax * loss_scale, per_share_tax)
+
+    keep = (positions >= 0) & (per_share_tax != 0)
+    return LinearExpression(
+        columns.sell_cols[positions[keep]],
+        per_share_tax[keep] / total_value * tax_normalization
+    )
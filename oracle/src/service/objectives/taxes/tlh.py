@@ -1,4 +1,5 @@
 import pulp
+import numpy as np
 import pandas as pd
 from typing import Dict, Tuple, List, Optional
 from dataclasses import dataclass
@@ -24,38 +25,48 @@ class TLHTrade:
     lot_priority: float  # Priority score for harvesting this lot
     replacement_buys: Dict[str, float] = None  # Added field for replacement securities and quantities
 
-def _calculate_harvest_quantities(
-    lots: pd.DataFrame,
+def _first_value_by_key(frame: pd.DataFrame, key: str, column: str) -> Dict:
+    """First value of column per key, matching a frame[frame[key] == k][column].iloc[0] lookup"""
+    first = frame.drop_duplicates(key)
+    return dict(zip(first[key], first[column]))
+
+def _target_weight_by_identifier(target_weights: pd.DataFrame) -> Dict[str, float]:
+    """Target weight of the first asset class listing each identifier"""
+    weights = {}
+    for identifiers, target_weight in zip(target_weights['identifiers'], target_weights['target_weight']):
+        for identifier in identifiers:
+            weights.setdefault(identifier, target_weight)
+    return weights
+
+def _group_bounds(keys: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, stop) of each run of equal consecutive keys"""
+    if len(keys) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    stops = np.r_[starts[1:], len(keys)]
+    return list(zip(starts.tolist(), stops.tolist()))
+
+def _allocate_harvest(
+    quantities: np.ndarray,
+    prices: np.ndarray,
     current_weight: float,
     target_weight: float,
     min_weight_multiplier: float,
     max_weight_multiplier: float,
     total_portfolio_value: float,
-    prices: pd.DataFrame,
     min_notional: float,
     trade_rounding: float,
     min_harvest_basis_points: float = 50.0,
-    soft_limit_percentage: float = 0.90  # New parameter for soft limit (90% by default)
-) -> Dict[str, float]:
+    soft_limit_percentage: float = 0.90
+) -> Dict[int, float]:
     """
-    Calculate harvest quantities for a group of lots of the same security,
-    ensuring we stay within weight bounds.
-    
-    Args:
-        lots: DataFrame of lots for a single security, sorted by priority
-        current_weight: Current weight of the security
-        target_weight: Target weight for the security
-        min_weight_multiplier: Minimum weight multiplier
-        max_weight_multiplier: Maximum weight multiplier
-        total_portfolio_value: Total portfolio value
-        prices: DataFrame with security prices
-        min_notional: Minimum notional value for a trade in dollars
-        trade_rounding: Rounding increment for trade quantities
-        min_harvest_basis_points: Minimum harvest size in basis points (default 50 = 0.5%)
-        soft_limit_percentage: Percentage of the way to hard limit for soft limit (default 90%)
-        
+    Allocate harvesting across the lots of one security, given in priority order.
+
+    Each lot's harvest depends on what the lots before it used up, so this is
+    a single pass over plain arrays rather than a vectorized expression.
+
     Returns:
-        Dict mapping tax_lot_id to harvest quantity
+        Dict mapping lot position (into quantities/prices) to harvest quantity
     """
     # If no target weight is set, we can't calculate min/max allowed weights
     if target_weight == 0.0:
@@ -95,17 +106,11 @@ def _calculate_harvest_quantities(
     remaining_harvest_value = max_harvest_value
     total_harvested_value = 0.0  # Track total value harvested
     
-    #Lots have already been but into order but lets make sure. 
-    lots = lots.sort_values('priority', ascending=True)
-    for _, lot in lots.iterrows():
-        # Debug logging removed - was causing MCP JSON parsing issues
-        # if lot['identifier'] == "EYPT_30233G209":
-        #     logger.debug("Processing EYPT_30233G209 lot")
+    for position, (quantity, price) in enumerate(zip(np.asarray(quantities).tolist(), np.asarray(prices).tolist())):
         if remaining_harvest_value <= 0:
             break
             
-        price = prices[prices['identifier'] == lot['identifier']]['price'].iloc[0]
-        lot_value = lot['quantity'] * price
+        lot_value = quantity * price
         
         # Harvest the minimum of:
         # 1. The entire lot
@@ -115,7 +120,7 @@ def _calculate_harvest_quantities(
         
         # If we're harvesting the entire lot, don't round
         if harvest_value >= lot_value:
-            harvest_qty = lot['quantity']
+            harvest_qty = quantity
         else:
             # For partial harvests, floor to the specified increment
             harvest_qty = (harvest_qty // trade_rounding) * trade_rounding
@@ -136,12 +141,9 @@ def _calculate_harvest_quantities(
             if harvest_value >= min_notional:
                 # Only proceed if this would make total harvest at least min_harvest_value
                 if total_harvested_value + harvest_value >= min_harvest_value:
-                    harvest_quantities[lot['tax_lot_id']] = harvest_qty
+                    harvest_quantities[position] = harvest_qty
                     remaining_harvest_value -= harvest_value
                     total_harvested_value += harvest_value
-                else:
-                    # If adding this lot wouldn't reach minimum size, skip it
-                    continue
             
     # If total harvest is less than minimum size, don't harvest anything
     if total_harvested_value < min_harvest_value:
@@ -149,6 +151,59 @@ def _calculate_harvest_quantities(
             
     return harvest_quantities
 
+def _calculate_harvest_quantities(
+    lots: pd.DataFrame,
+    current_weight: float,
+    target_weight: float,
+    min_weight_multiplier: float,
+    max_weight_multiplier: float,
+    total_portfolio_value: float,
+    prices: pd.DataFrame,
+    min_notional: float,
+    trade_rounding: float,
+    min_harvest_basis_points: float = 50.0,
+    soft_limit_percentage: float = 0.90  # New parameter for soft limit (90% by default)
+) -> Dict[str, float]:
+    """
+    Calculate harvest quantities for a group of lots of the same security,
+    ensuring we stay within weight bounds.
+    
+    Args:
+        lots: DataFrame of lots for a single security, sorted by priority
+        current_weight: Current weight of the security
+        target_weight: Target weight for the security
+        min_weight_multiplier: Minimum weight multiplier
+        max_weight_multiplier: Maximum weight multiplier
+        total_portfolio_value: Total portfolio value
+        prices: DataFrame with security prices
+        min_notional: Minimum notional value for a trade in dollars
+        trade_rounding: Rounding increment for trade quantities
+        min_harvest_basis_points: Minimum harvest size in basis points (default 50 = 0.5%)
+        soft_limit_percentage: Percentage of the way to hard limit for soft limit (default 90%)
+        
+    Returns:
+        Dict mapping tax_lot_id to harvest quantity
+    """
+    #Lots have already been but into order but lets make sure. 
+    lots = lots.sort_values('priority', ascending=True, kind='stable')
+    price_by_identifier = _first_value_by_key(prices, 'identifier', 'price')
+    
+    harvest_quantities = _allocate_harvest(
+        quantities=lots['quantity'].to_numpy(),
+        prices=lots['identifier'].map(price_by_identifier).to_numpy(dtype=float),
+        current_weight=current_weight,
+        target_weight=target_weight,
+        min_weight_multiplier=min_weight_multiplier,
+        max_weight_multiplier=max_weight_multiplier,
+        total_portfolio_value=total_portfolio_value,
+        min_notional=min_notional,
+        trade_rounding=trade_rounding,
+        min_harvest_basis_points=min_harvest_basis_points,
+        soft_limit_percentage=soft_limit_percentage
+    )
+    tax_lot_ids = lots['tax_lot_id'].to_numpy()
+    return {tax_lot_ids[position]: harvest_qty for position, harvest_qty in harvest_quantities.items()}
+
 def _identify_direct_index_tlh_opportunities(
     gain_loss_report: pd.DataFrame,
     prices: pd.DataFrame,
@@ -166,6 +221,9 @@ def _identify_direct_index_tlh_opportunities(
     Identify tax loss harvesting opportunities for Direct Indexing strategy.
     Uses asset class target weights to determine harvesting opportunities.
     
+    Restrictions, loss filters and lot priorities are computed for all lots
+    at once; only the per-security harvest allocation walks the lots.
+    
     Args:
         gain_loss_report: DataFrame with current gain/loss information for all lots
         prices: DataFrame with current security prices
@@ -193,87 +251,75 @@ def _identify_direct_index_tlh_opportunities(
     grouped_lots["current_value"] = grouped_lots["quantity"] * grouped_lots["price"]
     grouped_lots['current_weight'] = grouped_lots['current_value'] / total_portfolio_value
     
-    # Process each security's lots
-    for identifier in grouped_lots['identifier'].unique():
-        # Get security-level info
-        current_weight = 0.0
-        target_weight = 0.0
-        
-        # Safely get current weight
-        current_weight_series = grouped_lots[grouped_lots['identifier'] == identifier]['current_weight']
-        if not current_weight_series.empty:
-            current_weight = current_weight_series.iloc[0]
-        
-        if current_weight == 0.0:
-            # No current weight, skip this security
-            continue
-            
-        # Get target weight from asset class
-        for _, row in target_weights.iterrows():
-            if identifier in row['identifiers']:
-                target_weight = row['target_weight']
-                break
-        
-        # Get all lots for this security
-        security_lots = gain_loss_report[gain_loss_report['identifier'] == identifier].copy()
-        
-        # Skip lots that can't be sold due to restrictions using ConstraintsManager
-        security_lots = security_lots[
-            ~security_lots['tax_lot_id'].apply(
-                lambda x: constraints_manager.is_restricted_from_selling_pre_trade(identifier, x)[0]
-            )
-        ]
-        
-        if len(security_lots) == 0:
-            continue
-            
-        # Calculate loss percentage and priority for each lot
-        security_lots['current_value'] = security_lots['quantity'] * prices[
-            prices['identifier'] == identifier
-        ]['price'].iloc[0]
-        security_lots = security_lots[security_lots['tax_gain_loss_percentage'] < -abs(min_loss_threshold)]
-        if len(security_lots) == 0:
-            continue
-            
-        # Rank lots by per_share_tax_liability (smaller values get higher priority)
-        security_lots['priority'] = security_lots['per_share_tax_liability'].rank(ascending=True)
+    # Securities are processed in this order; those without a current weight are skipped
+    current_weights = _first_value_by_key(grouped_lots, 'identifier', 'current_weight')
+    security_order = pd.Index(grouped_lots['identifier'].unique())
+    target_weight_by_identifier = _target_weight_by_identifier(target_weights)
+    price_by_identifier = _first_value_by_key(prices, 'identifier', 'price')
+    tax_rate_by_gain_type = _first_value_by_key(tax_rates, 'gain_type', 'total_rate')
+    
+    # Candidate lots: held in a weighted security, sellable and at a sufficient loss
+    lots = gain_loss_report.reset_index(drop=True)
+    lots['security_order'] = security_order.get_indexer(lots['identifier'])
+    weighted = lots['security_order'].to_numpy() >= 0
+    weighted[weighted] = lots.loc[weighted, 'identifier'].map(current_weights).to_numpy() != 0.0
+    lots = lots[weighted]
+    lots = lots[~constraints_manager.restricted_from_selling_pre_trade_mask(lots['tax_lot_id'])]
+    lots = lots[lots['tax_gain_loss_percentage'] < -abs(min_loss_threshold)].copy()
+    if lots.empty:
+        return tlh_opportunities
+    
+    lots['current_value'] = lots['quantity'] * lots['identifier'].map(price_by_identifier)
+    # Rank lots by per_share_tax_liability within each security (smaller values get higher priority)
+    lots['priority'] = lots.groupby('identifier', sort=False)['per_share_tax_liability'].rank(ascending=True)
+    lots = lots.sort_values(['security_order', 'priority'], kind='stable')
+    
+    tax_lot_ids = lots['tax_lot_id'].to_numpy()
+    identifiers = lots['identifier'].to_numpy()
+    quantities = lots['quantity'].to_numpy()
+    cost_bases = lots['cost_basis'].to_numpy()
+    current_values = lots['current_value'].to_numpy()
+    loss_percentages = lots['tax_gain_loss_percentage'].to_numpy()
+    priorities = lots['priority'].to_numpy()
+    gain_types = lots['gain_type'].to_numpy()
+    lot_prices = lots['identifier'].map(price_by_identifier).to_numpy(dtype=float)
+    
+    # Harvest each security's lots in priority order
+    for start, stop in _group_bounds(lots['security_order'].to_numpy()):
+        identifier = identifiers[start]
+        current_weight = current_weights[identifier]
+        target_weight = target_weight_by_identifier.get(identifier, 0.0)
         
-        # Sort by priority (highest first) and calculate harvest quantities
-        security_lots = security_lots.sort_values('priority', ascending=True)
-        if len(security_lots) == 0:
-            continue
-            
-        harvest_quantities = _calculate_harvest_quantities(
-            lots=security_lots,
+        harvest_quantities = _allocate_harvest(
+            quantities=quantities[start:stop],
+            prices=lot_prices[start:stop],
             current_weight=current_weight,
             target_weight=target_weight,
             min_weight_multiplier=min_weight_multiplier,
             max_weight_multiplier=max_weight_multiplier,
             total_portfolio_value=total_portfolio_value,
-            prices=prices,
             min_notional=min_notional,
             trade_rounding=trade_rounding
         )
         
         # Create TLHTrade objects for lots we want to harvest
-        for _, lot in security_lots.iterrows():
-            harvest_qty = harvest_quantities.get(lot['tax_lot_id'], 0.0)
+        for position, harvest_qty in sorted(harvest_quantities.items()):
             if harvest_qty > 0:
-                tax_rate = tax_rates[tax_rates['gain_type'] == lot['gain_type']]['total_rate'].iloc[0]
-                potential_savings = (lot['cost_basis'] - lot['current_value']) * tax_rate
+                i = start + position
+                potential_savings = (cost_bases[i] - current_values[i]) * tax_rate_by_gain_type[gain_types[i]]
                 
                 tlh_opportunities.append(TLHTrade(
-                    tax_lot_id=lot['tax_lot_id'],
-                    identifier=lot['identifier'],
-                    quantity=lot['quantity'],
-                    cost_basis=lot['cost_basis'],
-                    current_value=lot['current_value'],
-                    loss_percentage=lot['tax_gain_loss_percentage'],
+                    tax_lot_id=tax_lot_ids[i],
+                    identifier=identifier,
+                    quantity=quantities[i],
+                    cost_basis=cost_bases[i],
+                    current_value=current_values[i],
+                    loss_percentage=loss_percentages[i],
                     potential_tax_savings=potential_savings,
                     target_weight=target_weight,
                     current_weight=current_weight,
                     harvest_quantity=harvest_qty,
-                    lot_priority=lot['priority']
+                    lot_priority=priorities[i]
                 ))
     
     return tlh_opportunities
@@ -297,6 +343,9 @@ def _identify_pairs_tlh_opportunities(
     For each asset class, finds the security with the best tax benefit that can be sold
     and pairs it with a valid replacement security from the same asset class.
     
+    Sellability, loss filters and tax benefits are aggregated per security for
+    all lots at once; the asset class loop only compares those aggregates.
+    
     Args:
         gain_loss_report: DataFrame with current gain/loss information for all lots
         prices: DataFrame with current security prices
@@ -323,76 +372,76 @@ def _identify_pairs_tlh_opportunities(
     
     grouped_lots["current_value"] = grouped_lots["quantity"] * grouped_lots["price"]
     grouped_lots['current_weight'] = grouped_lots['current_value'] / total_portfolio_value
+    current_weights = _first_value_by_key(grouped_lots, 'identifier', 'current_weight')
+    price_by_identifier = _first_value_by_key(prices, 'identifier', 'price')
+    
+    # Per-security aggregates: any sellable lot, and the tax benefit of its sellable loss lots
+    lots = gain_loss_report.reset_index(drop=True)
+    sellable = ~constraints_manager.restricted_from_selling_pre_trade_mask(lots['tax_lot_id'])
+    is_loss = (lots['tax_gain_loss_percentage'] < -abs(min_loss_threshold)).to_numpy()
+    securities = pd.DataFrame({
+        'identifier': lots['identifier'].to_numpy(),
+        'sellable': sellable,
+        'tax_benefit': np.where(sellable & is_loss, lots['tax_liability'].abs().to_numpy(dtype=float), 0.0)
+    }).groupby('identifier', sort=False).agg(sellable=('sellable', 'any'), tax_benefit=('tax_benefit', 'sum'))
+    can_sell_any = securities['sellable'].to_dict()
+    tax_benefits = securities['tax_benefit'].to_dict()
+    
+    # Loss lots of each security (restricted ones included), ranked within the security
+    loss_lots = lots[is_loss].copy()
+    loss_lots['priority'] = loss_lots.groupby('identifier', sort=False)['per_share_tax_liability'].rank(ascending=True)
+    loss_lot_positions = loss_lots.groupby('identifier', sort=False).indices
+    tax_lot_ids = loss_lots['tax_lot_id'].to_numpy()
+    quantities = loss_lots['quantity'].to_numpy()
+    cost_bases = loss_lots['cost_basis'].to_numpy()
+    market_values = loss_lots['market_value'].to_numpy()
+    loss_percentages = loss_lots['tax_gain_loss_percentage'].to_numpy()
+    tax_liabilities = loss_lots['tax_liability'].to_numpy()
+    priorities = loss_lots['priority'].to_numpy()
+    
+    restricted_from_buying = {}
+    def is_restricted_from_buying(identifier):
+        if identifier not in restricted_from_buying:
+            restricted_from_buying[identifier] = constraints_manager.is_restricted_from_buying_pre_trade(identifier)[0]
+        return restricted_from_buying[identifier]
     
     # Process each asset class
-    for _, asset_class in target_weights.iterrows():
-        if asset_class['asset_class'] == CASH_CUSIP_ID:
+    for asset_class_id, identifiers, asset_class_weight in zip(
+        target_weights['asset_class'], target_weights['identifiers'], target_weights['target_weight']
+    ):
+        if asset_class_id == CASH_CUSIP_ID:
             continue
             
-        identifiers = asset_class['identifiers']
         best_sell_identifier = None
         best_tax_benefit = 0
-        best_lots = None
         
         # Find the security with the best tax benefit that we can sell
         for identifier in identifiers:
-            # Debug logging removed - was causing MCP JSON parsing issues
-            # if identifier == "J_46982L108":
-            #     logger.debug("Processing J_46982L108")
-            # Get all lots for this security
-            security_lots = gain_loss_report[gain_loss_report['identifier'] == identifier].copy()
-            if len(security_lots) == 0:
+            if not can_sell_any.get(identifier, False) or identifier not in loss_lot_positions:
                 continue
-                
-            # Check if we can sell any lots
-            can_sell_any = False
-            for _, lot in security_lots.iterrows():
-                is_restricted, _ = constraints_manager.is_restricted_from_selling_pre_trade(identifier, lot['tax_lot_id'])
-                if not is_restricted:
-                    can_sell_any = True
-                    break
-                    
-            if not can_sell_any:
-                continue
-            
-            # Filter to lots with sufficient loss
-            loss_lots = security_lots[security_lots['tax_gain_loss_percentage'] < -abs(min_loss_threshold)].copy()
-            if len(loss_lots) == 0:
-                continue
-                
-            # Calculate total potential tax benefit for this security
-            total_tax_benefit = 0
-            for _, lot in loss_lots.iterrows():
-                is_restricted, _ = constraints_manager.is_restricted_from_selling_pre_trade(identifier, lot['tax_lot_id'])
-                if not is_restricted:
-                    total_tax_benefit += abs(lot['tax_liability'])
-            
-            if total_tax_benefit > best_tax_benefit:
-                best_tax_benefit = total_tax_benefit
+            if tax_benefits[identifier] > best_tax_benefit:
+                best_tax_benefit = tax_benefits[identifier]
                 best_sell_identifier = identifier
-                best_lots = loss_lots
                 
-        if best_sell_identifier is None or best_lots is None:
+        if best_sell_identifier is None:
             continue
             
         # Find a valid replacement security from the same asset class
         replacement_security = None
         for potential_replacement in identifiers:
-            if potential_replacement != best_sell_identifier:
-                is_restricted, _ = constraints_manager.is_restricted_from_buying_pre_trade(potential_replacement)
-                if not is_restricted:
-                    replacement_security = potential_replacement
-                    break
+            if potential_replacement != best_sell_identifier and not is_restricted_from_buying(potential_replacement):
+                replacement_security = potential_replacement
+                break
                     
         if replacement_security is None:
             continue
             
-        # Rank lots by per_share_tax_liability (smaller values get higher priority)
-        best_lots['priority'] = best_lots['per_share_tax_liability'].rank(ascending=True)
-        best_lots = best_lots.sort_values('priority', ascending=True)
+        # Loss lots of the security in priority order
+        best_lots = loss_lot_positions[best_sell_identifier]
+        best_lots = best_lots[np.argsort(priorities[best_lots], kind='stable')]
 
         # Calculate target weight for each security in the asset class
-        target_weight = asset_class['target_weight'] / len(identifiers)
+        target_weight = asset_class_weight / len(identifiers)
         
         # Calculate hard and soft minimum weights
         hard_min_allowed_weight = target_weight * min_weight_multiplier
@@ -400,7 +449,7 @@ def _identify_pairs_tlh_opportunities(
         soft_min_allowed_weight = target_weight - (soft_limit_percentage * weight_delta)
 
         # Calculate current weight
-        current_weight = grouped_lots[grouped_lots['identifier'] == best_sell_identifier]['current_weight'].iloc[0]
+        current_weight = current_weights[best_sell_identifier]
         
         # If already below soft minimum, skip this opportunity
         if current_weight <= soft_min_allowed_weight:
@@ -414,16 +463,16 @@ def _identify_pairs_tlh_opportunities(
         harvest_quantities = {}
         
         # Calculate minimum harvest value (50 bps = 0.5% of current position value)
-        current_position_value = best_lots['market_value'].sum()
+        current_position_value = pd.Series(market_values[best_lots]).sum()
         min_harvest_value = max(
             (50.0 / 10000.0) * current_position_value,  # 50 bps = 0.5%
             min_notional  # Ensure we meet minimum notional requirement
         )
 
         # Process each lot in priority order
-        for _, lot in best_lots.iterrows():
-            price = prices[prices['identifier'] == lot['identifier']]['price'].iloc[0]
-            lot_value = lot['quantity'] * price
+        price = price_by_identifier[best_sell_identifier]
+        for i, quantity in zip(best_lots.tolist(), quantities[best_lots].tolist()):
+            lot_value = quantity * price
             
             # Calculate maximum harvestable value for this lot
             harvest_value = min(lot_value, max_harvest_value - total_harvest_value)
@@ -442,7 +491,7 @@ def _identify_pairs_tlh_opportunities(
             
             # Only include if it meets minimum notional
             if actual_harvest_value >= min_notional:
-                harvest_quantities[lot['tax_lot_id']] = harvest_qty
+                harvest_quantities[i] = harvest_qty
                 total_harvest_value += actual_harvest_value
 
         # If total harvest value doesn't meet minimum, skip this opportunity
@@ -450,7 +499,7 @@ def _identify_pairs_tlh_opportunities(
             continue
 
         # Calculate buy quantity for the replacement security
-        replacement_price = prices[prices['identifier'] == replacement_security]['price'].iloc[0]
+        replacement_price = price_by_identifier[replacement_security]
         buy_qty = (total_harvest_value / replacement_price) // trade_rounding * trade_rounding
         
         # Only proceed if replacement buy meets minimum notional
@@ -460,24 +509,21 @@ def _identify_pairs_tlh_opportunities(
         buy_quantities = {replacement_security: buy_qty}
             
         # Create TLHTrade objects for lots we want to harvest
-        for _, lot in best_lots.iterrows():
-            harvest_qty = harvest_quantities.get(lot['tax_lot_id'], 0.0)
+        for i in best_lots.tolist():
+            harvest_qty = harvest_quantities.get(i, 0.0)
             if harvest_qty > 0:
-                tax_rate = tax_rates[tax_rates['gain_type'] == lot['gain_type']]['total_rate'].iloc[0]
-                potential_savings = abs(lot['tax_liability'])
-                
                 tlh_opportunities.append(TLHTrade(
-                    tax_lot_id=lot['tax_lot_id'],
-                    identifier=lot['identifier'],
-                    quantity=lot['quantity'],
-                    cost_basis=lot['cost_basis'],
-                    current_value=lot['market_value'],
-                    loss_percentage=lot['tax_gain_loss_percentage'],
-                    potential_tax_savings=potential_savings,
+                    tax_lot_id=tax_lot_ids[i],
+                    identifier=best_sell_identifier,
+                    quantity=quantities[i],
+                    cost_basis=cost_bases[i],
+                    current_value=market_values[i],
+                    loss_percentage=loss_percentages[i],
+                    potential_tax_savings=abs(tax_liabilities[i]),
                     target_weight=target_weight,
                     current_weight=current_weight,
                     harvest_quantity=harvest_qty,
-                    lot_priority=lot['priority'],
+                    lot_priority=priorities[i],
                     replacement_buys=buy_quantities
                 ))
     
@@ -549,6 +595,67 @@ def _identify_tlh_opportunities(
     else:
         return []
 
+def _tlh_trade_fixings(
+    tlh_opportunities: List[TLHTrade],
+    sells,
+    buys,
+    gain_loss_report: pd.DataFrame,
+    optimization_type: Optional[OracleOptimizationType] = None
+) -> Tuple[Dict[str, float], Dict[str, float], List[Tuple[str, str, float]]]:
+    """
+    Trades pinned by the identified TLH opportunities.
+
+    Args:
+        tlh_opportunities: Identified TLH opportunities
+        sells: Sell variables keyed by tax_lot_id (only membership is used)
+        buys: Buy variables keyed by identifier (only membership is used)
+        gain_loss_report: DataFrame with current gain/loss information for all lots
+        optimization_type: The optimization type (OracleOptimizationType)
+
+    Returns:
+        Tuple of:
+        - Dictionary mapping tax_lot_id to sell quantities
+        - Dictionary mapping identifier to buy quantities (for pairs trading)
+        - Ordered list of ('sell' | 'buy', key, quantity) fixings; a trade is
+          pinned once even when several opportunities share it (the lots of a
+          pairs opportunity share one replacement buy)
+    """
+    sell_quantities = {}
+    buy_quantities = {}
+    fixings = []
+    fixed = set()
+
+    def fix(side, key, quantity):
+        if (side, key) not in fixed:
+            fixed.add((side, key))
+            fixings.append((side, key, quantity))
+
+    sold_identifiers = []
+    
+    for opportunity in tlh_opportunities:
+        if opportunity.tax_lot_id in sells:
+            # Sell exactly the harvest quantity
+            if opportunity.harvest_quantity > opportunity.quantity:
+                raise ValueError("TLH Harvest quantity exceeds available quantity.")
+            fix('sell', opportunity.tax_lot_id, opportunity.harvest_quantity)
+            sell_quantities[opportunity.tax_lot_id] = opportunity.harvest_quantity
+            # When selling a security, prevent buying it at the same time
+            if opportunity.identifier in buys and opportunity.identifier not in sold_identifiers:
+                fix('buy', opportunity.identifier, 0)
+                sold_identifiers.append(opportunity.identifier)
+            
+            # For pairs trading, buy the replacement securities and don't sell them
+            if optimization_type == OracleOptimizationType.PAIRS_TLH and opportunity.replacement_buys:
+                for replacement_id, buy_qty in opportunity.replacement_buys.items():
+                    if replacement_id in buys: # and replacement_id not in sell_identifiers:
+                        fix('buy', replacement_id, buy_qty)
+                        buy_quantities[replacement_id] = buy_qty
+                        all_sell_lots = gain_loss_report[gain_loss_report['identifier'] == replacement_id]
+                        for tax_lot_id in all_sell_lots['tax_lot_id']:
+                            fix('sell', tax_lot_id, 0)
+
+    return sell_quantities, buy_quantities, fixings
+
 def calculate_tlh_impact(
     prob: pulp.LpProblem,
     buys: Dict[str, pulp.LpVariable],
@@ -615,35 +722,16 @@ def calculate_tlh_impact(
         optimization_type=optimization_type
     )
     
-    # Create dictionaries of sell and buy quantities
-    sell_quantities = {}
-    buy_quantities = {}
-
-    sell_identifiers = []
-    sold_identifiers = []
-    
-    for opportunity in tlh_opportunities:
-        if opportunity.tax_lot_id in sells:
-            # Add constraint to sell exactly the harvest quantity
-            if opportunity.harvest_quantity > opportunity.quantity:
-                raise ValueError("TLH Harvest quantity exceeds available quantity.")
-            prob += sells[opportunity.tax_lot_id] == opportunity.harvest_quantity, f"tlh_sell_{opportunity.tax_lot_id}"
-            sell_identifiers.append(opportunity.identifier)
-            sell_quantities[opportunity.tax_lot_id] = opportunity.harvest_quantity
-            # When selling a security, prevent buying it at the same time
-            if opportunity.identifier in buys and opportunity.identifier not in sold_identifiers:
-                prob += buys[opportunity.identifier] == 0, f"tlh_buy_{opportunity.identifier}"
-                sold_identifiers.append(opportunity.identifier)
-            
-            # For pairs trading, add buy constraints for replacement securities
-            if optimization_type == OracleOptimizationType.PAIRS_TLH and opportunity.replacement_buys:
-                for replacement_id, buy_qty in opportunity.replacement_buys.items():
-                    if replacement_id in buys: # and replacement_id not in sell_identifiers:
-                        prob += buys[replacement_id] == buy_qty, f"tlh_buy_{replacement_id}"
-                        buy_quantities[replacement_id] = buy_qty
-                        all_sell_lots = gain_loss_report[gain_loss_report['identifier'] == replacement_id]
-                        for _, lot in all_sell_lots.iterrows():
-                            prob += sells[lot['tax_lot_id']] == 0, f"tlh_sell_{lot['tax_lot_id']}"
+    sell_quantities, buy_quantities, fixings = _tlh_trade_fixings(
+        tlh_opportunities=tlh_opportunities,
+        sells=sells,
+        buys=buys,
+        gain_loss_report=gain_loss_report,
+        optimization_type=optimization_type
+    )
+    for side, key, quantity in fixings:
+        variable = sells[key] if side == 'sell' else buys[key]
+        prob += variable == quantity, f"tlh_{side}_{key}"
     
     # If we have TLH trades and an objective manager, calculate baseline values
     baseline_components = None
@@ -651,4 +739,65 @@ def calculate_tlh_impact(
         # Extract component values
         baseline_components = objective_manager.extract_component_values(prob)
     
-    return tlh_opportunities, sell_quantities, buy_quantities, baseline_components
\ No newline at end of file
+    return tlh_opportunities, sell_quantities, buy_quantities, baseline_components
+
+
+def calculate_tlh_impact_sparse(
+    model,
+    columns,
+    drift_report: pd.DataFrame,
+    gain_loss_report: pd.DataFrame,
+    prices: pd.DataFrame,
+    tax_rates: pd.DataFrame,
+    constraints_manager: ConstraintsManager,
+    target_weights: pd.DataFrame,
+    total_portfolio_value: float,
+    min_weight_multiplier: float,
+    max_weight_multiplier: float,
+    min_notional: float,
+    trade_rounding: float,
+    min_loss_threshold: float = 0.015,
+    optimization_type: Optional[OracleOptimizationType] = None
+) -> Tuple[List[TLHTrade], Dict[str, float], Dict[str, float]]:
+    """
+    Matrix form of calculate_tlh_impact: pins the TLH trades through column bounds.
+
+    Bounds are intersected, so pinning a trade to two different quantities
+    leaves the model infeasible just as two conflicting equality rows would.
+    Baseline component values are left to the caller, which already has the
+    no-trade solution they are evaluated at.
+
+    Returns:
+        Tuple of:
+        - List of TLHTrade objects representing identified opportunities
+        - Dictionary mapping tax_lot_id to sell quantities
+        - Dictionary mapping identifier to buy quantities (for pairs trading)
+    """
+    tlh_opportunities = _identify_tlh_opportunities(
+        drift_report=drift_report,
+        gain_loss_report=gain_loss_report,
+        prices=prices,
+        tax_rates=tax_rates,
+        constraints_manager=constraints_manager,
+        target_weights=target_weights,
+        total_portfolio_value=total_portfolio_value,
+        min_weight_multiplier=min_weight_multiplier,
+        max_weight_multiplier=max_weight_multiplier,
+        min_notional=min_notional,
+        trade_rounding=trade_rounding,
+        min_loss_threshold=min_loss_threshold,
+        optimization_type=optimization_type
+    )
+
+    sell_quantities, buy_quantities, fixings = _tlh_trade_fixings(
+        tlh_opportunities=tlh_opportunities,
+        sells=columns.sells,
+        buys=columns.buys,
+        gain_loss_report=gain_loss_report,
+        optimization_type=optimization_type
+    )
+    for side, key, quantity in fixings:
+        variable = columns.sells[key] if side == 'sell' else columns.buys[key]
+        model.fix([variable.col], quantity)
+
+    return tlh_opportunities, sell_quantities, buy_quantities
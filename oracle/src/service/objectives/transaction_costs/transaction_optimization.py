@@ -1,7 +1,10 @@
 import pulp
+import numpy as np
 import pandas as pd
 from typing import Dict
 
+from src.solvers.sparse_model import LinearExpression
+
 def get_buy_cost(
     quantity: float,
     spread: float,
@@ -76,4 +79,42 @@ def calculate_transaction_costs(
     ])) 
     
     # Apply normalization multiplier to transaction costs
-    return transaction_impact
\ No newline at end of file
+    return transaction_impact
+
+
+def calculate_transaction_costs_sparse(
+    columns,
+    total_value: float,
+    spreads: pd.DataFrame,
+    transaction_normalization: float
+) -> LinearExpression:
+    """
+    Matrix form of calculate_transaction_costs.
+
+    Keys are matched against the spreads table exactly as in the PuLP version:
+    buys by identifier and sells by their variable key (the tax lot id).
+
+    Args:
+        columns: TradeColumns of the sparse model
+        total_value: Total portfolio value
+        spreads: DataFrame with bid-ask spreads
+        transaction_normalization: Normalization factor for transaction costs
+
+    Returns:
+        The normalized transaction costs expression
+    """
+    if spreads is None or spreads.empty or total_value <= 0:
+        return LinearExpression()
+
+    per_share_cost = spreads.drop_duplicates('identifier').set_index('identifier')['per_share_cost']
+    scale = transaction_normalization / total_value
+
+    buy_costs = per_share_cost.reindex(columns.buy_identifiers).to_numpy(dtype=float)
+    sell_costs = per_share_cost.reindex(columns.sell_lot_ids).to_numpy(dtype=float)
+    has_buy_cost = ~np.isnan(buy_costs)
+    has_sell_cost = ~np.isnan(sell_costs)
+
+    return LinearExpression(
+        np.concatenate([columns.buy_cols[has_buy_cost], columns.sell_cols[has_sell_cost]]),
+        np.concatenate([buy_costs[has_buy_cost], sell_costs[has_sell_cost]]) * scale
+    )
@@ -1,4 +1,6 @@
+import multiprocessing
 import os
+import time
 import numpy as np
 import pandas as pd
 from datetime import date, datetime
@@ -20,6 +22,45 @@ from src.service.helpers.enums import OracleOptimizationType
 from src.service.helpers.constants import logger
 from src.service.helpers.trade_netting import net_trades_across_strategies
 
+# Attributes compute_optimal_trades sets on a strategy that later calls (e.g.
+# calculate_max_withdrawal_amount) rely on; copied back from pool workers
+STRATEGY_RUN_ATTRIBUTES = (
+    'weight_tax', 'weight_drift', 'weight_transaction', 'weight_factor_model', 'weight_cash_drag',
+    'rebalance_threshold', 'buy_threshold', 'holding_time_delta', 'min_notional',
+    'rank_penalty_factor', 'tlh_min_loss_threshold', 'should_tlh', 'trade_rounding',
+    'range_min_weight_multiplier', 'range_max_weight_multiplier', 'enforce_wash_sale_prevention',
+    'min_cash', 'no_trade_component_values', 'optimized_component_values',
+    'solver_settings', 'solver_stats',
+)
+
+# How often the parent checks running strategies against the timeout (seconds)
+STRATEGY_POLL_INTERVAL = 0.05
+
+# Oracle and per-strategy start times and worker pids shipped once to each pool worker by _init_strategy_worker
+_worker_oracle = None
+_worker_start_times = None
+_worker_pids = None
+
+
+def _init_strategy_worker(oracle: 'Oracle', start_times, pids) -> None:
+    global _worker_oracle, _worker_start_times, _worker_pids
+    _worker_oracle = oracle
+    _worker_start_times = start_times
+    _worker_pids = pids
+
+
+def _compute_strategy_in_worker(index: int, strategy_settings: dict, debug: bool, dump: bool) -> Tuple[Tuple, Dict]:
+    """Run one strategy's optimization in a pool worker; returns (result, run attributes)"""
+    # Lets the parent start the strategy's timeout clock when a worker picks it up
+    # and notice if that worker dies before returning
+    _worker_pids[index] = os.getpid()
+    _worker_start_times[index] = time.time()
+    strategy = _worker_oracle.strategies[index]
+    result = strategy.compute_optimal_trades(debug=debug, dump=dump, **strategy_settings)
+    attributes = {name: getattr(strategy, name) for name in STRATEGY_RUN_ATTRIBUTES if hasattr(strategy, name)}
+    return result, attributes
+
+
 class Oracle:
     
     def __init__(
@@ -226,11 +267,35 @@ class Oracle:
             percentage_protection_from_inadvertent_wash_sales=percentage_protection_from_inadvertent_wash_sales
         )
 
+    def add_closed_lots(self, closed_lots: pd.DataFrame) -> None:
+        """
+        Append newly closed lots to recently_closed_lots.
+
+        If wash sale restrictions are already initialized they are updated
+        with just the new lots rather than rebuilt from the whole history.
+
+        Args:
+            closed_lots (pd.DataFrame): Closed lots with the columns of recently_closed_lots
+        """
+        closed_lots = initialize_closed_lots(closed_lots)
+        if closed_lots is None:
+            return
+
+        if self.recently_closed_lots is None:
+            self.recently_closed_lots = closed_lots
+        else:
+            self.recently_closed_lots = pd.concat([self.recently_closed_lots, closed_lots], ignore_index=True)
+
+        if self.wash_sale_restrictions is not None:
+            self.wash_sale_restrictions.add_closed_lots(closed_lots)
+
     def compute_optimal_trades_for_all_strategies(
         self,
         settings: dict,
         debug: bool = True,
         dump: bool = False,
+        max_workers: int = 1,
+        strategy_timeout: Optional[float] = None,
         **kwargs
     ) -> Tuple[Dict[int, Tuple[Optional[int], bool, Dict, pd.DataFrame]], pd.DataFrame]:
         """
@@ -243,6 +308,12 @@ class Oracle:
                         Default is True.
             dump (bool): If True, dumps the optimization state for debugging.
                         Default is False.
+            max_workers (int): Number of worker processes. With more than one worker
+                        (and more than one strategy) the strategies are solved
+                        concurrently in a process pool. Default is 1 (sequential).
+            strategy_timeout (float, optional): Seconds a strategy may run in the
+                        process pool before it is abandoned and reported as failed.
+                        Ignored when solving sequentially.
             **kwargs: Additional keyword arguments passed to individual strategy optimizations.
             
         Returns:
@@ -260,6 +331,12 @@ class Oracle:
             to produce a final set of trades that considers the entire portfolio's needs.
             If debug is enabled, detailed logging will show the progress and results of
             each strategy's optimization.
+
+            Strategies are independent until netting, so in process-pool mode each
+            worker receives a copy of this Oracle once and solves the strategies it
+            is handed; results are always reported in strategy order. The run
+            parameters each strategy stores during optimization are copied back so
+            follow-up calls such as calculate_max_withdrawal_amount still work.
         """
         if not self.strategies:
             return {}, pd.DataFrame()
@@ -269,30 +346,33 @@ class Oracle:
         if debug:
             logger.info(f"Running compute_optimal_trades for {len(self.strategies)} strategies")
             
-        for strategy in self.strategies:
+        if max_workers > 1 and len(self.strategies) > 1:
+            outcomes = self._compute_strategies_in_pool(settings, max_workers, strategy_timeout, debug, dump)
+        else:
+            outcomes = [self._compute_strategy(strategy, settings, debug, dump) for strategy in self.strategies]
+
+        for strategy, (result, error) in zip(self.strategies, outcomes):
             strategy_id = strategy.strategy_id
-            if debug:
-                logger.info(f"Computing optimal trades for strategy {strategy_id} ({strategy.optimization_type.value})")
-                
-            try:
-                strategy_settings = settings["strategies"][str(strategy_id)]
-                result = strategy.compute_optimal_trades(debug=debug, dump=dump, **strategy_settings)
-                results[strategy_id] = result
-                
-                if debug:
-                    status, should_trade, trade_summary, trades = result
-                    status_str = pulp.LpStatus[status] if status is not None else 'None'
-                    logger.info(f"Strategy {strategy_id} optimization completed:")
-                    logger.info(f"  Status: {status_str}")
-                    logger.info(f"  Should trade: {should_trade}")
-                    logger.info(f"  Number of trades: {len(trades)}")
-                    
-            except Exception as e:
-                logger.error(f"Error computing optimal trades for strategy {strategy_id}: {str(e)}")
+            if error is not None:
+                logger.error(f"Error computing optimal trades for strategy {strategy_id}: {error}")
                 results[strategy_id] = (None, False, {}, pd.DataFrame())
-                
+                continue
+
+            results[strategy_id] = result
+            if debug:
+                status, should_trade, trade_summary, trades = result
+                status_str = pulp.LpStatus[status] if status is not None else 'None'
+                logger.info(f"Strategy {strategy_id} optimization completed:")
+                logger.info(f"  Status: {status_str}")
+                logger.info(f"  Should trade: {should_trade}")
+                logger.info(f"  Number of trades: {len(trades)}")
+
         # Net trades across all strategies
-        trade_rounding = min(strategy.trade_rounding for strategy in self.strategies)
+        # A strategy abandoned by the pool never set its run parameters
+        trade_rounding = min(
+            (strategy.trade_rounding for strategy in self.strategies if hasattr(strategy, 'trade_rounding')),
+            default=4
+        )
         netted_trades = net_trades_across_strategies(results, trade_rounding=trade_rounding)
         
         if debug and not netted_trades.empty:
@@ -300,6 +380,108 @@ class Oracle:
                 
         return results, netted_trades
 
+    def _compute_strategy(
+        self,
+        strategy: OracleStrategy,
+        settings: dict,
+        debug: bool,
+        dump: bool
+    ) -> Tuple[Optional[Tuple], Optional[str]]:
+        """Solve one strategy in this process; returns (result, error message)"""
+        if debug:
+            logger.info(f"Computing optimal trades for strategy {strategy.strategy_id} ({strategy.optimization_type.value})")
+        try:
+            strategy_settings = settings["strategies"][str(strategy.strategy_id)]
+            return strategy.compute_optimal_trades(debug=debug, dump=dump, **strategy_settings), None
+        except Exception as e:
+            return None, str(e)
+
+    def _compute_strategies_in_pool(
+        self,
+        settings: dict,
+        max_workers: int,
+        strategy_timeout: Optional[float],
+        debug: bool,
+        dump: bool
+    ) -> List[Tuple[Optional[Tuple], Optional[str]]]:
+        """
+        Solve all strategies in a process pool.
+
+        The timeout clock for a strategy starts when the pool hands it to a
+        worker, not at submission, so queued strategies are not penalized. An
+        abandoned solve keeps its worker busy until the pool is torn down, so if
+        any strategy times out the workers are terminated on the way out and the
+        call returns without waiting for them. A strategy whose worker dies
+        mid-solve is reported as "worker exited" rather than waited on.
+
+        Returns:
+            List of (result, error message) in self.strategies order
+        """
+        outcomes: List[Tuple[Optional[Tuple], Optional[str]]] = [(None, None)] * len(self.strategies)
+        max_workers = min(max_workers, len(self.strategies))
+        if debug:
+            logger.info(f"Solving {len(self.strategies)} strategies with {max_workers} worker processes")
+
+        # Wall-clock time each strategy started in a worker (0 = still queued) and that worker's pid
+        start_times = multiprocessing.Array('d', len(self.strategies), lock=False)
+        pids = multiprocessing.Array('i', len(self.strategies), lock=False)
+        pool = multiprocessing.Pool(
+            processes=max_workers,
+            initializer=_init_strategy_worker,
+            initargs=(self, start_times, pids)
+        )
+        pending: Dict[int, multiprocessing.pool.AsyncResult] = {}
+        abandoned = False
+        try:
+            for index, strategy in enumerate(self.strategies):
+                strategy_settings = settings["strategies"].get(str(strategy.strategy_id))
+                if strategy_settings is None:
+                    outcomes[index] = (None, f"No settings for strategy {strategy.strategy_id}")
+                    continue
+                pending[index] = pool.apply_async(_compute_strategy_in_worker, (index, strategy_settings, debug, dump))
+
+            while pending:
+                for index, async_result in list(pending.items()):
+                    if not async_result.ready():
+                        continue
+                    del pending[index]
+                    try:
+                        result, attributes = async_result.get()
+                    except Exception as e:
+                        outcomes[index] = (None, str(e))
+                        continue
+                    for name, value in attributes.items():
+                        setattr(self.strategies[index], name, value)
+                    outcomes[index] = (result, None)
+
+                # The pool replaces a worker that crashes (e.g. OOM-killed), but the
+                # strategy it was solving never completes
+                alive = {process.pid for process in multiprocessing.active_children()}
+                now = time.time()
+                for index in list(pending):
+                    if not start_times[index] or pending[index].ready():
+                        continue
+                    if pids[index] not in alive:
+                        del pending[index]
+                        abandoned = True
+                        outcomes[index] = (None, "worker exited")
+                    elif strategy_timeout is not None and now - start_times[index] > strategy_timeout:
+                        del pending[index]
+                        abandoned = True
+                        outcomes[index] = (None, f"Timed out after {strategy_timeout:.1f} seconds")
+                if pending:
+                    time.sleep(STRATEGY_POLL_INTERVAL)
+        finally:
+            if abandoned or pending:
+                # Abandoned solves would otherwise hold their workers until they finish,
+                # and the pool never finishes closing while one is outstanding
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+
+        return outcomes
+
     def to_dict(self) -> dict:
         """
         Convert Oracle state to a dictionary for serialization.
@@ -418,7 +600,11 @@ class Oracle:
             are replaced with None for JSON serialization.
         """
         oracle = cls.from_dict(event["oracle"])
-        results, netted_trades = oracle.compute_optimal_trades_for_all_strategies(settings=event["settings"])
+        results, netted_trades = oracle.compute_optimal_trades_for_all_strategies(
+            settings=event["settings"],
+            max_workers=event["settings"].get("max_workers", 1),
+            strategy_timeout=event["settings"].get("strategy_timeout")
+        )
 
         for strategy_id, result in results.items():
             status, should_trade, trade_summary, trades = result
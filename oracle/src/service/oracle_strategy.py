@@ -1,7 +1,7 @@
 import pandas as pd
 from datetime import date, datetime
 from functools import cached_property
-from typing import Optional, Dict, Tuple, List
+from typing import Any, Optional, Dict, Tuple, List
 import pulp
 from datetime import timedelta
 import json
@@ -33,11 +33,12 @@ from src.service.reports.comparison_report import (
     generate_drift_comparison_report,
     generate_factor_model_comparison_report
 )
-from src.service.helpers.create_decision_vars import create_decision_variables
+from src.service.helpers.create_decision_vars import create_decision_variables, create_model_variables
 from src.service.helpers.enums import OracleOptimizationType
-from src.service.objectives.taxes.tlh import calculate_tlh_impact, TLHTrade
+from src.service.objectives.taxes.tlh import calculate_tlh_impact, calculate_tlh_impact_sparse, TLHTrade
 from src.service.helpers.trade_applier import apply_trades_to_portfolio
 from src.service.helpers.trade_summary import generate_trade_summary_from_strategies
+from src.solvers import SparseLinearModel, SolverSession, SolverSettings, SolverError, SPARSE_SOLVER_AVAILABLE
 
 
 class OracleStrategy:
@@ -377,10 +378,11 @@ class OracleStrategy:
     def _solve_optimization(
         self,
         prob: pulp.LpProblem,
-        debug: bool = False
+        debug: bool = False,
+        label: Optional[str] = None
     ) -> tuple[int, float]:
         """
-        Solve the optimization problem using the CBC solver.
+        Solve the optimization problem with the configured solver backend (CBC by default).
 
         Attempts to solve the given linear programming problem and handles
         various solution statuses and potential failures.
@@ -388,6 +390,7 @@ class OracleStrategy:
         Args:
             prob (pulp.LpProblem): The PuLP optimization problem to solve
             debug (bool): Whether to print debug information
+            label (Optional[str]): Name of the sub-problem recorded in the solve statistics
 
         Returns:
             tuple[int, float]: Tuple containing:
@@ -397,7 +400,12 @@ class OracleStrategy:
         
         from src.solvers import solve_optimization_problem
         
-        status, optimized_value = solve_optimization_problem(prob)
+        solves_before = len(self.solver_stats)
+        status, optimized_value = solve_optimization_problem(
+            prob, settings=self.solver_settings, stats=self.solver_stats
+        )
+        for solve_stats in self.solver_stats[solves_before:]:
+            solve_stats.label = label
         
         if debug:
             # logger.info for debug steps
@@ -608,7 +616,7 @@ class OracleStrategy:
         if debug:
             logger.info("Solving no-trades scenario first...")
         
-        status, optimized_value = self._solve_optimization(prob_no_trades, debug)
+        status, optimized_value = self._solve_optimization(prob_no_trades, debug, label='no_trade')
         
         # Extract component values if solve was successful
         component_values = None
@@ -801,7 +809,7 @@ class OracleStrategy:
             buy_only_prob += sell_var == 0, f"force_no_sell_{sell_var.name}"
         
         # Solve buy-only optimization
-        status, buy_only_optimized_value = self._solve_optimization(buy_only_prob, debug)
+        status, buy_only_optimized_value = self._solve_optimization(buy_only_prob, debug, label='buy_only')
         
         if status is None or status != pulp.LpStatusOptimal:
             if debug:
@@ -842,6 +850,99 @@ class OracleStrategy:
             
         return status, buy_only_optimized_value, buy_only_prob, True, None
 
+    def _finalize_trades(
+        self,
+        gain_loss: pd.DataFrame,
+        total_value: float,
+        tlh_trades: List[TLHTrade],
+        is_2nd_buy_only_optimization: bool,
+        no_trade_optimized_value: float,
+        no_trade_components: Optional[Dict],
+        tlh_baseline_components: Optional[Dict],
+        optimized_value: float,
+        optimized_components: Optional[Dict],
+        weight_tax: float,
+        weight_transaction: float,
+        trade_rounding: int,
+        min_notional: float,
+        log_time: bool = False,
+        timing_data: Optional[Dict] = None
+    ) -> Tuple[bool, Dict, pd.DataFrame]:
+        """
+        Extract the solved trades, apply them and summarize the result.
+
+        Shared tail of the PuLP and sparse model paths; self.buys / self.sells
+        must hold the solved variables.
+
+        Returns:
+            Tuple[bool, Dict, pd.DataFrame]: Whether to trade, trade summary and trades
+        """
+        no_trade_components = no_trade_components or {}
+
+        trades = extract_trades(
+            buys=self.buys,
+            sells=self.sells,
+            gain_loss=gain_loss,
+            total_value=total_value,
+            prices=self.prices,
+            spreads=self.spreads,
+            tlh_trades=tlh_trades,
+            tax_normalization=self.TAX_NORMALIZATION * weight_tax,
+            transaction_normalization=self.TRANSACTION_NORMALIZATION * weight_transaction,
+            trade_rounding=trade_rounding,
+            min_notional=min_notional,
+        )
+        should_trade = len(trades) > 0
+
+        if log_time:
+            apply_trades_start = time.time()
+            
+        # Apply trades to get post-trade strategy
+        self.post_trade_strategy = apply_trades_to_portfolio(
+            tax_lots=self.tax_lots,
+            trades=trades,
+            cash=self.cash,
+            current_date=self.current_date,
+            strategy=self,
+            log_time=log_time
+        )
+        
+        if log_time:
+            timing_data['apply_trades'] = time.time() - apply_trades_start
+            logger.info(f"Apply trades time: {timing_data['apply_trades']:.3f} seconds")
+            trade_summary_start = time.time()
+        
+        # Generate trade summary by comparing pre and post strategies
+        trade_summary = generate_trade_summary_from_strategies(
+            pre_strategy=self,
+            is_2nd_buy_only_optimization=is_2nd_buy_only_optimization,
+            trades=trades,
+            total_value=total_value,
+            before_optimization={
+                'tax_cost': tlh_baseline_components.get('tax', no_trade_components.get('tax', 0)) if tlh_baseline_components else no_trade_components.get('tax', 0),
+                'drift_cost': tlh_baseline_components.get('drift', no_trade_components.get('drift', 0)) if tlh_baseline_components else no_trade_components.get('drift', 0),
+                'spread_costs': tlh_baseline_components.get('transaction', no_trade_components.get('transaction', 0)) if tlh_baseline_components else no_trade_components.get('transaction', 0),
+                'factor_cost': tlh_baseline_components.get('factor_model', no_trade_components.get('factor_model', 0)) if tlh_baseline_components else no_trade_components.get('factor_model', 0),
+                'cash_drag': tlh_baseline_components.get('cash_drag', no_trade_components.get('cash_drag', 0)) if tlh_baseline_components else no_trade_components.get('cash_drag', 0),
+                'overall': no_trade_optimized_value
+            },
+            after_optimization={
+                'tax_cost': optimized_components.get('tax', 0) if optimized_components else 0,
+                'drift_cost': optimized_components.get('drift', 0) if optimized_components else 0,
+                'spread_costs': optimized_components.get('transaction', 0) if optimized_components else 0,
+                'factor_cost': optimized_components.get('factor_model', 0) if optimized_components else 0,
+                'cash_drag': optimized_components.get('cash_drag', 0) if optimized_components else 0,
+                'overall': optimized_value
+            },
+            log_time=log_time
+        )
+
+        if log_time:
+            timing_data['trade_summary_generation'] = time.time() - trade_summary_start
+            logger.info(f"Trade summary generation time: {timing_data['trade_summary_generation']:.3f} seconds")
+
+        return should_trade, trade_summary, trades
+
     def compute_optimal_trades(
         self,
         weight_tax: float = 1,
@@ -860,6 +961,8 @@ class OracleStrategy:
         rank_penalty_factor: float = 0.0,  
         trade_rounding: int = 4,
         enforce_wash_sale_prevention: bool = True,
+        use_sparse_model: bool = True,
+        solver_settings: Optional[Dict[str, Any]] = None,
         debug: bool = True,
         dump: bool = False,
         log_time: bool = True
@@ -889,6 +992,13 @@ class OracleStrategy:
             rank_penalty_factor (float): Factor for rank penalty (default: 0.0)
             trade_rounding (int): Decimal places for trade rounding (default: 4)
             enforce_wash_sale_prevention (bool): Whether to enforce wash sale rules (default: True)
+            use_sparse_model (bool): Build the problem in matrix form and solve it in-process
+                with HiGHS; falls back to the PuLP model if no solver is available or the
+                solver fails. Keep scripts/check_sparse_parity.py clean before relying on
+                this default (default: True)
+            solver_settings (Optional[Dict[str, Any]]): SolverSettings fields (backend, time_limit,
+                gap_abs, gap_rel, threads, ...); backend defaults to CBC for the PuLP model and to HiGHS
+                for the sparse model (default: None)
             debug (bool): Whether to print debug information (default: True)
             dump (bool): Whether to dump strategy state (default: False)
             log_time (bool): Whether to log execution times (default: True)
@@ -924,6 +1034,8 @@ class OracleStrategy:
         self.range_min_weight_multiplier = range_min_weight_multiplier
         self.range_max_weight_multiplier = range_max_weight_multiplier
         self.enforce_wash_sale_prevention = enforce_wash_sale_prevention
+        self.solver_settings = SolverSettings.from_dict(solver_settings)
+        self.solver_stats = []
 
         if dump and self.oracle is not None:
             pass
@@ -981,6 +1093,19 @@ class OracleStrategy:
                 explanation_context={'case_type': 'empty_portfolio'}
             )
             return None, False, empty_summary, pd.DataFrame()
+
+        if use_sparse_model and SPARSE_SOLVER_AVAILABLE:
+            try:
+                return self._compute_optimal_trades_sparse(
+                    gain_loss=gain_loss,
+                    drift=drift,
+                    total_value=total_value,
+                    debug=debug,
+                    log_time=log_time
+                )
+            except SolverError as e:
+                # Only solver problems fall back; errors in the model builder propagate
+                logger.warning(f"Sparse model optimization failed ({e}); falling back to PuLP model")
         
         # Create optimization problem
         prob = pulp.LpProblem("Portfolio_Rebalance", pulp.LpMinimize)
@@ -1102,7 +1227,7 @@ class OracleStrategy:
         self._set_initial_values(self.buys, self.sells, gain_loss, debug)
         
         # Solve the optimization problem
-        status, optimized_value = self._solve_optimization(prob, debug)
+        status, optimized_value = self._solve_optimization(prob, debug, label='main')
 
         if log_time:
             timing_data['main_solve'] = time.time() - solve_start
@@ -1196,78 +1321,295 @@ class OracleStrategy:
         optimized_components = self.objective_manager.extract_component_values(prob)
         self.optimized_component_values = optimized_components
 
-        # Extract trades
-        trades = extract_trades(
-            buys=self.buys,
-            sells=self.sells,
+        should_trade, trade_summary, trades = self._finalize_trades(
             gain_loss=gain_loss,
             total_value=total_value,
-            prices=self.prices,
-            spreads=self.spreads,
             tlh_trades=tlh_trades,
-            tax_normalization=self.TAX_NORMALIZATION * weight_tax,
-            transaction_normalization=self.TRANSACTION_NORMALIZATION * weight_transaction,
+            is_2nd_buy_only_optimization=is_2nd_buy_only_optimization,
+            no_trade_optimized_value=no_trade_optimized_value,
+            no_trade_components=no_trade_components,
+            tlh_baseline_components=tlh_baseline_components,
+            optimized_value=optimized_value,
+            optimized_components=optimized_components,
+            weight_tax=weight_tax,
+            weight_transaction=weight_transaction,
             trade_rounding=trade_rounding,
             min_notional=min_notional,
+            log_time=log_time,
+            timing_data=timing_data if log_time else None
         )
-        if len(trades) == 0:
-            should_trade = False
-        
+
         if log_time:
-            apply_trades_start = time.time()
+            timing_data['post_processing'] = time.time() - post_process_start
+            logger.info(f"Post processing time: {timing_data['post_processing']:.3f} seconds")
+            timing_data['total_time'] = time.time() - start_time
             
-        # Apply trades to get post-trade strategy
-        self.post_trade_strategy = apply_trades_to_portfolio(
-            tax_lots=self.tax_lots,
-            trades=trades,
-            cash=self.cash,
-            current_date=self.current_date,
-            strategy=self,
-            log_time=log_time
-        )
+            # Log final timing information
+            logger.info("\n=== Final Optimization Timing Breakdown ===")
+            for section, duration in timing_data.items():
+                logger.info(f"{section}: {duration:.3f} seconds")
         
+        return status, should_trade, trade_summary, trades
+
+    def _compute_optimal_trades_sparse(
+        self,
+        gain_loss: pd.DataFrame,
+        drift: pd.DataFrame,
+        total_value: float,
+        debug: bool = False,
+        log_time: bool = False
+    ) -> tuple[Optional[int], bool, Dict, pd.DataFrame]:
+        """
+        Sparse-matrix counterpart of the PuLP path of compute_optimal_trades.
+
+        Builds the same objective and constraints into a SparseLinearModel
+        (vectorized blocks over buy/sell columns, CSR assembled once) and
+        solves it in-process with HiGHS. Sub-problems reuse the one model
+        through a SolverSession, changing only column bounds: the no-trade baseline solves the rows that existed before constraints
+        were added with all trades fixed to zero, TLH fixes trades through
+        column bounds, and the buy-only retry solves the pre-TLH bounds with
+        sells fixed to zero. Uses the parameters stored by compute_optimal_trades.
+
+        Returns:
+            Same tuple as compute_optimal_trades
+        """
+        timing_data = {}
         if log_time:
-            timing_data['apply_trades'] = time.time() - apply_trades_start
-            logger.info(f"Apply trades time: {timing_data['apply_trades']:.3f} seconds")
-            trade_summary_start = time.time()
-        
-        # Generate trade summary by comparing pre and post strategies
-        trade_summary = generate_trade_summary_from_strategies(
-            pre_strategy=self,
-            is_2nd_buy_only_optimization=is_2nd_buy_only_optimization,
-            trades=trades,
+            start_time = time.time()
+
+        model = SparseLinearModel("Portfolio_Rebalance")
+        session = SolverSession(model, self.solver_settings, stats=self.solver_stats)
+        self.optimization_problem = model
+        columns = create_model_variables(model, self.target_identifiers, gain_loss, self.prices, debug)
+        self.buys, self.sells = columns.buys, columns.sells
+        self.buy_df, self.sell_df = None, None
+
+        if self.optimization_type == OracleOptimizationType.BUY_ONLY:
+            model.fix(columns.sell_cols, 0.0)
+
+        self.objective_manager.calculate_objectives_sparse(
+            model=model,
+            columns=columns,
+            drift=drift,
+            gain_loss=gain_loss,
             total_value=total_value,
-            before_optimization={
-                'tax_cost': tlh_baseline_components.get('tax', no_trade_components.get('tax', 0)) if tlh_baseline_components else no_trade_components.get('tax', 0),
-                'drift_cost': tlh_baseline_components.get('drift', no_trade_components.get('drift', 0)) if tlh_baseline_components else no_trade_components.get('drift', 0),
-                'spread_costs': tlh_baseline_components.get('transaction', no_trade_components.get('transaction', 0)) if tlh_baseline_components else no_trade_components.get('transaction', 0),
-                'factor_cost': tlh_baseline_components.get('factor_model', no_trade_components.get('factor_model', 0)) if tlh_baseline_components else no_trade_components.get('factor_model', 0),
-                'cash_drag': tlh_baseline_components.get('cash_drag', no_trade_components.get('cash_drag', 0)) if tlh_baseline_components else no_trade_components.get('cash_drag', 0),
-                'overall': no_trade_optimized_value
-            },
-            after_optimization={
-                'tax_cost': optimized_components.get('tax', 0) if optimized_components else 0,
-                'drift_cost': optimized_components.get('drift', 0) if optimized_components else 0,
-                'spread_costs': optimized_components.get('transaction', 0) if optimized_components else 0,
-                'factor_cost': optimized_components.get('factor_model', 0) if optimized_components else 0,
-                'cash_drag': optimized_components.get('cash_drag', 0) if optimized_components else 0,
-                'overall': optimized_value
-            },
+            weight_tax=self.weight_tax,
+            weight_drift=self.weight_drift,
+            weight_transaction=self.weight_transaction,
+            weight_factor_model=self.weight_factor_model,
+            weight_cash_drag=self.weight_cash_drag,
+            rank_penalty_factor=self.rank_penalty_factor,
+            enforce_wash_sale_prevention=self.enforce_wash_sale_prevention,
+            debug=debug,
             log_time=log_time
         )
 
         if log_time:
-            timing_data['trade_summary_generation'] = time.time() - trade_summary_start
-            logger.info(f"Trade summary generation time: {timing_data['trade_summary_generation']:.3f} seconds")
-            timing_data['post_processing'] = time.time() - post_process_start
-            logger.info(f"Post processing time: {timing_data['post_processing']:.3f} seconds")
+            timing_data['objective_setup'] = time.time() - start_time
+            no_trade_start = time.time()
+
+        # No-trades baseline: only the objective rows, every trade fixed to zero
+        trade_cols = columns.trade_cols
+        no_trade_lower, no_trade_upper = model.col_lower.copy(), model.col_upper.copy()
+        no_trade_lower[trade_cols] = np.maximum(no_trade_lower[trade_cols], 0.0)
+        no_trade_upper[trade_cols] = np.minimum(no_trade_upper[trade_cols], 0.0)
+        no_trade_status, no_trade_optimized_value = session.solve(
+            lower=no_trade_lower, upper=no_trade_upper, checkpoint=model.checkpoint(), label='no_trade'
+        )
+        if no_trade_status != pulp.LpStatusOptimal or no_trade_optimized_value is None:
+            raise SolverError(f"Failed to solve no-trades scenario (status {pulp.LpStatus[no_trade_status]})")
+        no_trade_components = self.objective_manager.extract_sparse_component_values(model)
+        self.no_trade_component_values = no_trade_components
+        if debug:
+            logger.info(f"No-trades objective components: {no_trade_components}")
+
+        if log_time:
+            timing_data['no_trade_scenario'] = time.time() - no_trade_start
+            constraints_start = time.time()
+
+        if self.withdrawal_amount > 0:
+            self.constraints_manager.add_withdrawal_constraints_sparse(
+                model=model,
+                columns=columns,
+                drift=drift,
+                total_value=total_value,
+                withdrawal_amount=self.withdrawal_amount,
+                debug=debug
+            )
+
+        self.min_cash = self.min_cash_amount()
+        self.constraints_manager.add_constraints_sparse(
+            model=model,
+            columns=columns,
+            gain_loss=gain_loss,
+            tax_lots=self.tax_lots,
+            min_cash_amount=self.min_cash,
+            holding_time_delta=self.holding_time_delta,
+            min_notional=self.min_notional,
+            enforce_wash_sale_prevention=self.enforce_wash_sale_prevention
+        )
+
+        # Bounds before any TLH fixing, used by the buy-only retry
+        buy_only_lower, buy_only_upper = model.col_lower.copy(), model.col_upper.copy()
+
+        if log_time:
+            timing_data['constraints_setup'] = time.time() - constraints_start
+            tlh_start = time.time()
+
+        tlh_trades = []
+        tlh_baseline_components = None
+        if self.optimization_type.should_tlh() and self.should_tlh:
+            if self.oracle.wash_sale_restrictions is None:
+                raise ValueError("Wash sale restrictions not set in Oracle but we're trying to TLH.")
+            tlh_trades, sell_quantities, buy_quantities = calculate_tlh_impact_sparse(
+                model=model,
+                columns=columns,
+                drift_report=drift,
+                gain_loss_report=gain_loss,
+                prices=self.prices,
+                tax_rates=self.oracle.tax_rates,
+                constraints_manager=self.constraints_manager,
+                target_weights=self.targets,
+                total_portfolio_value=total_value,
+                min_weight_multiplier=self.range_min_weight_multiplier,
+                max_weight_multiplier=self.range_max_weight_multiplier,
+                min_notional=self.min_notional,
+                trade_rounding=self.trade_rounding,
+                min_loss_threshold=self.tlh_min_loss_threshold,
+                optimization_type=self.optimization_type,
+            )
+            # As in the PuLP path, the TLH baseline is evaluated at the no-trade solution
+            if sell_quantities or buy_quantities:
+                tlh_baseline_components = dict(no_trade_components)
+            if debug and tlh_trades:
+                logger.info(f"Found {len(tlh_trades)} TLH opportunities")
+
+        if log_time:
+            timing_data['tlh_optimization'] = time.time() - tlh_start
+            solve_start = time.time()
+
+        status, optimized_value = session.solve(label='main')
+
+        if log_time:
+            timing_data['main_solve'] = time.time() - solve_start
+        if debug:
+            logger.info(f"Sparse model: {model.n_cols} columns, {model.n_rows} rows, {model.num_nonzeros} nonzeros; "
+                        f"status {pulp.LpStatus[status]}")
+
+        if status != pulp.LpStatusOptimal:
+            status_str = pulp.LpStatus[status]
+            logger.warning(f"Optimization did not find an optimal solution (Status: {status_str}). Returning empty trades.")
+            empty_summary = generate_trade_summary_from_strategies(
+                pre_strategy=self,
+                is_2nd_buy_only_optimization=False,
+                trades=pd.DataFrame(),
+                total_value=total_value,
+                before_optimization=no_trade_components if no_trade_components else {},
+                after_optimization={},
+                explanation_context={
+                    'case_type': 'optimization_failed',
+                    'optimization_status': status_str,
+                    'additional_info': {'total_value': total_value}
+                }
+            )
+            return status, False, empty_summary, pd.DataFrame()
+
+        # Check for improvement against rebalance threshold
+        no_trade_optimized_value = tlh_baseline_components.get('overall', no_trade_optimized_value) if tlh_baseline_components else no_trade_optimized_value
+        improvement = no_trade_optimized_value - optimized_value
+        is_2nd_buy_only_optimization = False
+
+        if self.rebalance_threshold is not None and improvement < self.rebalance_threshold:
+            if debug:
+                logger.info(f"Rebalance improvement ({improvement}) is below threshold ({self.rebalance_threshold}). Trying buy-only optimization.")
+            is_2nd_buy_only_optimization = True
+            actual_cash = self.actuals[self.actuals['identifier'] == CASH_CUSIP_ID]['market_value'].sum()
+            rebalance_improvement = {'value': improvement, 'threshold': self.rebalance_threshold}
+            failure_context = None
+            buy_only_optimized_value = None
+
+            if actual_cash < self.min_cash:
+                failure_context = {
+                    'case_type': 'not_enough_cash_to_buy_only',
+                    'improvements': {'rebalance': rebalance_improvement},
+                    'additional_info': {'actual_cash': actual_cash, 'min_cash': self.min_cash}
+                }
+            else:
+                buy_only_lower[columns.sell_cols] = np.maximum(buy_only_lower[columns.sell_cols], 0.0)
+                buy_only_upper[columns.sell_cols] = np.minimum(buy_only_upper[columns.sell_cols], 0.0)
+                status, buy_only_optimized_value = session.solve(lower=buy_only_lower, upper=buy_only_upper, label='buy_only')
+                if status != pulp.LpStatusOptimal:
+                    buy_only_optimized_value = None
+                    failure_context = {
+                        'case_type': 'buy_only_failed',
+                        'improvements': {'rebalance': rebalance_improvement},
+                        'optimization_status': pulp.LpStatus[status],
+                        'additional_info': {'total_value': total_value, 'min_cash': self.min_cash, 'actual_cash': actual_cash}
+                    }
+                elif self.buy_threshold is not None and no_trade_optimized_value - buy_only_optimized_value < self.buy_threshold:
+                    failure_context = {
+                        'case_type': 'buy_only_below_threshold',
+                        'improvements': {
+                            'rebalance': rebalance_improvement,
+                            'buy_only': {'value': no_trade_optimized_value - buy_only_optimized_value, 'threshold': self.buy_threshold}
+                        },
+                        'additional_info': {'total_value': round(total_value, 2), 'min_cash': round(self.min_cash, 2), 'actual_cash': round(actual_cash, 2)}
+                    }
+                    buy_only_optimized_value = None
+
+            if buy_only_optimized_value is None:
+                buy_only_components = self.objective_manager.extract_sparse_component_values(model)
+                self.optimized_component_values = buy_only_components
+                empty_summary = generate_trade_summary_from_strategies(
+                    pre_strategy=self,
+                    is_2nd_buy_only_optimization=True,
+                    trades=pd.DataFrame(),
+                    total_value=total_value,
+                    before_optimization=no_trade_components if no_trade_components else {},
+                    after_optimization={
+                        'tax_cost': buy_only_components.get('tax', 0) or 0,
+                        'drift_cost': buy_only_components.get('drift', 0) or 0,
+                        'spread_costs': buy_only_components.get('transaction', 0) or 0,
+                        'factor_cost': buy_only_components.get('factor_model', 0) or 0,
+                        'cash_drag': buy_only_components.get('cash_drag', 0) or 0,
+                        'overall': buy_only_components
+                    },
+                    explanation_context=failure_context
+                )
+                return status, False, empty_summary, pd.DataFrame()
+
+            optimized_value = buy_only_optimized_value
+
+        optimized_components = self.objective_manager.extract_sparse_component_values(model)
+        self.optimized_component_values = optimized_components
+
+        should_trade, trade_summary, trades = self._finalize_trades(
+            gain_loss=gain_loss,
+            total_value=total_value,
+            tlh_trades=tlh_trades,
+            is_2nd_buy_only_optimization=is_2nd_buy_only_optimization,
+            no_trade_optimized_value=no_trade_optimized_value,
+            no_trade_components=no_trade_components,
+            tlh_baseline_components=tlh_baseline_components,
+            optimized_value=optimized_value,
+            optimized_components=optimized_components,
+            weight_tax=self.weight_tax,
+            weight_transaction=self.weight_transaction,
+            trade_rounding=self.trade_rounding,
+            min_notional=self.min_notional,
+            log_time=log_time,
+            timing_data=timing_data
+        )
+
+        if debug:
+            logger.info(f"Solver session: {session.get_stats()}")
+
+        if log_time:
             timing_data['total_time'] = time.time() - start_time
-            
-            # Log final timing information
-            logger.info("\n=== Final Optimization Timing Breakdown ===")
+            logger.info("\n=== Sparse Model Optimization Timing Breakdown ===")
             for section, duration in timing_data.items():
                 logger.info(f"{section}: {duration:.3f} seconds")
-        
+
         return status, should_trade, trade_summary, trades
 
     def calculate_max_withdrawal_amount(
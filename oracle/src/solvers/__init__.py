@@ -1,5 +1,30 @@
-from .solver import solve_optimization_problem
+from .solver import (
+    solve_optimization_problem,
+    SPARSE_SOLVER_AVAILABLE,
+    SolverSettings,
+    SolveStats,
+    SolverBackend,
+    SolverError,
+    SOLVER_BACKENDS,
+    register_solver_backend,
+    get_solver_backend,
+)
+from .session import SolverSession, solve_sparse_model
+from .sparse_model import SparseLinearModel, LinearExpression, ModelVariable
 
 __all__ = [
     solve_optimization_problem,
+    solve_sparse_model,
+    SPARSE_SOLVER_AVAILABLE,
+    SolverSettings,
+    SolveStats,
+    SolverBackend,
+    SolverError,
+    SOLVER_BACKENDS,
+    register_solver_backend,
+    get_solver_backend,
+    SolverSession,
+    SparseLinearModel,
+    LinearExpression,
+    ModelVariable,
 ]
\ No newline at end of file
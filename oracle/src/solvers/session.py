@@ -0,0 +1,211 @@
+import logging
+import numpy as np
+import pulp
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .solver import SolverSettings, SolveStats, get_solver_backend
+from .sparse_model import SparseLinearModel
+
+logger = logging.getLogger(__name__)
+
+# Slack allowed when checking a stored solution against new column bounds
+BOUND_TOLERANCE = 1e-9
+
+
+class _Assembled:
+    """Solver inputs for one (rows, columns, objective) state of a model"""
+
+    __slots__ = ('n_rows', 'n_cols', 'c', 'A', 'row_lower', 'row_upper', 'integrality')
+
+    def __init__(self, model: SparseLinearModel, n_rows: int, n_cols: int):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.c = model.objective_vector(n_cols)
+        self.integrality = model.integrality[:n_cols].copy()
+        self.A = model.to_csr()[:n_rows, :n_cols].tocsr() if n_rows else None
+        self.row_lower = model.row_lower[:n_rows]
+        self.row_upper = model.row_upper[:n_rows]
+
+
+class _Incumbent:
+    """An optimal solve: the bounds it was solved under and its solution"""
+
+    __slots__ = ('key', 'lower', 'upper', 'x', 'status')
+
+    def __init__(self, key: Tuple, lower: np.ndarray, upper: np.ndarray, x: np.ndarray, status: int):
+        self.key = key
+        self.lower = lower
+        self.upper = upper
+        self.x = x
+        self.status = status
+
+
+class SolverSession:
+    """
+    Keeps a SparseLinearModel resident across the sub-problems of one
+    rebalance decision (no-trade baseline, main solve, buy-only retry).
+
+    Sub-problems differ only in column bounds (and in how many rows/columns
+    of the append-only model they see), so the objective vector, CSR matrix
+    and row bounds are assembled once per model state and reused. Optimal
+    solutions are kept as incumbents: when a later sub-problem only tightens
+    the bounds of an earlier one over the same rows, and that earlier optimum
+    still satisfies the tighter bounds, it is optimal for the sub-problem too
+    and is returned without calling the solver.
+
+    The solver interfaces take no starting basis or MIP start, so every
+    sub-problem that cannot reuse an incumbent is still a fresh in-process
+    solve (without any file I/O) on the backend chosen by the settings.
+    """
+
+    def __init__(
+        self,
+        model: SparseLinearModel,
+        settings: Optional[Union[SolverSettings, Dict[str, Any]]] = None,
+        stats: Optional[List[SolveStats]] = None
+    ):
+        """
+        Initialize a solver session.
+
+        Args:
+            model: The matrix-form problem; rows/columns may still be appended
+                between solves
+            settings: SolverSettings (or dict) for every solver call
+            stats: Optional list the SolveStats of every call are appended to
+        """
+        self.model = model
+        self.settings = SolverSettings.from_dict(settings)
+        self.backend = get_solver_backend(self.settings.backend, arrays=True)
+        self._assembled: Dict[Tuple, _Assembled] = {}
+        self._incumbents: List[_Incumbent] = []
+        self.solve_stats: List[SolveStats] = stats if stats is not None else []
+
+        self.stats = {
+            "solves": 0,
+            "reused": 0,
+            "solve_time": 0.0
+        }
+
+    def _state_key(self, n_rows: int, n_cols: int) -> Tuple:
+        # Rows, columns and objective terms are append-only, so counts identify a state
+        return n_rows, n_cols, len(self.model.objective.cols)
+
+    def _assemble(self, key: Tuple) -> _Assembled:
+        assembled = self._assembled.get(key)
+        if assembled is None:
+            assembled = _Assembled(self.model, key[0], key[1])
+            self._assembled[key] = assembled
+        return assembled
+
+    def _find_incumbent(self, key: Tuple, lower: np.ndarray, upper: np.ndarray) -> Optional[_Incumbent]:
+        """An earlier optimum of a relaxation of this sub-problem that is feasible for it"""
+        for incumbent in reversed(self._incumbents):
+            if incumbent.key != key:
+                continue
+            if np.any(lower < incumbent.lower) or np.any(upper > incumbent.upper):
+                continue
+            if np.all(incumbent.x >= lower - BOUND_TOLERANCE) and np.all(incumbent.x <= upper + BOUND_TOLERANCE):
+                return incumbent
+        return None
+
+    def solve(
+        self,
+        lower: Optional[np.ndarray] = None,
+        upper: Optional[np.ndarray] = None,
+        checkpoint: Optional[Tuple[int, int]] = None,
+        label: Optional[str] = None
+    ) -> Tuple[int, Optional[float]]:
+        """
+        Solve the model (or the part of it up to checkpoint) under the given bounds.
+
+        Args:
+            lower, upper: Optional column bound overrides (full length); default
+                to the model's current bounds
+            checkpoint: Optional (rows, columns) from model.checkpoint(); only
+                the rows/columns that existed at that point are solved
+            label: Name of the sub-problem recorded in its SolveStats
+
+        Returns:
+            tuple: (status, objective_value) using PuLP status codes. The solution
+            vector (zero-padded to all model columns) is stored on model.solution.
+        """
+        model = self.model
+        n_rows, n_cols = checkpoint if checkpoint is not None else model.checkpoint()
+        lower = (model.col_lower if lower is None else lower)[:n_cols].copy()
+        upper = (model.col_upper if upper is None else upper)[:n_cols].copy()
+        key = self._state_key(n_rows, n_cols)
+
+        incumbent = self._find_incumbent(key, lower, upper)
+        if incumbent is not None:
+            self.stats["reused"] += 1
+            result = self._store_solution(incumbent.status, incumbent.x, n_cols)
+            self.solve_stats.append(SolveStats(
+                backend="reused", status=pulp.LpStatus[incumbent.status], wall_time=0.0,
+                nodes=0, objective=result[1], optimal=True, label=label
+            ))
+            return result
+
+        assembled = self._assemble(key)
+        status, x, solve_stats = self.backend.solve_arrays(
+            assembled.c, assembled.A, assembled.row_lower, assembled.row_upper,
+            assembled.integrality, lower, upper, self.settings
+        )
+        solve_stats.label = label
+        self.solve_stats.append(solve_stats)
+        self.stats["solves"] += 1
+        self.stats["solve_time"] += solve_stats.wall_time
+
+        if x is None:
+            model.solution = None
+            return status, None
+
+        x = np.asarray(x, dtype=np.float64).copy()
+        # Integer columns come back as floats close to integral values
+        integral = assembled.integrality == 1
+        x[integral] = np.round(x[integral])
+
+        # Only proven optima are safe to reuse for tighter sub-problems
+        if solve_stats.optimal:
+            self._incumbents.append(_Incumbent(key, lower, upper, x, status))
+        status, objective_value = self._store_solution(status, x, n_cols)
+        # Report the model objective (including its constant term)
+        solve_stats.objective = objective_value
+        return status, objective_value
+
+    def _store_solution(self, status: int, x: np.ndarray, n_cols: int) -> Tuple[int, float]:
+        solution = np.zeros(self.model.n_cols)
+        solution[:n_cols] = x
+        self.model.solution = solution
+        return status, self.model.objective.value(solution)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get session statistics"""
+        return dict(self.stats)
+
+
+def solve_sparse_model(model, time_limit=60, gap_abs=0.01, checkpoint=None, lower=None, upper=None, settings=None, gap_rel=None):
+    """
+    Solve a SparseLinearModel in-process (HiGHS via highspy, else scipy.optimize.milp).
+
+    One-off solve; use a SolverSession to solve several sub-problems of the
+    same model.
+
+    Args:
+        model (SparseLinearModel): The matrix-form problem to solve
+        time_limit (int): Time limit in seconds
+        gap_abs (float): Absolute optimality gap
+        checkpoint (tuple): Optional (rows, columns) from model.checkpoint(); only
+            the rows/columns that existed at that point are solved
+        lower, upper (np.ndarray): Optional column bound overrides (full length)
+        settings (SolverSettings or dict): Solver settings; overrides
+            time_limit/gap_abs/gap_rel when given
+        gap_rel (float): Relative optimality gap (default: none)
+
+    Returns:
+        tuple: (status, objective_value) using PuLP status codes. The solution
+        vector (zero-padded to all model columns) is stored on model.solution.
+    """
+    if settings is None:
+        settings = SolverSettings(time_limit=time_limit, gap_abs=gap_abs, gap_rel=gap_rel)
+    session = SolverSession(model, settings)
+    return session.solve(lower=lower, upper=upper, checkpoint=checkpoint)
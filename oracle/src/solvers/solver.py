@@ -1,62 +1,412 @@
 from shutil import which
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Optional, Tuple
+import time
+import numpy as np
 import pulp
 import os
 import logging
 
+try:
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    SCIPY_MILP_AVAILABLE = True
+except ImportError:  # scipy < 1.9
+    SCIPY_MILP_AVAILABLE = False
+
+try:
+    import highspy
+    HIGHSPY_AVAILABLE = True
+except ImportError:
+    HIGHSPY_AVAILABLE = False
+
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
 COIN_CMD_PATH = which("cbc") or "/opt/homebrew/opt/cbc/bin/cbc"
 
-def solve_optimization_problem(prob, time_limit=60, gap_rel=0.01, warm_start=True):
+# HiGHS' default mip_rel_gap, used where only a relative gap can be set
+SCIPY_DEFAULT_GAP_REL = 1e-4
+
+
+class SolverError(RuntimeError):
+    """No solver backend is usable, or a solve ended without a usable solution"""
+
+
+@dataclass
+class SolverSettings:
     """
-    Solve a PuLP optimization problem using the CBC solver with optimized parameters.
-    Falls back to default solver if CBC is not available.
-    
-    Args:
-        prob (pulp.LpProblem): The PuLP optimization problem to solve
-        time_limit (int): Time limit in seconds
-        gap_rel (float): Relative optimality gap
-        warm_start (bool): Whether to use warm start
-        
-    Returns:
-        tuple: (status, objective_value) - The solution status and objective value
+    Solver options; backend None picks the first available backend for the model type.
+
+    gap_abs is an absolute objective gap (CBC allowableGap, HiGHS mip_abs_gap) and
+    gap_rel a relative one (CBC ratioGap, HiGHS mip_rel_gap); None leaves that
+    criterion off. The defaults reproduce the original CBC call (allowableGap 0.01).
     """
-    try:
-        # Check if CBC solver exists
+    backend: Optional[str] = None
+    time_limit: float = 60
+    gap_abs: Optional[float] = 0.01
+    gap_rel: Optional[float] = None
+    threads: Optional[int] = None
+    warm_start: bool = True             # CBC only
+    max_nodes: Optional[int] = 10000    # CBC only
+    max_solutions: Optional[int] = 1    # CBC only
+
+    @classmethod
+    def from_dict(cls, settings: Optional[Dict[str, Any]]) -> 'SolverSettings':
+        """Build settings from a (possibly partial) dict, ignoring unknown keys"""
+        if isinstance(settings, SolverSettings):
+            return settings
+        names = {f.name for f in fields(cls)}
+        unknown = set(settings or {}) - names
+        if unknown:
+            logger.warning(f"Ignoring unknown solver settings: {sorted(unknown)}")
+        return cls(**{k: v for k, v in (settings or {}).items() if k in names})
+
+
+@dataclass
+class SolveStats:
+    """Statistics of one solver call, reported in the trade summary"""
+    backend: str
+    status: str
+    wall_time: float
+    nodes: Optional[int] = None
+    gap: Optional[float] = None
+    objective: Optional[float] = None
+    optimal: bool = False  # proven optimal within the gap, not stopped by a limit
+    label: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SolverBackend:
+    """
+    A solver usable by the oracle. Backends implement solve_problem for PuLP
+    problems and/or solve_arrays for matrix-form models (SparseLinearModel).
+    """
+
+    name: str = ""
+    solves_problems: bool = False
+    solves_arrays: bool = False
+
+    def available(self) -> bool:
+        return True
+
+    def solve_problem(self, prob: pulp.LpProblem, settings: SolverSettings) -> Tuple[int, SolveStats]:
+        """Solve a PuLP problem in place; returns (PuLP status, stats)"""
+        raise NotImplementedError(f"{self.name} backend does not solve PuLP problems")
+
+    def solve_arrays(
+        self,
+        c: np.ndarray,
+        A: Any,
+        row_lower: np.ndarray,
+        row_upper: np.ndarray,
+        integrality: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        settings: SolverSettings
+    ) -> Tuple[int, Optional[np.ndarray], SolveStats]:
+        """
+        Minimize c'x s.t. row_lower <= A x <= row_upper, lower <= x <= upper,
+        x[integrality == 1] integer. A is a CSR matrix (or None without rows).
+
+        Returns:
+            (PuLP status, solution or None, stats); status is Optimal whenever a
+            solution within the time limit/gap is returned
+        """
+        raise NotImplementedError(f"{self.name} backend does not solve matrix models")
+
+
+# Registered backends by name
+SOLVER_BACKENDS: Dict[str, SolverBackend] = {}
+
+# Preference order when no (or an unavailable) backend is requested
+PROBLEM_BACKEND_PREFERENCE = ("cbc", "highs")
+ARRAY_BACKEND_PREFERENCE = ("highs", "scipy")
+
+
+def register_solver_backend(backend: SolverBackend) -> SolverBackend:
+    """Register a backend under backend.name (replacing any existing one)"""
+    SOLVER_BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_solver_backend(name: Optional[str] = None, arrays: bool = False) -> SolverBackend:
+    """
+    Resolve a backend for PuLP problems (arrays=False) or matrix models (arrays=True).
+
+    Falls back through the preference order when name is None, unknown,
+    unavailable or does not support the model type.
+    """
+    def usable(backend: Optional[SolverBackend]) -> bool:
+        return (backend is not None
+                and (backend.solves_arrays if arrays else backend.solves_problems)
+                and backend.available())
+
+    if name is not None:
+        backend = SOLVER_BACKENDS.get(name)
+        if usable(backend):
+            return backend
+        logger.warning(f"Solver backend '{name}' is not available for {'matrix' if arrays else 'PuLP'} models; falling back")
+
+    for candidate in (ARRAY_BACKEND_PREFERENCE if arrays else PROBLEM_BACKEND_PREFERENCE):
+        backend = SOLVER_BACKENDS.get(candidate)
+        if usable(backend):
+            return backend
+    for backend in SOLVER_BACKENDS.values():
+        if usable(backend):
+            return backend
+    raise SolverError(f"No solver backend available for {'matrix' if arrays else 'PuLP'} models")
+
+
+def _problem_stats(backend: str, prob: pulp.LpProblem, status: int, wall_time: float,
+                   nodes: Optional[int] = None, gap: Optional[float] = None) -> SolveStats:
+    return SolveStats(
+        backend=backend,
+        status=pulp.LpStatus.get(status, str(status)),
+        wall_time=wall_time,
+        nodes=nodes,
+        gap=gap,
+        objective=float(pulp.value(prob.objective)) if pulp.value(prob.objective) is not None else None,
+        optimal=status == pulp.LpStatusOptimal
+    )
+
+
+class CbcBackend(SolverBackend):
+    """CBC through PuLP's command-line interface (writes an MPS file per solve)"""
+
+    name = "cbc"
+    solves_problems = True
+
+    def available(self) -> bool:
+        # PuLP's default solver is used when no cbc binary is found
+        return True
+
+    def solve_problem(self, prob, settings):
         cbc_exists = os.path.exists(COIN_CMD_PATH) or which("cbc") is not None
-        
+
         if cbc_exists:
-            # Convert gap_rel to string to avoid type issues
-            gap_rel_str = str(gap_rel)
-            
-            # Configure the solver with optimized parameters
+            options = []
+            if settings.gap_abs is not None:
+                options += ['allowableGap', str(settings.gap_abs)]
+            if settings.gap_rel is not None:
+                options += ['ratioGap', str(settings.gap_rel)]
+            if settings.max_solutions is not None:
+                options += ['maxSolutions', str(settings.max_solutions)]
+            if settings.max_nodes is not None:
+                options += ['maxNodes', str(settings.max_nodes)]
             solver = pulp.COIN_CMD(
                 path=COIN_CMD_PATH,
-                timeLimit=time_limit,
-                warmStart=warm_start,
-                options=[
-                    'allowableGap', gap_rel_str,
-                    'maxSolutions', '1',
-                    'maxNodes', '10000'
-                    
-                ]
+                timeLimit=settings.time_limit,
+                warmStart=settings.warm_start,
+                threads=settings.threads,
+                options=options
             )
         else:
             # Fallback to default PuLP solver
             logger.info("CBC solver not found, using default PuLP solver")
             solver = None  # Will use default solver
-        
-        # Solve the problem
-        if solver:
-            status = prob.solve(solver)
+
+        start = time.time()
+        status = prob.solve(solver) if solver else prob.solve()
+        return status, _problem_stats(self.name, prob, status, time.time() - start)
+
+
+class HighsBackend(SolverBackend):
+    """HiGHS in-process through highspy; the model is passed in memory"""
+
+    name = "highs"
+    solves_problems = True
+    solves_arrays = True
+
+    def available(self) -> bool:
+        return HIGHSPY_AVAILABLE
+
+    @staticmethod
+    def _info(highs) -> Tuple[Optional[int], Optional[float]]:
+        info = highs.getInfo()
+        nodes = int(info.mip_node_count) if info.mip_node_count >= 0 else None
+        gap = float(info.mip_gap) if np.isfinite(info.mip_gap) else None
+        return nodes, gap
+
+    def _configure(self, highs, settings: SolverSettings) -> None:
+        highs.setOptionValue("output_flag", False)
+        highs.setOptionValue("time_limit", float(settings.time_limit))
+        # Without a relative gap HiGHS stops on the absolute gap alone, as CBC does
+        highs.setOptionValue("mip_rel_gap", float(settings.gap_rel) if settings.gap_rel is not None else 0.0)
+        if settings.gap_abs is not None:
+            highs.setOptionValue("mip_abs_gap", float(settings.gap_abs))
+        if settings.threads is not None:
+            highs.setOptionValue("threads", int(settings.threads))
+
+    def solve_problem(self, prob, settings):
+        solver = pulp.HiGHS(
+            msg=False,
+            timeLimit=settings.time_limit,
+            gapRel=settings.gap_rel if settings.gap_rel is not None else 0.0,
+            gapAbs=settings.gap_abs,
+            threads=settings.threads
+        )
+        start = time.time()
+        status = prob.solve(solver)
+        nodes, gap = self._info(prob.solverModel)
+        return status, _problem_stats(self.name, prob, status, time.time() - start, nodes, gap)
+
+    def solve_arrays(self, c, A, row_lower, row_upper, integrality, lower, upper, settings):
+        start = time.time()
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(c)
+        lp.col_cost_ = np.asarray(c, dtype=np.float64)
+        lp.col_lower_ = np.asarray(lower, dtype=np.float64)
+        lp.col_upper_ = np.asarray(upper, dtype=np.float64)
+        if A is not None:
+            lp.num_row_ = A.shape[0]
+            lp.row_lower_ = np.asarray(row_lower, dtype=np.float64)
+            lp.row_upper_ = np.asarray(row_upper, dtype=np.float64)
+            lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+            lp.a_matrix_.num_col_ = len(c)
+            lp.a_matrix_.num_row_ = A.shape[0]
+            lp.a_matrix_.start_ = A.indptr
+            lp.a_matrix_.index_ = A.indices
+            lp.a_matrix_.value_ = A.data
+        if np.any(integrality):
+            lp.integrality_ = [
+                highspy.HighsVarType.kInteger if flag else highspy.HighsVarType.kContinuous
+                for flag in integrality
+            ]
+
+        highs = highspy.Highs()
+        self._configure(highs, settings)
+        highs.passModel(lp)
+        highs.run()
+
+        model_status = highs.getModelStatus()
+        info = highs.getInfo()
+        has_solution = info.primal_solution_status == 2  # kSolutionStatusFeasible
+        if has_solution and model_status in (highspy.HighsModelStatus.kOptimal,
+                                             highspy.HighsModelStatus.kTimeLimit,
+                                             highspy.HighsModelStatus.kIterationLimit,
+                                             highspy.HighsModelStatus.kSolutionLimit):
+            status = pulp.LpStatusOptimal
+        elif model_status == highspy.HighsModelStatus.kInfeasible:
+            status = pulp.LpStatusInfeasible
+        elif model_status in (highspy.HighsModelStatus.kUnbounded, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+            status = pulp.LpStatusUnbounded
+        elif model_status == highspy.HighsModelStatus.kTimeLimit:
+            status = pulp.LpStatusNotSolved
+        else:
+            status = pulp.LpStatusUndefined
+
+        x = np.asarray(highs.getSolution().col_value, dtype=np.float64) if status == pulp.LpStatusOptimal else None
+        nodes, gap = self._info(highs)
+        stats = SolveStats(
+            backend=self.name,
+            status=pulp.LpStatus[status],
+            wall_time=time.time() - start,
+            nodes=nodes,
+            gap=gap,
+            objective=float(info.objective_function_value) if x is not None else None,
+            optimal=model_status == highspy.HighsModelStatus.kOptimal
+        )
+        return status, x, stats
+
+
+class ScipyBackend(SolverBackend):
+    """
+    HiGHS in-process through scipy.optimize.milp (no threads option).
+
+    milp only takes a relative gap, so gap_abs cannot be honoured; without
+    gap_rel HiGHS' own default (SCIPY_DEFAULT_GAP_REL) is used.
+    """
+
+    name = "scipy"
+    solves_arrays = True
+
+    def available(self) -> bool:
+        return SCIPY_MILP_AVAILABLE
+
+    def solve_arrays(self, c, A, row_lower, row_upper, integrality, lower, upper, settings):
+        start = time.time()
+        constraints = [LinearConstraint(A, row_lower, row_upper)] if A is not None else []
+        result = milp(
+            c,
+            constraints=constraints,
+            integrality=integrality,
+            bounds=Bounds(lower, upper),
+            options={
+                'time_limit': settings.time_limit,
+                'mip_rel_gap': settings.gap_rel if settings.gap_rel is not None else SCIPY_DEFAULT_GAP_REL,
+                'disp': False
+            }
+        )
+
+        # Map HiGHS outcomes onto PuLP status codes so callers can keep using pulp.LpStatus
+        if result.x is not None and result.status in (0, 1):
+            status = pulp.LpStatusOptimal
+        elif result.status == 2:
+            status = pulp.LpStatusInfeasible
+        elif result.status == 3:
+            status = pulp.LpStatusUnbounded
+        elif result.status == 1:
+            status = pulp.LpStatusNotSolved
         else:
-            status = prob.solve()  # Use default solver
-            
+            status = pulp.LpStatusUndefined
+
+        nodes = result.get('mip_node_count')
+        gap = result.get('mip_gap')
+        stats = SolveStats(
+            backend=self.name,
+            status=pulp.LpStatus[status],
+            wall_time=time.time() - start,
+            nodes=int(nodes) if nodes is not None else None,
+            gap=float(gap) if gap is not None else None,
+            objective=float(result.fun) if result.x is not None else None,
+            optimal=result.status == 0
+        )
+        return status, (result.x if status == pulp.LpStatusOptimal else None), stats
+
+
+register_solver_backend(CbcBackend())
+register_solver_backend(HighsBackend())
+register_solver_backend(ScipyBackend())
+
+# Whether matrix-form models (SparseLinearModel) can be solved in-process
+SPARSE_SOLVER_AVAILABLE = HIGHSPY_AVAILABLE or SCIPY_MILP_AVAILABLE
+
+
+def solve_optimization_problem(prob, time_limit=60, gap_abs=0.01, warm_start=True, settings=None, stats=None, gap_rel=None):
+    """
+    Solve a PuLP optimization problem with a registered solver backend.
+    Uses CBC unless settings select another backend; falls back to PuLP's
+    default solver if the backend fails.
+
+    Args:
+        prob (pulp.LpProblem): The PuLP optimization problem to solve
+        time_limit (int): Time limit in seconds
+        gap_abs (float): Absolute optimality gap
+        warm_start (bool): Whether to use warm start
+        settings (SolverSettings or dict): Solver settings; overrides the
+            time_limit/gap_abs/gap_rel/warm_start arguments when given
+        stats (list): Optional list the SolveStats of this call is appended to
+        gap_rel (float): Relative optimality gap (default: none)
+
+    Returns:
+        tuple: (status, objective_value) - The solution status and objective value
+    """
+    if settings is None:
+        settings = SolverSettings(time_limit=time_limit, gap_abs=gap_abs, gap_rel=gap_rel, warm_start=warm_start)
+    else:
+        settings = SolverSettings.from_dict(settings)
+
+    try:
+        backend = get_solver_backend(settings.backend)
+        status, solve_stats = backend.solve_problem(prob, settings)
+        if stats is not None:
+            stats.append(solve_stats)
         objective_value = pulp.value(prob.objective)
-        
+
         return status, objective_value
-    
+
     except Exception as e:
         logger.error(f"Error solving optimization problem: {str(e)}")
         # Try with default solver as last resort
@@ -0,0 +1,263 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+ArrayLike = Union[Sequence[float], np.ndarray, float]
+
+
+class LinearExpression:
+    """
+    Sparse affine expression sum(vals * x[cols]) + constant over model columns.
+
+    Duplicate columns are allowed and summed when evaluated or added to a model.
+    """
+
+    __slots__ = ('cols', 'vals', 'constant')
+
+    def __init__(
+        self,
+        cols: Optional[np.ndarray] = None,
+        vals: Optional[np.ndarray] = None,
+        constant: float = 0.0
+    ):
+        self.cols = np.asarray(cols if cols is not None else [], dtype=np.int64)
+        self.vals = np.asarray(vals if vals is not None else [], dtype=np.float64)
+        self.constant = float(constant)
+
+    def __add__(self, other: 'LinearExpression') -> 'LinearExpression':
+        if not isinstance(other, LinearExpression):
+            return LinearExpression(self.cols, self.vals, self.constant + float(other))
+        return LinearExpression(
+            np.concatenate([self.cols, other.cols]),
+            np.concatenate([self.vals, other.vals]),
+            self.constant + other.constant
+        )
+
+    __radd__ = __add__
+
+    def __mul__(self, scalar: float) -> 'LinearExpression':
+        return LinearExpression(self.cols, self.vals * scalar, self.constant * scalar)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'LinearExpression':
+        return self * -1.0
+
+    def __sub__(self, other: 'LinearExpression') -> 'LinearExpression':
+        return self + (-other)
+
+    def value(self, x: np.ndarray) -> float:
+        """Evaluate at a solution vector"""
+        return float(self.vals @ x[self.cols] + self.constant) if len(self.cols) else self.constant
+
+
+class ModelVariable:
+    """
+    Handle on one model column exposing the small part of the pulp.LpVariable
+    interface the trade extraction code relies on (name, value(), varValue).
+    """
+
+    __slots__ = ('model', 'col', 'name')
+
+    def __init__(self, model: 'SparseLinearModel', col: int, name: str):
+        self.model = model
+        self.col = col
+        self.name = name
+
+    @property
+    def varValue(self) -> Optional[float]:
+        solution = self.model.solution
+        return None if solution is None else float(solution[self.col])
+
+    def value(self) -> Optional[float]:
+        return self.varValue
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class SparseLinearModel:
+    """
+    Mixed-integer linear program in matrix form: minimize c'x + c0 subject to
+    row_lower <= A x <= row_upper and col_lower <= x <= col_upper.
+
+    Columns and rows are appended in vectorized blocks (COO triplets) and the
+    constraint matrix is assembled once into CSR when the model is solved, so
+    construction cost is linear in the number of nonzeros.
+    """
+
+    def __init__(self, name: str = "Portfolio_Rebalance"):
+        self.name = name
+        self.n_cols = 0
+        self.n_rows = 0
+        self._col_lower: List[np.ndarray] = []
+        self._col_upper: List[np.ndarray] = []
+        self._integrality: List[np.ndarray] = []
+        self._col_names: List[Tuple[int, int, str]] = []  # (start, count, prefix) blocks
+        self._row_chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._row_lower: List[np.ndarray] = []
+        self._row_upper: List[np.ndarray] = []
+        self._row_names: List[Tuple[int, int, str]] = []
+        self.objective = LinearExpression()
+        self.components: Dict[str, LinearExpression] = {}
+        self.solution: Optional[np.ndarray] = None
+        self._csr: Optional[sp.csr_matrix] = None
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+
+    def add_variables(
+        self,
+        count: int,
+        lower: ArrayLike = 0.0,
+        upper: ArrayLike = np.inf,
+        integer: bool = False,
+        name: str = "x"
+    ) -> np.ndarray:
+        """Append count columns; returns their indices"""
+        start = self.n_cols
+        self._col_lower.append(np.broadcast_to(np.asarray(lower, dtype=np.float64), (count,)).copy())
+        self._col_upper.append(np.broadcast_to(np.asarray(upper, dtype=np.float64), (count,)).copy())
+        self._integrality.append(np.full(count, 1 if integer else 0, dtype=np.int8))
+        self._col_names.append((start, count, name))
+        self.n_cols += count
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def add_binary_variables(self, count: int, name: str = "b") -> np.ndarray:
+        return self.add_variables(count, 0.0, 1.0, integer=True, name=name)
+
+    def _consolidate_columns(self) -> None:
+        if len(self._col_lower) > 1:
+            self._col_lower = [np.concatenate(self._col_lower)]
+            self._col_upper = [np.concatenate(self._col_upper)]
+            self._integrality = [np.concatenate(self._integrality)]
+
+    @property
+    def col_lower(self) -> np.ndarray:
+        self._consolidate_columns()
+        return self._col_lower[0] if self._col_lower else np.empty(0)
+
+    @property
+    def col_upper(self) -> np.ndarray:
+        self._consolidate_columns()
+        return self._col_upper[0] if self._col_upper else np.empty(0)
+
+    @property
+    def integrality(self) -> np.ndarray:
+        self._consolidate_columns()
+        return self._integrality[0] if self._integrality else np.empty(0, dtype=np.int8)
+
+    def restrict_bounds(self, cols: np.ndarray, lower: ArrayLike = -np.inf, upper: ArrayLike = np.inf) -> None:
+        """
+        Intersect column bounds with [lower, upper].
+
+        Equivalent to adding the rows lower <= x <= upper: fixing a column that
+        is already fixed elsewhere to a different value leaves it infeasible
+        (lower > upper) rather than silently overriding the earlier fix.
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        col_lower, col_upper = self.col_lower, self.col_upper
+        np.maximum.at(col_lower, cols, np.broadcast_to(np.asarray(lower, dtype=np.float64), cols.shape))
+        np.minimum.at(col_upper, cols, np.broadcast_to(np.asarray(upper, dtype=np.float64), cols.shape))
+
+    def fix(self, cols: np.ndarray, value: ArrayLike = 0.0) -> None:
+        """Pin columns to value (see restrict_bounds)"""
+        self.restrict_bounds(cols, value, value)
+
+    def variable_name(self, col: int) -> str:
+        for start, count, prefix in self._col_names:
+            if start <= col < start + count:
+                return f"{prefix}_{col - start}"
+        raise IndexError(col)
+
+    # ------------------------------------------------------------------
+    # Rows
+    # ------------------------------------------------------------------
+
+    def add_rows(
+        self,
+        matrix: sp.spmatrix,
+        lower: ArrayLike = -np.inf,
+        upper: ArrayLike = np.inf,
+        name: str = "c"
+    ) -> np.ndarray:
+        """
+        Append lower <= matrix @ x <= upper; matrix may cover only the first
+        columns of the model. Returns the new row indices.
+        """
+        coo = sp.coo_matrix(matrix)
+        count = coo.shape[0]
+        start = self.n_rows
+        self._row_chunks.append((coo.row.astype(np.int64) + start, coo.col.astype(np.int64), coo.data.astype(np.float64)))
+        self._row_lower.append(np.broadcast_to(np.asarray(lower, dtype=np.float64), (count,)).copy())
+        self._row_upper.append(np.broadcast_to(np.asarray(upper, dtype=np.float64), (count,)).copy())
+        self._row_names.append((start, count, name))
+        self.n_rows += count
+        self._csr = None
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def add_constraint(
+        self,
+        expression: LinearExpression,
+        lower: float = -np.inf,
+        upper: float = np.inf,
+        name: str = "c"
+    ) -> int:
+        """Append lower <= expression <= upper as a single row"""
+        matrix = sp.coo_matrix(
+            (expression.vals, (np.zeros(len(expression.cols), dtype=np.int64), expression.cols)),
+            shape=(1, self.n_cols)
+        )
+        return int(self.add_rows(matrix, lower - expression.constant, upper - expression.constant, name)[0])
+
+    @property
+    def row_lower(self) -> np.ndarray:
+        return np.concatenate(self._row_lower) if self._row_lower else np.empty(0)
+
+    @property
+    def row_upper(self) -> np.ndarray:
+        return np.concatenate(self._row_upper) if self._row_upper else np.empty(0)
+
+    def to_csr(self) -> sp.csr_matrix:
+        """Constraint matrix over all current rows and columns"""
+        if self._csr is None or self._csr.shape != (self.n_rows, self.n_cols):
+            if self._row_chunks:
+                rows, cols, vals = (np.concatenate(part) for part in zip(*self._row_chunks))
+            else:
+                rows = cols = np.empty(0, dtype=np.int64)
+                vals = np.empty(0)
+            self._csr = sp.csr_matrix((vals, (rows, cols)), shape=(self.n_rows, self.n_cols))
+        return self._csr
+
+    def checkpoint(self) -> Tuple[int, int]:
+        """Current (rows, columns); solving up to a checkpoint ignores anything added later"""
+        return self.n_rows, self.n_cols
+
+    # ------------------------------------------------------------------
+    # Objective
+    # ------------------------------------------------------------------
+
+    def add_objective_component(self, name: str, expression: LinearExpression) -> None:
+        """Add a named term to the (minimized) objective"""
+        if name in self.components:
+            self.components[name] = self.components[name] + expression
+        else:
+            self.components[name] = expression
+        self.objective = self.objective + expression
+
+    def objective_vector(self, n_cols: Optional[int] = None) -> np.ndarray:
+        n_cols = self.n_cols if n_cols is None else n_cols
+        c = np.zeros(self.n_cols)
+        np.add.at(c, self.objective.cols, self.objective.vals)
+        return c[:n_cols]
+
+    def component_values(self, x: np.ndarray) -> Dict[str, float]:
+        """Value of every objective component (plus 'total') at x"""
+        values = {name: expression.value(x) for name, expression in self.components.items()}
+        values['total'] = self.objective.value(x)
+        return values
+
+    @property
+    def num_nonzeros(self) -> int:
+        return int(sum(len(chunk[0]) for chunk in self._row_chunks))
@@ -5,10 +5,14 @@ Aggregates exposure to individual companies across all holdings (direct + fund h
 """
 
 import logging
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple, Any
-import yfinance as yf
 from dataclasses import dataclass
-from collections import defaultdict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.fund_lookthrough import FUND_TYPES, ExposureMatrix, get_lookthrough_engine
+from shared.identifier_store import get_identifier_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +33,7 @@ class PositionLookthrough:
     
     # ETF/Fund types that need look-through analysis
     # ALL funds are exempt from direct concentration limits
-    FUND_TYPES = {'ETF', 'MUTUALFUND', 'CEF'}  # Closed-End Fund
-    
-    # Cache for fund holdings to avoid repeated API calls
-    _holdings_cache = {}
+    FUND_TYPES = FUND_TYPES  # ETF, MUTUALFUND, CEF (Closed-End Fund)
     
     def __init__(self, concentration_limit: float = 0.10):
         """
@@ -42,13 +43,14 @@ class PositionLookthrough:
             concentration_limit: Maximum allowed concentration in any single company (default 10%)
         """
         self.concentration_limit = concentration_limit
-        # Initialize mappings on first use
-        self._cik_to_ticker = None
-        self._ticker_to_cik = None
+        # Fund holdings are fetched in batches and cached on disk, shared by all instances
+        self.engine = get_lookthrough_engine()
+        # Compiled identifier store, opened on first lookup
+        self._identifier_store = None
         
     def get_fund_holdings(self, symbol: str) -> Dict[str, float]:
         """
-        Get holdings of an ETF or mutual fund using OpenBB SDK
+        Get holdings of an ETF or mutual fund (cached on disk by the lookthrough engine)
         
         Args:
             symbol: Fund ticker symbol
@@ -56,77 +58,10 @@ class PositionLookthrough:
         Returns:
             Dictionary of {holding_symbol: weight_in_fund}
         """
-        # Check cache first
-        if symbol in self._holdings_cache:
-            return self._holdings_cache[symbol]
-            
-        holdings = {}
-        try:
-            # First check if it's a fund using yfinance
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Check if it's a fund
-            quote_type = info.get('quoteType', '')
-            if quote_type not in self.FUND_TYPES:
-                # Not a fund, return empty holdings
-                return {}
-                
-            # Use OpenBB SDK with SEC provider only (tested and working)
-            from openbb import obb
-            
-            provider = 'sec'  # Standardize on SEC provider
-            last_error = None
-            
-            try:
-                logger.info(f"Using SEC provider for {symbol} holdings")
-                
-                result = obb.etf.holdings(symbol=symbol, provider=provider)
-                
-                if result and hasattr(result, 'results') and result.results:
-                    # Process OpenBB response
-                    for holding in result.results[:100]:  # Top 100 holdings
-                        # Get holding identifier
-                        holding_id = None
-                        
-                        # For SEC provider, use CUSIP to get ticker
-                        if hasattr(holding, 'cusip') and holding.cusip:
-                            # Map CUSIP to ticker using our comprehensive mapping
-                            holding_id = self._map_sec_holding_to_ticker(holding)
-                        
-                        if holding_id:
-                            # SEC provider uses 'weight' field
-                            weight = getattr(holding, 'weight', 0)
-                            
-                            # Convert percentage to decimal if needed
-                            if weight > 1:
-                                weight = weight / 100.0
-                                
-                            if weight > 0:
-                                holdings[holding_id] = weight
-                    
-                    if holdings:
-                        logger.info(f"✅ Got {len(holdings)} holdings for {symbol} from SEC")
-                else:
-                    logger.warning(f"SEC provider returned no data for {symbol}")
-                    
-            except Exception as e:
-                error_str = str(e)
-                logger.warning(f"SEC provider failed for {symbol}: {error_str[:100]}")
-                last_error = e
-            
-            # If SEC provider didn't work, log but don't fail (some funds don't have SEC data)
-            if not holdings and last_error:
-                logger.warning(f"Could not get ETF holdings for {symbol} from SEC: {last_error}")
-                # Return empty holdings rather than failing
-                return {}
-                
-        except Exception as e:
-            logger.warning(f"Could not get holdings for {symbol}: {e}")
-            
-        # Cache the result
-        self._holdings_cache[symbol] = holdings
-        return holdings
+        if not self.engine.is_fund(symbol):
+            # Not a fund, return empty holdings
+            return {}
+        return self.engine.get_holdings([symbol])[symbol].holdings
     
     def get_fund_holdings_from_mcp(self, symbol: str, mcp_holdings_data: List[Dict]) -> Dict[str, float]:
         """
@@ -147,95 +82,23 @@ class PositionLookthrough:
             if isinstance(holding, dict):
                 holding_symbol = holding.get('symbol', '')
                 weight = holding.get('weight', 0.0)
-                
-                # Convert percentage to decimal if needed
-                if weight > 1:
-                    weight = weight / 100.0
-                    
-                if holding_symbol and weight > 0:
-                    holdings[holding_symbol] = weight
-        
-        # Cache the result
-        self._holdings_cache[symbol] = holdings
-        logger.info(f"Processed {len(holdings)} holdings for {symbol} from MCP data")
-        
-        return holdings
+                if holding_symbol and weight:
+                    holdings[holding_symbol] = holdings.get(holding_symbol, 0.0) + weight
         
+        # Cache the result (weights are converted to fractions by the engine)
+        entry = self.engine.store_holdings(symbol, holdings, source='mcp')
+        logger.info(f"Processed {len(entry.holdings)} holdings for {symbol} from MCP data")
         
-    def _map_sec_holding_to_ticker(self, holding) -> str:
-        """
-        Map SEC holding data to ticker symbol using CUSIP-based matching
-        
-        Args:
-            holding: SEC holding object with cusip field
-            
-        Returns:
-            Ticker symbol or identifier
-        """
-        # CUSIP-based matching (only method)
-        if hasattr(holding, 'cusip') and holding.cusip:
-            ticker = self._cusip_to_ticker_lookup(holding.cusip)
-            if ticker:
-                logger.debug(f"CUSIP match: {holding.cusip[:6]} -> {ticker}")
-                return ticker
-            else:
-                # Use CUSIP prefix as identifier if no mapping found
-                logger.debug(f"No CUSIP match for {holding.cusip[:6]}")
-                return f"CUSIP:{holding.cusip[:6]}"
+        return entry.holdings
         
-        return "UNKNOWN"
-    
     
-    def _initialize_cik_ticker_mappings(self):
+    def _get_identifier_store(self):
         """
-        Initialize CIK-to-ticker and ticker-to-CIK mappings from SEC files
+        Open the compiled CUSIP/CIK/ticker store on first use
         """
-        import os
-        
-        if self._cik_to_ticker is not None:
-            return  # Already initialized
-        
-        self._cik_to_ticker = {}
-        self._ticker_to_cik = {}
-        
-        # Load ticker.txt (ticker -> CIK mapping)
-        ticker_file = '/home/hvksh/investing/data/ticker.txt'
-        if os.path.exists(ticker_file):
-            try:
-                with open(ticker_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and '\t' in line:
-                            ticker, cik = line.split('\t')
-                            ticker = ticker.upper()
-                            self._ticker_to_cik[ticker] = cik
-                            self._cik_to_ticker[cik] = ticker
-                
-                logger.info(f"✅ Loaded {len(self._cik_to_ticker)} CIK-to-ticker mappings from ticker.txt")
-            except Exception as e:
-                logger.error(f"Failed to load ticker.txt: {e}")
-        
-        # Also load from company_tickers.json for additional mappings
-        company_file = '/home/hvksh/investing/data/company_tickers.json'
-        if os.path.exists(company_file):
-            try:
-                import json
-                with open(company_file, 'r') as f:
-                    company_data = json.load(f)
-                
-                for key, company in company_data.items():
-                    if 'cik_str' in company and 'ticker' in company:
-                        cik = str(company['cik_str'])
-                        ticker = company['ticker'].upper()
-                        # Only add if not already present (ticker.txt takes precedence)
-                        if cik not in self._cik_to_ticker:
-                            self._cik_to_ticker[cik] = ticker
-                        if ticker not in self._ticker_to_cik:
-                            self._ticker_to_cik[ticker] = cik
-                
-                logger.info(f"✅ Total CIK-to-ticker mappings: {len(self._cik_to_ticker)}")
-            except Exception as e:
-                logger.error(f"Failed to load company_tickers.json: {e}")
+        if self._identifier_store is None:
+            self._identifier_store = get_identifier_store()
+        return self._identifier_store
     
     def _cik_to_ticker_lookup(self, cik: str) -> str:
         """
@@ -247,31 +110,12 @@ class PositionLookthrough:
         Returns:
             Ticker symbol or None
         """
-        if self._cik_to_ticker is None:
-            self._initialize_cik_ticker_mappings()
-        
-        # Try with and without leading zeros
-        cik_clean = str(int(cik))  # Remove leading zeros
-        
-        # Try exact match
-        if cik in self._cik_to_ticker:
-            return self._cik_to_ticker[cik]
-        
-        # Try without leading zeros
-        if cik_clean in self._cik_to_ticker:
-            return self._cik_to_ticker[cik_clean]
-        
-        # Try with 10-digit padding (SEC standard)
-        cik_padded = cik.zfill(10)
-        if cik_padded in self._cik_to_ticker:
-            return self._cik_to_ticker[cik_padded]
-        
-        return None
+        return self._get_identifier_store().ticker_for_cik(cik)
     
     def _cusip_to_ticker_lookup(self, cusip: str) -> str:
         """
         Look up ticker by CUSIP (using issuer prefix)
-        Uses our generated CUSIP-to-ticker mapping from SEC filings
+        Uses the compiled CUSIP-to-ticker and CUSIP-to-CIK-to-ticker mappings
         
         Args:
             cusip: CUSIP identifier
@@ -279,57 +123,7 @@ class PositionLookthrough:
         Returns:
             Ticker symbol or None
         """
-        if not hasattr(self, '_cusip_to_ticker'):
-            self._load_cusip_mappings()
-        
-        if not cusip or len(cusip) < 6:
-            return None
-        
-        # Use first 6 characters (issuer identifier)
-        cusip_prefix = cusip[:6].upper()
-        
-        # Try direct CUSIP-to-ticker mapping
-        if cusip_prefix in self._cusip_to_ticker:
-            return self._cusip_to_ticker[cusip_prefix]
-        
-        # Try via CUSIP-to-CIK-to-ticker
-        if cusip_prefix in self._cusip_to_cik:
-            cik = self._cusip_to_cik[cusip_prefix]
-            ticker = self._cik_to_ticker_lookup(cik)
-            if ticker:
-                return ticker
-        
-        return None
-    
-    def _load_cusip_mappings(self):
-        """
-        Load CUSIP-to-ticker and CUSIP-to-CIK mappings
-        """
-        import json
-        import os
-        
-        self._cusip_to_ticker = {}
-        self._cusip_to_cik = {}
-        
-        # Load direct CUSIP-to-ticker mapping
-        cusip_ticker_file = '/home/hvksh/investing/data/cusip_to_ticker.json'
-        if os.path.exists(cusip_ticker_file):
-            try:
-                with open(cusip_ticker_file, 'r') as f:
-                    self._cusip_to_ticker = json.load(f)
-                logger.info(f"✅ Loaded {len(self._cusip_to_ticker)} CUSIP-to-ticker mappings")
-            except Exception as e:
-                logger.error(f"Failed to load CUSIP-to-ticker mapping: {e}")
-        
-        # Load CUSIP-to-CIK mapping
-        cusip_cik_file = '/home/hvksh/investing/data/cusip_to_cik.json'
-        if os.path.exists(cusip_cik_file):
-            try:
-                with open(cusip_cik_file, 'r') as f:
-                    self._cusip_to_cik = json.load(f)
-                logger.info(f"✅ Loaded {len(self._cusip_to_cik)} CUSIP-to-CIK mappings")
-            except Exception as e:
-                logger.error(f"Failed to load CUSIP-to-CIK mapping: {e}")
+        return self._get_identifier_store().ticker_for_cusip(cusip)
     
     
     def is_fund(self, symbol: str) -> bool:
@@ -342,13 +136,23 @@ class PositionLookthrough:
         Returns:
             True if the symbol is a fund
         """
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            quote_type = info.get('quoteType', '')
-            return quote_type in self.FUND_TYPES
-        except:
-            return False
+        return self.engine.is_fund(symbol)
+    
+    def exposure_matrix(self, symbols: List[str]) -> ExposureMatrix:
+        """
+        Sparse symbol -> underlying company exposure matrix for a universe
+        
+        Reuse it to score many candidate allocations over the same symbols:
+        matrix.exposures(weights) is a single sparse mat-vec per allocation
+        (or one sparse mat-mat for a block of candidates).
+        
+        Args:
+            symbols: Portfolio or candidate universe symbols
+            
+        Returns:
+            ExposureMatrix with one column per symbol
+        """
+        return self.engine.build_exposure_matrix(symbols)
             
     def calculate_concentration(self, portfolio: Dict[str, float]) -> Dict[str, float]:
         """
@@ -360,24 +164,9 @@ class PositionLookthrough:
         Returns:
             Dictionary of {underlying_symbol: total_concentration}
         """
-        # Aggregate exposure to each underlying company
-        company_exposure = defaultdict(float)
-        
-        for symbol, weight in portfolio.items():
-            if self.is_fund(symbol):
-                # Get fund holdings and calculate weighted exposure
-                holdings = self.get_fund_holdings(symbol)
-                for holding_symbol, holding_weight in holdings.items():
-                    # Total exposure = portfolio weight * weight in fund
-                    company_exposure[holding_symbol] += weight * holding_weight
-                    logger.debug(f"{symbol} ({weight:.2%}) holds {holding_symbol} at {holding_weight:.2%} "
-                               f"= {weight * holding_weight:.3%} exposure")
-            else:
-                # Direct holding
-                company_exposure[symbol] += weight
-                logger.debug(f"Direct holding: {symbol} = {weight:.2%}")
-                
-        return dict(company_exposure)
+        # Total exposure = sum over positions of portfolio weight * weight in fund
+        # (direct holdings map to themselves with weight 1)
+        return self.exposure_matrix(list(portfolio)).exposure_dict(portfolio)
         
     def check_concentration_limits(self, portfolio: Dict[str, float]) -> ConcentrationResult:
         """
@@ -396,9 +185,11 @@ class PositionLookthrough:
         fund_positions = {}
         individual_positions = {}
         
+        # Classify all positions in one batch
+        quote_types = self.engine.quote_types(portfolio)
         for ticker, weight in portfolio.items():
             # Check if it's a fund (ETF, Mutual Fund, or CEF)
-            if self.is_fund(ticker):
+            if quote_types[ticker] in self.FUND_TYPES:
                 fund_positions[ticker] = weight
                 logger.info(f"{ticker} identified as fund - exempt from direct concentration limit")
             else:
@@ -9,7 +9,12 @@ from typing import Dict, Any, Optional, List, Tuple
 import yfinance as yf
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 import re
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
@@ -180,21 +185,68 @@ class SymbolResolver:
         }
         return mapping.get(quote_type, 'EQUITY')
     
-    def validate_symbols_batch(self, symbols: List[str]) -> Dict[str, SymbolInfo]:
+    def validate_symbols_batch(self, symbols: List[str], offline: bool = True) -> Dict[str, SymbolInfo]:
         """
         Validate multiple symbols at once
         
+        Symbols known to the offline symbol index are validated from it with
+        no network calls (name, asset type, fund category and exchange; no live
+        price or sector). Only symbols the index does not know are validated live.
+        
         Args:
             symbols: List of ticker symbols
+            offline: Use the symbol index first (False validates every symbol live)
             
         Returns:
             Dictionary mapping symbols to SymbolInfo objects
         """
         results = {}
         for symbol in symbols:
-            results[symbol] = self.validate_symbol(symbol)
+            info = self.validate_symbol_offline(symbol) if offline else None
+            results[symbol] = info if info is not None else self.validate_symbol(symbol)
         return results
     
+    def validate_symbol_offline(self, symbol: str) -> Optional[SymbolInfo]:
+        """
+        Validate a symbol against the offline symbol index
+        
+        Args:
+            symbol: Ticker symbol (any spelling, e.g. BRK.B)
+            
+        Returns:
+            SymbolInfo for the canonical symbol, or None if the index does not know it
+        """
+        # Renamed and delisted symbols go through validate_symbol's handling
+        if symbol in self.SYMBOL_CHANGES:
+            return None
+        
+        try:
+            record = get_symbol_index().lookup(symbol)
+        except Exception as e:
+            logger.warning(f"Symbol index unavailable: {e}")
+            return None
+        if record is None:
+            return None
+        
+        asset_type = record['quote_type']
+        is_fund = asset_type in ['ETF', 'MUTUALFUND', 'CEF']
+        return SymbolInfo(
+            symbol=record['symbol'],
+            valid=True,
+            name=record['name'] or record['symbol'],
+            asset_type=asset_type,
+            category=record['category'] if is_fund else "",
+            exchange=record['exchange'],
+            currency="",
+            current_price=0,
+            is_fund=is_fund,
+            is_tradable=True,
+            metadata={
+                'source': 'symbol_index',
+                'cik': record['cik']
+            }
+        )
+    
     def get_correct_classification(self, symbol: str) -> str:
         """
         Get the correct classification for a symbol
@@ -23,6 +23,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
 from data_pipeline import MarketDataPipeline
 from confidence_scoring import ConfidenceScorer
 from portfolio_state_client import get_portfolio_state_client
+from optimization.risk_parity import RiskBudgetSolver
+from covariance_engine import get_covariance_engine
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +39,8 @@ server = FastMCP("Portfolio Optimizer v3 - Professional Grade")
 data_pipeline = MarketDataPipeline()
 confidence_scorer = ConfidenceScorer()
 portfolio_state_client = get_portfolio_state_client()
+risk_parity_solver = RiskBudgetSolver()
+covariance_engine = get_covariance_engine()
 
 # Try to import advanced libraries
 try:
@@ -50,7 +54,7 @@ except ImportError as e:
     logger.error(f"Riskfolio-Lib not available: {e}")
 
 try:
-    from pypfopt import EfficientFrontier, risk_models, expected_returns
+    from pypfopt import EfficientFrontier, expected_returns
     from pypfopt import HRPOpt, BlackLittermanModel, plotting
     from pypfopt.discrete_allocation import DiscreteAllocation, get_latest_prices
     PYPFOPT_AVAILABLE = True
@@ -86,6 +90,7 @@ async def optimize_portfolio_advanced(
               - sectors: Dict[str, List[str]] (sector definitions)
               - sector_limits: Dict[str, float] (sector constraints)
             - discrete_allocation: bool (default False, converts to shares)
+            - risk_budgets: Dict[str, float] (optional Risk-Parity budgets per ticker)
     
     Returns:
         Comprehensive optimization results using professional algorithms
@@ -192,6 +197,10 @@ async def optimize_portfolio_advanced(
         prices_df = data['prices']
         returns_df = data['returns']
         
+        # Shared covariance estimates (cached per universe/window and reused by every method below)
+        sample_cov = covariance_engine.estimate(returns_df, 'sample')
+        lw_cov = covariance_engine.estimate(returns_df, 'ledoit_wolf')
+        
         # Get risk-free rate if needed
         if risk_free_rate is None:
             rf_data = data_pipeline.get_risk_free_rate('10y')
@@ -216,12 +225,11 @@ async def optimize_portfolio_advanced(
             # Calculate expected returns and covariance
             mu = expected_returns.mean_historical_return(prices_df)
             
-            # Use Ledoit-Wolf shrinkage for covariance
-            S = risk_models.CovarianceShrinkage(prices_df).ledoit_wolf()
+            # Use Ledoit-Wolf shrinkage for covariance (annualized)
+            S = lw_cov.to_frame(annualization=252)
             
             # Store shrinkage intensity
-            shrinkage_intensity = S[1] if isinstance(S, tuple) else 0
-            S = S[0] if isinstance(S, tuple) else S
+            shrinkage_intensity = lw_cov.shrinkage
             
             # a) Hierarchical Risk Parity (no covariance inversion needed)
             if 'HRP' in methods:
@@ -456,29 +464,44 @@ async def optimize_portfolio_advanced(
                             }
                     except Exception as e:
                         logger.warning(f"Riskfolio {risk_key} optimization failed: {e}")
-            
-            # Risk Parity Portfolio
-            if 'Risk-Parity' in methods:
-                try:
-                    weights_rp = port.rp_optimization(
-                        model='Classic',
-                        rm='MV',
-                        rf=risk_free_rate,
-                        b=None,  # Equal risk contribution
-                        hist=True
-                    )
-                    
-                    if weights_rp is not None and not weights_rp.empty:
-                        rp_dict = weights_rp.to_dict()['weights']
-                        
-                        result["optimal_portfolios"]["Risk-Parity-RF"] = {
-                            "method": "Risk Parity (Riskfolio)",
-                            "weights": rp_dict,
-                            "equal_risk_contribution": True,
-                            "optimization_success": True
-                        }
-                except Exception as e:
-                    logger.warning(f"Risk Parity optimization failed: {e}")
+        
+        # =========================
+        # 2b. RISK PARITY (shared ERC solver)
+        # =========================
+        if 'Risk-Parity' in methods:
+            try:
+                # Ledoit-Wolf covariance, annualized; warm-started from the previous solve
+                rp_cov = lw_cov.covariance * 252
+                rp_solution = risk_parity_solver.solve(
+                    rp_cov,
+                    budgets=config.get('risk_budgets'),
+                    tickers=list(tickers)
+                )
+                rp_weights = rp_solution['weights']
+                rp_return = float(data['optimization_data']['expected_returns'] @ rp_weights)
+                rp_vol = rp_solution['portfolio_volatility']
+                
+                result["optimal_portfolios"]["Risk-Parity-RF"] = {
+                    "method": "Risk Parity (equal risk contribution)" if config.get('risk_budgets') is None
+                              else "Risk Budgeting",
+                    "weights": rp_solution['weights_dict'],
+                    "expected_return": rp_return,
+                    "volatility": rp_vol,
+                    "sharpe_ratio": float((rp_return - risk_free_rate) / rp_vol) if rp_vol > 0 else 0.0,
+                    "risk_contributions": {
+                        t: float(rc) for t, rc in zip(tickers, rp_solution['risk_contributions'])
+                    },
+                    "equal_risk_contribution": config.get('risk_budgets') is None,
+                    "converged": rp_solution['converged'],
+                    "iterations": rp_solution['iterations'],
+                    "optimization_success": rp_solution['converged']
+                }
+            except Exception as e:
+                logger.warning(f"Risk Parity optimization failed: {e}")
+                result["optimal_portfolios"]["Risk-Parity-RF"] = {
+                    "optimization_success": False,
+                    "error": str(e)
+                }
         
         # =========================
         # 3. DISCRETE ALLOCATION
@@ -555,7 +578,7 @@ async def optimize_portfolio_advanced(
                     # Black-Litterman approach
                     bl_result = entropy_pooler.black_litterman_views(
                         market_weights=views_config['market_weights'],
-                        covariance=S if PYPFOPT_AVAILABLE else returns_df.cov(),
+                        covariance=S if PYPFOPT_AVAILABLE else sample_cov.to_frame(),
                         views=views_config.get('views', []),
                         tau=views_config.get('tau', 0.05)
                     )
@@ -718,7 +741,7 @@ async def optimize_portfolio_advanced(
                     mp_result = mp_optimizer.optimize_trajectory(
                         initial_holdings=initial_holdings,
                         expected_returns=mu if PYPFOPT_AVAILABLE else returns_df.mean(),
-                        covariance=S if PYPFOPT_AVAILABLE else returns_df.cov(),
+                        covariance=S if PYPFOPT_AVAILABLE else sample_cov.to_frame(),
                         horizon=config.get('horizon_days', 252),
                         rebalance_freq=config.get('rebalance_freq', 21),
                         transaction_cost=config.get('transaction_cost', 0.001),
@@ -737,7 +760,7 @@ async def optimize_portfolio_advanced(
                     if 'market_regime' in config:
                         dynamic_schedule = mp_optimizer.dynamic_rebalancing_schedule(
                             volatility=returns_df.std(),
-                            correlation=returns_df.corr(),
+                            correlation=sample_cov.correlation_frame(),
                             market_regime=config['market_regime']
                         )
                         result["multi_period_plan"]["dynamic_schedule"] = dynamic_schedule
@@ -0,0 +1,254 @@
+"""
+Columnar tax lot table for the Portfolio State MCP Server
+Stores lots as NumPy arrays with interned symbol/account ids so holding periods,
+unrealized gains and FIFO/LIFO/HIFO ordering are computed in vectorized passes,
+and provides a compact binary snapshot format for fast startup.
+"""
+
+import json
+import logging
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.atomic_writer import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Bump when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+LONG_TERM_DAYS = 365
+
+
+def _intern_codes(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    """Map strings to a sorted vocabulary and integer codes"""
+    vocab = sorted(set(values))
+    index = {value: i for i, value in enumerate(vocab)}
+    return vocab, np.fromiter((index[v] for v in values), dtype=np.int32, count=len(values))
+
+
+def _today_day(today: Optional[date] = None) -> int:
+    """Epoch day number for today (UTC)"""
+    today = today or datetime.now(timezone.utc).date()
+    return int(np.datetime64(today, 'D').astype(np.int64))
+
+
+class LotTable:
+    """
+    Columnar view over tax lots.
+
+    Rows are grouped by symbol in the order of the source ``tax_lots`` dict, so a
+    symbol's lots occupy one contiguous slice and ``lots[i]`` is the TaxLot
+    object behind row ``i`` (when built from live objects).
+    """
+
+    NUMERIC_COLUMNS = ('quantity', 'purchase_price', 'cost_basis', 'current_price', 'current_value')
+
+    def __init__(
+        self,
+        symbols: List[str],
+        accounts: List[str],
+        brokers: List[str],
+        asset_types: List[str],
+        columns: Dict[str, np.ndarray],
+        lots: Optional[List[Any]] = None
+    ):
+        self.symbols = symbols
+        self.accounts = accounts
+        self.brokers = brokers
+        self.asset_types = asset_types
+        self.symbol_code = columns['symbol_code']
+        self.account_code = columns['account_code']
+        self.broker_code = columns['broker_code']
+        self.asset_type_code = columns['asset_type_code']
+        self.lot_id = columns['lot_id']
+        self.purchase_day = columns['purchase_day']
+        self.quantity = columns['quantity']
+        self.purchase_price = columns['purchase_price']
+        self.cost_basis = columns['cost_basis']
+        self.current_price = columns['current_price']
+        self.current_value = columns['current_value']
+        self.lots = lots
+        self.journal_seq = 0  # Last state journal entry folded into a loaded snapshot
+
+        # Contiguous row range per symbol
+        bounds = np.flatnonzero(np.diff(self.symbol_code)) + 1
+        starts = np.concatenate([[0], bounds]).astype(np.int64) if len(self.symbol_code) else np.empty(0, np.int64)
+        ends = np.concatenate([bounds, [len(self.symbol_code)]]).astype(np.int64) if len(self.symbol_code) else starts
+        self.slices: Dict[str, Tuple[int, int]] = {
+            self.symbols[self.symbol_code[s]]: (int(s), int(e)) for s, e in zip(starts, ends)
+        }
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+    @classmethod
+    def from_lots(cls, tax_lots: Dict[str, List[Any]]) -> 'LotTable':
+        """Build the table from the server's symbol -> [TaxLot] mapping"""
+        # Group rows by dict order, not by sorted symbol, to keep lot iteration order
+        symbols = list(tax_lots.keys())
+        lots = [lot for symbol_lots in tax_lots.values() for lot in symbol_lots]
+        symbol_code = np.repeat(
+            np.arange(len(symbols), dtype=np.int32),
+            [len(symbol_lots) for symbol_lots in tax_lots.values()]
+        )
+        accounts, account_code = _intern_codes([lot.account_id for lot in lots])
+        brokers, broker_code = _intern_codes([lot.broker for lot in lots])
+        asset_types, asset_type_code = _intern_codes([str(getattr(lot.asset_type, 'value', lot.asset_type)) for lot in lots])
+
+        def numeric(attr: str) -> np.ndarray:
+            return np.array(
+                [np.nan if getattr(lot, attr) is None else getattr(lot, attr) for lot in lots],
+                dtype=np.float64
+            )
+
+        columns = {
+            'symbol_code': symbol_code,
+            'account_code': account_code,
+            'broker_code': broker_code,
+            'asset_type_code': asset_type_code,
+            'lot_id': np.array([lot.lot_id for lot in lots], dtype=str),
+            'purchase_day': np.array([lot.purchase_date for lot in lots], dtype='datetime64[D]').astype(np.int64),
+        }
+        for attr in cls.NUMERIC_COLUMNS:
+            columns[attr] = numeric(attr)
+        return cls(symbols, accounts, brokers, asset_types, columns, lots=lots)
+
+    def to_lots(self, lot_factory: Callable[..., Any]) -> Dict[str, List[Any]]:
+        """Rebuild the symbol -> [TaxLot] mapping using ``lot_factory(**fields)``"""
+        purchase_dates = self.purchase_day.astype('datetime64[D]').astype(str)
+        holding_days = self.holding_days()
+        tax_lots: Dict[str, List[Any]] = {symbol: [] for symbol in self.slices}
+        for i in range(len(self)):
+            symbol = self.symbols[self.symbol_code[i]]
+            current_price = self.current_price[i]
+            current_value = self.current_value[i]
+            tax_lots[symbol].append(lot_factory(
+                lot_id=str(self.lot_id[i]),
+                symbol=symbol,
+                quantity=float(self.quantity[i]),
+                purchase_date=str(purchase_dates[i]),
+                purchase_price=float(self.purchase_price[i]),
+                cost_basis=float(self.cost_basis[i]),
+                current_price=None if np.isnan(current_price) else float(current_price),
+                current_value=None if np.isnan(current_value) else float(current_value),
+                holding_period_days=int(holding_days[i]),
+                is_long_term=bool(holding_days[i] > LONG_TERM_DAYS),
+                asset_type=self.asset_types[self.asset_type_code[i]],
+                account_id=self.accounts[self.account_code[i]],
+                broker=self.brokers[self.broker_code[i]]
+            ))
+        return tax_lots
+
+    def holding_days(self, today: Optional[date] = None) -> np.ndarray:
+        """Days held for every lot"""
+        return _today_day(today) - self.purchase_day
+
+    def is_long_term(self, today: Optional[date] = None) -> np.ndarray:
+        """Long-term status for every lot (held more than a year)"""
+        return self.holding_days(today) > LONG_TERM_DAYS
+
+    def price_vector(self, prices: Dict[str, float]) -> np.ndarray:
+        """Per-row price from a symbol -> price mapping (NaN where missing)"""
+        by_code = np.array([prices.get(symbol, np.nan) for symbol in self.symbols], dtype=np.float64)
+        return by_code[self.symbol_code] if len(by_code) else np.empty(0)
+
+    def unrealized_gain(self, prices: Dict[str, float]) -> np.ndarray:
+        """Unrealized gain for every lot (NaN where no price is available)"""
+        return self.quantity * self.price_vector(prices) - self.cost_basis
+
+    def sale_order(self, symbol: str, method: str) -> np.ndarray:
+        """
+        Row indices of a symbol's lots in the order they would be sold.
+
+        Uses stable sorts so ties keep insertion order, matching list.sort.
+
+        Args:
+            symbol: Symbol whose lots to order
+            method: FIFO, LIFO or HIFO (anything else keeps insertion order)
+        """
+        if symbol not in self.slices:
+            return np.empty(0, dtype=np.int64)
+        start, end = self.slices[symbol]
+        method = str(getattr(method, 'value', method)).upper()
+        if method == 'FIFO':
+            keys = self.purchase_day[start:end]
+        elif method == 'LIFO':
+            keys = -self.purchase_day[start:end]
+        elif method == 'HIFO':
+            keys = -self.purchase_price[start:end]
+        else:
+            return np.arange(start, end)
+        return start + np.argsort(keys, kind='stable')
+
+    def save(
+        self,
+        path: Union[str, Path],
+        accounts: Optional[Dict[str, Any]] = None,
+        journal_seq: int = 0
+    ) -> None:
+        """
+        Write a binary snapshot (uncompressed .npz) atomically.
+
+        Args:
+            path: Snapshot file path
+            accounts: Account metadata stored alongside the lots
+            journal_seq: Last state journal entry included in this snapshot
+        """
+        arrays = {
+            'version': np.array(SNAPSHOT_VERSION),
+            'symbols': np.array(self.symbols, dtype=str),
+            'accounts': np.array(self.accounts, dtype=str),
+            'brokers': np.array(self.brokers, dtype=str),
+            'asset_types': np.array(self.asset_types, dtype=str),
+            'account_metadata': np.array(json.dumps(accounts or {}, default=str)),
+            'journal_seq': np.array(journal_seq, dtype=np.int64),
+            'symbol_code': self.symbol_code,
+            'account_code': self.account_code,
+            'broker_code': self.broker_code,
+            'asset_type_code': self.asset_type_code,
+            'lot_id': self.lot_id,
+            'purchase_day': self.purchase_day,
+        }
+        for attr in self.NUMERIC_COLUMNS:
+            arrays[attr] = getattr(self, attr)
+
+        atomic_write_bytes(path, lambda f: np.savez(f, **arrays))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Tuple['LotTable', Dict[str, Any]]:
+        """
+        Read a binary snapshot.
+
+        Returns:
+            Tuple of (table, account metadata)
+
+        Raises:
+            ValueError: If the snapshot version is not supported
+        """
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported lot snapshot version {version} (expected {SNAPSHOT_VERSION})")
+            columns = {
+                name: data[name]
+                for name in ('symbol_code', 'account_code', 'broker_code', 'asset_type_code', 'lot_id', 'purchase_day')
+                + cls.NUMERIC_COLUMNS
+            }
+            table = cls(
+                symbols=data['symbols'].tolist(),
+                accounts=data['accounts'].tolist(),
+                brokers=data['brokers'].tolist(),
+                asset_types=data['asset_types'].tolist(),
+                columns=columns
+            )
+            accounts = json.loads(str(data['account_metadata']))
+            if 'journal_seq' in data.files:
+                table.journal_seq = int(data['journal_seq'])
+        return table, accounts
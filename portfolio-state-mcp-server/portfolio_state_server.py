@@ -10,6 +10,7 @@ from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, date, timezone
 from decimal import Decimal
 import pandas as pd
+import numpy as np
 import json
 import logging
 from pathlib import Path
@@ -21,13 +22,19 @@ import yfinance as yf
 import time
 import uuid
 import os
-import shutil
 import sys
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 from shared.atomic_writer import atomic_dump_json
+from shared.state_journal import StateJournal, apply_journal_entry, journal_path_for, load_state_with_journal
 from shared.money_utils import money, calculate_gain_loss, calculate_position_value
+from shared.symbol_index import get_symbol_index
+
+from lot_table import LotTable
 
 # Import Pydantic models
 from models import (
@@ -157,6 +164,12 @@ class TaxLot:
     account_id: str = ""
     broker: str = ""
     
+    def __post_init__(self):
+        # Intern repeated identifiers so thousands of lots share one string each
+        self.symbol = sys.intern(self.symbol)
+        self.account_id = sys.intern(self.account_id)
+        self.broker = sys.intern(self.broker)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         return asdict(self)
@@ -217,11 +230,20 @@ class PortfolioStateManager:
                                    os.path.join(os.path.dirname(__file__), "state", "portfolio_state.json"))
         self.state_file = Path(state_path)
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        # Binary columnar snapshot written alongside the JSON state for fast startup
+        self.snapshot_file = self.state_file.with_suffix('.lots.npz')
+        # Append-only journal of lot/account changes, compacted into the state file periodically
+        self.journal = StateJournal(journal_path_for(self.state_file))
+        self.journal_seq = 0  # Sequence number of the last journaled change
+        self.journal_pending = 0  # Entries written since the last compaction
+        self.journal_compact_every = int(os.environ.get("PORTFOLIO_JOURNAL_COMPACT_EVERY", "200"))
+        self._journal_lock = threading.Lock()
         
         # Optional: Backup existing state if it exists (controlled by environment variable)
         if self.state_file.exists() and os.environ.get("PORTFOLIO_STATE_BACKUP", "0") == "1":
             backup_file = self.state_file.parent / f"portfolio_state_backup_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.json"
-            shutil.copy(self.state_file, backup_file)
+            # Back up checkpoint plus journal as one self-contained file
+            atomic_dump_json(load_state_with_journal(self.state_file), backup_file)
             logger.info(f"Backed up existing state to {backup_file}")
 
             # Prune old backups - keep only last 5
@@ -239,9 +261,19 @@ class PortfolioStateManager:
         self.positions: Dict[str, Position] = {}
         self.accounts: Dict[str, Dict[str, Any]] = {}
         self.ticker_cache: Dict[str, str] = {}  # Cache for resolved ticker symbols
+        self.symbol_index = None  # Offline symbol index (ticker variants, share classes)
+        try:
+            self.symbol_index = get_symbol_index()
+        except Exception as e:
+            logger.warning(f"Symbol index unavailable, resolving tickers over the network: {e}")
         self.price_cache: Dict[str, tuple[float, datetime]] = {}  # Cache prices with timestamp
         self.price_cache_ttl = 300  # 5 minutes TTL for price cache
+        self.price_fetch_workers = int(os.environ.get("PORTFOLIO_PRICE_WORKERS", "8"))  # Straggler fetch concurrency
+        self.price_refresh_stats: Dict[str, Any] = {}  # Timing report from the last price refresh
         self.positions_built = False  # Track if positions have been built
+        self._dirty_symbols: set = set()  # Symbols whose lots changed since last aggregation
+        self._holding_period_date: Optional[date] = None  # Day holding periods were last refreshed
+        self._lot_table: Optional[LotTable] = None  # Columnar view of tax_lots, rebuilt after lot changes
 
         # Load existing state if available (CRITICAL FIX - Codex recommendation)
         self.load_state()
@@ -251,9 +283,42 @@ class PortfolioStateManager:
                        f"{sum(len(lots) for lots in self.tax_lots.values())} tax lots")
         else:
             logger.info("Portfolio state initialized - no existing state found, starting fresh")
+        
+        # Fold outstanding journal entries into a checkpoint on clean shutdown
+        atexit.register(self.compact_journal)
     
     def load_state(self):
-        """Load portfolio state from file without fetching prices"""
+        """Load portfolio state from the latest checkpoint plus journal, without fetching prices"""
+        self._load_checkpoint()
+        
+        # Replay changes journaled after the checkpoint
+        entries = self.journal.read(after_seq=self.journal_seq)
+        for entry in entries:
+            apply_journal_entry(self.tax_lots, self.accounts, entry, lot_factory=TaxLot)
+        if entries:
+            self.journal_seq = entries[-1]['seq']
+            self.journal_pending = len(entries)
+            logger.info(f"Replayed {len(entries)} journal entries")
+    
+    def _load_checkpoint(self):
+        """Load the binary snapshot or JSON state written by the last compaction"""
+        # Prefer the binary snapshot unless the JSON state was written after it
+        if self.snapshot_file.exists() and (
+            not self.state_file.exists()
+            or self.snapshot_file.stat().st_mtime >= self.state_file.stat().st_mtime
+        ):
+            try:
+                table, accounts = LotTable.load(self.snapshot_file)
+                self.tax_lots = table.to_lots(TaxLot)
+                self.accounts = accounts
+                self.journal_seq = table.journal_seq
+                self._lot_table = None
+                self.positions_built = False
+                logger.info(f"Loaded portfolio snapshot: {len(self.tax_lots)} symbols, {len(table)} total lots")
+                return
+            except Exception as e:
+                logger.warning(f"Failed to load lot snapshot, falling back to JSON state: {e}")
+        
         if self.state_file.exists():
             try:
                 with open(self.state_file, 'r') as f:
@@ -266,6 +331,8 @@ class PortfolioStateManager:
                     ]
                 
                 self.accounts = state.get('accounts', {})
+                self.journal_seq = state.get('journal_seq', 0)
+                self._lot_table = None
                 
                 # LAZY LOADING: Don't rebuild positions on startup
                 # This avoids fetching prices for all 55 tickers during initialization
@@ -277,27 +344,67 @@ class PortfolioStateManager:
                 logger.error(f"Failed to load state: {e}")
     
     def save_state(self):
-        """Save portfolio state to file"""
-        try:
-            state = {
-                'tax_lots': {
-                    symbol: [lot.to_dict() for lot in lots]
-                    for symbol, lots in self.tax_lots.items()
-                },
-                'accounts': self.accounts,
-                'last_updated': datetime.now(timezone.utc).isoformat()
-            }
-            
-            atomic_dump_json(state, self.state_file)
-            
-            logger.info("Portfolio state saved")
-        except Exception as e:
-            logger.error(f"Failed to save state: {e}")
+        """Checkpoint the full portfolio state to file and truncate the journal"""
+        with self._journal_lock:
+            try:
+                state = {
+                    'tax_lots': {
+                        symbol: [lot.to_dict() for lot in lots]
+                        for symbol, lots in self.tax_lots.items()
+                    },
+                    'accounts': self.accounts,
+                    'journal_seq': self.journal_seq,
+                    'last_updated': datetime.now(timezone.utc).isoformat()
+                }
+                
+                atomic_dump_json(state, self.state_file)
+                
+                # Snapshot last so its mtime marks it as current
+                self._lot_table = LotTable.from_lots(self.tax_lots)
+                self._lot_table.save(self.snapshot_file, self.accounts, journal_seq=self.journal_seq)
+                
+                # Both checkpoints record journal_seq, so a crash before this point replays safely
+                self.journal.truncate()
+                self.journal_pending = 0
+                
+                logger.info("Portfolio state saved")
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
+    
+    def compact_journal(self):
+        """Checkpoint only if there are journaled changes not yet in the state file"""
+        if self.journal_pending:
+            self.save_state()
+    
+    def _journal(self, op: str, **fields):
+        """
+        Record one state change in the journal (O(change) write).
+        
+        Compacts into a full checkpoint every journal_compact_every entries.
+        """
+        with self._journal_lock:
+            self.journal_seq += 1
+            self.journal.append({
+                'seq': self.journal_seq,
+                'op': op,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                **fields
+            })
+            self.journal_pending += 1
+            compact = self.journal_pending >= self.journal_compact_every
+        if compact:
+            self.save_state()
+    
+    def update_account(self, account_id: str, fields: Dict[str, Any]):
+        """Update account metadata and journal the change"""
+        self.accounts.setdefault(account_id, {}).update(fields)
+        self._journal('update_account', account_id=account_id, fields=fields)
     
     def resolve_ticker(self, ticker: str) -> Optional[str]:
         """
         Resolve ticker symbol using fuzzy matching to handle format variations.
-        Tries multiple formats to find a working ticker symbol for Yahoo Finance.
+        Looks the ticker up in the offline symbol index first; only symbols the
+        index does not know are probed in multiple formats on Yahoo Finance.
         """
         # Check cache first
         if ticker in self.ticker_cache:
@@ -313,6 +420,12 @@ class PortfolioStateManager:
         if ticker == 'BRKA':
             return 'BRK-A'
         
+        if self.symbol_index is not None:
+            resolved = self.symbol_index.resolve(ticker)
+            if resolved is not None:
+                self.ticker_cache[ticker] = resolved
+                return resolved
+        
         # Common ticker format variations to try (same as data_pipeline.py)
         variations = [
             ticker,                          # Original
@@ -372,53 +485,151 @@ class PortfolioStateManager:
             # Add to fetch list
             symbols_to_fetch.append(symbol)
         
-        # Fetch prices for symbols not in cache
-        logger.info(f"Fetching prices for {len(symbols_to_fetch)} symbols...")
-        for i, symbol in enumerate(symbols_to_fetch):
-            # Log progress for large batches
-            if len(symbols_to_fetch) > 10 and i % 10 == 0:
-                logger.info(f"Progress: {i}/{len(symbols_to_fetch)} symbols fetched")
-            
-            # Resolve ticker format
+        if symbols_to_fetch:
+            prices.update(self._fetch_prices_batch(symbols_to_fetch, now))
+        
+        return prices
+    
+    def _fetch_prices_batch(self, symbols: List[str], now: datetime) -> Dict[str, float]:
+        """
+        Fetch prices for uncached symbols in one pass.
+        
+        All symbols go through a single multi-symbol yf.download; any symbol the
+        batch did not return a price for is retried individually on a bounded
+        thread pool, which also refreshes asset classifications that are not yet
+        cached. Per-symbol timings are kept in self.price_refresh_stats.
+        """
+        started = time.perf_counter()
+        timings: Dict[str, Dict[str, Any]] = {}
+        prices: Dict[str, float] = {}
+        
+        # Resolve ticker formats
+        yahoo_symbols: Dict[str, str] = {}
+        for symbol in symbols:
             yahoo_symbol = self.resolve_ticker(symbol)
             if not yahoo_symbol:
                 logger.warning(f"Skipping unresolvable ticker: {symbol}")
                 continue
-            
+            yahoo_symbols[symbol] = yahoo_symbol
+        
+        logger.info(f"Fetching prices for {len(yahoo_symbols)} symbols in one batch...")
+        
+        # One multi-symbol download for everything
+        batch_started = time.perf_counter()
+        closes = pd.DataFrame()
+        batch_symbols = sorted(set(yahoo_symbols.values()))
+        if batch_symbols:
             try:
-                ticker = yf.Ticker(yahoo_symbol)
-                # Use 5d period for better mutual fund compatibility
-                hist = ticker.history(period='5d')
-                
-                if not hist.empty:
-                    price = float(hist['Close'].iloc[-1])
-                    prices[symbol] = price
-                    # Cache the price
-                    self.price_cache[symbol] = (price, now)
-                    logger.debug(f"Fetched and cached price for {symbol}: ${price:.2f}")
-                    
-                    # NEW: Also fetch and update asset classification
-                    self.update_asset_classification(symbol, ticker)
+                data = yf.download(
+                    batch_symbols,
+                    period='5d',  # 5d period for better mutual fund compatibility
+                    progress=False,
+                    threads=True
+                )
+                if isinstance(data.columns, pd.MultiIndex):
+                    closes = data['Close']
                 else:
-                    # FAIL LOUDLY - No silent fallback to purchase prices
-                    error_msg = f"Failed to fetch current price for {symbol} - no market data available"
-                    logger.error(error_msg)
-                    raise ValueError(error_msg)
-            except ValueError:
-                # Re-raise our explicit errors
-                raise
+                    closes = data[['Close']].rename(columns={'Close': batch_symbols[0]})
+                if isinstance(closes, pd.Series):
+                    closes = closes.to_frame(batch_symbols[0])
             except Exception as e:
-                # FAIL LOUDLY - No silent fallback
-                error_msg = f"Failed to fetch price for {symbol}: {e}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+                logger.warning(f"Batch price download failed, falling back to per-symbol fetch: {e}")
+        batch_seconds = time.perf_counter() - batch_started
+        
+        for symbol, yahoo_symbol in yahoo_symbols.items():
+            if yahoo_symbol in closes.columns:
+                series = closes[yahoo_symbol].dropna()
+                if not series.empty:
+                    price = float(series.iloc[-1])
+                    prices[symbol] = price
+                    self.price_cache[symbol] = (price, now)
+                    timings[symbol] = {"source": "batch", "seconds": round(batch_seconds, 4)}
+        
+        # Stragglers and unclassified symbols go through a bounded thread pool
+        if not hasattr(self, 'asset_type_cache'):
+            self.asset_type_cache = {}
+        pending = [
+            symbol for symbol in yahoo_symbols
+            if symbol not in prices or symbol not in self.asset_type_cache
+        ]
+        
+        def fetch_one(symbol: str):
+            symbol_started = time.perf_counter()
+            ticker = yf.Ticker(yahoo_symbols[symbol])
+            price = None
+            error = None
+            if symbol not in prices:
+                try:
+                    hist = ticker.history(period='5d')
+                    if not hist.empty:
+                        price = float(hist['Close'].iloc[-1])
+                except Exception as e:
+                    error = e
+            classification_changed = False
+            if symbol not in self.asset_type_cache:
+                classification_changed = self.update_asset_classification(symbol, ticker, persist=False)
+            return symbol, price, error, classification_changed, time.perf_counter() - symbol_started
+        
+        failures = []
+        reclassified = []
+        for symbol in prices:
+            if symbol in self.asset_type_cache:
+                # Cached classification - re-apply to any newly added lots without a network call
+                if self.update_asset_classification(symbol, None, persist=False):
+                    reclassified.append(symbol)
+        if pending:
+            workers = max(1, min(self.price_fetch_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for symbol, price, error, changed, seconds in executor.map(fetch_one, pending):
+                    if changed:
+                        reclassified.append(symbol)
+                    if symbol in prices:
+                        continue
+                    if price is not None:
+                        prices[symbol] = price
+                        self.price_cache[symbol] = (price, now)
+                        timings[symbol] = {"source": "fallback", "seconds": round(seconds, 4)}
+                        logger.debug(f"Fetched and cached price for {symbol}: ${price:.2f}")
+                    else:
+                        timings[symbol] = {"source": "failed", "seconds": round(seconds, 4)}
+                        failures.append(f"{symbol} ({error})" if error else symbol)
+        
+        # Journal classification updates from the main thread once the pool is done
+        for symbol in reclassified:
+            self._journal('set_asset_type', symbol=symbol, asset_type=self.asset_type_cache[symbol])
+        
+        self.price_refresh_stats = {
+            "symbols_requested": len(symbols),
+            "batch_seconds": round(batch_seconds, 4),
+            "total_seconds": round(time.perf_counter() - started, 4),
+            "fallback_count": sum(1 for t in timings.values() if t["source"] == "fallback"),
+            "per_symbol": timings,
+            "as_of": now.isoformat()
+        }
+        logger.info(f"Fetched {len(prices)}/{len(yahoo_symbols)} prices in "
+                    f"{self.price_refresh_stats['total_seconds']:.2f}s "
+                    f"(batch {batch_seconds:.2f}s, {self.price_refresh_stats['fallback_count']} fallbacks)")
+        
+        if failures:
+            # FAIL LOUDLY - No silent fallback to purchase prices
+            error_msg = f"Failed to fetch current price for {', '.join(failures)} - no market data available"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
         
         return prices
     
-    def update_asset_classification(self, symbol: str, ticker_obj) -> None:
+    def update_asset_classification(self, symbol: str, ticker_obj, persist: bool = True) -> bool:
         """
         Update asset classification for a symbol based on provider data.
         Uses yfinance info to determine if this is a bond, equity, etc.
+        
+        Args:
+            symbol: Portfolio symbol
+            ticker_obj: yfinance Ticker (only used when the type is not cached)
+            persist: Journal the change immediately when a lot's classification changes
+        
+        Returns:
+            True if any tax lot's asset type changed
         """
         try:
             # Check asset type cache first
@@ -429,12 +640,16 @@ class PortfolioStateManager:
             if symbol in self.asset_type_cache:
                 cached_type = self.asset_type_cache[symbol]
                 # Update all tax lots for this symbol
+                updated = False
                 if symbol in self.tax_lots:
                     for lot in self.tax_lots[symbol]:
                         if lot.asset_type != cached_type:
                             lot.asset_type = cached_type
+                            updated = True
                             logger.info(f"Updated {symbol} classification to {cached_type}")
-                return
+                if updated and persist:
+                    self._journal('set_asset_type', symbol=symbol, asset_type=cached_type)
+                return updated
             
             # Get ticker info from yfinance
             info = ticker_obj.info
@@ -485,11 +700,15 @@ class PortfolioStateManager:
                 
                 if updated:
                     logger.info(f"Updated {symbol} from {lot.asset_type} to {asset_type} based on provider data")
-                    self.save_state()  # Persist the classification update
+                    if persist:
+                        self._journal('set_asset_type', symbol=symbol, asset_type=asset_type)
+                return updated
+            return False
             
         except Exception as e:
             logger.warning(f"Could not update asset classification for {symbol}: {e}")
             # Don't fail the price fetch if classification fails
+            return False
     
     def add_tax_lot(self, lot: TaxLot):
         """Add a new tax lot with validation"""
@@ -514,84 +733,198 @@ class PortfolioStateManager:
         if lot.symbol not in self.tax_lots:
             self.tax_lots[lot.symbol] = []
         self.tax_lots[lot.symbol].append(lot)
-        self._rebuild_positions()
-        self.positions_built = True  # Mark as built after rebuild
-        self.save_state()
+        self._lot_table = None
+        if self.positions_built:
+            self._apply_lot_delta(lot)
+        self._journal('add_lot', lot=lot.to_dict())
     
     def ensure_positions_built(self):
-        """Ensure positions are built (lazy initialization)"""
+        """Ensure positions are built (lazy initialization) and dirty symbols re-aggregated"""
         if not self.positions_built:
-            self._rebuild_positions()
+            self._rebuild_positions(full=True)
             self.positions_built = True
+        elif self._dirty_symbols:
+            self._rebuild_positions()
     
-    def _rebuild_positions(self):
-        """Rebuild aggregated positions from tax lots with dynamic pricing"""
-        self.positions = {}
+    def _mark_dirty(self, symbol: str):
+        """Flag a symbol whose lots changed so its position is re-aggregated"""
+        self._dirty_symbols.add(symbol)
+        self._lot_table = None
+    
+    @property
+    def lot_table(self) -> LotTable:
+        """Columnar view of all tax lots, rebuilt lazily after lot changes"""
+        if self._lot_table is None:
+            self._lot_table = LotTable.from_lots(self.tax_lots)
+        return self._lot_table
+    
+    def _rebuild_positions(self, full: bool = False):
+        """
+        Bring aggregated positions up to date with tax lots and dynamic pricing.
+        
+        Positions are maintained incrementally: only dirty symbols (lots added,
+        sold or reloaded) are re-summed over their lots. Every other position is
+        only repriced, and only when its price actually changed. Holding periods
+        for all lots are refreshed once per calendar day.
+        
+        Args:
+            full: Re-aggregate every symbol from scratch
+        """
+        if full:
+            self.positions = {}
+            self._dirty_symbols = set(self.tax_lots.keys())
+        
+        # Drop positions whose lots are gone
+        for symbol in [s for s in self.positions if not self.tax_lots.get(s)]:
+            del self.positions[symbol]
+        
+        today = datetime.now(timezone.utc).date()
+        if self._holding_period_date != today:
+            for lots in self.tax_lots.values():
+                for lot in lots:
+                    lot.update_holding_period()
+            self._holding_period_date = today
         
         # Get all symbols that need prices
         symbols_to_price = [s for s in self.tax_lots.keys() 
                            if s not in ['CASH', 'VMFXX', 'N/A']]
         
-        # Fetch current prices dynamically
+        # Fetch current prices dynamically (cached symbols are dict lookups)
         current_prices = self.get_current_prices(symbols_to_price)
         
         for symbol, lots in self.tax_lots.items():
             if not lots:
                 continue
-            
-            # Update holding periods and current prices for all lots
-            for lot in lots:
-                lot.update_holding_period()
-                # Add current price and value to each lot
-                lot.current_price = current_prices.get(symbol, lot.purchase_price)
-                lot.current_value = lot.quantity * lot.current_price
-            
-            total_quantity = sum(lot.quantity for lot in lots)
-            total_cost_basis = sum(lot.cost_basis for lot in lots)
-            average_cost = total_cost_basis / total_quantity if total_quantity > 0 else 0
-            
-            # Get current price (use fetched price or fallback to average purchase price)
-            current_price = current_prices.get(symbol, average_cost)
-            current_value = total_quantity * current_price
-            unrealized_gain = current_value - total_cost_basis
-            unrealized_return = (unrealized_gain / total_cost_basis) if total_cost_basis > 0 else 0
-            
-            self.positions[symbol] = Position(
-                symbol=symbol,
-                total_quantity=total_quantity,
-                average_cost=average_cost,
-                total_cost_basis=total_cost_basis,
-                current_price=current_price,
-                current_value=current_value,
-                unrealized_gain=unrealized_gain,
-                unrealized_return=unrealized_return,
-                asset_type=lots[0].asset_type if lots else AssetType.EQUITY,
-                tax_lots=lots
-            )
+            if symbol in self._dirty_symbols or symbol not in self.positions:
+                self._aggregate_position(symbol, current_prices.get(symbol))
+            else:
+                self._reprice_position(symbol, current_prices.get(symbol))
+        
+        self._dirty_symbols.clear()
+    
+    def _aggregate_position(self, symbol: str, price: Optional[float]):
+        """Re-sum a single symbol's position over its tax lots"""
+        lots = self.tax_lots[symbol]
+        
+        # Update holding periods and current prices for this symbol's lots
+        for lot in lots:
+            lot.update_holding_period()
+            lot.current_price = price if price is not None else lot.purchase_price
+            lot.current_value = lot.quantity * lot.current_price
+        
+        total_quantity = sum(lot.quantity for lot in lots)
+        total_cost_basis = sum(lot.cost_basis for lot in lots)
+        average_cost = total_cost_basis / total_quantity if total_quantity > 0 else 0
+        
+        # Get current price (use fetched price or fallback to average purchase price)
+        position = Position(
+            symbol=symbol,
+            total_quantity=total_quantity,
+            average_cost=average_cost,
+            total_cost_basis=total_cost_basis,
+            current_price=price if price is not None else average_cost,
+            current_value=0.0,
+            unrealized_gain=0.0,
+            unrealized_return=0.0,
+            asset_type=lots[0].asset_type if lots else AssetType.EQUITY,
+            tax_lots=lots
+        )
+        self._update_position_values(position)
+        self.positions[symbol] = position
+    
+    def _reprice_position(self, symbol: str, price: Optional[float]):
+        """Apply a new price to a clean position without re-summing its lots"""
+        position = self.positions[symbol]
+        lots = self.tax_lots[symbol]
+        position.tax_lots = lots
+        position.asset_type = lots[0].asset_type
+        
+        new_price = price if price is not None else position.average_cost
+        if new_price == position.current_price:
+            return
+        
+        position.current_price = new_price
+        for lot in lots:
+            lot.current_price = price if price is not None else lot.purchase_price
+            lot.current_value = lot.quantity * lot.current_price
+        self._update_position_values(position)
+    
+    def _apply_lot_delta(self, lot: TaxLot):
+        """Fold a newly added lot into its position's running aggregates"""
+        position = self.positions.get(lot.symbol)
+        if position is None or lot.symbol in self._dirty_symbols:
+            # No clean aggregate to adjust - re-aggregate on next access
+            self._mark_dirty(lot.symbol)
+            return
+        
+        lot.update_holding_period()
+        lot.current_price = position.current_price
+        lot.current_value = lot.quantity * lot.current_price
+        
+        position.total_quantity += lot.quantity
+        position.total_cost_basis += lot.cost_basis
+        position.average_cost = (position.total_cost_basis / position.total_quantity
+                                 if position.total_quantity > 0 else 0)
+        self._update_position_values(position)
+    
+    @staticmethod
+    def _update_position_values(position: Position):
+        """Derive value and unrealized gain from a position's aggregates"""
+        position.current_value = position.total_quantity * position.current_price
+        position.unrealized_gain = position.current_value - position.total_cost_basis
+        position.unrealized_return = (position.unrealized_gain / position.total_cost_basis
+                                      if position.total_cost_basis > 0 else 0)
     
     def refresh_prices(self):
         """Refresh all position values with latest market prices"""
-        self._rebuild_positions()
+        self._rebuild_positions(full=not self.positions_built)
         self.positions_built = True  # Mark as built after rebuild
         # Note: We don't save state here since prices are fetched dynamically
     
+    def apply_sale(self, symbol: str, lots_to_sell: List[TaxLot]):
+        """Reduce or remove sold lots, journaling only the lots touched"""
+        remaining_lots = []
+        changes = []
+        for existing_lot in self.tax_lots.get(symbol, []):
+            sold = False
+            for sold_lot in lots_to_sell:
+                if existing_lot.lot_id == sold_lot.lot_id:
+                    if sold_lot.quantity < existing_lot.quantity:
+                        # Partial sale
+                        existing_lot.quantity -= sold_lot.quantity
+                        existing_lot.cost_basis -= sold_lot.cost_basis
+                        changes.append(('update_lot', {
+                            'symbol': symbol,
+                            'lot_id': existing_lot.lot_id,
+                            'fields': {'quantity': existing_lot.quantity, 'cost_basis': existing_lot.cost_basis}
+                        }))
+                    else:
+                        # Full sale
+                        sold = True
+                    break
+            
+            if not sold and existing_lot.quantity > 0:
+                remaining_lots.append(existing_lot)
+            else:
+                changes.append(('remove_lot', {'symbol': symbol, 'lot_id': existing_lot.lot_id}))
+        
+        self.tax_lots[symbol] = remaining_lots
+        self._mark_dirty(symbol)
+        
+        # Journal after the in-memory state is complete so a compaction never checkpoints a half-applied sale
+        for op, fields in changes:
+            self._journal(op, **fields)
+        
+        self._rebuild_positions()
+    
     def get_lots_for_sale(self, symbol: str, quantity: float, method: CostBasisMethod) -> List[TaxLot]:
         """Get tax lots for a sale based on cost basis method"""
         if symbol not in self.tax_lots:
             return []
         
-        lots = self.tax_lots[symbol].copy()
-        
-        # Sort based on method
-        if method == CostBasisMethod.FIFO:
-            lots.sort(key=lambda x: x.purchase_date)
-        elif method == CostBasisMethod.LIFO:
-            lots.sort(key=lambda x: x.purchase_date, reverse=True)
-        elif method == CostBasisMethod.HIFO:
-            lots.sort(key=lambda x: x.purchase_price, reverse=True)
-        elif method == CostBasisMethod.AVERAGE:
-            # For average cost, all shares are treated equally
-            pass
+        # Sort based on method (AVERAGE/SPECIFIC keep lot order - all shares treated equally)
+        table = self.lot_table
+        lots = [table.lots[i] for i in table.sale_order(symbol, method)]
         
         # Select lots to sell
         selected_lots = []
@@ -754,17 +1087,12 @@ async def import_broker_csv(
             added_count += 1
         
         # Update account info
-        if account_id not in portfolio_manager.accounts:
-            portfolio_manager.accounts[account_id] = {}
-        
-        portfolio_manager.accounts[account_id].update({
+        portfolio_manager.update_account(account_id, {
             "broker": broker,
             "last_import": datetime.now(timezone.utc).isoformat(),
             "num_lots_imported": added_count
         })
         
-        portfolio_manager.save_state()
-        
         return {
             "status": "success",
             "broker": broker,
@@ -812,6 +1140,7 @@ async def update_market_prices(
         return {
             "status": "success",
             "prices_updated": len(prices),
+            "price_refresh": portfolio_manager.price_refresh_stats,
             "portfolio_value": total_value,
             "total_unrealized_gain": total_unrealized,
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -941,44 +1270,38 @@ async def get_tax_loss_harvesting_opportunities(
         # Refresh prices to get current values
         portfolio_manager.refresh_prices()
         
-        opportunities = []
-        today = datetime.now(timezone.utc)
+        # Vectorized scan over the columnar lot table
+        table = portfolio_manager.lot_table
+        positions = portfolio_manager.positions
+        current_prices = {symbol: pos.current_price for symbol, pos in positions.items()}
+        losing_symbols = {symbol for symbol, pos in positions.items() if pos.unrealized_gain < 0}
         
-        for symbol, position in portfolio_manager.positions.items():
-            if position.unrealized_gain >= 0:
-                continue  # Skip positions with gains
-            
-            # Get current price for this position
-            current_price = position.current_price
-            
-            # Check each lot for harvesting potential
-            for lot in position.tax_lots:
-                # Skip recent purchases (wash sale rule)
-                purchase_date = datetime.strptime(lot.purchase_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-                days_held = (today - purchase_date).days
-                
-                if days_held < exclude_recent_days:
-                    continue
-                
-                # Calculate unrealized gain for this lot
-                lot_current_value = lot.quantity * current_price
-                lot_unrealized_gain = lot_current_value - lot.cost_basis
-                
-                if lot_unrealized_gain < -min_loss_threshold:
-                    is_long_term = days_held > 365
-                    
-                    opportunities.append({
-                        "symbol": symbol,
-                        "lot_id": lot.lot_id,
-                        "quantity": lot.quantity,
-                        "purchase_date": lot.purchase_date,
-                        "cost_basis": lot.cost_basis,
-                        "current_value": lot_current_value,
-                        "unrealized_loss": -lot_unrealized_gain,
-                        "days_held": days_held,
-                        "is_long_term": is_long_term,
-                        "tax_benefit_estimate": -lot_unrealized_gain * (0.15 if is_long_term else 0.35)
-                    })
+        days_held = table.holding_days()
+        lot_current_value = table.quantity * table.price_vector(current_prices)
+        lot_unrealized_gain = lot_current_value - table.cost_basis
+        
+        # Skip positions with gains and recent purchases (wash sale rule)
+        losing_codes = [code for code, symbol in enumerate(table.symbols) if symbol in losing_symbols]
+        in_losing_position = np.isin(table.symbol_code, losing_codes)
+        mask = in_losing_position & (days_held >= exclude_recent_days) & (lot_unrealized_gain < -min_loss_threshold)
+        
+        opportunities = []
+        for i in np.flatnonzero(mask):
+            lot = table.lots[i]
+            is_long_term = bool(days_held[i] > 365)
+            unrealized_loss = float(-lot_unrealized_gain[i])
+            opportunities.append({
+                "symbol": lot.symbol,
+                "lot_id": lot.lot_id,
+                "quantity": lot.quantity,
+                "purchase_date": lot.purchase_date,
+                "cost_basis": lot.cost_basis,
+                "current_value": float(lot_current_value[i]),
+                "unrealized_loss": unrealized_loss,
+                "days_held": int(days_held[i]),
+                "is_long_term": is_long_term,
+                "tax_benefit_estimate": unrealized_loss * (0.15 if is_long_term else 0.35)
+            })
         
         # Sort by tax benefit
         opportunities.sort(key=lambda x: x["tax_benefit_estimate"], reverse=True)
@@ -1076,26 +1399,7 @@ async def record_transaction(
             realized_gain = gain_loss_info['gain_loss']
             
             # Update tax lots
-            remaining_lots = []
-            for existing_lot in portfolio_manager.tax_lots.get(symbol, []):
-                sold = False
-                for sold_lot in lots_to_sell:
-                    if existing_lot.lot_id == sold_lot.lot_id:
-                        if sold_lot.quantity < existing_lot.quantity:
-                            # Partial sale
-                            existing_lot.quantity -= sold_lot.quantity
-                            existing_lot.cost_basis -= sold_lot.cost_basis
-                        else:
-                            # Full sale
-                            sold = True
-                        break
-                
-                if not sold and existing_lot.quantity > 0:
-                    remaining_lots.append(existing_lot)
-            
-            portfolio_manager.tax_lots[symbol] = remaining_lots
-            portfolio_manager._rebuild_positions()
-            portfolio_manager.save_state()
+            portfolio_manager.apply_sale(symbol, lots_to_sell)
             
             return {
                 "status": "success",
@@ -17,12 +17,17 @@ from datetime import datetime, timezone, timedelta
 
 # Add shared modules to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared', 'services'))
 
 # Import shared modules
 from data_pipeline import MarketDataPipeline
 from confidence_scoring import ConfidenceScorer
 from portfolio_state_client import get_portfolio_state_client
 from risk_conventions import RiskConventions, RiskStack
+from risk_utils import calculate_var_es_grid, calculate_monte_carlo_var_es, VAR_GRID_METHODS
+from optimization.risk_parity import RiskBudgetSolver
+from factor_exposure_service import get_factor_exposure_service
+from covariance_engine import get_covariance_engine
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'orchestrator'))
 from position_lookthrough import PositionLookthrough
 
@@ -40,6 +45,9 @@ data_pipeline = MarketDataPipeline()
 confidence_scorer = ConfidenceScorer()
 portfolio_state_client = get_portfolio_state_client()
 position_lookthrough = PositionLookthrough(concentration_limit=0.20)  # 20% limit for single names
+risk_parity_solver = RiskBudgetSolver()
+factor_exposure_service = get_factor_exposure_service(data_pipeline)
+covariance_engine = get_covariance_engine()
 
 @server.tool()
 async def analyze_portfolio_risk(
@@ -60,8 +68,14 @@ async def analyze_portfolio_risk(
             - time_horizons: List[int] (default [1, 5, 10, 21] days)
             - include_stress_test: bool (default True)
             - include_risk_parity: bool (default True)
+            - risk_budgets: Dict[str, float] (optional risk-parity budgets per ticker)
             - include_advanced_measures: bool (default True)
-            - var_methods: List[str] (default ['historical', 'parametric', 'cornish-fisher'])
+            - var_methods: List[str] (default ['historical', 'parametric', 'cornish-fisher'];
+              'student-t' and 'monte-carlo' are also available)
+            - mc_model: str (default 'normal'; 'normal', 't-copula' or 'filtered-historical')
+            - mc_paths: int (default 100000)
+            - mc_seed: int (default 42)
+            - mc_workers: int (default 0 = in-process)
             - custom_scenarios: List[Dict] (optional stress scenarios)
     
     Returns:
@@ -256,60 +270,30 @@ async def analyze_portfolio_risk(
         start_date = (datetime.now(timezone.utc) - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
         
         try:
-            ff_factors = data_pipeline.fetch_fama_french_factors(
+            # Per-asset betas are cached by the service; a weight-only change just re-aggregates
+            factor_result = factor_exposure_service.portfolio_exposures(
+                data['returns'],
+                weights,
                 start_date=start_date,
-                end_date=end_date,
-                frequency="daily"
+                end_date=end_date
             )
-            
-            # Align dates and compute excess returns
-            portfolio_df = pd.DataFrame(portfolio_returns, index=data['returns'].index, columns=['portfolio'])
-            ff_factors_aligned = ff_factors.reindex(portfolio_df.index).fillna(method='ffill')
-            
-            # Compute excess returns for regression
-            rf_rate_daily = ff_factors_aligned['RF'] if 'RF' in ff_factors_aligned.columns else 0
-            excess_returns = portfolio_df['portfolio'] - rf_rate_daily
-            
-            # Run factor regression with robust standard errors
-            from statsmodels.regression.linear_model import OLS
-            import statsmodels.api as sm
-            
-            factor_cols = ['MKT-RF', 'SMB', 'HML', 'RMW', 'CMA', 'MOM']
-            available_factors = [col for col in factor_cols if col in ff_factors_aligned.columns]
-            
-            if len(available_factors) > 0:
-                X = ff_factors_aligned[available_factors]
-                X = sm.add_constant(X)  # Add intercept
-                
-                # Robust regression
-                model = OLS(excess_returns, X)
-                results = model.fit(cov_type='HAC', cov_kwds={'maxlags': 5})
-                
-                factor_betas = {factor: float(results.params[factor]) for factor in available_factors}
-                factor_betas['alpha'] = float(results.params['const'])
-                
-                # Get confidence intervals
-                conf_int = results.conf_int()
-                factor_ci = {factor: [float(conf_int.loc[factor, 0]), float(conf_int.loc[factor, 1])] 
-                            for factor in available_factors}
-                
-                r_squared = float(results.rsquared)
-                residual_vol = float(np.std(results.resid))
-            else:
-                factor_betas = {}
-                factor_ci = {}
-                r_squared = 0.0
-                residual_vol = float(volatility)
+            factor_betas = factor_result['betas']
+            factor_ci = factor_result['beta_ci']
+            asset_factor_betas = factor_result['asset_betas']
+            r_squared = factor_result['r_squared']
+            residual_vol = factor_result['residual_vol']
         except Exception as e:
             logger.warning(f"Factor analysis failed: {e}, using empty factors")
             factor_betas = {}
             factor_ci = {}
+            asset_factor_betas = {}
             r_squared = 0.0
             residual_vol = float(volatility)
         
         # Calculate correlation-adjusted concentration metrics
         returns_df = data['returns']
-        cov_matrix = returns_df.cov().values * 252  # Annualized
+        sample_cov = covariance_engine.estimate(returns_df, 'sample')
+        cov_matrix = sample_cov.covariance * 252  # Annualized
         
         # Weight-based ENB
         enb_weight = 1 / np.sum(weights**2)
@@ -388,6 +372,7 @@ async def analyze_portfolio_risk(
                 "window_days": lookback_days,
                 "betas": factor_betas,
                 "beta_ci": factor_ci,
+                "asset_betas": asset_factor_betas,
                 "r_squared": r_squared,
                 "residual_vol": residual_vol
             },
@@ -456,47 +441,63 @@ async def analyze_portfolio_risk(
         # =========================
         # 3c. TRADITIONAL VAR ANALYSIS (for backward compatibility)
         # =========================
-        var_results = {}
+        # Student-t fit is shared by the VaR grid and the advanced measures
+        t_params = None
+        if include_advanced or 'student-t' in var_methods:
+            try:
+                t_params = stats.t.fit(portfolio_returns)
+            except Exception as e:
+                logger.error(f"Student-t distribution fitting failed: {e}")
+                raise ValueError(f"Failed to fit Student-t distribution: {str(e)}")
         
-        for confidence in confidence_levels:
+        # Evaluate the whole confidence x horizon x method grid in one pass
+        var_grid = calculate_var_es_grid(
+            portfolio_returns,
+            confidence_levels=confidence_levels,
+            horizons=time_horizons,
+            methods=[m for m in VAR_GRID_METHODS if m in var_methods],
+            t_params=t_params
+        )
+        output_keys = {
+            'historical': ('historical_var', 'historical_cvar'),
+            'parametric': ('parametric_var', 'parametric_cvar'),
+            'cornish-fisher': ('modified_var', None),
+            'student-t': ('student_t_var', 'student_t_cvar')
+        }
+        
+        var_results = {}
+        for i, confidence in enumerate(confidence_levels):
             conf_key = f"conf_{int(confidence*100)}"
             var_results[conf_key] = {}
             
-            for horizon in time_horizons:
+            for j, horizon in enumerate(time_horizons):
                 horizon_key = f"horizon_{horizon}d"
-                var_results[conf_key][horizon_key] = {}
-                
-                # Scale returns for time horizon
-                scaled_returns = portfolio_returns * np.sqrt(horizon)
-                
-                # Historical VaR
-                if 'historical' in var_methods:
-                    percentile = (1 - confidence) * 100
-                    var_hist = np.percentile(scaled_returns, percentile)
-                    cvar_hist = np.mean(scaled_returns[scaled_returns <= var_hist])
-                    var_results[conf_key][horizon_key]["historical_var"] = float(var_hist)
-                    var_results[conf_key][horizon_key]["historical_cvar"] = float(cvar_hist)
-                
-                # Parametric VaR
-                if 'parametric' in var_methods:
-                    mean = np.mean(scaled_returns)
-                    std = np.std(scaled_returns)
-                    z_score = stats.norm.ppf(1 - confidence)
-                    var_param = mean + z_score * std
-                    cvar_param = mean - std * stats.norm.pdf(z_score) / (1 - confidence)
-                    var_results[conf_key][horizon_key]["parametric_var"] = float(var_param)
-                    var_results[conf_key][horizon_key]["parametric_cvar"] = float(cvar_param)
-                
-                # Cornish-Fisher VaR
-                if 'cornish-fisher' in var_methods:
-                    mean = np.mean(scaled_returns)
-                    std = np.std(scaled_returns)
-                    skew = stats.skew(scaled_returns)
-                    kurt = stats.kurtosis(scaled_returns, fisher=True)
-                    z = stats.norm.ppf(1 - confidence)
-                    cf_z = z + (z**2 - 1) * skew / 6 + (z**3 - 3*z) * kurt / 24
-                    var_cf = mean + cf_z * std
-                    var_results[conf_key][horizon_key]["modified_var"] = float(var_cf)
+                cell = {}
+                for method, (var_key, es_key) in output_keys.items():
+                    if method in var_grid["var"]:
+                        cell[var_key] = float(var_grid["var"][method][i, j])
+                    if es_key and method in var_grid["es"]:
+                        cell[es_key] = float(var_grid["es"][method][i, j])
+                var_results[conf_key][horizon_key] = cell
+        
+        # Monte Carlo VaR/ES on the asset-level return matrix (seeded for reproducible gates)
+        if 'monte-carlo' in var_methods:
+            mc_grid = calculate_monte_carlo_var_es(
+                returns,
+                weights,
+                confidence_levels=confidence_levels,
+                horizons=time_horizons,
+                model=options.get('mc_model', 'normal'),
+                covariance=sample_cov.covariance,
+                n_paths=int(options.get('mc_paths', 100_000)),
+                seed=options.get('mc_seed', 42),
+                n_workers=int(options.get('mc_workers', 0))
+            )
+            for i, confidence in enumerate(confidence_levels):
+                for j, horizon in enumerate(time_horizons):
+                    cell = var_results[f"conf_{int(confidence*100)}"][f"horizon_{horizon}d"]
+                    cell["monte_carlo_var"] = float(mc_grid["var"][i, j])
+                    cell["monte_carlo_cvar"] = float(mc_grid["es"][i, j])
         
         result["risk_metrics"]["var_analysis"] = var_results
         
@@ -509,14 +510,9 @@ async def analyze_portfolio_risk(
             kurtosis = stats.kurtosis(portfolio_returns, fisher=True)
             _, jb_pvalue = stats.jarque_bera(portfolio_returns)
             
-            # Student-t fit for fat tails
-            try:
-                t_params = stats.t.fit(portfolio_returns)
-                t_df = t_params[0]
-                t_var_95 = stats.t.ppf(0.05, *t_params) * np.sqrt(252)
-            except Exception as e:
-                logger.error(f"Student-t distribution fitting failed: {e}")
-                raise ValueError(f"Failed to fit Student-t distribution: {str(e)}")
+            # Student-t fit for fat tails (fitted once above)
+            t_df = t_params[0]
+            t_var_95 = stats.t.ppf(0.05, *t_params) * np.sqrt(252)
             
             # Ulcer Index
             ulcer_index = float(np.sqrt(np.mean(drawdown**2)))
@@ -571,15 +567,13 @@ async def analyze_portfolio_risk(
         
         # Risk parity analysis
         if include_parity:
-            # Calculate equal risk contribution weights
-            n_assets = len(tickers)
-            rp_weights = np.ones(n_assets) / n_assets
-            
-            # Iterative solution
-            for _ in range(100):
-                rp_vol = np.sqrt(rp_weights @ cov_matrix @ rp_weights)
-                rp_marginal = cov_matrix @ rp_weights
-                rp_weights = (1 / rp_marginal) / np.sum(1 / rp_marginal)
+            # Equal risk contribution (or custom budgets), warm-started from the last run
+            rp_solution = risk_parity_solver.solve(
+                cov_matrix,
+                budgets=options.get('risk_budgets'),
+                tickers=list(tickers)
+            )
+            rp_weights = rp_solution['weights']
             
             # Final risk contributions for risk parity
             rp_vol = np.sqrt(rp_weights @ cov_matrix @ rp_weights)
@@ -589,12 +583,15 @@ async def analyze_portfolio_risk(
             result["risk_decomposition"]["risk_parity"] = {
                 "optimal_weights": {ticker: float(w) for ticker, w in zip(tickers, rp_weights)},
                 "equal_risk_achieved": bool(float(np.std(rp_contrib)) < 0.01),
-                "risk_contribution_std": float(np.std(rp_contrib))
+                "risk_contribution_std": float(np.std(rp_contrib)),
+                "converged": rp_solution['converged'],
+                "iterations": rp_solution['iterations'],
+                "max_budget_error": rp_solution['max_budget_error']
             }
         
         # Correlation matrix stats
         if len(tickers) > 1:
-            corr_matrix = data['returns'].corr().values
+            corr_matrix = sample_cov.correlation
             upper_triangle = corr_matrix[np.triu_indices_from(corr_matrix, k=1)]
             
             result["risk_decomposition"]["correlation_stats"] = {
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+PuLP vs sparse-model parity check for OracleStrategy.compute_optimal_trades.
+
+Runs both model paths on seeded synthetic portfolios for each optimization
+type and compares the trade decision and the main objective. The sparse
+path is only a safe default while this reports no mismatches.
+
+Usage:
+    python scripts/check_sparse_parity.py [--seeds 5] [--assets 30] [--types TAX_AWARE,TAX_UNAWARE,BUY_ONLY]
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "oracle"))
+
+from src.service.oracle import Oracle
+from src.service.oracle_strategy import OracleStrategy
+
+# Objectives may differ by the solvers' absolute gap (SolverSettings.gap_abs)
+OBJECTIVE_TOLERANCE = 0.011
+
+TAX_RATES = pd.DataFrame({
+    'gain_type': ['short_term', 'long_term', 'qualified_dividend'],
+    'federal_rate': [0.37, 0.2, 0.2],
+    'state_rate': [0.05] * 3,
+    'total_rate': [0.42, 0.25, 0.25]
+})
+
+
+def build_strategy(optimization_type: str, n_assets: int, seed: int) -> OracleStrategy:
+    """A synthetic strategy with two lots per asset, attached to its own Oracle"""
+    rng = np.random.default_rng(seed)
+    ids = [f"S{i}" for i in range(n_assets)]
+    lots = []
+    for i, ident in enumerate(ids):
+        for k in range(2):
+            quantity = float(rng.integers(5, 50))
+            lots.append({
+                'tax_lot_id': f"{i}_{k}",
+                'identifier': ident,
+                'quantity': quantity,
+                'cost_basis': quantity * float(rng.uniform(50, 150)),
+                'date': pd.Timestamp('2023-01-01') + pd.Timedelta(days=int(rng.integers(0, 600)))
+            })
+    prices = pd.DataFrame({'identifier': ids, 'price': rng.uniform(60, 140, n_assets)})
+    weights = rng.dirichlet(np.ones(n_assets)) * 0.98
+    targets = pd.DataFrame(
+        [{'asset_class': ident, 'target_weight': float(weights[i]), 'identifiers': [ident]} for i, ident in enumerate(ids)]
+        + [{'asset_class': 'CASH', 'target_weight': 0.02, 'identifiers': ['CASH']}]
+    )
+    strategy = OracleStrategy(tax_lots=pd.DataFrame(lots), prices=prices, cash=5000.0, targets=targets,
+                              strategy_id=1, optimization_type=optimization_type)
+    oracle = Oracle(current_date=date(2025, 1, 15), recently_closed_lots=pd.DataFrame(),
+                    stock_restrictions=pd.DataFrame(), tax_rates=TAX_RATES, strategies=[strategy])
+    oracle.initialize_wash_sale_restrictions()
+    return strategy
+
+
+def run(optimization_type: str, n_assets: int, seed: int, use_sparse_model: bool):
+    strategy = build_strategy(optimization_type, n_assets, seed)
+    status, should_trade, _, trades = strategy.compute_optimal_trades(
+        should_tlh=True, min_notional=10, trade_rounding=2, rebalance_threshold=0.0, buy_threshold=0.0,
+        use_sparse_model=use_sparse_model, debug=False, log_time=False
+    )
+    total = (strategy.optimized_component_values or {}).get('total')
+    return status, should_trade, None if total is None else float(total), len(trades)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seeds', type=int, default=5)
+    parser.add_argument('--assets', type=int, default=30)
+    parser.add_argument('--types', default='TAX_AWARE,TAX_UNAWARE,BUY_ONLY')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    mismatches = 0
+    for optimization_type in args.types.split(','):
+        for seed in range(args.seeds):
+            pulp_result = run(optimization_type, args.assets, seed, use_sparse_model=False)
+            sparse_result = run(optimization_type, args.assets, seed, use_sparse_model=True)
+            same = (pulp_result[:2] == sparse_result[:2]
+                    and (pulp_result[2] is None) == (sparse_result[2] is None)
+                    and (pulp_result[2] is None or abs(pulp_result[2] - sparse_result[2]) <= OBJECTIVE_TOLERANCE))
+            mismatches += not same
+            print(f"{'ok  ' if same else 'DIFF'} {optimization_type:<12} seed {seed}: "
+                  f"pulp (status, trade, objective, trades)={pulp_result} sparse={sparse_result}")
+
+    print(f"{mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
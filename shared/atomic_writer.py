@@ -5,7 +5,7 @@ import os
 import json
 import tempfile
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, BinaryIO, Callable, Union
 
 
 def atomic_dump_json(obj: Any, path: Union[str, Path], **json_kwargs) -> None:
@@ -106,6 +106,48 @@ def atomic_write_text(content: str, path: Union[str, Path]) -> None:
     os.replace(tmp_path, path)
 
 
+def atomic_write_bytes(path: Union[str, Path], writer: Callable[[BinaryIO], None]) -> None:
+    """
+    Atomically write a binary file produced by a writer callback.
+    
+    Args:
+        path: Target file path
+        writer: Called with the open temporary file, e.g.
+            lambda f: np.savez(f, **arrays)
+    """
+    path = Path(path)
+    
+    # Ensure parent directory exists
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Create temporary file in the same directory
+    with tempfile.NamedTemporaryFile(
+        delete=False,
+        dir=path.parent,
+        prefix=f'.{path.name}.',
+        suffix='.tmp'
+    ) as tmp:
+        try:
+            # Write content to temporary file
+            writer(tmp)
+            
+            # Ensure data is written to disk
+            tmp.flush()
+            os.fsync(tmp.fileno())
+            
+            tmp_path = tmp.name
+        except Exception:
+            # Clean up temp file on error
+            try:
+                os.unlink(tmp.name)
+            except OSError:
+                pass
+            raise
+    
+    # Atomically replace the target file
+    os.replace(tmp_path, path)
+
+
 def atomic_append_json_array(new_item: Any, path: Union[str, Path], **json_kwargs) -> None:
     """
     Atomically append an item to a JSON array file.
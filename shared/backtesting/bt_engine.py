@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from .vectorized import STRATEGIES, backtest_periods
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,8 +22,17 @@ class BacktestEngine:
     All interpretation and period selection done by LLM agents.
     """
     
-    def __init__(self):
-        """Initialize backtesting engine."""
+    def __init__(self, engine: str = 'bt'):
+        """
+        Initialize backtesting engine.
+        
+        Args:
+            engine: 'bt' to run strategies through the bt library, 'native' to use
+                    the vectorized NumPy core (fixed-weight strategies only)
+        """
+        if engine not in ('bt', 'native'):
+            raise ValueError(f"Unknown backtest engine: {engine}")
+        self.engine = engine
         self.cache = {}  # Cache backtest results
     
     def run_backtest(self, strategy, weights, data, **kwargs):
@@ -70,8 +81,109 @@ class BacktestEngine:
         Returns:
             Dict with backtest results for each period
         """
+        if self.engine == 'native':
+            return self.backtest_batch(
+                [strategy_weights],
+                historical_data,
+                periods,
+                strategy='periodic_rebalance',
+                rebalance_freq=rebalance_freq,
+                transaction_cost=transaction_cost
+            )[0]
+        
         results = {}
         
+        for period_str, period_data in self._slice_periods(historical_data, periods):
+            # Create bt strategy
+            strategy = self._create_strategy(
+                strategy_weights,
+                rebalance_freq,
+                transaction_cost
+            )
+            
+            # Run backtest mechanically
+            backtest = bt.Backtest(strategy, period_data)
+            result = bt.run(backtest)
+            
+            # Extract key metrics
+            results[period_str] = self._extract_metrics(result, backtest.name)
+            
+        return results
+    
+    def backtest_batch(self,
+                       portfolios: List[Dict[str, float]],
+                       historical_data: pd.DataFrame,
+                       periods: List[Dict[str, Any]],
+                       strategy: str = 'periodic_rebalance',
+                       rebalance_freq: str = 'monthly',
+                       transaction_cost: float = 0.001) -> List[Dict[str, Any]]:
+        """
+        Backtest many candidate portfolios on many periods with the vectorized core.
+        
+        All portfolios x periods are simulated as one array computation; the
+        metrics are the same as backtest_on_periods produces through bt. Positions
+        are fractional and transaction_cost is charged on traded value (the bt
+        path runs with whole shares and no commissions).
+        
+        Args:
+            portfolios: Target weights for each candidate portfolio
+            historical_data: Full historical price data
+            periods: List of period dicts, as for backtest_on_periods
+            strategy: 'buy_and_hold', 'periodic_rebalance' or 'equal_weight'
+                      (StrategyLibrary counterparts; equal_weight holds the
+                      portfolio's assets in equal proportions, rebalanced monthly)
+            rebalance_freq: Rebalancing frequency for periodic_rebalance
+            transaction_cost: Linear cost per unit of traded value (0.001 = 0.1%)
+            
+        Returns:
+            One dict per portfolio, mapping period label to metrics
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unsupported strategy for native backtest: {strategy}")
+        
+        unknown = sorted({asset for weights in portfolios for asset in weights} - set(historical_data.columns))
+        if unknown:
+            raise ValueError(f"No price data for assets: {unknown}")
+        
+        assets = historical_data.columns
+        weight_matrix = np.array([
+            [float(weights.get(asset, 0.0)) for asset in assets]
+            for weights in portfolios
+        ]).reshape(len(portfolios), len(assets))
+        
+        sliced = self._slice_periods(historical_data, periods)
+        if not sliced or not portfolios:
+            return [{} for _ in portfolios]
+        
+        stats = backtest_periods(
+            weight_matrix,
+            [period_data for _, period_data in sliced],
+            strategy=strategy,
+            rebalance_freq=rebalance_freq,
+            transaction_cost=transaction_cost
+        )
+        
+        results = [{} for _ in portfolios]
+        for (period_str, _), period_stats in zip(sliced, stats):
+            for result, portfolio_stats in zip(results, period_stats):
+                result[period_str] = self._format_metrics(portfolio_stats)
+        return results
+    
+    def _slice_periods(self,
+                       historical_data: pd.DataFrame,
+                       periods: List[Dict[str, Any]]) -> List[Tuple[str, pd.DataFrame]]:
+        """
+        Resolve period dicts to labelled slices of the historical data.
+        
+        Args:
+            historical_data: Full historical price data
+            periods: List of period dicts with 'start_date'/'end_date' or 'period'
+            
+        Returns:
+            List of (period label, price data) for the periods with data
+        """
+        sliced = []
+        
         for period_info in periods:
             # Check if dates are provided directly
             start_date = period_info.get('start_date')
@@ -102,21 +214,9 @@ class BacktestEngine:
                 logger.warning(f"No data available for period {period_str}")
                 continue
             
-            # Create bt strategy
-            strategy = self._create_strategy(
-                strategy_weights,
-                rebalance_freq,
-                transaction_cost
-            )
-            
-            # Run backtest mechanically
-            backtest = bt.Backtest(strategy, period_data)
-            result = bt.run(backtest)
-            
-            # Extract key metrics
-            results[period_str] = self._extract_metrics(result, backtest.name)
+            sliced.append((period_str, period_data))
             
-        return results
+        return sliced
     
     def backtest_strategy(self,
                          strategy_weights: Dict[str, float],
@@ -343,8 +443,18 @@ class BacktestEngine:
         Returns:
             Dict with performance metrics
         """
-        stats = bt_result[strategy_name]
+        return self._format_metrics(bt_result[strategy_name])
+    
+    def _format_metrics(self, stats) -> Dict[str, Any]:
+        """
+        Format performance statistics as the metrics dict returned by the engine.
         
+        Args:
+            stats: ffn PerformanceStats from bt, or PeriodStats from the native core
+            
+        Returns:
+            Dict with performance metrics
+        """
         return {
             "total_return": float(stats.total_return),
             "annualized_return": float(stats.cagr),
@@ -356,4 +466,4 @@ class BacktestEngine:
             "end_date": str(stats.end),
             "best_year": float(stats.yearly_returns.max()) if hasattr(stats, 'yearly_returns') else None,
             "worst_year": float(stats.yearly_returns.min()) if hasattr(stats, 'yearly_returns') else None
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtesting core - fixed-weight strategies as NumPy array math.
+
+Covers the strategies that reduce to "hold target weights, rebalance on a
+calendar schedule" (StrategyLibrary.buy_and_hold, periodic_rebalance and
+equal_weight) and simulates many weight vectors over many periods at once.
+Follows bt's conventions (virtual start row one day before the first date,
+run-on-first-date schedules, cash earns nothing) with fractional positions,
+so the statistics line up with the PerformanceStats bt produces.
+"""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('buy_and_hold', 'periodic_rebalance', 'equal_weight')
+REBALANCE_FREQUENCIES = ('daily', 'weekly', 'monthly', 'quarterly', 'yearly')
+TRADING_DAYS_PER_YEAR = 252
+SECONDS_PER_YEAR = 31557600  # 365.25 days, as ffn's year_frac
+
+# Cap on the (rebalances x portfolios x assets) block used for turnover
+TURNOVER_BLOCK_ENTRIES = 4_000_000
+
+
+@dataclass
+class PeriodStats:
+    """Performance statistics of one simulated portfolio over one period (ffn field names)."""
+    start: pd.Timestamp
+    end: pd.Timestamp
+    total_return: float
+    cagr: float
+    daily_vol: float
+    daily_sharpe: float
+    max_drawdown: float
+    calmar: float
+    yearly_returns: pd.Series
+
+
+def rebalance_mask(dates: pd.DatetimeIndex, frequency: Optional[str]) -> np.ndarray:
+    """
+    Rebalance dates of a period, matching bt's RunPeriod algos.
+
+    The first date always trades and the last date never does; in between a
+    date trades when its day/week/month/quarter/year differs from the
+    previous date's.
+
+    Args:
+        dates: Trading dates of the period
+        frequency: One of REBALANCE_FREQUENCIES, or None to trade only on the
+                   first date (buy and hold). Unknown values fall back to monthly.
+
+    Returns:
+        Boolean array, True on rebalance dates
+    """
+    dates = pd.DatetimeIndex(dates)
+    mask = np.zeros(len(dates), dtype=bool)
+    if len(dates) == 0:
+        return mask
+    mask[0] = True
+    if frequency is None or len(dates) < 3:
+        return mask
+
+    if frequency == 'daily':
+        key = dates.normalize().asi8
+    elif frequency == 'weekly':
+        iso = dates.isocalendar()
+        key = iso['year'].to_numpy(dtype=np.int64) * 100 + iso['week'].to_numpy(dtype=np.int64)
+    elif frequency == 'quarterly':
+        key = dates.year.to_numpy() * 4 + dates.quarter.to_numpy()
+    elif frequency == 'yearly':
+        key = dates.year.to_numpy()
+    else:
+        key = dates.year.to_numpy() * 12 + dates.month.to_numpy()
+
+    mask[1:-1] = key[1:-1] != key[:-2]
+    return mask
+
+
+def simulate_portfolios(prices: np.ndarray,
+                        weights: np.ndarray,
+                        rebalance: np.ndarray,
+                        starts: np.ndarray,
+                        transaction_cost: float = 0.0,
+                        equal_weight: bool = False) -> np.ndarray:
+    """
+    Value paths of many fixed-weight portfolios over concatenated periods.
+
+    Between rebalances holdings are constant, so the value in a segment is the
+    value at its rebalance date times w . (p_t / p_rebalance) plus idle cash;
+    segments are chained with a cumulative product that restarts at every
+    period start. Assets without a positive price on a rebalance date are
+    skipped until the next rebalance (their weight stays in cash).
+
+    Args:
+        prices: (T, N) prices of all periods stacked in time order, forward
+                filled within each period
+        weights: (P, N) target weights, one row per portfolio
+        rebalance: (T,) True where the portfolio trades back to target
+        starts: (T,) True on the first date of each period (value resets to 1)
+        transaction_cost: Linear cost per unit of traded value (0.001 = 0.1%)
+        equal_weight: Ignore the weight values and hold the non-zero assets of
+                      each row in equal proportions
+
+    Returns:
+        (T, P) portfolio values, 1.0 at the start of each period before trading
+    """
+    prices = np.asarray(prices, dtype=float)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    starts = np.asarray(starts, dtype=bool)
+    rebalance = np.asarray(rebalance, dtype=bool) | starts
+    n_portfolios = weights.shape[0]
+
+    with np.errstate(invalid='ignore'):
+        tradable = np.isfinite(prices) & (prices > 0)
+    rows = np.flatnonzero(rebalance)
+    segment = np.cumsum(rebalance) - 1
+    anchor = prices[rows]
+
+    # Effective weights depend only on which assets trade at the rebalance
+    # date; group segments into the (few) distinct availability patterns.
+    patterns, regime = np.unique(tradable[rows], axis=0, return_inverse=True)
+    regime = regime.ravel()
+    if equal_weight:
+        members = (weights != 0)[None, :, :] & patterns[:, None, :]
+        counts = members.sum(axis=2, keepdims=True)
+        regime_weights = np.divide(members, counts, out=np.zeros(members.shape), where=counts > 0)
+    else:
+        regime_weights = weights[None, :, :] * patterns[:, None, :]
+    regime_cash = 1.0 - regime_weights.sum(axis=2)
+
+    # Growth since the last rebalance: w . (p_t / p_anchor) + cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(tradable[rows][segment], prices / anchor[segment], 0.0)
+    growth = np.empty((len(prices), n_portfolios))
+    row_regime = regime[segment]
+    for r in range(len(patterns)):
+        in_regime = row_regime == r
+        growth[in_regime] = relative[in_regime] @ regime_weights[r].T + regime_cash[r]
+
+    # Drift of the previous segment up to each rebalance date
+    continuing = ~starts[rows]
+    continuing[0] = False
+    prev = np.maximum(np.arange(len(rows)) - 1, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drift = np.where(tradable[rows][prev] & continuing[:, None], anchor / anchor[prev], 0.0)
+    drift = np.nan_to_num(drift, nan=0.0, posinf=0.0, neginf=0.0)
+    pre_growth = np.ones((len(rows), n_portfolios))
+    for r in range(len(patterns)):
+        k = np.flatnonzero(continuing & (regime[prev] == r))
+        pre_growth[k] = drift[k] @ regime_weights[r].T + regime_cash[r]
+
+    factors = np.where(continuing[:, None], pre_growth, 1.0)
+    if transaction_cost:
+        turnover = _turnover(regime_weights, regime, prev, drift, pre_growth, continuing)
+        factors = factors * (1.0 - transaction_cost * turnover)
+
+    # Chain segment factors within each period
+    level = np.empty_like(factors)
+    bounds = np.append(np.flatnonzero(~continuing), len(rows))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        level[lo:hi] = np.cumprod(factors[lo:hi], axis=0)
+
+    return level[segment] * growth
+
+
+def _turnover(regime_weights: np.ndarray,
+              regime: np.ndarray,
+              prev: np.ndarray,
+              drift: np.ndarray,
+              pre_growth: np.ndarray,
+              continuing: np.ndarray) -> np.ndarray:
+    """Traded value per rebalance as a fraction of pre-trade value: sum |w_target - w_drifted|."""
+    n_rebalances, n_portfolios = pre_growth.shape
+    n_assets = regime_weights.shape[2]
+    block = max(1, TURNOVER_BLOCK_ENTRIES // max(1, n_portfolios * n_assets))
+    turnover = np.empty((n_rebalances, n_portfolios))
+    for lo in range(0, n_rebalances, block):
+        k = slice(lo, lo + block)
+        target = regime_weights[regime[k]]
+        drifted = regime_weights[regime[prev[k]]] * drift[k][:, None, :] / pre_growth[k][:, :, None]
+        drifted = np.where(continuing[k][:, None, None], drifted, 0.0)
+        turnover[k] = np.abs(target - drifted).sum(axis=2)
+    return turnover
+
+
+def performance_stats(dates: pd.DatetimeIndex, values: np.ndarray) -> List[PeriodStats]:
+    """
+    ffn-style statistics for the value paths of one period, all portfolios at once.
+
+    Prepends bt's virtual starting row (one day before the first date, value
+    1.0) and works on the last observation of each calendar day.
+
+    Args:
+        dates: (T,) dates of the period
+        values: (T, P) portfolio values from simulate_portfolios
+
+    Returns:
+        List of PeriodStats, one per portfolio
+    """
+    dates = pd.DatetimeIndex(dates)
+    values = np.asarray(values, dtype=float).reshape(len(dates), -1)
+    n_portfolios = values.shape[1]
+    index = dates.insert(0, dates[0] - pd.DateOffset(days=1))
+    values = np.vstack([np.ones((1, n_portfolios)), values])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_return = values[-1] / values[0] - 1
+
+        days = index.normalize()
+        last_of_day = np.append(days[1:] != days[:-1], True)
+        days, daily = days[last_of_day], values[last_of_day]
+
+        nan = np.full(n_portfolios, np.nan)
+        cagr = daily_vol = daily_sharpe = max_drawdown = calmar = nan
+        years_index = pd.Index([], dtype=np.int64)
+        yearly = np.empty((0, n_portfolios))
+
+        if len(daily) > 1:
+            returns = daily[1:] / daily[:-1] - 1
+            if len(returns) >= 2:
+                std = returns.std(axis=0, ddof=1)
+                spread = returns.max(axis=0) - returns.min(axis=0)
+                tolerance = 4 * np.finfo(float).eps
+                no_dispersion = (spread <= tolerance * np.abs(returns.max(axis=0))) | \
+                                (spread <= tolerance * np.abs(returns.min(axis=0)))
+                daily_vol = std * np.sqrt(TRADING_DAYS_PER_YEAR)
+                daily_sharpe = np.where(no_dispersion, np.nan,
+                                        returns.mean(axis=0) / std * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+            years = (days[-1] - days[0]).total_seconds() / SECONDS_PER_YEAR
+            cagr = (daily[-1] / daily[0]) ** (1 / years) - 1
+            max_drawdown = (daily / np.maximum.accumulate(daily, axis=0)).min(axis=0) - 1
+            calmar = np.divide(cagr, np.abs(max_drawdown))
+
+            # ffn only reports yearly returns from four daily returns on
+            if len(returns) >= 4:
+                year = days.year.to_numpy()
+                year_end = np.append(year[1:] != year[:-1], True)
+                year_values = daily[year_end]
+                years_index = pd.Index(year[year_end][1:])
+                yearly = year_values[1:] / year_values[:-1] - 1
+
+    start, end = index[0], index[-1]
+    return [
+        PeriodStats(
+            start=start,
+            end=end,
+            total_return=float(total_return[p]),
+            cagr=float(cagr[p]),
+            daily_vol=float(daily_vol[p]),
+            daily_sharpe=float(daily_sharpe[p]),
+            max_drawdown=float(max_drawdown[p]),
+            calmar=float(calmar[p]),
+            yearly_returns=pd.Series(yearly[:, p], index=years_index, dtype=float)
+        )
+        for p in range(n_portfolios)
+    ]
+
+
+def backtest_periods(weights: np.ndarray,
+                     period_data: Sequence[pd.DataFrame],
+                     strategy: str = 'periodic_rebalance',
+                     rebalance_freq: Optional[str] = 'monthly',
+                     transaction_cost: float = 0.0) -> List[List[PeriodStats]]:
+    """
+    Backtest every weight vector on every period in one batched simulation.
+
+    Args:
+        weights: (P, N) target weights aligned with the columns of period_data
+        period_data: Price frames, one per period, all with the same N columns
+        strategy: One of STRATEGIES
+        rebalance_freq: Rebalancing frequency for periodic_rebalance
+        transaction_cost: Linear cost per unit of traded value
+
+    Returns:
+        Nested list [period][portfolio] of PeriodStats
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unsupported strategy for vectorized backtest: {strategy}")
+    if not period_data:
+        return []
+
+    frequency = {
+        'buy_and_hold': None,
+        'periodic_rebalance': rebalance_freq,
+        'equal_weight': 'monthly'
+    }[strategy]
+
+    frames = [frame.ffill() for frame in period_data]
+    lengths = np.array([len(frame) for frame in frames])
+    prices = np.vstack([frame.to_numpy(dtype=float) for frame in frames])
+    rebalance = np.concatenate([rebalance_mask(frame.index, frequency) for frame in frames])
+    starts = np.zeros(len(prices), dtype=bool)
+    starts[np.concatenate([[0], np.cumsum(lengths)[:-1]])] = True
+
+    values = simulate_portfolios(
+        prices,
+        weights,
+        rebalance,
+        starts,
+        transaction_cost=transaction_cost,
+        equal_weight=strategy == 'equal_weight'
+    )
+
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return [
+        performance_stats(frame.index, values[offsets[i]:offsets[i + 1]])
+        for i, frame in enumerate(frames)
+    ]
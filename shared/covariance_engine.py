@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Covariance Engine
+Single source of covariance/correlation estimates keyed by (universe, window,
+estimator). Keeps running moment sums per (universe, window) so that a new day
+of returns rolls the window forward with rank-one updates instead of a full
+O(T n^2) recomputation, and caches each estimate with its Cholesky factor.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from risk_utils import cached_cholesky
+
+logger = logging.getLogger("covariance_engine")
+
+ESTIMATORS = ("sample", "ledoit_wolf", "oas", "ewma")
+
+# Recompute moments from scratch after this many rolling updates to bound drift
+REFRESH_AFTER_UPDATES = 252
+
+
+@dataclass
+class CovarianceEstimate:
+    """A daily covariance estimate plus lazily derived correlation and Cholesky factor"""
+    tickers: List[str]
+    estimator: str
+    window: int
+    end_date: Any
+    covariance: np.ndarray
+    shrinkage: Optional[float] = None
+    _correlation: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def correlation(self) -> np.ndarray:
+        if self._correlation is None:
+            std = np.sqrt(np.diag(self.covariance))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = self.covariance / np.outer(std, std)
+            corr[~np.isfinite(corr)] = 0.0
+            np.fill_diagonal(corr, 1.0)
+            self._correlation = corr
+        return self._correlation
+
+    def cholesky(self) -> np.ndarray:
+        """Lower Cholesky factor of the (daily) covariance, cached by content"""
+        return cached_cholesky(self.covariance)
+
+    def to_frame(self, annualization: float = 1.0) -> pd.DataFrame:
+        """Covariance as a DataFrame, optionally annualized (e.g. 252)"""
+        return pd.DataFrame(self.covariance * annualization, index=self.tickers, columns=self.tickers)
+
+    def correlation_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.correlation, index=self.tickers, columns=self.tickers)
+
+
+class _WindowMoments:
+    """
+    Running sums over a fixed window of return rows.
+
+    Maintains sum(x), sum(x x'), sum(x^2 x') and sum(||x||^4), which is
+    enough to produce the sample covariance and the Ledoit-Wolf / OAS
+    shrinkage intensities without revisiting the rows, plus an EWMA
+    covariance updated by its own recursion.
+    """
+
+    def __init__(self, rows: np.ndarray, dates: pd.Index, ewma_decay: float):
+        self.ewma_decay = ewma_decay
+        self.rebuild(rows, dates)
+
+    def rebuild(self, rows: np.ndarray, dates: pd.Index) -> None:
+        self.rows = rows
+        self.dates = dates
+        squared = rows * rows
+        self.count = len(rows)
+        self.total = rows.sum(axis=0)
+        self.cross = rows.T @ rows
+        self.square_cross = squared.T @ rows
+        self.fourth = float(np.sum(squared.sum(axis=1) ** 2))
+        self.updates = 0
+
+        # EWMA seeded with the window's sample covariance, then run through the window
+        decay = self.ewma_decay
+        weights = (1 - decay) * decay ** np.arange(len(rows) - 1, -1, -1)
+        self.ewma = decay ** len(rows) * self.sample() + (rows * weights[:, np.newaxis]).T @ rows
+
+    def roll(self, new_rows: np.ndarray, new_dates: pd.Index) -> None:
+        """Append rows and drop the same number of oldest rows"""
+        decay = self.ewma_decay
+        for k, x in enumerate(new_rows):
+            old = self.rows[k]
+            x2, old2 = x * x, old * old
+            self.total += x - old
+            self.cross += np.outer(x, x) - np.outer(old, old)
+            self.square_cross += np.outer(x2, x) - np.outer(old2, old)
+            self.fourth += float(x2.sum() ** 2 - old2.sum() ** 2)
+            self.ewma = decay * self.ewma + (1 - decay) * np.outer(x, x)
+
+        k = len(new_rows)
+        self.rows = np.concatenate([self.rows[k:], new_rows])
+        self.dates = self.dates[k:].append(new_dates)
+        self.updates += k
+
+    def scatter(self) -> np.ndarray:
+        """Centered cross-product matrix sum((x - m)(x - m)')"""
+        mean = self.total / self.count
+        return self.cross - self.count * np.outer(mean, mean)
+
+    def sample(self) -> np.ndarray:
+        return self.scatter() / (self.count - 1)
+
+    def ledoit_wolf(self) -> Tuple[np.ndarray, float]:
+        """Ledoit-Wolf shrinkage toward scaled identity (sklearn conventions)"""
+        n_samples, n_features = self.count, len(self.total)
+        emp_cov = self.scatter() / n_samples
+        emp_cov_trace = np.diag(emp_cov)
+        mu = emp_cov_trace.sum() / n_features
+
+        # sum over t of ||x_t - m||^4 expanded in the running raw moments
+        mean = self.total / n_samples
+        mean_sq = float(mean @ mean)
+        centered_fourth = (
+            self.fourth
+            - 4.0 * float(self.square_cross.sum(axis=0) @ mean)
+            + 4.0 * float(mean @ self.cross @ mean)
+            + 2.0 * mean_sq * float(np.trace(self.cross))
+            - 3.0 * n_samples * mean_sq ** 2
+        )
+        delta_ = float(np.sum((emp_cov * n_samples) ** 2)) / n_samples ** 2
+        beta = (centered_fourth / n_samples - delta_) / (n_features * n_samples)
+        delta = (delta_ - 2.0 * mu * emp_cov_trace.sum() + n_features * mu ** 2) / n_features
+        beta = min(beta, delta)
+        shrinkage = 0.0 if beta == 0 else beta / delta
+
+        shrunk = (1.0 - shrinkage) * emp_cov
+        shrunk.flat[::n_features + 1] += shrinkage * mu
+        return shrunk, float(shrinkage)
+
+    def oas(self) -> Tuple[np.ndarray, float]:
+        """Oracle Approximating Shrinkage toward scaled identity (sklearn conventions)"""
+        n_samples, n_features = self.count, len(self.total)
+        emp_cov = self.scatter() / n_samples
+        alpha = float(np.mean(emp_cov ** 2))
+        mu = float(np.trace(emp_cov)) / n_features
+        num = alpha + mu ** 2
+        den = (n_samples + 1.0) * (alpha - mu ** 2 / n_features)
+        shrinkage = 1.0 if den == 0 else min(num / den, 1.0)
+
+        shrunk = (1.0 - shrinkage) * emp_cov
+        shrunk.flat[::n_features + 1] += shrinkage * mu
+        return shrunk, float(shrinkage)
+
+
+class CovarianceEngine:
+    """
+    Process-wide covariance/correlation cache.
+
+    Estimates are keyed by (universe, window, estimator). When called again
+    with the same universe and window and the returns have only gained new
+    trailing days (with unchanged history), the window is rolled forward with
+    rank-one updates; any revision of history triggers a full rebuild.
+    """
+
+    def __init__(self, max_entries: int = 32, ewma_decay: float = 0.94):
+        """
+        Initialize covariance engine.
+
+        Args:
+            max_entries: Number of (universe, window) states kept
+            ewma_decay: Decay factor for the "ewma" estimator (RiskMetrics 0.94)
+        """
+        self.max_entries = max_entries
+        self.ewma_decay = ewma_decay
+        self.lock = threading.RLock()
+        self._states: "OrderedDict[Tuple, _WindowMoments]" = OrderedDict()
+        self._estimates: Dict[Tuple, CovarianceEstimate] = {}
+
+        self.stats = {
+            "hits": 0,
+            "rolls": 0,
+            "rebuilds": 0
+        }
+
+    def _sync_state(self, key: Tuple, rows: np.ndarray, dates: pd.Index) -> Tuple[_WindowMoments, bool]:
+        """Bring the moment state for key up to the given window; returns (state, changed)"""
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+            if len(state.dates) == len(dates) and state.dates[-1] == dates[-1] and np.array_equal(state.rows, rows):
+                return state, False
+
+            # New trailing days on top of unchanged history -> roll forward
+            n_new = int(np.searchsorted(dates, state.dates[-1], side='right'))
+            n_new = len(dates) - n_new if n_new > 0 and dates[n_new - 1] == state.dates[-1] else 0
+            if (0 < n_new < len(rows)
+                    and state.updates + n_new <= REFRESH_AFTER_UPDATES
+                    and np.array_equal(state.rows[n_new:], rows[:-n_new])):
+                state.roll(rows[-n_new:], dates[-n_new:])
+                self.stats["rolls"] += 1
+                return state, True
+
+            state.rebuild(rows, dates)
+            self.stats["rebuilds"] += 1
+            return state, True
+
+        state = _WindowMoments(rows, dates, self.ewma_decay)
+        self._states[key] = state
+        if len(self._states) > self.max_entries:
+            evicted, _ = self._states.popitem(last=False)
+            for name in ESTIMATORS:
+                self._estimates.pop(evicted + (name,), None)
+        self.stats["rebuilds"] += 1
+        return state, True
+
+    def estimate(
+        self,
+        returns: pd.DataFrame,
+        estimator: str = "sample",
+        window: Optional[int] = None
+    ) -> CovarianceEstimate:
+        """
+        Daily covariance estimate over the trailing window of returns.
+
+        Args:
+            returns: Daily returns (rows = dates, columns = tickers); rows with
+                any NaN are dropped
+            estimator: One of ESTIMATORS
+            window: Number of trailing rows (default: all rows)
+
+        Returns:
+            CovarianceEstimate (shared; treat as read-only)
+        """
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Unknown covariance estimator: {estimator} (expected one of {ESTIMATORS})")
+
+        returns = returns.dropna()
+        window = int(window or len(returns))
+        tail = returns.iloc[-window:]
+        if len(tail) < 2:
+            raise ValueError(f"Insufficient data for covariance estimate: {len(tail)} rows")
+
+        tickers = [str(t) for t in returns.columns]
+        state_key = (tuple(tickers), window)
+        rows = np.ascontiguousarray(tail.values, dtype=np.float64)
+
+        with self.lock:
+            state, changed = self._sync_state(state_key, rows, tail.index)
+            est_key = state_key + (estimator,)
+            if changed:
+                for name in ESTIMATORS:
+                    self._estimates.pop(state_key + (name,), None)
+            cached = self._estimates.get(est_key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+
+            shrinkage = None
+            if estimator == "sample":
+                covariance = state.sample()
+            elif estimator == "ledoit_wolf":
+                covariance, shrinkage = state.ledoit_wolf()
+            elif estimator == "oas":
+                covariance, shrinkage = state.oas()
+            else:
+                covariance = state.ewma.copy()
+
+            estimate = CovarianceEstimate(
+                tickers=tickers,
+                estimator=estimator,
+                window=len(rows),
+                end_date=tail.index[-1],
+                covariance=(covariance + covariance.T) / 2,
+                shrinkage=shrinkage
+            )
+            self._estimates[est_key] = estimate
+            return estimate
+
+    def clear(self) -> None:
+        """Drop all cached states and estimates"""
+        with self.lock:
+            self._states.clear()
+            self._estimates.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get engine statistics"""
+        return {
+            **self.stats,
+            "universes": len(self._states),
+            "estimates": len(self._estimates)
+        }
+
+
+# Singleton instance shared by servers in the same process
+_covariance_engine = None
+
+def get_covariance_engine() -> CovarianceEngine:
+    """Get or create the singleton CovarianceEngine instance"""
+    global _covariance_engine
+    if _covariance_engine is None:
+        _covariance_engine = CovarianceEngine()
+    return _covariance_engine
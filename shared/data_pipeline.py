@@ -147,7 +147,8 @@ class MarketDataPipeline:
     # Invalid tickers to exclude
     INVALID_TICKERS = ['TEST', 'DUMMY', 'MOCK', 'SAMPLE', 'EXAMPLE']
     
-    def __init__(self, cache_ttl_minutes: int = 15, portfolio_state_client=None):
+    def __init__(self, cache_ttl_minutes: int = 15, portfolio_state_client=None, use_price_store: bool = True,
+                 use_symbol_index: bool = True):
         self.cache = {}
         self.cache_ttl = timedelta(minutes=cache_ttl_minutes)
         self.quality_scorer = DataQualityScorer()
@@ -163,6 +164,24 @@ class MarketDataPipeline:
             self.shared_cache = None
             logger.info("Shared cache not available, using local cache only")
         
+        # Persistent per-ticker price history so restarts don't refetch full windows
+        self.price_store = None
+        if use_price_store:
+            try:
+                from shared.price_store import get_price_store
+                self.price_store = get_price_store()
+            except Exception as e:
+                logger.warning(f"Price history store unavailable, fetching from network: {e}")
+        
+        # Offline symbol index so known tickers resolve without yfinance probes
+        self.symbol_index = None
+        if use_symbol_index:
+            try:
+                from shared.symbol_index import get_symbol_index
+                self.symbol_index = get_symbol_index()
+            except Exception as e:
+                logger.warning(f"Symbol index unavailable, resolving tickers over the network: {e}")
+        
         # Lazy initialization - OpenBB will be loaded on first use
         self._obb = None
         self.use_openbb = None  # Will be determined on first access
@@ -211,7 +230,8 @@ class MarketDataPipeline:
     def resolve_ticker(self, ticker: str) -> Optional[str]:
         """
         Resolve ticker symbol using fuzzy matching to handle format variations.
-        Tries multiple formats to find a working ticker symbol for Yahoo Finance.
+        Looks the ticker up in the offline symbol index first; only symbols the
+        index does not know are probed in multiple formats on Yahoo Finance.
         """
         # Check cache first
         if ticker in self.ticker_cache:
@@ -221,6 +241,12 @@ class MarketDataPipeline:
         if ticker.upper() in self.INVALID_TICKERS or ticker in ['CASH', 'VMFXX', 'N/A']:
             return None
         
+        if self.symbol_index is not None:
+            resolved = self.symbol_index.resolve(ticker)
+            if resolved is not None:
+                self.ticker_cache[ticker] = resolved
+                return resolved
+        
         if not self.yf_available:
             # Can't resolve without yfinance
             return ticker
@@ -253,6 +279,180 @@ class MarketDataPipeline:
         logger.warning(f"Could not resolve ticker: {ticker}")
         return None
     
+    def _download_prices(
+        self,
+        tickers_to_fetch: List[str],
+        start_date: str,
+        end_date: str
+    ) -> pd.DataFrame:
+        """
+        Download closing prices from OpenBB/yfinance
+        
+        Args:
+            tickers_to_fetch: Resolved ticker symbols
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD, exclusive as in yfinance)
+        
+        Returns:
+            DataFrame of closes with one column per resolved ticker
+        """
+        # Try to use OpenBB first (lazy load via property)
+        if self.obb is not None:  # This will trigger lazy loading
+            try:
+                # Use OpenBB for data fetching (with resolved tickers)
+                data = self.obb.equity.price.historical(
+                    symbol=tickers_to_fetch,
+                    start=start_date,
+                    end=end_date,
+                    provider='yfinance'  # Can switch providers
+                )
+                prices_df = pd.DataFrame(data.results)
+                prices_df = prices_df.pivot(index='date', columns='symbol', values='close')
+            except Exception as openbb_error:
+                logger.warning(f"OpenBB fetch failed: {openbb_error}, falling back to direct yfinance")
+                self.use_openbb = False  # Fallback for this request
+        
+        if not self.use_openbb and self.yf_available:
+            # Fallback to yfinance (with resolved tickers)
+            if len(tickers_to_fetch) == 1:
+                # Single ticker - download directly
+                data = self.yf.download(
+                    tickers_to_fetch[0],
+                    start=start_date,
+                    end=end_date,
+                    progress=False
+                )
+                # Check if we got any data
+                if data is None:
+                    raise ValueError(f"No data available for {tickers_to_fetch[0]} in the specified date range")
+                elif hasattr(data, 'empty') and data.empty:
+                    raise ValueError(f"No data available for {tickers_to_fetch[0]} in the specified date range")
+                elif isinstance(data, pd.DataFrame) and data.isna().all().all():
+                    raise ValueError(f"No valid data available for {tickers_to_fetch[0]} (all NaN values)")
+                
+                # yfinance returns MultiIndex even for single ticker!
+                if isinstance(data.columns, pd.MultiIndex):
+                    # Extract 'Adj Close' or 'Close' prices
+                    if 'Adj Close' in data.columns.levels[0]:
+                        prices_df = data['Adj Close']
+                        # For single ticker, this will be a Series, convert to DataFrame
+                        if isinstance(prices_df, pd.Series):
+                            prices_df = prices_df.to_frame(tickers_to_fetch[0])
+                        elif len(prices_df.columns) == 1:
+                            prices_df.columns = tickers_to_fetch
+                    elif 'Close' in data.columns.levels[0]:
+                        prices_df = data['Close']
+                        # For single ticker, this will be a Series, convert to DataFrame
+                        if isinstance(prices_df, pd.Series):
+                            prices_df = prices_df.to_frame(tickers_to_fetch[0])
+                        elif len(prices_df.columns) == 1:
+                            prices_df.columns = tickers_to_fetch
+                    else:
+                        raise ValueError("No price data found in yfinance response")
+                elif isinstance(data, pd.DataFrame):
+                    # Non-MultiIndex DataFrame (shouldn't happen with yfinance, but handle it)
+                    if 'Adj Close' in data.columns:
+                        prices_df = data[['Adj Close']].rename(columns={'Adj Close': tickers_to_fetch[0]})
+                    elif 'Close' in data.columns:
+                        prices_df = data[['Close']].rename(columns={'Close': tickers_to_fetch[0]})
+                    else:
+                        prices_df = data
+                else:
+                    # Single series result
+                    prices_df = pd.DataFrame({tickers_to_fetch[0]: data})
+            else:
+                # Multiple tickers - handle MultiIndex
+                data = self.yf.download(
+                    tickers_to_fetch,
+                    start=start_date,
+                    end=end_date,
+                    progress=False
+                )
+                # Check if we got any data
+                if data is None:
+                    raise ValueError(f"No data available for {tickers_to_fetch} in the specified date range")
+                elif hasattr(data, 'empty') and data.empty:
+                    raise ValueError(f"No data available for {tickers_to_fetch} in the specified date range")
+                elif isinstance(data, pd.DataFrame) and data.isna().all().all():
+                    raise ValueError(f"No valid data available for {tickers_to_fetch} (all NaN values)")
+                
+                # yfinance returns MultiIndex columns for multiple tickers
+                if isinstance(data.columns, pd.MultiIndex):
+                    # Extract 'Adj Close' or 'Close' prices
+                    if 'Adj Close' in data.columns.levels[0]:
+                        prices_df = data['Adj Close']
+                    elif 'Close' in data.columns.levels[0]:
+                        prices_df = data['Close']
+                    else:
+                        raise ValueError("No price data found in yfinance response")
+                else:
+                    # Single ticker returned as regular columns
+                    if 'Adj Close' in data.columns:
+                        prices_df = data[['Adj Close']]
+                    else:
+                        prices_df = data[['Close']]
+                    prices_df.columns = tickers_to_fetch
+            
+            # Ensure we have a DataFrame with ticker columns
+            if isinstance(prices_df, pd.Series):
+                prices_df = prices_df.to_frame(tickers_to_fetch[0] if tickers_to_fetch else 'UNKNOWN')
+        
+        return prices_df
+    
+    def _load_prices(
+        self,
+        tickers_to_fetch: List[str],
+        start_date: str,
+        end_date: str
+    ) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Load closing prices, reading from the on-disk price store first
+        
+        Only date ranges the store has never covered are downloaded. Tickers
+        sharing the same gap (the common case: every holding is one day behind)
+        are fetched together in a single request.
+        
+        Returns:
+            Tuple of (prices DataFrame keyed by resolved ticker, tickers downloaded)
+        """
+        if self.price_store is None:
+            return self._download_prices(tickers_to_fetch, start_date, end_date), list(tickers_to_fetch)
+        
+        # Group tickers by the gap they need filled
+        gaps: Dict[Tuple[str, str], List[str]] = {}
+        for ticker in tickers_to_fetch:
+            for gap in self.price_store.missing_ranges(ticker, start_date, end_date):
+                gaps.setdefault(gap, []).append(ticker)
+        
+        downloaded = set()
+        for (gap_start, gap_end), group in gaps.items():
+            try:
+                segment = self._download_prices(group, gap_start, gap_end)
+            except Exception as e:
+                # Only tolerate the failure if we already hold history for every ticker
+                if any(self.price_store.get_coverage(t) is None for t in group):
+                    raise
+                logger.warning(f"Could not extend price history for {group} ({gap_start} to {gap_end}): {e}")
+                continue
+            
+            for ticker in group:
+                if ticker in segment.columns:
+                    self.price_store.write(ticker, segment[ticker], gap_start, gap_end)
+                    downloaded.add(ticker)
+                else:
+                    logger.warning(f"No {ticker} column in downloaded prices for {gap_start} to {gap_end}")
+        
+        if gaps:
+            logger.info(f"Price store: {len(tickers_to_fetch) - len(downloaded)} tickers served locally, "
+                        f"{len(downloaded)} extended over {len(gaps)} download(s)")
+        
+        series = [self.price_store.read(ticker, start_date, end_date) for ticker in tickers_to_fetch]
+        prices_df = pd.concat(series, axis=1) if series else pd.DataFrame()
+        if prices_df.empty or prices_df.isna().all().all():
+            raise ValueError(f"No data available for {tickers_to_fetch} in the specified date range")
+        
+        return prices_df, sorted(downloaded)
+    
     def fetch_equity_data(
         self,
         tickers: List[str],
@@ -343,106 +543,7 @@ class MarketDataPipeline:
                 logger.warning(f"Could not fetch prices from Portfolio State: {e}")
         
         try:
-            # Try to use OpenBB first (lazy load via property)
-            if self.obb is not None:  # This will trigger lazy loading
-                try:
-                    # Use OpenBB for data fetching (with resolved tickers)
-                    data = self.obb.equity.price.historical(
-                        symbol=tickers_to_fetch,
-                        start=start_date,
-                        end=end_date,
-                        provider='yfinance'  # Can switch providers
-                    )
-                    prices_df = pd.DataFrame(data.results)
-                    prices_df = prices_df.pivot(index='date', columns='symbol', values='close')
-                except Exception as openbb_error:
-                    logger.warning(f"OpenBB fetch failed: {openbb_error}, falling back to direct yfinance")
-                    self.use_openbb = False  # Fallback for this request
-            
-            if not self.use_openbb and self.yf_available:
-                # Fallback to yfinance (with resolved tickers)
-                if len(tickers_to_fetch) == 1:
-                    # Single ticker - download directly
-                    data = self.yf.download(
-                        tickers_to_fetch[0],
-                        start=start_date,
-                        end=end_date,
-                        progress=False
-                    )
-                    # Check if we got any data
-                    if data is None:
-                        raise ValueError(f"No data available for {tickers[0]} in the specified date range")
-                    elif hasattr(data, 'empty') and data.empty:
-                        raise ValueError(f"No data available for {tickers[0]} in the specified date range")
-                    elif isinstance(data, pd.DataFrame) and data.isna().all().all():
-                        raise ValueError(f"No valid data available for {tickers[0]} (all NaN values)")
-                    
-                    # yfinance returns MultiIndex even for single ticker!
-                    if isinstance(data.columns, pd.MultiIndex):
-                        # Extract 'Adj Close' or 'Close' prices
-                        if 'Adj Close' in data.columns.levels[0]:
-                            prices_df = data['Adj Close']
-                            # For single ticker, this will be a Series, convert to DataFrame
-                            if isinstance(prices_df, pd.Series):
-                                prices_df = prices_df.to_frame(tickers[0])
-                            elif len(prices_df.columns) == 1:
-                                prices_df.columns = tickers
-                        elif 'Close' in data.columns.levels[0]:
-                            prices_df = data['Close']
-                            # For single ticker, this will be a Series, convert to DataFrame
-                            if isinstance(prices_df, pd.Series):
-                                prices_df = prices_df.to_frame(tickers[0])
-                            elif len(prices_df.columns) == 1:
-                                prices_df.columns = tickers
-                        else:
-                            raise ValueError("No price data found in yfinance response")
-                    elif isinstance(data, pd.DataFrame):
-                        # Non-MultiIndex DataFrame (shouldn't happen with yfinance, but handle it)
-                        if 'Adj Close' in data.columns:
-                            prices_df = data[['Adj Close']].rename(columns={'Adj Close': tickers[0]})
-                        elif 'Close' in data.columns:
-                            prices_df = data[['Close']].rename(columns={'Close': tickers[0]})
-                        else:
-                            prices_df = data
-                    else:
-                        # Single series result
-                        prices_df = pd.DataFrame({tickers[0]: data})
-                else:
-                    # Multiple tickers - handle MultiIndex
-                    data = self.yf.download(
-                        tickers_to_fetch,
-                        start=start_date,
-                        end=end_date,
-                        progress=False
-                    )
-                    # Check if we got any data
-                    if data is None:
-                        raise ValueError(f"No data available for {tickers} in the specified date range")
-                    elif hasattr(data, 'empty') and data.empty:
-                        raise ValueError(f"No data available for {tickers} in the specified date range")
-                    elif isinstance(data, pd.DataFrame) and data.isna().all().all():
-                        raise ValueError(f"No valid data available for {tickers} (all NaN values)")
-                    
-                    # yfinance returns MultiIndex columns for multiple tickers
-                    if isinstance(data.columns, pd.MultiIndex):
-                        # Extract 'Adj Close' or 'Close' prices
-                        if 'Adj Close' in data.columns.levels[0]:
-                            prices_df = data['Adj Close']
-                        elif 'Close' in data.columns.levels[0]:
-                            prices_df = data['Close']
-                        else:
-                            raise ValueError("No price data found in yfinance response")
-                    else:
-                        # Single ticker returned as regular columns
-                        if 'Adj Close' in data.columns:
-                            prices_df = data[['Adj Close']]
-                        else:
-                            prices_df = data[['Close']]
-                        prices_df.columns = tickers
-                
-                # Ensure we have a DataFrame with ticker columns
-                if isinstance(prices_df, pd.Series):
-                    prices_df = prices_df.to_frame(tickers[0] if tickers else 'UNKNOWN')
+            prices_df, downloaded = self._load_prices(tickers_to_fetch, start_date, end_date)
             
             # Map columns back to original ticker names
             if len(ticker_map) > 0:
@@ -471,7 +572,8 @@ class MarketDataPipeline:
                     'start_date': start_date,
                     'end_date': end_date,
                     'interval': interval,
-                    'source': 'OpenBB' if self.use_openbb else 'yfinance',
+                    'source': ('OpenBB' if self.use_openbb else 'yfinance') if downloaded else 'price_store',
+                    'downloaded_tickers': downloaded,
                     'fetch_time': datetime.now(timezone.utc).isoformat()
                 },
                 'quality': quality_report,
@@ -924,21 +1026,18 @@ class MarketDataPipeline:
         
         returns = data['returns']
         
-        # Calculate various covariance estimates
+        # Calculate various covariance estimates (shared engine caches and rolls these forward)
+        from covariance_engine import get_covariance_engine
+        engine = get_covariance_engine()
         cov_estimates = {}
         
         # 1. Sample covariance
-        cov_estimates['sample'] = returns.cov().values
+        cov_estimates['sample'] = engine.estimate(returns, 'sample').covariance
         
         # 2. Ledoit-Wolf shrinkage
-        try:
-            from sklearn.covariance import LedoitWolf
-            lw = LedoitWolf()
-            cov_estimates['ledoit_wolf'], shrinkage = lw.fit(returns.values).covariance_, lw.shrinkage_
-            data['shrinkage_intensity'] = shrinkage
-        except ImportError:
-            logger.error("scikit-learn not available for Ledoit-Wolf shrinkage")
-            raise ImportError("scikit-learn is required for Ledoit-Wolf shrinkage. Install with: pip install scikit-learn")
+        lw = engine.estimate(returns, 'ledoit_wolf')
+        cov_estimates['ledoit_wolf'] = lw.covariance
+        data['shrinkage_intensity'] = lw.shrinkage
         
         # 3. Exponentially weighted covariance
         cov_estimates['exp_weighted'] = returns.ewm(span=60).cov().iloc[-len(tickers):].values
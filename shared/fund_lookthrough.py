@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Fund Lookthrough Engine
+Fetches ETF/mutual fund holdings concurrently, persists them per fund with
+their as-of date, and compiles fund -> underlying exposures into a sparse
+matrix so the true exposure of any allocation is a single mat-vec.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.atomic_writer import atomic_dump_json
+from shared.identifier_store import get_identifier_store
+from shared.symbol_index import get_symbol_index
+
+try:
+    import yfinance as yf
+    YFINANCE_AVAILABLE = True
+except ImportError:
+    YFINANCE_AVAILABLE = False
+
+logger = logging.getLogger("fund_lookthrough")
+
+# Quote types that are looked through to their holdings
+FUND_TYPES = {'ETF', 'MUTUALFUND', 'CEF'}
+
+
+def _normalize_weights(weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Convert holding weights to fractions of the fund.
+
+    Providers report either fractions or percentages for a whole fund, so the
+    unit is decided from the total rather than per holding.
+    """
+    positive = {symbol: float(w) for symbol, w in weights.items() if w and float(w) > 0}
+    if sum(positive.values()) > 1.5:
+        return {symbol: w / 100.0 for symbol, w in positive.items()}
+    return positive
+
+
+@dataclass
+class FundHoldings:
+    """Holdings of one fund as of a report date"""
+    symbol: str
+    holdings: Dict[str, float]
+    as_of: Optional[str]
+    fetched_at: str
+    source: str
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'as_of': self.as_of,
+            'fetched_at': self.fetched_at,
+            'source': self.source,
+            'holdings': self.holdings
+        }
+
+
+@dataclass
+class ExposureMatrix:
+    """
+    Sparse map from portfolio symbols to underlying companies.
+
+    Column j holds the exposure of one unit of symbols[j]: a fund's holding
+    weights, or 1.0 on its own row for a directly held security.
+    """
+    symbols: List[str]
+    underlyings: List[str]
+    matrix: sparse.csr_matrix  # (n_underlyings, n_symbols)
+    funds: List[str]
+
+    def weight_vector(self, portfolio: Dict[str, float]) -> np.ndarray:
+        """Portfolio weights aligned to self.symbols (missing symbols get 0)"""
+        return np.array([portfolio.get(symbol, 0.0) for symbol in self.symbols], dtype=float)
+
+    def exposures(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Underlying exposures of one or more allocations.
+
+        Args:
+            weights: (n_symbols,) weight vector, or (n_symbols, n_candidates)
+                     with one candidate allocation per column
+
+        Returns:
+            (n_underlyings,) or (n_underlyings, n_candidates) exposures
+        """
+        return self.matrix @ np.asarray(weights, dtype=float)
+
+    def exposure_dict(self, portfolio: Dict[str, float]) -> Dict[str, float]:
+        """Non-zero underlying exposures of a portfolio as {symbol: exposure}"""
+        exposure = self.exposures(self.weight_vector(portfolio))
+        return {self.underlyings[i]: float(exposure[i]) for i in np.flatnonzero(exposure)}
+
+    def max_exposure(self, weights: np.ndarray) -> Tuple[str, float]:
+        """Largest underlying exposure of a weight vector as (symbol, exposure)"""
+        exposure = self.exposures(weights)
+        if len(exposure) == 0:
+            return "", 0.0
+        i = int(np.argmax(exposure))
+        return self.underlyings[i], float(exposure[i])
+
+
+class FundLookthroughEngine:
+    """
+    Fund holdings with a per-fund JSON cache and batched, concurrent fetching.
+
+    Each fund's holdings are stored as ``<SYMBOL>.json`` under the cache
+    directory and reused until they are older than max_age_days. Fund
+    classification comes from the offline symbol index, falling back to
+    Yahoo Finance only for symbols the index does not know.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_age_days: int = 30,
+                 max_workers: int = 8,
+                 max_holdings: Optional[int] = None):
+        """
+        Initialize lookthrough engine.
+
+        Args:
+            cache_dir: Directory for per-fund holdings (default: shared/cache/fund_holdings)
+            max_age_days: Refetch holdings fetched longer ago than this
+            max_workers: Concurrent holdings/quote type requests
+            max_holdings: Keep only the largest N holdings per fund (None = all)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(__file__).parent / "cache" / "fund_holdings"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = timedelta(days=max_age_days)
+        self.max_workers = max_workers
+        self.max_holdings = max_holdings
+        self.lock = threading.RLock()
+
+        self._holdings: Dict[str, FundHoldings] = {}
+        self._quote_types: Dict[str, str] = {}
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "fetches": 0,
+            "fetch_failures": 0
+        }
+
+    def _path(self, symbol: str) -> Path:
+        return self.cache_dir / f"{symbol.upper().replace('/', '_')}.json"
+
+    # ------------------------------------------------------------------
+    # Classification
+    # ------------------------------------------------------------------
+
+    def _fetch_quote_type(self, symbol: str) -> str:
+        """Quote type from Yahoo Finance ('' if unavailable)"""
+        if not YFINANCE_AVAILABLE:
+            return ''
+        try:
+            return yf.Ticker(symbol).info.get('quoteType', '') or ''
+        except Exception as e:
+            logger.debug(f"Could not get quote type for {symbol}: {e}")
+            return ''
+
+    def quote_types(self, symbols: Iterable[str]) -> Dict[str, str]:
+        """
+        Quote types for a batch of symbols.
+
+        Args:
+            symbols: Ticker symbols
+
+        Returns:
+            Dictionary of {symbol: quote_type} ('' when unknown)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        index = get_symbol_index()
+        missing = []
+        with self.lock:
+            for symbol in symbols:
+                if symbol in self._quote_types:
+                    continue
+                quote_type = index.quote_type(symbol)
+                if quote_type is not None:
+                    self._quote_types[symbol] = quote_type
+                else:
+                    missing.append(symbol)
+
+        if missing:
+            workers = max(1, min(self.max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = list(executor.map(self._fetch_quote_type, missing))
+            with self.lock:
+                self._quote_types.update(zip(missing, fetched))
+
+        return {symbol: self._quote_types[symbol] for symbol in symbols}
+
+    def is_fund(self, symbol: str) -> bool:
+        """Check if a symbol is an ETF, mutual fund or closed-end fund"""
+        return self.quote_types([symbol])[symbol] in FUND_TYPES
+
+    # ------------------------------------------------------------------
+    # Holdings
+    # ------------------------------------------------------------------
+
+    def _is_fresh(self, entry: FundHoldings) -> bool:
+        try:
+            fetched_at = datetime.fromisoformat(entry.fetched_at)
+        except (TypeError, ValueError):
+            return False
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - fetched_at < self.max_age
+
+    def _load(self, symbol: str) -> Optional[FundHoldings]:
+        """Read a fund's cached holdings from disk"""
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return FundHoldings(
+                symbol=data['symbol'],
+                holdings={k: float(v) for k, v in data['holdings'].items()},
+                as_of=data.get('as_of'),
+                fetched_at=data['fetched_at'],
+                source=data.get('source', '')
+            )
+        except Exception as e:
+            logger.warning(f"Corrupt holdings cache for {symbol}, ignoring: {e}")
+            return None
+
+    def store_holdings(self,
+                       symbol: str,
+                       holdings: Dict[str, float],
+                       as_of: Optional[str] = None,
+                       source: str = 'external') -> FundHoldings:
+        """
+        Record holdings obtained elsewhere (e.g. an MCP tool response).
+
+        Args:
+            symbol: Fund ticker symbol
+            holdings: {holding_symbol: weight} as fractions or percentages
+            as_of: Report date of the holdings
+            source: Where the holdings came from
+
+        Returns:
+            The stored FundHoldings
+        """
+        entry = FundHoldings(
+            symbol=symbol,
+            holdings=self._truncate(_normalize_weights(holdings)),
+            as_of=as_of,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+            source=source
+        )
+        with self.lock:
+            self._holdings[symbol] = entry
+        try:
+            atomic_dump_json(entry.to_dict(), self._path(symbol))
+        except OSError as e:
+            logger.warning(f"Could not persist holdings for {symbol}: {e}")
+        return entry
+
+    def _truncate(self, holdings: Dict[str, float]) -> Dict[str, float]:
+        if self.max_holdings is None or len(holdings) <= self.max_holdings:
+            return holdings
+        return dict(sorted(holdings.items(), key=lambda x: x[1], reverse=True)[:self.max_holdings])
+
+    def _fetch_holdings(self, symbol: str) -> Tuple[Dict[str, float], Optional[str]]:
+        """
+        Fetch holdings from the OpenBB SEC provider, mapping CUSIPs to tickers.
+
+        Returns:
+            ({holding_symbol: raw weight}, report date or None)
+        """
+        from openbb import obb
+
+        result = obb.etf.holdings(symbol=symbol, provider='sec')
+        holdings: Dict[str, float] = {}
+        as_of = None
+        if not result or not getattr(result, 'results', None):
+            return holdings, as_of
+
+        store = get_identifier_store()
+        for holding in result.results:
+            if as_of is None:
+                as_of = next((str(getattr(holding, field)) for field in ('period_ending', 'as_of', 'date')
+                              if getattr(holding, field, None)), None)
+            cusip = getattr(holding, 'cusip', None)
+            if not cusip:
+                continue
+            holding_id = store.ticker_for_cusip(cusip) or f"CUSIP:{cusip[:6]}"
+            # Share classes of one issuer (GOOG/GOOGL) map to the same ticker
+            holdings[holding_id] = holdings.get(holding_id, 0.0) + float(getattr(holding, 'weight', 0) or 0)
+        return holdings, as_of
+
+    def _fetch_and_store(self, symbol: str) -> FundHoldings:
+        try:
+            holdings, as_of = self._fetch_holdings(symbol)
+            with self.lock:
+                self.stats["fetches"] += 1
+            if not holdings:
+                logger.warning(f"SEC provider returned no data for {symbol}")
+                # Kept for this process only, so the next run retries
+                entry = FundHoldings(symbol, {}, as_of, datetime.now(timezone.utc).isoformat(), 'sec')
+                with self.lock:
+                    self._holdings[symbol] = entry
+                return entry
+            logger.info(f"✅ Got {len(holdings)} holdings for {symbol} from SEC")
+            return self.store_holdings(symbol, holdings, as_of=as_of, source='sec')
+        except Exception as e:
+            with self.lock:
+                self.stats["fetch_failures"] += 1
+            logger.warning(f"Could not get ETF holdings for {symbol} from SEC: {str(e)[:100]}")
+            # Not persisted, so the next run retries
+            return FundHoldings(symbol, {}, None, datetime.now(timezone.utc).isoformat(), 'error')
+
+    def get_holdings(self, symbols: Iterable[str], refresh: bool = False) -> Dict[str, FundHoldings]:
+        """
+        Holdings for a batch of funds, fetching stale or missing ones concurrently.
+
+        Args:
+            symbols: Fund ticker symbols
+            refresh: Ignore cached holdings
+
+        Returns:
+            Dictionary of {symbol: FundHoldings}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result: Dict[str, FundHoldings] = {}
+        missing = []
+        with self.lock:
+            for symbol in symbols:
+                entry = None if refresh else self._holdings.get(symbol)
+                if entry is not None and self._is_fresh(entry):
+                    self.stats["memory_hits"] += 1
+                    result[symbol] = entry
+                    continue
+                entry = None if refresh else self._load(symbol)
+                if entry is not None and self._is_fresh(entry):
+                    self.stats["disk_hits"] += 1
+                    self._holdings[symbol] = entry
+                    result[symbol] = entry
+                    continue
+                missing.append(symbol)
+
+        if missing:
+            workers = max(1, min(self.max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for entry in executor.map(self._fetch_and_store, missing):
+                    result[entry.symbol] = entry
+
+        return {symbol: result[symbol] for symbol in symbols}
+
+    # ------------------------------------------------------------------
+    # Exposure matrix
+    # ------------------------------------------------------------------
+
+    def build_exposure_matrix(self, symbols: Iterable[str], refresh: bool = False) -> ExposureMatrix:
+        """
+        Compile the lookthrough exposures of a symbol universe.
+
+        Args:
+            symbols: Portfolio (or candidate universe) symbols
+            refresh: Refetch fund holdings instead of using the cache
+
+        Returns:
+            ExposureMatrix with one column per symbol
+        """
+        symbols = list(dict.fromkeys(symbols))
+        quote_types = self.quote_types(symbols)
+        funds = [s for s in symbols if quote_types[s] in FUND_TYPES]
+        holdings = self.get_holdings(funds, refresh=refresh) if funds else {}
+
+        underlying_rows: Dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for col, symbol in enumerate(symbols):
+            if symbol in holdings:
+                entries = holdings[symbol].holdings.items()
+            else:
+                entries = ((symbol, 1.0),)
+            for underlying, weight in entries:
+                rows.append(underlying_rows.setdefault(underlying, len(underlying_rows)))
+                cols.append(col)
+                values.append(weight)
+
+        matrix = sparse.csr_matrix(
+            (np.array(values, dtype=float), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(underlying_rows), len(symbols))
+        )
+        return ExposureMatrix(
+            symbols=symbols,
+            underlyings=list(underlying_rows),
+            matrix=matrix,
+            funds=funds
+        )
+
+
+# Singleton instance shared by lookthrough users in the same process
+_lookthrough_engine = None
+_lookthrough_engine_lock = threading.Lock()
+
+def get_lookthrough_engine() -> FundLookthroughEngine:
+    """Get or create the singleton FundLookthroughEngine instance"""
+    global _lookthrough_engine
+    with _lookthrough_engine_lock:
+        if _lookthrough_engine is None:
+            _lookthrough_engine = FundLookthroughEngine()
+    return _lookthrough_engine
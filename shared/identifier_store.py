@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Compiled Identifier Store
+CUSIP issuer prefix, CIK and ticker cross-references compiled from the SEC
+reference files in data/ into one sorted, memory-mapped NumPy table.
+Processes map the file read-only, so the pages are shared through the OS
+page cache instead of every server parsing the JSON into its own dicts.
+
+Build (or rebuild) the store with:
+    python shared/identifier_store.py
+"""
+
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.atomic_writer import atomic_write_bytes
+
+logger = logging.getLogger("identifier_store")
+
+STORE_VERSION = 1
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_STORE_PATH = Path(__file__).parent / "cache" / "identifier_store.npy"
+
+# Reference files the store is compiled from (relative to DATA_DIR)
+SOURCE_FILES = (
+    "ticker.txt",
+    "company_tickers.json",
+    "cusip_to_ticker.json",
+    "cusip_to_ticker_comprehensive.json",
+    "cusip_to_cik.json",
+)
+
+# One record per identifier; keys are namespaced so both tables share one sorted array
+IDENTIFIER_DTYPE = np.dtype([('key', 'S16'), ('ticker', 'S16'), ('cik', '<i8')])
+
+CUSIP_PREFIX = b"CUSIP:"
+CIK_PREFIX = b"CIK:"
+# Sorts ahead of every namespace; its cik field holds STORE_VERSION
+VERSION_KEY = b"#VERSION"
+
+
+def _load_cik_to_ticker(data_dir: Path) -> Dict[int, str]:
+    """CIK -> ticker from ticker.txt, falling back to company_tickers.json"""
+    cik_to_ticker: Dict[int, str] = {}
+
+    path = data_dir / "ticker.txt"
+    if path.exists():
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.strip().split('\t')
+                if len(parts) != 2 or not parts[1].isdigit():
+                    continue
+                cik_to_ticker[int(parts[1])] = parts[0].upper()
+
+    path = data_dir / "company_tickers.json"
+    if path.exists():
+        with open(path, 'r') as f:
+            for company in json.load(f).values():
+                if 'cik_str' in company and 'ticker' in company:
+                    # ticker.txt takes precedence
+                    cik_to_ticker.setdefault(int(company['cik_str']), company['ticker'].upper())
+
+    return cik_to_ticker
+
+
+def _load_json_map(path: Path) -> Dict[str, str]:
+    """Flat JSON object with upper-cased keys (empty if the file is missing)"""
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return {str(k).upper(): str(v) for k, v in json.load(f).items()}
+
+
+class IdentifierStore:
+    """
+    Read-only CUSIP/CIK/ticker lookup over a sorted structured array.
+
+    Records are keyed ``CUSIP:<6-char issuer prefix>`` and ``CIK:<integer>``
+    and searched with np.searchsorted. CUSIP records carry the ticker already
+    resolved at build time (direct CUSIP-to-ticker mapping first, then via the
+    issuer's CIK), so a lookup is a single binary search.
+    """
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+        self._keys = records['key']
+
+    def __len__(self) -> int:
+        return len(self.records) - 1
+
+    @classmethod
+    def build(cls, data_dir: Optional[Union[str, Path]] = None) -> 'IdentifierStore':
+        """
+        Compile the reference files into a store.
+
+        Args:
+            data_dir: Directory holding SOURCE_FILES (default: repo data/)
+
+        Returns:
+            IdentifierStore
+        """
+        data_dir = Path(data_dir) if data_dir else DATA_DIR
+        cik_to_ticker = _load_cik_to_ticker(data_dir)
+
+        cusip_to_ticker = _load_json_map(data_dir / "cusip_to_ticker_comprehensive.json")
+        cusip_to_ticker.update(_load_json_map(data_dir / "cusip_to_ticker.json"))
+        cusip_to_cik = {
+            prefix: int(cik)
+            for prefix, cik in _load_json_map(data_dir / "cusip_to_cik.json").items()
+            if cik.isdigit()
+        }
+
+        rows = {VERSION_KEY: (b"", STORE_VERSION)}
+        for cik, ticker in cik_to_ticker.items():
+            rows[CIK_PREFIX + str(cik).encode('ascii')] = (ticker.encode('ascii', 'ignore'), cik)
+        for prefix in set(cusip_to_ticker) | set(cusip_to_cik):
+            cik = cusip_to_cik.get(prefix, 0)
+            ticker = cusip_to_ticker.get(prefix) or cik_to_ticker.get(cik, "")
+            rows[CUSIP_PREFIX + prefix[:6].encode('ascii', 'ignore')] = (ticker.encode('ascii', 'ignore'), cik)
+
+        records = np.empty(len(rows), dtype=IDENTIFIER_DTYPE)
+        for i, key in enumerate(sorted(rows)):
+            records[i] = (key,) + rows[key]
+        return cls(records)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Write the store as a .npy file atomically.
+
+        Args:
+            path: Store file path
+        """
+        atomic_write_bytes(path, lambda f: np.save(f, self.records))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'IdentifierStore':
+        """
+        Memory-map a compiled store read-only.
+
+        Raises:
+            ValueError: If the file is not a store of the supported version
+        """
+        records = np.load(path, mmap_mode='r', allow_pickle=False)
+        if records.dtype != IDENTIFIER_DTYPE or len(records) == 0 or records[0]['key'] != VERSION_KEY:
+            raise ValueError(f"{path} is not an identifier store")
+        version = int(records[0]['cik'])
+        if version != STORE_VERSION:
+            raise ValueError(f"Unsupported identifier store version {version} (expected {STORE_VERSION})")
+        return cls(records)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: Optional[Union[str, Path]] = None,
+        data_dir: Optional[Union[str, Path]] = None
+    ) -> 'IdentifierStore':
+        """
+        Load the store, recompiling it when missing, outdated or older than a source file.
+
+        Args:
+            path: Store file path (default: shared/cache/identifier_store.npy)
+            data_dir: Directory holding SOURCE_FILES (default: repo data/)
+
+        Returns:
+            IdentifierStore
+        """
+        path = Path(path) if path else DEFAULT_STORE_PATH
+        data_dir = Path(data_dir) if data_dir else DATA_DIR
+        source_mtime = max(
+            ((data_dir / name).stat().st_mtime for name in SOURCE_FILES if (data_dir / name).exists()),
+            default=0.0
+        )
+
+        if path.exists() and path.stat().st_mtime >= source_mtime:
+            try:
+                return cls.load(path)
+            except Exception as e:
+                logger.warning(f"Rebuilding identifier store ({e})")
+
+        store = cls.build(data_dir)
+        try:
+            store.save(path)
+            logger.info(f"Built identifier store with {len(store)} records at {path}")
+            # Map the file just written so this process shares pages with the others
+            return cls.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not persist identifier store to {path}: {e}")
+        return store
+
+    def _find(self, key: bytes) -> int:
+        """Row of a namespaced key, or -1"""
+        pos = int(np.searchsorted(self._keys, key))
+        if pos < len(self._keys) and self._keys[pos] == key:
+            return pos
+        return -1
+
+    def _cusip_row(self, cusip: str) -> int:
+        if not cusip or len(cusip) < 6:
+            return -1
+        try:
+            prefix = cusip[:6].upper().encode('ascii')
+        except UnicodeEncodeError:
+            return -1
+        return self._find(CUSIP_PREFIX + prefix)
+
+    def ticker_for_cusip(self, cusip: str) -> Optional[str]:
+        """
+        Ticker of a security's issuer by CUSIP (first 6 characters are used).
+
+        Args:
+            cusip: 6- or 9-character CUSIP
+
+        Returns:
+            Ticker symbol or None
+        """
+        row = self._cusip_row(cusip)
+        if row < 0:
+            return None
+        return self.records[row]['ticker'].decode('ascii') or None
+
+    def cik_for_cusip(self, cusip: str) -> Optional[int]:
+        """Issuer CIK by CUSIP, or None if unknown"""
+        row = self._cusip_row(cusip)
+        if row < 0:
+            return None
+        return int(self.records[row]['cik']) or None
+
+    def ticker_for_cik(self, cik: Union[str, int]) -> Optional[str]:
+        """
+        Ticker by CIK number (with or without leading zeros).
+
+        Args:
+            cik: CIK number
+
+        Returns:
+            Ticker symbol or None
+        """
+        try:
+            cik = int(cik)
+        except (TypeError, ValueError):
+            return None
+        row = self._find(CIK_PREFIX + str(cik).encode('ascii'))
+        return self.records[row]['ticker'].decode('ascii') if row >= 0 else None
+
+
+# Singleton instance shared by lookthrough code in the same process
+_identifier_store = None
+_identifier_store_lock = threading.Lock()
+
+def get_identifier_store(path: Optional[Union[str, Path]] = None) -> IdentifierStore:
+    """Get or open the singleton IdentifierStore instance"""
+    global _identifier_store
+    with _identifier_store_lock:
+        if _identifier_store is None:
+            _identifier_store = IdentifierStore.load_or_build(path)
+    return _identifier_store
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = IdentifierStore.build()
+    store.save(DEFAULT_STORE_PATH)
+    logger.info(f"Compiled {len(store)} identifier records to {DEFAULT_STORE_PATH}")
@@ -6,5 +6,6 @@ LLMs define objectives and constraints, scripts perform mechanical optimization.
 from .multi_period import MultiPeriodOptimizer
 from .views_entropy import ViewsEntropyPooling
 from .quantum import QuantumOptimizer
+from .risk_parity import RiskBudgetSolver
 
-__all__ = ['MultiPeriodOptimizer', 'ViewsEntropyPooling', 'QuantumOptimizer']
\ No newline at end of file
+__all__ = ['MultiPeriodOptimizer', 'ViewsEntropyPooling', 'QuantumOptimizer', 'RiskBudgetSolver']
\ No newline at end of file
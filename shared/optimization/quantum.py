@@ -7,7 +7,8 @@ Pure mechanical optimization - constraint definition by Portfolio Manager.
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+from scipy import sparse
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
 import logging
 
 # Try to import quantum/quantum-inspired libraries
@@ -25,6 +26,167 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# QUBO given as {(i, j): coefficient}, a dense matrix or a scipy sparse matrix;
+# energy is sum(Q[i, j] * x_i * x_j) over all entries (x binary)
+QUBO = Union[Dict[Tuple[int, int], float], np.ndarray, sparse.spmatrix]
+
+# Couplings are kept sparse only for large problems at most this dense
+SPARSE_QUBO_DENSITY = 0.1
+DENSE_QUBO_MAX_ENTRIES = 1_000_000
+
+DEFAULT_ANNEALING_PARAMS = {
+    'num_reads': 32,             # Independent replicas annealed side by side
+    'n_iterations': 10000,       # Single-bit flip proposals per replica
+    'initial_temperature': 1.0,
+    'cooling_rate': 0.995,       # Per-iteration factor for the geometric schedule
+    'schedule': 'geometric',     # 'geometric', 'linear' or an explicit temperature sequence
+    'seed': None
+}
+
+
+def qubo_to_arrays(Q: QUBO, n_variables: int) -> Tuple[np.ndarray, Union[np.ndarray, sparse.csr_matrix]]:
+    """
+    Split a QUBO into linear terms and a symmetric coupling matrix.
+
+    With x binary, energy(x) = linear @ x + 0.5 * x @ coupling @ x, where
+    coupling[i, j] = coupling[j, i] is the total coefficient of x_i x_j.
+
+    Args:
+        Q: QUBO as a dict, dense matrix or sparse matrix
+        n_variables: Number of binary variables
+
+    Returns:
+        (linear, coupling); coupling is CSR for large, sparse problems
+    """
+    if isinstance(Q, dict):
+        if Q:
+            keys = np.array(list(Q.keys()), dtype=np.int64).reshape(-1, 2)
+            values = np.fromiter(Q.values(), dtype=float, count=len(Q))
+        else:
+            keys = np.empty((0, 2), dtype=np.int64)
+            values = np.empty(0)
+        rows, cols = keys[:, 0], keys[:, 1]
+    else:
+        matrix = sparse.coo_matrix(Q)
+        rows, cols, values = matrix.row, matrix.col, matrix.data.astype(float)
+
+    on_diagonal = rows == cols
+    linear = np.bincount(rows[on_diagonal], weights=values[on_diagonal], minlength=n_variables)
+
+    off = ~on_diagonal
+    coupling = sparse.coo_matrix(
+        (np.concatenate([values[off], values[off]]), (np.concatenate([rows[off], cols[off]]), np.concatenate([cols[off], rows[off]]))),
+        shape=(n_variables, n_variables)
+    ).tocsr()
+    n_entries = n_variables * n_variables
+    if n_entries <= DENSE_QUBO_MAX_ENTRIES or coupling.nnz > SPARSE_QUBO_DENSITY * n_entries:
+        return linear, coupling.toarray()
+    return linear, coupling
+
+
+def annealing_temperatures(n_iterations: int,
+                           initial_temperature: float = 1.0,
+                           cooling_rate: float = 0.995,
+                           schedule: Union[str, Sequence[float]] = 'geometric') -> np.ndarray:
+    """
+    Temperature at each annealing iteration.
+
+    Args:
+        n_iterations: Number of iterations
+        initial_temperature: Starting temperature
+        cooling_rate: Per-iteration factor of the geometric schedule
+        schedule: 'geometric' (T0 * rate^t), 'linear' (T0 down to 0) or an
+            explicit sequence of n_iterations temperatures
+
+    Returns:
+        Array of n_iterations temperatures
+    """
+    if not isinstance(schedule, str):
+        temperatures = np.asarray(schedule, dtype=float)
+        if temperatures.shape != (n_iterations,):
+            raise ValueError(f"Temperature schedule must have {n_iterations} entries, got {temperatures.shape}")
+        return temperatures
+    if schedule == 'geometric':
+        return initial_temperature * cooling_rate ** np.arange(n_iterations)
+    if schedule == 'linear':
+        return initial_temperature * (1.0 - np.arange(n_iterations) / n_iterations)
+    raise ValueError(f"Unknown cooling schedule: {schedule}")
+
+
+def simulated_annealing_qubo(Q: QUBO,
+                             n_variables: int,
+                             num_reads: int = 32,
+                             n_iterations: int = 10000,
+                             initial_temperature: float = 1.0,
+                             cooling_rate: float = 0.995,
+                             schedule: Union[str, Sequence[float]] = 'geometric',
+                             seed: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    Minimize a QUBO by single-flip simulated annealing over independent replicas.
+
+    Every replica keeps its local fields (coupling @ x), so the energy change
+    of a proposed flip is O(1) and an accepted flip updates the fields in
+    O(n). All replicas propose one flip per iteration in a single vectorized
+    step.
+
+    Args:
+        Q: QUBO as a dict, dense matrix or sparse matrix
+        n_variables: Number of binary variables
+        num_reads: Number of independent replicas (random restarts)
+        n_iterations: Flip proposals per replica
+        initial_temperature, cooling_rate, schedule: Cooling schedule (see annealing_temperatures)
+        seed: Random seed
+
+    Returns:
+        (best solution as a 0/1 array, its energy)
+    """
+    if n_variables == 0:
+        return np.zeros(0, dtype=np.int8), 0.0
+
+    rng = np.random.default_rng(seed)
+    linear, coupling = qubo_to_arrays(Q, n_variables)
+    is_sparse = sparse.issparse(coupling)
+    temperatures = annealing_temperatures(n_iterations, initial_temperature, cooling_rate, schedule)
+
+    x = rng.integers(0, 2, size=(num_reads, n_variables)).astype(float)
+    fields = np.asarray(coupling @ x.T).T
+    energy = x @ linear + 0.5 * np.einsum('ij,ij->i', x, fields)
+    best_x = x.copy()
+    best_energy = energy.copy()
+
+    replicas = np.arange(num_reads)
+    flips = rng.integers(0, n_variables, size=(n_iterations, num_reads))
+    draws = rng.random((n_iterations, num_reads))
+
+    for temperature, flip, draw in zip(temperatures, flips, draws):
+        # Energy change of flipping x_k: (1 - 2 x_k) * (linear_k + field_k)
+        direction = 1.0 - 2.0 * x[replicas, flip]
+        delta = direction * (linear[flip] + fields[replicas, flip])
+        with np.errstate(over='ignore', divide='ignore'):
+            accept = (delta <= 0) | (draw < np.exp(-delta / max(temperature, 1e-300)))
+        if not accept.any():
+            continue
+
+        accepted, columns, steps = replicas[accept], flip[accept], direction[accept]
+        x[accepted, columns] += steps
+        if is_sparse:
+            # Gather the flipped variables' CSR rows without building a matrix
+            starts = coupling.indptr[columns]
+            counts = coupling.indptr[columns + 1] - starts
+            entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            fields[np.repeat(accepted, counts), coupling.indices[entries]] += np.repeat(steps, counts) * coupling.data[entries]
+        else:
+            fields[accepted] += steps[:, None] * coupling[columns]
+        energy[accepted] += delta[accept]
+
+        improved = accepted[energy[accepted] < best_energy[accepted]]
+        if len(improved):
+            best_energy[improved] = energy[improved]
+            best_x[improved] = x[improved]
+
+    best = int(np.argmin(best_energy))
+    return best_x[best].astype(np.int8), float(best_energy[best])
+
 
 class QuantumOptimizer:
     """
@@ -32,15 +194,18 @@ class QuantumOptimizer:
     Mechanical solver - Portfolio Manager defines constraints and interprets results.
     """
     
-    def __init__(self, use_quantum: bool = False):
+    def __init__(self, use_quantum: bool = False, annealing_params: Optional[Dict[str, Any]] = None):
         """
         Initialize quantum optimizer.
         
         Args:
             use_quantum: Whether to use actual quantum hardware (if available)
+            annealing_params: Overrides of DEFAULT_ANNEALING_PARAMS for the
+                built-in simulated annealing solver
         """
         self.use_quantum = use_quantum and DWAVE_AVAILABLE
         self.sampler = None
+        self.annealing_params = {**DEFAULT_ANNEALING_PARAMS, **(annealing_params or {})}
         
         if self.use_quantum:
             try:
@@ -137,38 +302,21 @@ class QuantumOptimizer:
         expected_returns = returns.mean()
         covariance = returns.cov()
         
-        # Binary variables for asset selection
-        selection_vars = {}
-        weight_vars = {}
-        
-        # Create QUBO for cardinality constraint
-        Q = {}
-        
+        # Create QUBO for cardinality constraint (upper triangular)
         # Objective: Maximize returns - Risk
-        for i in range(n_assets):
-            # Return component
-            Q[(i, i)] = -expected_returns.iloc[i]
-            
-            # Risk component
-            for j in range(i, n_assets):
-                if i == j:
-                    Q[(i, i)] += covariance.iloc[i, i]
-                else:
-                    Q[(i, j)] = 2 * covariance.iloc[i, j]
+        Q = np.triu(2 * covariance.values, k=1)
+        np.fill_diagonal(Q, covariance.values.diagonal() - expected_returns.values)
         
         # Cardinality constraint (soft constraint with penalty)
         penalty = 100 * abs(expected_returns.max())
         
-        # Add penalty for not having exactly target_assets
-        for i in range(n_assets):
-            Q[(i, i)] += penalty * (1 - 2 * target_assets / n_assets)
-            
-            for j in range(i+1, n_assets):
-                Q[(i, j)] = Q.get((i, j), 0) + 2 * penalty / n_assets
+        # Add penalty * (sum(x) - target_assets)^2 for not having exactly target_assets
+        Q[np.diag_indices(n_assets)] += penalty * (1 - 2 * target_assets)
+        Q += np.triu(np.full((n_assets, n_assets), 2 * penalty), k=1)
         
         # Solve
         if DIMOD_AVAILABLE:
-            bqm = dimod.BinaryQuadraticModel.from_qubo(Q)
+            bqm = dimod.BinaryQuadraticModel.from_qubo(self._qubo_to_dict(Q))
             if DWAVE_AVAILABLE and self.use_quantum:
                 sampler = SimulatedAnnealingSampler()  # Or use real quantum
             else:
@@ -416,34 +564,23 @@ class QuantumOptimizer:
                           universe: List[str],
                           expected_returns: Dict[str, float],
                           risk_matrix: pd.DataFrame,
-                          constraints: Dict[str, Any]) -> Dict[Tuple[int, int], float]:
+                          constraints: Dict[str, Any]) -> np.ndarray:
         """
         Build QUBO matrix for portfolio optimization.
         
         Returns:
-            QUBO matrix as dictionary
+            Upper triangular QUBO matrix
         """
         n = len(universe)
-        Q = {}
+        
+        # Risk between assets missing from the risk matrix is zero
+        risk = risk_matrix.reindex(index=universe, columns=universe).fillna(0.0).values.astype(float)
+        returns = np.array([expected_returns.get(asset, 0) for asset in universe], dtype=float)
         
         # Objective: Maximize returns - Minimize risk
-        for i in range(n):
-            asset_i = universe[i]
-            
-            # Return component (negative because we minimize QUBO)
-            Q[(i, i)] = -expected_returns.get(asset_i, 0)
-            
-            # Risk component
-            for j in range(i, n):
-                asset_j = universe[j]
-                
-                if asset_i in risk_matrix.index and asset_j in risk_matrix.columns:
-                    risk_val = risk_matrix.loc[asset_i, asset_j]
-                    
-                    if i == j:
-                        Q[(i, i)] += risk_val
-                    else:
-                        Q[(i, j)] = Q.get((i, j), 0) + 2 * risk_val
+        # (return component negative because we minimize QUBO)
+        Q = np.triu(2 * risk, k=1)
+        np.fill_diagonal(Q, risk.diagonal() - returns)
         
         # Add constraint penalties
         penalty = abs(max(expected_returns.values())) * 10 if expected_returns else 100
@@ -451,16 +588,22 @@ class QuantumOptimizer:
         # Cardinality constraint
         if 'cardinality' in constraints:
             target = constraints['cardinality']
-            # Soft constraint: penalize deviation from target
-            for i in range(n):
-                Q[(i, i)] += penalty * (1 - 2 * target / n)
-                for j in range(i+1, n):
-                    Q[(i, j)] = Q.get((i, j), 0) + 2 * penalty / (n * n)
+            # Soft constraint: penalty * (sum(x) - target)^2
+            Q[np.diag_indices(n)] += penalty * (1 - 2 * target)
+            Q += np.triu(np.full((n, n), 2 * penalty), k=1)
         
         return Q
     
+    @staticmethod
+    def _qubo_to_dict(Q: QUBO) -> Dict[Tuple[int, int], float]:
+        """QUBO as the {(i, j): coefficient} mapping dimod expects."""
+        if isinstance(Q, dict):
+            return Q
+        matrix = sparse.coo_matrix(Q)
+        return {(int(i), int(j)): float(v) for i, j, v in zip(matrix.row, matrix.col, matrix.data)}
+    
     def _solve_with_dimod(self,
-                         Q: Dict[Tuple[int, int], float],
+                         Q: QUBO,
                          n_variables: int) -> Dict[int, int]:
         """
         Solve QUBO using dimod library.
@@ -469,7 +612,7 @@ class QuantumOptimizer:
             Binary solution vector
         """
         # Create Binary Quadratic Model
-        bqm = dimod.BinaryQuadraticModel.from_qubo(Q)
+        bqm = dimod.BinaryQuadraticModel.from_qubo(self._qubo_to_dict(Q))
         
         # Use appropriate sampler
         if self.use_quantum and self.sampler:
@@ -486,59 +629,19 @@ class QuantumOptimizer:
         return best_solution
     
     def _solve_with_simulated_annealing(self,
-                                       Q: Dict[Tuple[int, int], float],
+                                       Q: QUBO,
                                        n_variables: int) -> Dict[int, int]:
         """
-        Solve QUBO using basic simulated annealing (fallback).
+        Solve QUBO using simulated annealing (fallback when dimod is unavailable).
+        
+        Runs simulated_annealing_qubo with this optimizer's annealing_params.
         
         Returns:
             Binary solution vector
         """
-        # Initialize random solution
-        solution = {i: np.random.randint(0, 2) for i in range(n_variables)}
-        
-        # Calculate initial energy
-        def calculate_energy(sol):
-            energy = 0
-            for (i, j), val in Q.items():
-                if i == j:
-                    energy += val * sol[i]
-                else:
-                    energy += val * sol[i] * sol[j]
-            return energy
-        
-        current_energy = calculate_energy(solution)
-        best_solution = solution.copy()
-        best_energy = current_energy
-        
-        # Simulated annealing parameters
-        temperature = 1.0
-        cooling_rate = 0.995
-        n_iterations = 10000
-        
-        for _ in range(n_iterations):
-            # Random neighbor
-            neighbor = solution.copy()
-            flip_idx = np.random.randint(0, n_variables)
-            neighbor[flip_idx] = 1 - neighbor[flip_idx]
-            
-            # Calculate neighbor energy
-            neighbor_energy = calculate_energy(neighbor)
-            
-            # Accept or reject
-            delta = neighbor_energy - current_energy
-            if delta < 0 or np.random.rand() < np.exp(-delta / temperature):
-                solution = neighbor
-                current_energy = neighbor_energy
-                
-                if current_energy < best_energy:
-                    best_solution = solution.copy()
-                    best_energy = current_energy
-            
-            # Cool down
-            temperature *= cooling_rate
-        
-        return best_solution
+        solution, energy = simulated_annealing_qubo(Q, n_variables, **self.annealing_params)
+        logger.debug(f"Simulated annealing best energy {energy:.6g} over {self.annealing_params['num_reads']} replicas")
+        return {i: int(value) for i, value in enumerate(solution)}
     
     def _optimize_weights(self,
                          selected_assets: List[str],
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Equal-risk-contribution and risk-budgeting solver.
+Newton's method on the convex log-barrier formulation with warm starts.
+Pure mechanical optimization - budgets chosen by Portfolio Manager.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RiskBudgetSolver:
+    """
+    Long-only risk budgeting (ERC when budgets are equal).
+
+    Solves min_y 0.5 * y'Σy - Σ b_i log(y_i), whose unique positive minimizer
+    satisfies y_i (Σy)_i = b_i; normalizing y gives weights whose risk
+    contributions are proportional to the budgets b. Newton steps with a
+    positivity-preserving backtracking line search converge in a handful of
+    iterations even for several hundred assets.
+
+    The last solution for each universe is kept so the next solve on the same
+    tickers (e.g. the following revision round) starts from it.
+    """
+
+    def __init__(self, tol: float = 1e-10, max_iter: int = 50):
+        """
+        Initialize risk budget solver.
+
+        Args:
+            tol: Convergence tolerance on the max relative budget error
+            max_iter: Maximum Newton iterations
+        """
+        self.tol = tol
+        self.max_iter = max_iter
+        self._warm_starts: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def solve(self,
+              covariance: Union[np.ndarray, pd.DataFrame],
+              budgets: Optional[Union[Sequence[float], Dict[str, float]]] = None,
+              tickers: Optional[List[str]] = None,
+              initial_weights: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+        """
+        Solve for risk-budgeted weights.
+
+        Args:
+            covariance: Asset covariance matrix
+            budgets: Target risk shares (list aligned to assets, or ticker dict);
+                normalized to sum to 1. Equal risk contribution if None
+            tickers: Asset names; enables warm starts across calls
+            initial_weights: Explicit starting weights (overrides the warm start)
+
+        Returns:
+            Dictionary with weights, risk contributions and convergence details
+        """
+        if isinstance(covariance, pd.DataFrame):
+            tickers = tickers or list(covariance.columns)
+            covariance = covariance.values
+        cov = np.asarray(covariance, dtype=float)
+        n_assets = cov.shape[0]
+
+        b = self._budget_vector(budgets, tickers, n_assets)
+        key = tuple(tickers) if tickers else None
+
+        # Starting point scaled so y'Σy = Σb, where the optimum lies
+        if initial_weights is not None:
+            start = np.asarray(initial_weights, dtype=float)
+        elif key is not None and key in self._warm_starts:
+            start = self._warm_starts[key]
+        else:
+            start = b / np.sqrt(np.diag(cov))
+        start = np.maximum(start, 1e-12)
+        y = start * np.sqrt(b.sum() / (start @ cov @ start))
+
+        converged = False
+        iterations = 0
+        for iterations in range(1, self.max_iter + 1):
+            cov_y = cov @ y
+            gradient = cov_y - b / y
+            hessian = cov + np.diag(b / y**2)
+            step = np.linalg.solve(hessian, gradient)
+
+            # Backtrack to stay strictly positive and decrease the objective
+            objective = 0.5 * y @ cov_y - b @ np.log(y)
+            t = 1.0
+            while True:
+                candidate = y - t * step
+                if np.all(candidate > 0):
+                    new_objective = 0.5 * candidate @ cov @ candidate - b @ np.log(candidate)
+                    if new_objective <= objective - 1e-4 * t * (gradient @ step) or t < 1e-10:
+                        break
+                t *= 0.5
+            y = candidate
+
+            budget_error = np.max(np.abs(y * (cov @ y) - b) / b)
+            if budget_error < self.tol:
+                converged = True
+                break
+
+        if not converged:
+            logger.warning(f"Risk budget solver did not converge in {self.max_iter} iterations "
+                           f"(max budget error {budget_error:.2e})")
+
+        weights = y / y.sum()
+        if key is not None:
+            self._warm_starts[key] = weights
+
+        portfolio_var = weights @ cov @ weights
+        risk_contributions = weights * (cov @ weights) / portfolio_var
+
+        result = {
+            'weights': weights,
+            'risk_contributions': risk_contributions,
+            'budgets': b,
+            'portfolio_volatility': float(np.sqrt(portfolio_var)),
+            'iterations': iterations,
+            'converged': converged,
+            'max_budget_error': float(np.max(np.abs(risk_contributions - b) / b))
+        }
+        if tickers:
+            result['weights_dict'] = {t: float(w) for t, w in zip(tickers, weights)}
+        return result
+
+    def clear_warm_starts(self) -> None:
+        """Forget previous solutions"""
+        self._warm_starts.clear()
+
+    @staticmethod
+    def _budget_vector(budgets: Optional[Union[Sequence[float], Dict[str, float]]],
+                       tickers: Optional[List[str]],
+                       n_assets: int) -> np.ndarray:
+        """Normalized, strictly positive budget vector"""
+        if budgets is None:
+            b = np.ones(n_assets)
+        elif isinstance(budgets, dict):
+            if not tickers:
+                raise ValueError("Ticker names are required for dict risk budgets")
+            missing = [t for t in tickers if t not in budgets]
+            if missing:
+                raise ValueError(f"Risk budgets missing for: {missing}")
+            b = np.array([budgets[t] for t in tickers], dtype=float)
+        else:
+            b = np.asarray(budgets, dtype=float)
+
+        if b.shape != (n_assets,):
+            raise ValueError(f"Expected {n_assets} risk budgets, got {b.shape}")
+        if np.any(b <= 0):
+            raise ValueError("Risk budgets must be strictly positive")
+        return b / b.sum()
@@ -28,24 +28,31 @@ class ViewsEntropyPooling:
     def incorporate_views(self,
                          historical_returns: pd.DataFrame,
                          views: List[Dict[str, Any]],
-                         confidence_levels: Optional[List[float]] = None) -> Dict[str, Any]:
+                         confidence_levels: Optional[List[float]] = None,
+                         prior_probabilities: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Incorporate views into return distribution using entropy pooling.
         
         Args:
-            historical_returns: Historical return data
+            historical_returns: Historical return data, or any scenario set
+                (e.g. Monte Carlo draws) with one row per scenario
             views: List of view dictionaries with structure:
                    {'type': 'absolute'/'relative',
                     'assets': list of assets,
                     'view_return': expected return,
                     'confidence': confidence level}
             confidence_levels: Optional confidence for each view
+            prior_probabilities: Optional scenario probabilities (equal if None)
             
         Returns:
             Dict with posterior distribution and statistics
         """
         # Extract prior distribution from historical data
-        self.prior_distribution = self._extract_prior(historical_returns)
+        self.prior_distribution = self._extract_prior(historical_returns, prior_probabilities)
+        
+        # Explicit confidence levels override the ones in the views
+        if confidence_levels is not None:
+            views = [{**view, 'confidence': confidence} for view, confidence in zip(views, confidence_levels)]
         
         # Process views into constraints
         constraints = self._process_views(views, historical_returns)
@@ -53,7 +60,8 @@ class ViewsEntropyPooling:
         # Solve entropy minimization problem
         posterior_probs = self._entropy_minimization(
             self.prior_distribution['probabilities'],
-            constraints
+            constraints,
+            historical_returns
         )
         
         # Calculate posterior statistics
@@ -234,7 +242,9 @@ class ViewsEntropyPooling:
             'recommendation': self._get_confidence_recommendation(final_confidence)
         }
     
-    def _extract_prior(self, historical_returns: pd.DataFrame) -> Dict[str, Any]:
+    def _extract_prior(self,
+                       historical_returns: pd.DataFrame,
+                       probabilities: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Extract prior distribution from historical data.
         
@@ -243,8 +253,14 @@ class ViewsEntropyPooling:
         """
         n_observations = len(historical_returns)
         
-        # Equal probability prior (can be enhanced with regime detection)
-        probabilities = np.ones(n_observations) / n_observations
+        if probabilities is None:
+            # Equal probability prior (can be enhanced with regime detection)
+            probabilities = np.ones(n_observations) / n_observations
+        else:
+            probabilities = np.asarray(probabilities, dtype=float)
+            if probabilities.shape != (n_observations,) or np.any(probabilities < 0) or probabilities.sum() <= 0:
+                raise ValueError("prior_probabilities must be non-negative with one entry per scenario")
+            probabilities = probabilities / probabilities.sum()
         
         return {
             'probabilities': probabilities,
@@ -293,57 +309,99 @@ class ViewsEntropyPooling:
         
         return constraints
     
+    def _view_matrix(self,
+                     constraints: List[Dict[str, Any]],
+                     scenarios: pd.DataFrame,
+                     prior_probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Translate view constraints into expectation constraints E_p[F] = b.
+        
+        Absolute views constrain an asset's expected return, relative views
+        the first asset's expected return minus the second's. A view with
+        confidence c targets c * view + (1 - c) * prior expectation.
+        
+        Returns:
+            Tuple of (F with one column per view, targets b)
+        """
+        columns = []
+        targets = []
+        for constraint in constraints:
+            if constraint['type'] == 'equality':
+                column = scenarios[constraint['asset']].to_numpy(dtype=float)
+            else:
+                first, second = constraint['assets'][:2]
+                column = scenarios[first].to_numpy(dtype=float) - scenarios[second].to_numpy(dtype=float)
+            confidence = float(np.clip(constraint.get('confidence', 0.5), 0.0, 1.0))
+            prior_value = float(prior_probs @ column)
+            columns.append(column)
+            targets.append(confidence * constraint['value'] + (1 - confidence) * prior_value)
+        
+        if not columns:
+            return np.empty((len(scenarios), 0)), np.empty(0)
+        return np.column_stack(columns), np.array(targets)
+    
     def _entropy_minimization(self,
                             prior_probs: np.ndarray,
-                            constraints: List[Dict[str, Any]]) -> np.ndarray:
+                            constraints: List[Dict[str, Any]],
+                            scenarios: pd.DataFrame) -> np.ndarray:
         """
         Minimize relative entropy subject to view constraints.
         
+        Solved in the dual: the posterior minimizing KL(p || prior) subject to
+        E_p[F] = b is p_j ∝ prior_j * exp(F_j · λ), where λ (one multiplier per
+        view) minimizes the convex dual log Σ_j prior_j exp((F_j - b) · λ).
+        Its gradient is E_p[F] - b and its Hessian Cov_p[F], so the problem
+        size is the number of views, not the number of scenarios.
+        
         Returns:
             Posterior probabilities
         """
-        n = len(prior_probs)
+        F, b = self._view_matrix(constraints, scenarios, prior_probs)
+        if F.shape[1] == 0:
+            return prior_probs
+        
+        # Standardize views (same constraints, better conditioned multipliers)
+        scale = np.sqrt(prior_probs @ (F - prior_probs @ F) ** 2)
+        scale[scale == 0] = 1.0
+        G = (F - b) / scale
+        log_prior = np.log(np.maximum(prior_probs, 1e-300))
         
-        # Objective: minimize relative entropy
-        def entropy(p):
-            # Add small epsilon to avoid log(0)
-            p_safe = np.maximum(p, 1e-10)
-            prior_safe = np.maximum(prior_probs, 1e-10)
-            return np.sum(p_safe * np.log(p_safe / prior_safe))
+        def posterior(lam):
+            log_p = log_prior + G @ lam
+            shift = log_p.max()
+            weights = np.exp(log_p - shift)
+            total = weights.sum()
+            return weights / total, shift + np.log(total)
         
-        # Gradient of entropy
-        def entropy_grad(p):
-            p_safe = np.maximum(p, 1e-10)
-            prior_safe = np.maximum(prior_probs, 1e-10)
-            return np.log(p_safe / prior_safe) + 1
+        def dual(lam):
+            return posterior(lam)[1]
         
-        # Constraints
-        opt_constraints = [
-            {'type': 'eq', 'fun': lambda p: np.sum(p) - 1},  # Probabilities sum to 1
-            {'type': 'ineq', 'fun': lambda p: p}  # Non-negative probabilities
-        ]
+        def dual_grad(lam):
+            p, _ = posterior(lam)
+            return p @ G
         
-        # Add view constraints (simplified)
-        # In practice, would translate views to constraints on expected values
+        def dual_hess(lam):
+            p, _ = posterior(lam)
+            mean = p @ G
+            return (G * p[:, None]).T @ G - np.outer(mean, mean)
         
-        # Solve optimization
         result = minimize(
-            entropy,
-            prior_probs,
-            method='SLSQP',
-            jac=entropy_grad,
-            constraints=opt_constraints,
-            options={'disp': False}
+            dual,
+            np.zeros(G.shape[1]),
+            method='trust-exact',
+            jac=dual_grad,
+            hess=dual_hess,
+            options={'gtol': 1e-10}
         )
         
-        if result.success:
-            posterior = result.x
-            # Ensure valid probability distribution
-            posterior = np.maximum(posterior, 0)
-            posterior = posterior / posterior.sum()
-            return posterior
+        # The dual gradient is the (standardized) view error, so it decides success
+        posterior_probs, _ = posterior(result.x)
+        view_error = np.max(np.abs(posterior_probs @ G))
+        if view_error < 1e-6:
+            return posterior_probs
         else:
-            logger.warning("Entropy minimization failed, returning prior")
+            # Views outside the range of the scenarios have no solution
+            logger.warning(f"Entropy minimization failed (view error {view_error:.2e}), returning prior")
             return prior_probs
     
     def _calculate_posterior_stats(self,
@@ -370,7 +428,7 @@ class ViewsEntropyPooling:
         centered = returns - returns.mean()
         # Convert to numpy for proper matrix multiplication
         centered_np = centered.values
-        posterior_cov_np = centered_np.T @ np.diag(posterior_probs) @ centered_np
+        posterior_cov_np = (centered_np * posterior_probs[:, None]).T @ centered_np
         posterior_cov = pd.DataFrame(posterior_cov_np, index=returns.columns, columns=returns.columns)
         
         # Effective sample size
@@ -430,7 +488,7 @@ class ViewsEntropyPooling:
         
         # Weighted covariance - use numpy for proper matrix multiplication
         centered_np = centered.values
-        weighted_cov_np = centered_np.T @ np.diag(posterior_probs) @ centered_np
+        weighted_cov_np = (centered_np * posterior_probs[:, None]).T @ centered_np
         weighted_cov = pd.DataFrame(weighted_cov_np, index=returns.columns, columns=returns.columns)
         
         return weighted_cov
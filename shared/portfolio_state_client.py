@@ -5,7 +5,6 @@ Provides a unified interface for all MCP servers to access portfolio data
 Supports both real portfolio state and synthetic data for testing
 """
 
-import json
 import logging
 import os
 from typing import Dict, List, Optional, Any, Tuple
@@ -17,6 +16,7 @@ import numpy as np
 
 # Import the data pipeline for ticker resolution - DRY principle
 from data_pipeline import MarketDataPipeline
+from state_journal import load_state_with_journal
 
 logger = logging.getLogger(__name__)
 
@@ -155,9 +155,8 @@ class PortfolioStateClient:
             raise ValueError("Portfolio State is required but not enabled. Set USE_PORTFOLIO_STATE=true")
         
         try:
-            with open(self.state_file_path, 'r') as f:
-                state_data = json.load(f)
-            return state_data
+            # Include changes journaled since the last checkpoint
+            return load_state_with_journal(self.state_file_path)
         except Exception as e:
             logger.error(f"Error reading portfolio state: {e}")
             # Fail loudly - no fallback
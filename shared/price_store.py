@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Persistent Price History Store
+Columnar on-disk store of daily closes, one memory-mapped NumPy file per symbol.
+MarketDataPipeline reads from here first and only goes to the network for
+date ranges that have never been fetched.
+"""
+
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.atomic_writer import atomic_dump_json, atomic_write_bytes
+
+logger = logging.getLogger("price_store")
+
+# One record per trading day: days since epoch + close
+PRICE_DTYPE = np.dtype([('date', '<i8'), ('close', '<f8')])
+
+# Relative difference on overlapping days that triggers re-adjustment of history
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+def _to_day(value: Union[str, datetime, pd.Timestamp]) -> int:
+    """Convert a date-like value to integer days since epoch"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return int(np.datetime64(ts.normalize(), 'D').astype('int64'))
+
+
+def _from_day(day: int) -> str:
+    """Convert integer days since epoch back to YYYY-MM-DD"""
+    return str(np.datetime64(int(day), 'D'))
+
+
+class PriceHistoryStore:
+    """
+    Per-symbol columnar store of daily closing prices.
+
+    Each symbol has a ``<SYMBOL>.npy`` file holding a sorted structured array of
+    (date, close) records and a ``<SYMBOL>.json`` sidecar recording which
+    half-open date range [covered_start, covered_end) has already been fetched.
+    Coverage is tracked separately from the data so that holidays, weekends and
+    pre-listing dates are not re-requested on every call.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        """
+        Initialize price history store.
+
+        Args:
+            root: Directory holding the per-symbol files
+                (default: shared/cache/price_history)
+        """
+        self.root = Path(root) if root else Path(__file__).parent / "cache" / "price_history"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+
+        self.stats = {
+            "reads": 0,
+            "writes": 0,
+            "readjustments": 0
+        }
+
+    def _safe_name(self, symbol: str) -> str:
+        """File-system safe name for a symbol (e.g. ^GSPC -> _GSPC)"""
+        return re.sub(r'[^A-Za-z0-9._-]', '_', symbol.upper())
+
+    def _data_path(self, symbol: str) -> Path:
+        return self.root / f"{self._safe_name(symbol)}.npy"
+
+    def _meta_path(self, symbol: str) -> Path:
+        return self.root / f"{self._safe_name(symbol)}.json"
+
+    def _load_array(self, symbol: str) -> np.ndarray:
+        """Memory-map the stored records for a symbol (empty array if none)"""
+        path = self._data_path(symbol)
+        if not path.exists():
+            return np.empty(0, dtype=PRICE_DTYPE)
+        try:
+            return np.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Corrupt price history for {symbol}, ignoring: {e}")
+            return np.empty(0, dtype=PRICE_DTYPE)
+
+    def _save_array(self, symbol: str, records: np.ndarray) -> None:
+        """Atomically replace the stored records for a symbol"""
+        path = self._data_path(symbol)
+        atomic_write_bytes(path, lambda f: np.save(f, np.ascontiguousarray(records, dtype=PRICE_DTYPE)))
+
+    def get_coverage(self, symbol: str) -> Optional[Tuple[int, int]]:
+        """
+        Get the fetched date range for a symbol.
+
+        Returns:
+            (covered_start, covered_end) as epoch days, end exclusive, or None
+        """
+        path = self._meta_path(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                meta = json.load(f)
+            return _to_day(meta['covered_start']), _to_day(meta['covered_end'])
+        except Exception as e:
+            logger.warning(f"Corrupt coverage metadata for {symbol}, ignoring: {e}")
+            return None
+
+    def _set_coverage(self, symbol: str, start: int, end: int) -> None:
+        atomic_dump_json({
+            'symbol': symbol,
+            'covered_start': _from_day(start),
+            'covered_end': _from_day(end),
+            'updated': datetime.now(timezone.utc).isoformat()
+        }, self._meta_path(symbol))
+
+    def missing_ranges(self, symbol: str, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """
+        Date ranges that must be fetched to cover [start_date, end_date).
+
+        Gaps adjacent to stored data are widened by one stored trading day so the
+        fetched segment overlaps existing history; the overlap is used to detect
+        and re-apply dividend/split adjustments when the segment is written.
+
+        Returns:
+            List of (start, end) YYYY-MM-DD tuples, end exclusive
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        if start >= end:
+            return []
+
+        with self.lock:
+            coverage = self.get_coverage(symbol)
+            if coverage is None:
+                return [(start_date, end_date)]
+
+            covered_start, covered_end = coverage
+            if start >= covered_end or end <= covered_start:
+                # Disjoint from what we hold - fetch the whole span to keep coverage contiguous
+                return [(_from_day(min(start, covered_start)), _from_day(max(end, covered_end)))]
+
+            dates = self._load_array(symbol)['date']
+            ranges = []
+            if start < covered_start:
+                head_end = int(dates[0]) + 1 if len(dates) else covered_start
+                ranges.append((_from_day(start), _from_day(max(head_end, covered_start))))
+            if end > covered_end:
+                tail_start = int(dates[-1]) if len(dates) else covered_end
+                ranges.append((_from_day(min(tail_start, covered_end)), _from_day(end)))
+            return ranges
+
+    def read(self, symbol: str, start_date: str, end_date: str) -> pd.Series:
+        """
+        Read stored closes for [start_date, end_date).
+
+        Returns:
+            Series of closes indexed by date (empty if nothing stored)
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        with self.lock:
+            records = self._load_array(symbol)
+            dates = records['date']
+            lo = int(np.searchsorted(dates, start, side='left'))
+            hi = int(np.searchsorted(dates, end, side='left'))
+            window = np.array(records[lo:hi])
+            self.stats["reads"] += 1
+
+        index = pd.DatetimeIndex(window['date'].astype('datetime64[D]'), name='date')
+        return pd.Series(window['close'], index=index, name=symbol)
+
+    def write(self, symbol: str, prices: pd.Series, start_date: str, end_date: str) -> None:
+        """
+        Merge a freshly fetched segment into the store and extend coverage.
+
+        If the segment overlaps stored history and the closes on the first common
+        day disagree, the older side is rescaled so adjusted prices stay
+        consistent across the splice (the newer fetch is treated as authoritative).
+
+        Args:
+            symbol: Ticker symbol as fetched
+            prices: Closing prices indexed by date (NaNs are dropped)
+            start_date: Start of the fetched range
+            end_date: End of the fetched range (exclusive)
+        """
+        prices = prices.dropna()
+        new = np.empty(len(prices), dtype=PRICE_DTYPE)
+        if len(prices):
+            index = pd.DatetimeIndex(pd.to_datetime(prices.index))
+            if index.tz is not None:
+                index = index.tz_convert(None)
+            new['date'] = index.normalize().values.astype('datetime64[D]').astype('int64')
+            new['close'] = prices.values.astype('float64')
+            new = np.sort(new, order='date')
+
+        with self.lock:
+            old = np.array(self._load_array(symbol))
+
+            if len(old) and len(new):
+                common, old_idx, new_idx = np.intersect1d(
+                    old['date'], new['date'], assume_unique=True, return_indices=True
+                )
+                if len(common):
+                    old_close = old['close'][old_idx[0]]
+                    new_close = new['close'][new_idx[0]]
+                    if old_close > 0 and new_close > 0:
+                        factor = new_close / old_close
+                        if abs(factor - 1.0) > ADJUSTMENT_TOLERANCE:
+                            if new['date'][-1] >= old['date'][-1]:
+                                old['close'] *= factor
+                            else:
+                                new['close'] /= factor
+                            self.stats["readjustments"] += 1
+                            logger.info(f"Re-adjusted stored history for {symbol} by {factor:.6f}")
+
+                # New records win on overlapping dates
+                keep = ~np.isin(old['date'], new['date'])
+                merged = np.sort(np.concatenate([old[keep], new]), order='date')
+            else:
+                merged = new if len(new) else old
+
+            start, end = _to_day(start_date), _to_day(end_date)
+            coverage = self.get_coverage(symbol)
+            if coverage is not None:
+                start, end = min(start, coverage[0]), max(end, coverage[1])
+
+            if len(new):
+                self._save_array(symbol, merged)
+            self._set_coverage(symbol, start, end)
+            self.stats["writes"] += 1
+
+    def clear(self, symbol: Optional[str] = None) -> None:
+        """Remove stored history for one symbol or for all symbols"""
+        with self.lock:
+            paths = [self._data_path(symbol), self._meta_path(symbol)] if symbol else \
+                list(self.root.glob("*.npy")) + list(self.root.glob("*.json"))
+            for path in paths:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get store statistics"""
+        return {
+            **self.stats,
+            "symbols": len(list(self.root.glob("*.npy")))
+        }
+
+
+# Singleton instance shared by pipelines in the same process
+_price_store = None
+
+def get_price_store(root: Optional[Union[str, Path]] = None) -> PriceHistoryStore:
+    """Get or create the singleton PriceHistoryStore instance"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceHistoryStore(root)
+    return _price_store
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Replacement Search Index
+Standardized return vectors for a large ETF/stock universe so that the
+most-correlated substitutes of any holding come from one matrix-vector
+product (or one matrix-matrix product for a batch of losing lots) instead
+of a fresh correlation matrix per query.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("replacement_index")
+
+
+class ReplacementIndex:
+    """
+    Unit-norm, mean-centred return columns of a ticker universe.
+
+    For tickers with full history the dot product of two columns is exactly
+    their Pearson correlation. Missing observations are zero after centring,
+    so for partially overlapping histories the dot product only covers the
+    common days; scores are renormalised by each column's norm over those
+    days, which is the correlation over the overlap with every ticker centred
+    on its own mean. min_overlap guards against scores built on too few
+    common days.
+    """
+
+    def __init__(self,
+                 tickers: List[str],
+                 vectors: np.ndarray,
+                 observed: np.ndarray,
+                 issuers: Optional[np.ndarray] = None):
+        """
+        Args:
+            tickers: Universe tickers, one per column
+            vectors: (n_days, n_tickers) standardized returns
+            observed: (n_days, n_tickers) mask of days with a return
+            issuers: Issuer id per ticker (0 = unknown); tickers sharing an
+                     issuer are never proposed as replacements for each other
+        """
+        self.tickers = list(tickers)
+        self.vectors = vectors
+        self.observed = observed
+        self.issuers = issuers if issuers is not None else np.zeros(len(self.tickers), dtype=np.int64)
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        # Without gaps every overlap is the full window and no renormalisation is needed
+        self._complete = bool(observed.all())
+        self._squared = None
+        self._observed_values = None
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._positions
+
+    @classmethod
+    def from_returns(cls,
+                     returns: pd.DataFrame,
+                     min_observations: int = 60,
+                     issuers: Optional[Dict[str, int]] = None) -> 'ReplacementIndex':
+        """
+        Build the index from a returns frame (NaN where a ticker did not trade).
+
+        Args:
+            returns: (n_days, n_tickers) daily returns
+            min_observations: Drop tickers with fewer non-missing returns
+            issuers: Optional {ticker: issuer id} (e.g. SEC CIK)
+
+        Returns:
+            ReplacementIndex
+        """
+        values = returns.to_numpy(dtype=float)
+        observed = np.isfinite(values)
+        counts = observed.sum(axis=0)
+
+        centred = np.where(observed, values, 0.0)
+        centred -= np.where(observed, centred.sum(axis=0) / np.maximum(counts, 1), 0.0)
+        norms = np.sqrt((centred ** 2).sum(axis=0))
+
+        keep = (counts >= min_observations) & (norms > 0)
+        dropped = int((~keep).sum())
+        if dropped:
+            logger.info(f"Replacement index skips {dropped} tickers with short or constant history")
+
+        tickers = [str(t) for t, k in zip(returns.columns, keep) if k]
+        issuer_ids = None
+        if issuers:
+            issuer_ids = np.array([int(issuers.get(t) or 0) for t in tickers], dtype=np.int64)
+        return cls(
+            tickers=tickers,
+            vectors=np.ascontiguousarray(centred[:, keep] / norms[keep]),
+            observed=np.ascontiguousarray(observed[:, keep]),
+            issuers=issuer_ids
+        )
+
+    def positions(self, tickers: Iterable[str]) -> np.ndarray:
+        """Column positions of tickers (KeyError for tickers not in the index)"""
+        return np.array([self._positions[t] for t in tickers], dtype=np.int64)
+
+    def _scores(self, rows, cols) -> np.ndarray:
+        """
+        Correlations of row columns (candidates) with cols (queries).
+
+        Args:
+            rows: Column positions or slice of candidates
+            cols: Column positions or slice of queries
+
+        Returns:
+            (n_rows, n_cols) array; NaN where two tickers share no observations
+        """
+        scores = self.vectors[:, rows].T @ self.vectors[:, cols]
+        if self._complete:
+            return scores
+        if self._squared is None:
+            self._squared = self.vectors ** 2
+            self._observed_values = self.observed.astype(self.vectors.dtype)
+        # Squared norm of each side restricted to the days both have a return
+        row_norms = self._squared[:, rows].T @ self._observed_values[:, cols]
+        col_norms = self._observed_values[:, rows].T @ self._squared[:, cols]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return scores / np.sqrt(row_norms * col_norms)
+
+    def correlations(self,
+                     ticker: str,
+                     candidates: Optional[List[str]] = None,
+                     min_overlap: int = 60) -> np.ndarray:
+        """
+        Correlations of one ticker with candidates (default: the whole universe).
+
+        Args:
+            ticker: Indexed ticker
+            candidates: Indexed candidate tickers
+            min_overlap: Minimum common observations with the ticker
+
+        Returns:
+            Array of correlations aligned to candidates (NaN below min_overlap)
+        """
+        rows = slice(None) if candidates is None else self.positions(candidates)
+        col = self._positions[ticker]
+        scores = self._scores(rows, [col])[:, 0]
+        overlap = self.observed[:, rows].T.astype(np.float32) @ self.observed[:, col].astype(np.float32)
+        return np.where(overlap >= min_overlap, scores, np.nan)
+
+    def search(self,
+               tickers: List[str],
+               k: int = 10,
+               min_correlation: float = 0.85,
+               exclude: Optional[Iterable[str]] = None,
+               min_overlap: int = 60) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Top-k most correlated replacements for each query ticker.
+
+        Candidates are never the ticker itself, a ticker of the same issuer,
+        or one in exclude (e.g. symbols bought or held within the wash sale
+        window). Query tickers missing from the index get an empty list.
+
+        Args:
+            tickers: Tickers to replace (e.g. every lot at a loss)
+            k: Replacements per ticker
+            min_correlation: Minimum correlation required
+            exclude: Tickers that must not be proposed
+            min_overlap: Minimum common observations with the query ticker
+
+        Returns:
+            Dictionary of {ticker: [{'ticker', 'correlation', 'is_suitable'}, ...]}
+            sorted by correlation (highest first)
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {t: [] for t in tickers}
+        queries = [t for t in dict.fromkeys(tickers) if t in self._positions]
+        if not queries or k <= 0:
+            return results
+
+        query_pos = self.positions(queries)
+        # (n_tickers, n_queries): one product scores every candidate for every lot
+        scores = self._scores(slice(None), query_pos)
+        overlap = self.observed.T.astype(np.float32) @ self.observed[:, query_pos].astype(np.float32)
+
+        invalid = (overlap < min_overlap) | ~(scores >= min_correlation)
+        same_issuer = (self.issuers[:, None] == self.issuers[query_pos][None, :]) & (self.issuers[:, None] != 0)
+        invalid |= same_issuer
+        invalid[query_pos, np.arange(len(queries))] = True
+        excluded = [self._positions[t] for t in (exclude or ()) if t in self._positions]
+        if excluded:
+            invalid[excluded, :] = True
+        scores = np.where(invalid, -np.inf, scores)
+
+        if k < len(self.tickers):
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        else:
+            top = np.argsort(-scores, axis=0)
+        for j, ticker in enumerate(queries):
+            rows = top[:, j]
+            rows = rows[np.argsort(-scores[rows, j], kind='stable')]
+            results[ticker] = [
+                {'ticker': self.tickers[i], 'correlation': float(scores[i, j]), 'is_suitable': True}
+                for i in rows if np.isfinite(scores[i, j])
+            ]
+        return results
+
+    def correlated_pairs(self,
+                         threshold: float = 0.95,
+                         tickers: Optional[List[str]] = None,
+                         min_overlap: int = 60,
+                         block_size: int = 1024) -> List[Dict[str, Any]]:
+        """
+        All pairs with |correlation| >= threshold, computed in row blocks.
+
+        Args:
+            threshold: Minimum absolute correlation
+            tickers: Indexed tickers to pair up (default: the whole universe)
+            min_overlap: Minimum common observations of a pair
+            block_size: Rows scored per matrix product
+
+        Returns:
+            List of {'ticker1', 'ticker2', 'correlation', 'is_positive'} sorted
+            by absolute correlation (highest first)
+        """
+        cols = np.arange(len(self.tickers)) if tickers is None else self.positions(dict.fromkeys(tickers))
+        pairs = []
+        for start in range(0, len(cols), block_size):
+            rows = cols[start:start + block_size]
+            block = self._scores(rows, cols)
+            hits = np.abs(block) >= threshold
+            if not self._complete:
+                observed = self.observed.astype(np.float32)
+                hits &= observed[:, rows].T @ observed[:, cols] >= min_overlap
+            r, c = np.nonzero(hits)
+            upper = c > r + start
+            for i, j in zip(r[upper], c[upper]):
+                corr = float(block[i, j])
+                pairs.append({
+                    'ticker1': self.tickers[rows[i]],
+                    'ticker2': self.tickers[cols[j]],
+                    'correlation': corr,
+                    'is_positive': corr > 0
+                })
+        pairs.sort(key=lambda x: abs(x['correlation']), reverse=True)
+        return pairs
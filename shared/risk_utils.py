@@ -2,6 +2,8 @@
 Risk calculation utilities for consistent VaR/ES reporting.
 Ensures both VaR and ES are always reported together with clear conventions.
 """
+import hashlib
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Union, Any
@@ -29,7 +31,8 @@ def calculate_var_es(
     Args:
         returns: Array or Series of returns (as decimals, not percentages)
         confidence: Confidence level (e.g., 0.95 for 95%)
-        method: Calculation method ("historical", "parametric", "cornish_fisher")
+        method: Calculation method ("historical", "parametric", "cornish_fisher",
+            "monte_carlo" - filtered historical simulation, see calculate_monte_carlo_var_es)
         horizon_days: Time horizon in days for scaling
         
     Returns:
@@ -87,6 +90,11 @@ def calculate_var_es(
         var_value, es_value = _calculate_cornish_fisher_var_es(
             returns, confidence, horizon_days
         )
+    elif method == "monte_carlo":
+        mc = calculate_monte_carlo_var_es(
+            returns, [1.0], [confidence], [horizon_days], model="filtered-historical"
+        )
+        var_value, es_value = mc["var"][0, 0], mc["es"][0, 0]
     else:
         raise ValueError(f"Unknown method: {method}")
     
@@ -200,6 +208,333 @@ def _calculate_cornish_fisher_var_es(
     return var_value, es_value
 
 
+VAR_GRID_METHODS = ("historical", "parametric", "cornish-fisher", "student-t")
+
+
+def _sorted_tail_stats(sorted_returns: np.ndarray, alphas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    VaR and ES at several tail probabilities from an already sorted sample.
+
+    VaR is the linear-interpolated percentile (np.percentile default) and ES
+    the mean of returns at or below it, read off prefix sums.
+
+    Returns:
+        Tuple of (VaR, ES) arrays as negative values (losses)
+    """
+    n = len(sorted_returns)
+    position = alphas * (n - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n - 1)
+    frac = position - lower
+    var_values = sorted_returns[lower] + frac * (sorted_returns[upper] - sorted_returns[lower])
+
+    tail_count = np.maximum(np.searchsorted(sorted_returns, var_values, side="right"), 1)
+    es_values = np.cumsum(sorted_returns)[tail_count - 1] / tail_count
+    return var_values, es_values
+
+
+def calculate_var_es_grid(
+    returns: Union[np.ndarray, pd.Series],
+    confidence_levels: List[float],
+    horizons: List[int],
+    methods: List[str] = ("historical", "parametric", "cornish-fisher"),
+    t_params: Optional[Tuple[float, float, float]] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate VaR and ES over a full (confidence, horizon, method) grid in one pass.
+
+    Returns are sorted and their moments computed once; every horizon is a
+    square-root-of-time rescaling of the 1-day result, so each method costs a
+    single vectorized evaluation over all confidence levels.
+
+    Args:
+        returns: Array or Series of 1-day returns (as decimals)
+        confidence_levels: Confidence levels (e.g., [0.90, 0.95, 0.99])
+        horizons: Time horizons in days
+        methods: Any of "historical", "parametric", "cornish-fisher", "student-t"
+        t_params: Pre-fitted Student-t (df, loc, scale); fitted here if needed and omitted
+
+    Returns:
+        Dictionary with "var" and "es" mappings of method -> array of shape
+        (len(confidence_levels), len(horizons)). Values are return thresholds
+        (NEGATIVE = loss), matching the analyze_portfolio_risk var_analysis
+        output. Cornish-Fisher reports VaR only.
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.values
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+
+    unknown = [m for m in methods if m not in VAR_GRID_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown method(s): {unknown}")
+    if len(returns) < 2:
+        raise ValueError(f"Insufficient data for VaR grid: {len(returns)} returns")
+
+    alphas = 1 - np.asarray(confidence_levels, dtype=float)          # (C,)
+    scale = np.sqrt(np.asarray(horizons, dtype=float))[np.newaxis, :]  # (1, H)
+
+    var_grid: Dict[str, np.ndarray] = {}
+    es_grid: Dict[str, np.ndarray] = {}
+
+    if "historical" in methods:
+        var_1d, es_1d = _sorted_tail_stats(np.sort(returns), alphas)
+        var_grid["historical"] = var_1d[:, np.newaxis] * scale
+        es_grid["historical"] = es_1d[:, np.newaxis] * scale
+
+    if "parametric" in methods or "cornish-fisher" in methods:
+        # Central moments in one pass (biased, as np.std / scipy.stats defaults)
+        mean = returns.mean()
+        centered = returns - mean
+        sq = centered * centered
+        m2 = sq.mean()
+        std = np.sqrt(m2)
+        z = stats.norm.ppf(alphas)
+
+        if "parametric" in methods:
+            var_grid["parametric"] = (mean + z * std)[:, np.newaxis] * scale
+            es_grid["parametric"] = (mean - std * stats.norm.pdf(z) / alphas)[:, np.newaxis] * scale
+
+        if "cornish-fisher" in methods:
+            skew = (sq * centered).mean() / m2**1.5 if m2 > 0 else 0.0
+            kurt = (sq * sq).mean() / m2**2 - 3 if m2 > 0 else 0.0
+            z_cf = z + (z**2 - 1) * skew / 6 + (z**3 - 3*z) * kurt / 24
+            var_grid["cornish-fisher"] = (mean + z_cf * std)[:, np.newaxis] * scale
+
+    if "student-t" in methods:
+        if t_params is None:
+            t_params = stats.t.fit(returns)
+        df, loc, t_scale = t_params
+        q = stats.t.ppf(alphas, df)
+        var_grid["student-t"] = (loc + t_scale * q)[:, np.newaxis] * scale
+        if df > 1:
+            # Closed-form lower-tail mean of a Student-t
+            tail_mean = -(df + q**2) / (df - 1) * stats.t.pdf(q, df) / alphas
+            es_grid["student-t"] = (loc + t_scale * tail_mean)[:, np.newaxis] * scale
+
+    return {
+        "confidence_levels": list(confidence_levels),
+        "horizons": list(horizons),
+        "var": var_grid,
+        "es": es_grid,
+        "t_params": t_params
+    }
+
+
+MC_MODELS = ("normal", "t-copula", "filtered-historical")
+
+# Cholesky factors keyed by a digest of the matrix they factor
+_CHOLESKY_CACHE: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_CHOLESKY_CACHE_SIZE = 32
+
+
+def cached_cholesky(matrix: np.ndarray) -> np.ndarray:
+    """
+    Lower Cholesky factor of a covariance/correlation matrix, cached by content.
+
+    A matrix that is only positive semi-definite is regularized with a growing
+    diagonal ridge until the factorization succeeds.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    key = hashlib.sha1(matrix.tobytes() + str(matrix.shape).encode()).hexdigest()
+    factor = _CHOLESKY_CACHE.get(key)
+    if factor is not None:
+        _CHOLESKY_CACHE.move_to_end(key)
+        return factor
+
+    ridge = 0.0
+    base = max(float(np.mean(np.diag(matrix))), 1e-12)
+    for _ in range(10):
+        try:
+            factor = np.linalg.cholesky(matrix + ridge * np.eye(len(matrix)))
+            break
+        except np.linalg.LinAlgError:
+            ridge = base * 1e-10 if ridge == 0.0 else ridge * 10
+    else:
+        raise ValueError("Matrix is not positive semi-definite; Cholesky failed")
+
+    if ridge:
+        logger.debug(f"Cholesky needed ridge {ridge:.2e}")
+    _CHOLESKY_CACHE[key] = factor
+    if len(_CHOLESKY_CACHE) > _CHOLESKY_CACHE_SIZE:
+        _CHOLESKY_CACHE.popitem(last=False)
+    return factor
+
+
+def _ewma_volatility(returns: np.ndarray, decay: float) -> np.ndarray:
+    """
+    EWMA (RiskMetrics) volatility per asset.
+
+    Returns:
+        Array of shape (T + 1, n): in-sample conditional volatilities followed by
+        the one-step-ahead forecast
+    """
+    n_obs, n_assets = returns.shape
+    variance = np.empty((n_obs + 1, n_assets))
+    variance[0] = np.var(returns, axis=0)
+    for t in range(n_obs):
+        variance[t + 1] = decay * variance[t] + (1 - decay) * returns[t] ** 2
+    return np.sqrt(np.maximum(variance, 1e-18))
+
+
+def _simulate_portfolio_chunk(
+    model: str,
+    params: Dict[str, Any],
+    seed: np.random.SeedSequence,
+    size: int
+) -> np.ndarray:
+    """
+    Simulate one chunk of 1-day portfolio returns.
+
+    Module-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    weights = params["weights"]
+
+    if model == "normal":
+        draws = rng.standard_normal((size, len(weights))) @ params["chol"].T
+        return params["mean"] @ weights + draws @ weights
+
+    if model == "t-copula":
+        df = params["df"]
+        normals = rng.standard_normal((size, len(weights))) @ params["chol"].T
+        mixing = np.sqrt(rng.chisquare(df, size=(size, 1)) / df)
+        uniforms = stats.t.cdf(normals / mixing, df)
+
+        # Map uniforms through each asset's empirical marginal (interpolated quantile)
+        sorted_hist = params["sorted_returns"]
+        n_obs = len(sorted_hist)
+        position = uniforms * (n_obs - 1)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, n_obs - 1)
+        frac = position - lower
+        columns = np.arange(len(weights))
+        lo_vals = sorted_hist[lower, columns]
+        asset_returns = lo_vals + frac * (sorted_hist[upper, columns] - lo_vals)
+        return asset_returns @ weights
+
+    if model == "filtered-historical":
+        # Resample whole days of standardized residuals to keep cross-asset dependence
+        rows = rng.integers(0, len(params["residuals"]), size=size)
+        return (params["residuals"][rows] * params["sigma_next"]) @ weights
+
+    raise ValueError(f"Unknown Monte Carlo model: {model}")
+
+
+def calculate_monte_carlo_var_es(
+    asset_returns: Union[np.ndarray, pd.DataFrame],
+    weights: Union[np.ndarray, List[float]],
+    confidence_levels: List[float],
+    horizons: List[int],
+    model: str = "normal",
+    covariance: Optional[np.ndarray] = None,
+    n_paths: int = 100_000,
+    chunk_size: int = 20_000,
+    seed: Optional[int] = 42,
+    t_df: float = 5.0,
+    ewma_decay: float = 0.94,
+    n_workers: int = 0
+) -> Dict[str, Any]:
+    """
+    Portfolio Monte Carlo VaR and ES over a (confidence, horizon) grid.
+
+    Scenarios are generated in fixed-size chunks, each with its own child seed
+    spawned from ``seed``, so memory stays bounded by ``chunk_size`` x assets
+    draws and the result is identical whether chunks run in-process or in a
+    process pool. Only the portfolio return of each path is kept.
+
+    Models:
+        - "normal": multivariate normal with the sample mean and covariance
+        - "t-copula": Student-t copula on the sample correlation with
+          empirical marginals
+        - "filtered-historical": bootstrap of EWMA-standardized residuals
+          rescaled by the one-day-ahead EWMA volatility
+
+    Args:
+        asset_returns: Matrix of 1-day asset returns (rows = days, columns = assets)
+        weights: Portfolio weights
+        confidence_levels: Confidence levels (e.g., [0.95, 0.99])
+        horizons: Time horizons in days (square-root-of-time scaled, as the
+            other var_analysis methods)
+        model: One of MC_MODELS
+        covariance: Precomputed daily covariance for the "normal" model
+            (e.g. from the covariance engine); sample covariance if None
+        n_paths: Number of simulated paths
+        chunk_size: Paths generated per chunk
+        seed: Root seed (None for non-deterministic)
+        t_df: Degrees of freedom of the t-copula
+        ewma_decay: EWMA decay for filtered historical simulation
+        n_workers: Worker processes for chunk generation (0 = in-process)
+
+    Returns:
+        Dictionary with "var" and "es" arrays of shape
+        (len(confidence_levels), len(horizons)) as negative values (losses)
+    """
+    if model not in MC_MODELS:
+        raise ValueError(f"Unknown Monte Carlo model: {model} (expected one of {MC_MODELS})")
+
+    if isinstance(asset_returns, pd.DataFrame):
+        asset_returns = asset_returns.values
+    asset_returns = np.asarray(asset_returns, dtype=float)
+    if asset_returns.ndim == 1:
+        asset_returns = asset_returns[:, np.newaxis]
+    asset_returns = asset_returns[~np.isnan(asset_returns).any(axis=1)]
+    weights = np.asarray(weights, dtype=float)
+
+    if len(asset_returns) < 20:
+        raise ValueError(f"Insufficient data for Monte Carlo VaR: {len(asset_returns)} returns")
+    if asset_returns.shape[1] != len(weights):
+        raise ValueError(f"{asset_returns.shape[1]} assets but {len(weights)} weights")
+
+    params: Dict[str, Any] = {"weights": weights}
+    if model == "normal":
+        params["mean"] = asset_returns.mean(axis=0)
+        if covariance is None:
+            covariance = np.cov(asset_returns, rowvar=False)
+        params["chol"] = cached_cholesky(np.atleast_2d(covariance))
+    elif model == "t-copula":
+        params["df"] = float(t_df)
+        params["chol"] = cached_cholesky(np.atleast_2d(np.corrcoef(asset_returns, rowvar=False)))
+        params["sorted_returns"] = np.sort(asset_returns, axis=0)
+    else:
+        sigma = _ewma_volatility(asset_returns, ewma_decay)
+        params["residuals"] = asset_returns / sigma[:-1]
+        params["sigma_next"] = sigma[-1]
+
+    sizes = [chunk_size] * (n_paths // chunk_size)
+    if n_paths % chunk_size:
+        sizes.append(n_paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if n_workers and len(sizes) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            chunks = list(executor.map(
+                _simulate_portfolio_chunk,
+                [model] * len(sizes), [params] * len(sizes), seeds, sizes
+            ))
+    else:
+        chunks = [
+            _simulate_portfolio_chunk(model, params, chunk_seed, size)
+            for chunk_seed, size in zip(seeds, sizes)
+        ]
+
+    simulated = np.sort(np.concatenate(chunks))
+    alphas = 1 - np.asarray(confidence_levels, dtype=float)
+    scale = np.sqrt(np.asarray(horizons, dtype=float))[np.newaxis, :]
+    var_1d, es_1d = _sorted_tail_stats(simulated, alphas)
+
+    return {
+        "confidence_levels": list(confidence_levels),
+        "horizons": list(horizons),
+        "var": var_1d[:, np.newaxis] * scale,
+        "es": es_1d[:, np.newaxis] * scale,
+        "model": model,
+        "n_paths": int(n_paths),
+        "seed": seed
+    }
+
+
 def calculate_portfolio_risk_metrics(
     returns: pd.DataFrame,
     weights: Optional[np.ndarray] = None,
@@ -5,32 +5,214 @@ Eliminates duplicate correlation calculations across risk, portfolio, and tax se
 Provides caching to avoid redundant API calls
 """
 
+import hashlib
 import logging
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Any, Union
 from datetime import datetime, timedelta, timezone
-import json
 import os
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from shared.atomic_writer import atomic_dump_json
+sys.path.append(str(Path(__file__).parent.parent))
+from covariance_engine import get_covariance_engine
+from replacement_index import ReplacementIndex
+from shared.atomic_writer import atomic_write_bytes
+from shared.symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
+# Bump when the layout of a cache entry changes; older entries are discarded
+CORRELATION_CACHE_VERSION = 1
+
+# Registrants listing more equity symbols than this issue notes (e.g. iPath ETNs
+# under Barclays), not share classes of one company
+MAX_SHARE_CLASSES = 7
+
+
+class CorrelationCache:
+    """
+    Size-bounded on-disk cache of correlation matrices with LRU eviction.
+    
+    Each entry is one uncompressed .npz named by a hash of the canonical
+    (sorted) ticker set and lookback, holding the matrix in canonical order.
+    Only directory entries are read at startup; matrices are loaded when first
+    requested and a small in-memory LRU keeps the hot ones. File mtimes record
+    the last access, so eviction order survives restarts.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        ttl: timedelta,
+        max_entries: int = 256,
+        max_memory_entries: int = 32
+    ):
+        """
+        Initialize correlation cache
+        
+        Args:
+            cache_dir: Directory holding the entry files
+            ttl: Entries older than this are treated as misses and removed
+            max_entries: Entries kept on disk
+            max_memory_entries: Entries kept loaded in memory
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self.lock = threading.RLock()
+        
+        # key -> entry file, least recently used first
+        self._files: "OrderedDict[str, Path]" = OrderedDict()
+        # key -> (canonical tickers, matrix, timestamp), least recently used first
+        self._memory: "OrderedDict[str, Tuple[List[str], np.ndarray, datetime]]" = OrderedDict()
+        
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz') and not entry.name.startswith('.'):
+                entries.append((entry.stat().st_mtime, entry.name[:-4], Path(entry.path)))
+        for _, key, path in sorted(entries):
+            self._files[key] = path
+        self._evict()
+    
+    def __len__(self) -> int:
+        return len(self._files)
+    
+    @staticmethod
+    def _canonical(tickers: List[str], lookback_days: int) -> Tuple[List[str], str]:
+        """Sorted unique tickers and the canonical key string they hash to"""
+        canonical = sorted(set(tickers))
+        return canonical, f"{','.join(canonical)}|{lookback_days}"
+    
+    @staticmethod
+    def _hash(canonical_key: str) -> str:
+        return hashlib.sha256(canonical_key.encode('utf-8')).hexdigest()[:32]
+    
+    def get(self, tickers: List[str], lookback_days: int) -> Optional[pd.DataFrame]:
+        """
+        Cached correlation matrix ordered like tickers, or None on a miss
+        """
+        canonical, canonical_key = self._canonical(tickers, lookback_days)
+        key = self._hash(canonical_key)
+        with self.lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                path = self._files.get(key)
+                if path is None:
+                    return None
+                entry = self._read(path, canonical_key)
+                if entry is None:
+                    self._remove(key)
+                    return None
+            
+            if datetime.now(timezone.utc) - entry[2] >= self.ttl:
+                self._remove(key)
+                return None
+            
+            self._files.move_to_end(key)
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+            try:
+                os.utime(self._files[key])
+            except OSError:
+                pass
+        
+        stored_tickers, matrix, _ = entry
+        frame = pd.DataFrame(matrix, index=stored_tickers, columns=stored_tickers)
+        # Tickers the data pipeline could not resolve are absent, as on a fresh calculation
+        ordered = [t for t in dict.fromkeys(tickers) if t in frame.index]
+        return frame.loc[ordered, ordered]
+    
+    def put(self, tickers: List[str], lookback_days: int, corr_matrix: pd.DataFrame) -> None:
+        """
+        Store a correlation matrix computed for tickers
+        """
+        _, canonical_key = self._canonical(tickers, lookback_days)
+        key = self._hash(canonical_key)
+        stored_tickers = sorted(set(corr_matrix.columns))
+        matrix = corr_matrix.loc[stored_tickers, stored_tickers].to_numpy(dtype=float)
+        timestamp = datetime.now(timezone.utc)
+        path = self.cache_dir / f"{key}.npz"
+        
+        with self.lock:
+            try:
+                atomic_write_bytes(path, lambda f: np.savez(
+                    f,
+                    version=np.array(CORRELATION_CACHE_VERSION),
+                    key=np.array(canonical_key),
+                    timestamp=np.array(timestamp.isoformat()),
+                    tickers=np.array(stored_tickers, dtype=str),
+                    correlation=matrix
+                ))
+            except OSError as e:
+                logger.warning(f"Could not save correlation cache entry: {e}")
+                return
+            
+            self._files[key] = path
+            self._files.move_to_end(key)
+            self._memory[key] = (stored_tickers, matrix, timestamp)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+            self._evict()
+    
+    def _read(self, path: Path, canonical_key: str) -> Optional[Tuple[List[str], np.ndarray, datetime]]:
+        """Load one entry, or None if it is unreadable, from another schema version or a hash collision"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != CORRELATION_CACHE_VERSION or str(data['key']) != canonical_key:
+                    return None
+                return (
+                    data['tickers'].tolist(),
+                    data['correlation'],
+                    datetime.fromisoformat(str(data['timestamp']))
+                )
+        except Exception as e:
+            logger.warning(f"Discarding unreadable correlation cache entry {path.name}: {e}")
+            return None
+    
+    def _remove(self, key: str) -> None:
+        self._memory.pop(key, None)
+        path = self._files.pop(key, None)
+        if path is not None:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_entries"""
+        while len(self._files) > self.max_entries:
+            self._remove(next(iter(self._files)))
+
+
 class CorrelationService:
     """Centralized service for correlation calculations"""
     
-    def __init__(self, data_pipeline=None, cache_ttl_minutes: int = 60):
+    def __init__(
+        self,
+        data_pipeline=None,
+        cache_ttl_minutes: int = 60,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_cache_entries: int = 256
+    ):
         """
         Initialize correlation service
         
         Args:
             data_pipeline: MarketDataPipeline instance for fetching data
             cache_ttl_minutes: Cache time-to-live in minutes
+            cache_dir: Directory for cached matrices (default: shared/cache/correlations)
+            max_cache_entries: Cached matrices kept on disk before LRU eviction
         """
         # Import data pipeline if not provided
         if data_pipeline is None:
@@ -40,17 +222,17 @@ class CorrelationService:
             data_pipeline = MarketDataPipeline()
         
         self.data_pipeline = data_pipeline
-        self.cache = {}
+        self.covariance_engine = get_covariance_engine()
         self.cache_ttl = timedelta(minutes=cache_ttl_minutes)
-        
-        # Cache file for persistence across server restarts
-        self.cache_file = "/home/hvksh/investing/shared/cache/correlation_cache.json"
-        self._load_cache()
-    
-    def _get_cache_key(self, tickers: List[str], lookback_days: int) -> str:
-        """Generate cache key for correlation request"""
-        sorted_tickers = sorted(tickers)
-        return f"{','.join(sorted_tickers)}_{lookback_days}"
+        # Replacement search indexes by lookback_days: {'index', 'universe', 'timestamp'}
+        self.replacement_indexes = {}
+        
+        # Binary cache for persistence across server restarts, loaded per entry on demand
+        self.cache = CorrelationCache(
+            cache_dir or Path(__file__).parent.parent / "cache" / "correlations",
+            ttl=self.cache_ttl,
+            max_entries=max_cache_entries
+        )
     
     def _is_cache_valid(self, cache_entry: Dict) -> bool:
         """Check if cached data is still valid"""
@@ -60,34 +242,6 @@ class CorrelationService:
         cached_time = datetime.fromisoformat(cache_entry['timestamp'])
         return datetime.now(timezone.utc) - cached_time < self.cache_ttl
     
-    def _load_cache(self):
-        """Load cache from file if it exists"""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    # Convert back to proper format
-                    for key, value in cache_data.items():
-                        if self._is_cache_valid(value):
-                            self.cache[key] = value
-                logger.info(f"Loaded {len(self.cache)} valid correlation entries from cache")
-        except Exception as e:
-            logger.warning(f"Could not load correlation cache: {e}")
-    
-    def _save_cache(self):
-        """Save cache to file"""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            # Only save valid entries
-            valid_cache = {
-                key: value for key, value in self.cache.items()
-                if self._is_cache_valid(value)
-            }
-            atomic_dump_json(valid_cache, self.cache_file)
-        except Exception as e:
-            logger.warning(f"Could not save correlation cache: {e}")
-    
     def get_correlation_matrix(
         self,
         tickers: List[str],
@@ -106,15 +260,11 @@ class CorrelationService:
             Correlation matrix as pandas DataFrame
         """
         # Check cache
-        cache_key = self._get_cache_key(tickers, lookback_days)
-        if use_cache and cache_key in self.cache:
-            if self._is_cache_valid(self.cache[cache_key]):
+        if use_cache:
+            cached = self.cache.get(tickers, lookback_days)
+            if cached is not None:
                 logger.info(f"Using cached correlation matrix for {len(tickers)} tickers")
-                return pd.DataFrame(
-                    self.cache[cache_key]['matrix'],
-                    index=tickers,
-                    columns=tickers
-                )
+                return cached
         
         # Fetch data and calculate
         logger.info(f"Calculating correlation matrix for {len(tickers)} tickers over {lookback_days} days")
@@ -133,17 +283,11 @@ class CorrelationService:
             # Calculate returns
             returns = data['returns']
             
-            # Calculate correlation matrix
-            corr_matrix = returns.corr()
+            # Calculate correlation matrix (shared engine caches it with the covariance)
+            corr_matrix = self.covariance_engine.estimate(returns, 'sample').correlation_frame()
             
             # Cache the result
-            self.cache[cache_key] = {
-                'matrix': corr_matrix.values.tolist(),
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'tickers': tickers,
-                'lookback_days': lookback_days
-            }
-            self._save_cache()
+            self.cache.put(tickers, lookback_days, corr_matrix)
             
             return corr_matrix
             
@@ -156,7 +300,8 @@ class CorrelationService:
         self,
         tickers: List[str],
         threshold: float = 0.95,
-        lookback_days: int = 252
+        lookback_days: int = 252,
+        use_index: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Find pairs of tickers with correlation above threshold
@@ -165,23 +310,35 @@ class CorrelationService:
             tickers: List of ticker symbols
             threshold: Correlation threshold (e.g., 0.95)
             lookback_days: Number of days for correlation calculation
+            use_index: Score pairs from the replacement index when it covers all
+                       tickers (last lookback_days returns per pair rather than
+                       the days every ticker traded, so values can differ from
+                       get_correlation_matrix)
         
         Returns:
             List of correlated pairs with their correlation values
         """
-        corr_matrix = self.get_correlation_matrix(tickers, lookback_days)
+        index = self._get_replacement_index(lookback_days) if use_index else None
+        if index is not None and all(t in index for t in tickers):
+            pairs = index.correlated_pairs(threshold, tickers)
+            logger.info(f"Found {len(pairs)} pairs with correlation >= {threshold} in the replacement index")
+            return pairs
         
-        pairs = []
-        for i in range(len(tickers)):
-            for j in range(i + 1, len(tickers)):
-                correlation = corr_matrix.iloc[i, j]
-                if abs(correlation) >= threshold:
-                    pairs.append({
-                        'ticker1': tickers[i],
-                        'ticker2': tickers[j],
-                        'correlation': float(correlation),
-                        'is_positive': correlation > 0
-                    })
+        corr_matrix = self.get_correlation_matrix(tickers, lookback_days)
+        values = corr_matrix.values
+        
+        rows, cols = np.triu_indices(len(tickers), k=1)
+        upper = values[rows, cols]
+        hits = np.flatnonzero(np.abs(upper) >= threshold)
+        pairs = [
+            {
+                'ticker1': tickers[rows[h]],
+                'ticker2': tickers[cols[h]],
+                'correlation': float(upper[h]),
+                'is_positive': bool(upper[h] > 0)
+            }
+            for h in hits
+        ]
         
         # Sort by absolute correlation (highest first)
         pairs.sort(key=lambda x: abs(x['correlation']), reverse=True)
@@ -217,13 +374,13 @@ class CorrelationService:
         )
         
         returns = data['returns']
-        volatilities = returns.std().values
+        cov_matrix = self.covariance_engine.estimate(returns, 'sample').covariance
+        volatilities = np.sqrt(np.diag(cov_matrix))
         
         # Calculate weighted average volatility
         weighted_vol_sum = np.sum(weights * volatilities)
         
         # Calculate portfolio volatility
-        cov_matrix = returns.cov().values
         portfolio_variance = weights @ cov_matrix @ weights
         portfolio_vol = np.sqrt(portfolio_variance)
         
@@ -302,7 +459,8 @@ class CorrelationService:
         ticker: str,
         candidate_tickers: List[str],
         min_correlation: float = 0.85,
-        lookback_days: int = 252
+        lookback_days: int = 252,
+        use_index: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Find replacement candidates for tax-loss harvesting
@@ -312,33 +470,140 @@ class CorrelationService:
             candidate_tickers: List of potential replacements
             min_correlation: Minimum correlation required
             lookback_days: Number of days for calculation
+            use_index: Score candidates from the replacement index when it covers
+                       them (last lookback_days returns per pair rather than the
+                       days every ticker traded, so values can differ from
+                       get_correlation_matrix)
         
         Returns:
             List of replacement candidates sorted by correlation
         """
-        # Include original ticker in correlation calculation
-        all_tickers = [ticker] + candidate_tickers
-        corr_matrix = self.get_correlation_matrix(all_tickers, lookback_days)
-        
-        # Get correlations with the target ticker
-        target_correlations = corr_matrix.loc[ticker, candidate_tickers]
-        
-        # Filter and sort candidates
-        candidates = []
-        for candidate in candidate_tickers:
-            correlation = target_correlations[candidate]
-            if correlation >= min_correlation:
-                candidates.append({
-                    'ticker': candidate,
-                    'correlation': float(correlation),
-                    'is_suitable': True
-                })
-        
-        # Sort by correlation (highest first)
-        candidates.sort(key=lambda x: x['correlation'], reverse=True)
+        index = self._get_replacement_index(lookback_days) if use_index else None
+        if index is not None and ticker in index and all(c in index for c in candidate_tickers):
+            # Served from the precomputed universe: one mat-vec, no price fetch
+            correlations = index.correlations(ticker, candidate_tickers)
+        else:
+            # Include original ticker in correlation calculation
+            all_tickers = [ticker] + candidate_tickers
+            corr_matrix = self.get_correlation_matrix(all_tickers, lookback_days)
+            correlations = corr_matrix.loc[ticker, candidate_tickers].to_numpy(dtype=float)
+        
+        # Filter and sort candidates (highest correlation first)
+        selected = np.flatnonzero(correlations >= min_correlation)
+        selected = selected[np.argsort(-correlations[selected], kind='stable')]
+        candidates = [
+            {
+                'ticker': candidate_tickers[i],
+                'correlation': float(correlations[i]),
+                'is_suitable': True
+            }
+            for i in selected
+        ]
         
         logger.info(f"Found {len(candidates)} replacement candidates for {ticker} with correlation >= {min_correlation}")
         return candidates
+    
+    def build_replacement_index(
+        self,
+        universe: List[str],
+        lookback_days: int = 252,
+        min_observations: int = 60
+    ) -> ReplacementIndex:
+        """
+        Precompute standardized returns of a replacement universe
+        
+        Args:
+            universe: ETF/stock tickers that may serve as replacements
+            lookback_days: Number of trading days of returns to index
+            min_observations: Skip tickers with fewer daily returns
+        
+        Returns:
+            ReplacementIndex (also kept for find_replacements, and for
+            find_replacement_candidates and find_correlated_pairs with
+            use_index=True, within the cache TTL)
+        """
+        universe = list(dict.fromkeys(universe))
+        logger.info(f"Building replacement index for {len(universe)} tickers over {lookback_days} days")
+        
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=int(lookback_days * 1.5))  # Extra buffer
+        data = self.data_pipeline.fetch_equity_data(
+            tickers=universe,
+            start_date=start_date.strftime('%Y-%m-%d'),
+            end_date=end_date.strftime('%Y-%m-%d')
+        )
+        
+        # Per-ticker returns; the pipeline's 'returns' drop every day any ticker is missing
+        prices = data['prices']
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame(universe[0])
+        returns = prices.pct_change(fill_method=None).iloc[1:].tail(lookback_days)
+        
+        # A fund's CIK is its sponsor trust and a note programme's CIK is the issuing
+        # bank, so only operating companies' share classes (GOOG/GOOGL) share an issuer
+        symbol_index = get_symbol_index()
+        issuers = {}
+        for ticker in returns.columns:
+            record = symbol_index.lookup(ticker)
+            if (record and record['cik'] and record['quote_type'] == 'EQUITY'
+                    and symbol_index.listing_count(record['cik'], 'EQUITY') <= MAX_SHARE_CLASSES):
+                issuers[ticker] = record['cik']
+        
+        index = ReplacementIndex.from_returns(returns, min_observations=min_observations, issuers=issuers)
+        self.replacement_indexes[lookback_days] = {
+            'index': index,
+            'universe': set(universe),
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+        logger.info(f"Replacement index ready with {len(index)} tickers")
+        return index
+    
+    def _get_replacement_index(self, lookback_days: int) -> Optional[ReplacementIndex]:
+        """Replacement index for a lookback if one was built within the cache TTL"""
+        entry = self.replacement_indexes.get(lookback_days)
+        if entry and self._is_cache_valid(entry):
+            return entry['index']
+        return None
+    
+    def find_replacements(
+        self,
+        tickers: List[str],
+        universe: Optional[List[str]] = None,
+        k: int = 5,
+        min_correlation: float = 0.85,
+        exclude: Optional[List[str]] = None,
+        lookback_days: int = 252
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Find wash-sale-safe replacements for many losing positions at once
+        
+        Candidates exclude the ticker itself, other share classes of the same
+        issuer and anything in exclude (e.g. symbols bought in the last 30 days).
+        
+        Args:
+            tickers: Tickers to replace (e.g. every lot at a loss)
+            universe: Replacement universe; (re)builds the index when given and the
+                      current index is missing, expired or does not cover it
+            k: Replacements per ticker
+            min_correlation: Minimum correlation required
+            exclude: Tickers that must not be proposed
+            lookback_days: Number of days for correlation calculation
+        
+        Returns:
+            Dictionary of {ticker: replacement candidates sorted by correlation}
+        """
+        index = self._get_replacement_index(lookback_days)
+        if universe is not None:
+            # Tickers dropped for short history still count as covered, so they do not force rebuilds
+            needed = set(universe) | set(tickers)
+            if index is None or not needed.issubset(self.replacement_indexes[lookback_days]['universe']):
+                index = self.build_replacement_index(list(universe) + list(tickers), lookback_days)
+        if index is None:
+            raise ValueError("No replacement index available - pass a universe or call build_replacement_index first")
+        
+        results = index.search(tickers, k=k, min_correlation=min_correlation, exclude=exclude)
+        logger.info(f"Searched {len(index)} replacement candidates for {len(tickers)} tickers")
+        return results
 
 # Singleton instance
 _correlation_service = None
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Factor Exposure Service - Fama-French factor betas for holdings and portfolios
+Caches factor history on disk and per-asset regressions in memory so that a
+weight-only change re-aggregates cached betas instead of refitting
+"""
+
+import hashlib
+import logging
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from shared.atomic_writer import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+FACTOR_COLUMNS = ['MKT-RF', 'SMB', 'HML', 'RMW', 'CMA', 'MOM']
+
+
+class FactorExposureService:
+    """Centralized service for Fama-French factor exposures"""
+
+    def __init__(
+        self,
+        data_pipeline=None,
+        cache_dir: Optional[Union[str, Path]] = None,
+        hac_lags: int = 5,
+        max_cached_fits: int = 16
+    ):
+        """
+        Initialize factor exposure service
+
+        Args:
+            data_pipeline: MarketDataPipeline instance for fetching factors
+            cache_dir: Directory for cached factor history (default: shared/cache/factors)
+            hac_lags: Newey-West lags for coefficient confidence intervals
+            max_cached_fits: Number of per-asset regressions kept in memory
+        """
+        if data_pipeline is None:
+            sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+            from data_pipeline import MarketDataPipeline
+            data_pipeline = MarketDataPipeline()
+
+        self.data_pipeline = data_pipeline
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(__file__).parent.parent / "cache" / "factors"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hac_lags = hac_lags
+        self.max_cached_fits = max_cached_fits
+        self._fits: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Factor history
+    # ------------------------------------------------------------------
+
+    def _factor_path(self, frequency: str) -> Path:
+        return self.cache_dir / f"ff_factors_{frequency}.npz"
+
+    def _load_factor_cache(self, frequency: str) -> Optional[Dict[str, Any]]:
+        path = self._factor_path(frequency)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                frame = pd.DataFrame(
+                    data['values'],
+                    index=pd.DatetimeIndex(data['dates'].astype('datetime64[D]')),
+                    columns=data['columns'].tolist()
+                )
+                return {'frame': frame, 'fetched': str(data['fetched'])}
+        except Exception as e:
+            logger.warning(f"Corrupt factor cache {path}, ignoring: {e}")
+            return None
+
+    def _save_factor_cache(self, frequency: str, frame: pd.DataFrame) -> None:
+        path = self._factor_path(frequency)
+        atomic_write_bytes(path, lambda f: np.savez(
+            f,
+            dates=frame.index.values.astype('datetime64[D]').astype(np.int64),
+            values=frame.values.astype(np.float64),
+            columns=np.array(list(frame.columns), dtype=str),
+            fetched=np.array(datetime.now(timezone.utc).date().isoformat())
+        ))
+
+    def get_factors(
+        self,
+        start_date: str,
+        end_date: str,
+        frequency: str = "daily"
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fama-French factors for [start_date, end_date], served from disk when possible
+
+        The full published history is cached per frequency. A request is served
+        from disk if the cache was refreshed today or already extends past
+        end_date; otherwise the history is re-fetched once and re-cached.
+
+        Returns:
+            DataFrame with factor columns (decimals) or None if unavailable
+        """
+        today = datetime.now(timezone.utc).date().isoformat()
+        cached = self._load_factor_cache(frequency)
+
+        fresh = cached is not None and (
+            cached['fetched'] == today or cached['frame'].index[-1] >= pd.Timestamp(end_date)
+        )
+        if not fresh:
+            # Unfiltered fetch returns the full history, so any later window can be sliced
+            factors = self.data_pipeline.fetch_fama_french_factors(frequency=frequency)
+            if factors is not None and not factors.empty:
+                factors = factors.copy()
+                factors.index = pd.DatetimeIndex(pd.to_datetime(factors.index)).tz_localize(None).normalize()
+                factors = factors.apply(pd.to_numeric, errors='coerce').sort_index()
+                self._save_factor_cache(frequency, factors)
+                cached = {'frame': factors, 'fetched': today}
+            elif cached is not None:
+                logger.warning(f"Factor refresh failed, using cached history fetched {cached['fetched']}")
+            else:
+                return None
+
+        return cached['frame'].loc[start_date:end_date]
+
+    # ------------------------------------------------------------------
+    # Regressions
+    # ------------------------------------------------------------------
+
+    def _fit_key(self, returns: pd.DataFrame, factors: pd.DataFrame) -> str:
+        digest = hashlib.sha1()
+        digest.update(','.join(map(str, returns.columns)).encode())
+        digest.update(','.join(map(str, factors.columns)).encode())
+        digest.update(returns.index.values.tobytes())
+        digest.update(np.ascontiguousarray(returns.values, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(factors.values, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def fit_asset_exposures(self, returns: pd.DataFrame, factors: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Regress every asset's excess return on the factors in one least-squares solve
+
+        Args:
+            returns: Daily asset returns (columns = tickers)
+            factors: Factor frame from get_factors (RF column used for excess returns)
+
+        Returns:
+            Fit with design matrix, coefficients (k+1 x n), residuals (T x n) and
+            per-asset betas; cached by content so repeated calls are free
+        """
+        available = [col for col in FACTOR_COLUMNS if col in factors.columns]
+        if not available:
+            raise ValueError("No Fama-French factor columns available")
+
+        aligned = factors.reindex(returns.index).ffill()
+        aligned = aligned[available + (['RF'] if 'RF' in aligned.columns else [])]
+        mask = aligned.notna().all(axis=1).values & returns.notna().all(axis=1).values
+        asset_returns = returns.loc[mask]
+        aligned = aligned.loc[mask]
+        if len(asset_returns) <= len(available) + 1:
+            raise ValueError(f"Insufficient overlapping observations for factor regression: {len(asset_returns)}")
+
+        key = self._fit_key(asset_returns, aligned)
+        fit = self._fits.get(key)
+        if fit is not None:
+            self._fits.move_to_end(key)
+            return fit
+
+        rf = aligned['RF'].values if 'RF' in aligned.columns else np.zeros(len(aligned))
+        y = asset_returns.values - rf[:, np.newaxis]
+        x = np.column_stack([np.ones(len(aligned)), aligned[available].values])
+
+        coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+        if rank < x.shape[1]:
+            logger.warning("Factor design matrix is rank deficient; betas are minimum-norm")
+        residuals = y - x @ coef
+
+        tickers = list(asset_returns.columns)
+        fit = {
+            'factors': available,
+            'tickers': tickers,
+            'x': x,
+            'xtx_inv': np.linalg.pinv(x.T @ x),
+            'y': y,
+            'coef': coef,
+            'residuals': residuals,
+            'asset_betas': {
+                ticker: {
+                    **{factor: float(coef[i + 1, j]) for i, factor in enumerate(available)},
+                    'alpha': float(coef[0, j])
+                }
+                for j, ticker in enumerate(tickers)
+            }
+        }
+        self._fits[key] = fit
+        if len(self._fits) > self.max_cached_fits:
+            self._fits.popitem(last=False)
+        return fit
+
+    def aggregate(self, fit: Dict[str, Any], weights: Union[np.ndarray, List[float]]) -> Dict[str, Any]:
+        """
+        Portfolio exposures as weight-aggregates of cached per-asset fits
+
+        OLS is linear in the dependent variable, so coefficients and residuals
+        of the portfolio regression are the weighted sums of the asset ones;
+        only the Newey-West interval needs the (cheap) portfolio residual pass.
+
+        Args:
+            fit: Result of fit_asset_exposures
+            weights: Portfolio weights aligned with fit['tickers'] (summing to 1)
+
+        Returns:
+            Dictionary with betas (including alpha), beta_ci, r_squared and residual_vol
+        """
+        weights = np.asarray(weights, dtype=float)
+        coef = fit['coef'] @ weights
+        resid = fit['residuals'] @ weights
+        y = fit['y'] @ weights
+        x = fit['x']
+
+        # Newey-West (Bartlett) covariance of the coefficients
+        scores = x * resid[:, np.newaxis]
+        meat = scores.T @ scores
+        for lag in range(1, min(self.hac_lags, len(scores) - 1) + 1):
+            gamma = scores[lag:].T @ scores[:-lag]
+            meat += (1 - lag / (self.hac_lags + 1)) * (gamma + gamma.T)
+        cov = fit['xtx_inv'] @ meat @ fit['xtx_inv']
+        half_width = stats.norm.ppf(0.975) * np.sqrt(np.maximum(np.diag(cov), 0))
+
+        total = np.sum((y - y.mean()) ** 2)
+        factors = fit['factors']
+        betas = {factor: float(coef[i + 1]) for i, factor in enumerate(factors)}
+        betas['alpha'] = float(coef[0])
+        return {
+            'betas': betas,
+            'beta_ci': {
+                factor: [float(coef[i + 1] - half_width[i + 1]), float(coef[i + 1] + half_width[i + 1])]
+                for i, factor in enumerate(factors)
+            },
+            'r_squared': float(1 - np.sum(resid ** 2) / total) if total > 0 else 0.0,
+            'residual_vol': float(np.std(resid))
+        }
+
+    def portfolio_exposures(
+        self,
+        returns: pd.DataFrame,
+        weights: Union[np.ndarray, List[float]],
+        start_date: str,
+        end_date: str,
+        frequency: str = "daily"
+    ) -> Dict[str, Any]:
+        """
+        Factor exposures of a weighted portfolio plus the per-asset betas behind them
+
+        Raises:
+            ValueError: If factors are unavailable or the regression cannot be fit
+        """
+        factors = self.get_factors(start_date, end_date, frequency)
+        if factors is None or factors.empty:
+            raise ValueError("Fama-French factors unavailable")
+        fit = self.fit_asset_exposures(returns, factors)
+        exposures = self.aggregate(fit, weights)
+        exposures['asset_betas'] = fit['asset_betas']
+        return exposures
+
+
+# Singleton instance
+_factor_exposure_service = None
+
+def get_factor_exposure_service(data_pipeline=None) -> FactorExposureService:
+    """Get or create the singleton FactorExposureService instance"""
+    global _factor_exposure_service
+    if _factor_exposure_service is None:
+        _factor_exposure_service = FactorExposureService(data_pipeline)
+    return _factor_exposure_service
@@ -0,0 +1,149 @@
+"""
+Append-only journal of portfolio state mutations.
+
+The portfolio state server appends one JSON line per lot/account change instead
+of rewriting the full state file, and periodically compacts the journal into a
+new checkpoint. Every entry carries a sequence number and every checkpoint
+records the last sequence it contains, so replay after a crash between
+checkpoint and truncation never applies an entry twice.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Union
+
+
+def journal_path_for(state_path: Union[str, Path]) -> Path:
+    """Journal file that accompanies a portfolio state file"""
+    return Path(state_path).with_suffix('.journal.jsonl')
+
+
+def _set_field(lot: Any, field: str, value: Any) -> None:
+    if isinstance(lot, dict):
+        lot[field] = value
+    else:
+        setattr(lot, field, value)
+
+
+def _get_field(lot: Any, field: str) -> Any:
+    return lot[field] if isinstance(lot, dict) else getattr(lot, field)
+
+
+class StateJournal:
+    """Line-delimited JSON write-ahead journal"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """
+        Durably append one entry.
+
+        Args:
+            entry: JSON-serializable mutation with at least 'seq' and 'op'
+        """
+        line = json.dumps(entry, default=str, ensure_ascii=False) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """
+        Read entries with a sequence number greater than after_seq.
+
+        A torn final line (crash mid-append) is ignored.
+        """
+        if not self.path.exists():
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry.get('seq', 0) > after_seq:
+                    entries.append(entry)
+        return entries
+
+    def truncate(self) -> None:
+        """Discard all entries after a checkpoint has been written"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def apply_journal_entry(
+    tax_lots: Dict[str, List[Any]],
+    accounts: Dict[str, Dict[str, Any]],
+    entry: Dict[str, Any],
+    lot_factory: Callable[..., Any] = dict
+) -> None:
+    """
+    Apply one journal entry in place.
+
+    Works on either TaxLot objects or plain lot dicts (the JSON form), so the
+    server and read-only consumers replay with identical semantics.
+
+    Args:
+        tax_lots: symbol -> list of lots
+        accounts: account_id -> account metadata
+        entry: Journal entry
+        lot_factory: Builds a lot from its dict fields (dict for JSON consumers)
+    """
+    op = entry['op']
+
+    if op == 'add_lot':
+        lot = entry['lot']
+        tax_lots.setdefault(lot['symbol'], []).append(lot_factory(**lot))
+
+    elif op == 'update_lot':
+        for lot in tax_lots.get(entry['symbol'], []):
+            if _get_field(lot, 'lot_id') == entry['lot_id']:
+                for field, value in entry['fields'].items():
+                    _set_field(lot, field, value)
+                break
+
+    elif op == 'remove_lot':
+        lots = tax_lots.get(entry['symbol'], [])
+        for i, lot in enumerate(lots):
+            if _get_field(lot, 'lot_id') == entry['lot_id']:
+                del lots[i]
+                break
+
+    elif op == 'set_asset_type':
+        for lot in tax_lots.get(entry['symbol'], []):
+            _set_field(lot, 'asset_type', entry['asset_type'])
+
+    elif op == 'update_account':
+        accounts.setdefault(entry['account_id'], {}).update(entry['fields'])
+
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
+
+
+def load_state_with_journal(state_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read a portfolio state JSON file and replay any journal entries after it.
+
+    Returns:
+        State dict in the same shape as the JSON file, with 'journal_seq'
+        advanced to the last replayed entry
+
+    Raises:
+        FileNotFoundError: If the state file does not exist
+    """
+    with open(state_path, 'r') as f:
+        state = json.load(f)
+
+    entries = StateJournal(journal_path_for(state_path)).read(after_seq=state.get('journal_seq', 0))
+    if entries:
+        tax_lots = state.setdefault('tax_lots', {})
+        accounts = state.setdefault('accounts', {})
+        for entry in entries:
+            apply_journal_entry(tax_lots, accounts, entry)
+        state['journal_seq'] = entries[-1]['seq']
+        state['last_updated'] = entries[-1].get('timestamp', state.get('last_updated'))
+    return state
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Offline Symbol Index
+Resolves ticker spelling variants, share classes and quote types from the
+SEC and FinanceDatabase reference files in data/ with no network calls.
+The parsed index is persisted as a binary snapshot (uncompressed .npz of
+sorted byte-string arrays) so later processes load it in milliseconds.
+"""
+
+import json
+import logging
+import math
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+from shared.atomic_writer import atomic_write_bytes
+
+logger = logging.getLogger("symbol_index")
+
+INDEX_VERSION = 1
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_INDEX_PATH = Path(__file__).parent / "cache" / "symbol_index.npz"
+
+# Reference files the index is built from (relative to DATA_DIR)
+SOURCE_FILES = (
+    "company_tickers_exchange.json",
+    "company_tickers.json",
+    "ticker.txt",
+    "fund_categories_financedatabase.json",
+)
+
+QUOTE_TYPES = ["EQUITY", "ETF", "MUTUALFUND"]
+
+# SEC registrants that are funds rather than operating companies
+FUND_NAME_PATTERN = re.compile(
+    r'\b(ETF|ETFS|ETN|FUND|TRUST|SHARES|PORTFOLIO|INDEX|PROSHARES|ISHARES|SPDR|INVESCO|COMMODITY)\b',
+    re.IGNORECASE
+)
+# Share class / unit separators brokers use in place of Yahoo's '-' (BRK.B, BRK/B, BRK B)
+CLASS_SEPARATOR_PATTERN = re.compile(r'[._/ ]+')
+
+
+def _alias_key(symbol: str) -> str:
+    """Separator-free spelling of a symbol (BRK-B, BRK.B and BRKB all -> BRKB)"""
+    return re.sub(r'[^A-Z0-9]', '', symbol.upper())
+
+
+def _is_mutual_fund(symbol: str) -> bool:
+    """US mutual fund tickers are five letters ending in X"""
+    return re.fullmatch(r'[A-Z]{4}X', symbol) is not None
+
+
+class SymbolIndex:
+    """
+    Read-only symbol table with variant resolution.
+
+    Canonical symbols use Yahoo Finance spelling (class shares as BRK-B) and
+    are kept in a sorted byte-string array searched with np.searchsorted;
+    alternative spellings map to canonical rows through a second sorted
+    alias array. Names are stored as one UTF-8 blob with offsets.
+    """
+
+    def __init__(
+        self,
+        symbols: np.ndarray,
+        name_blob: np.ndarray,
+        name_offsets: np.ndarray,
+        ciks: np.ndarray,
+        exchange_code: np.ndarray,
+        exchanges: List[str],
+        quote_type_code: np.ndarray,
+        category_code: np.ndarray,
+        categories: List[str],
+        alias_keys: np.ndarray,
+        alias_rows: np.ndarray
+    ):
+        self.symbols = symbols
+        self.name_blob = name_blob
+        self.name_offsets = name_offsets
+        self.ciks = ciks
+        self.exchange_code = exchange_code
+        self.exchanges = exchanges
+        self.quote_type_code = quote_type_code
+        self.category_code = category_code
+        self.categories = categories
+        self.alias_keys = alias_keys
+        self.alias_rows = alias_rows
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, ticker: str) -> bool:
+        return self._find(ticker) >= 0
+
+    @classmethod
+    def build(cls, data_dir: Optional[Union[str, Path]] = None) -> 'SymbolIndex':
+        """
+        Parse the reference files into an index.
+
+        Args:
+            data_dir: Directory holding SOURCE_FILES (default: repo data/)
+
+        Returns:
+            SymbolIndex
+        """
+        data_dir = Path(data_dir) if data_dir else DATA_DIR
+        # symbol -> [name, cik, exchange, quote type, category]
+        entries: Dict[str, List[Any]] = {}
+
+        path = data_dir / "company_tickers_exchange.json"
+        if path.exists():
+            with open(path, 'r') as f:
+                payload = json.load(f)
+            fields = payload.get("fields", [])
+            for row in payload.get("data", []):
+                record = dict(zip(fields, row))
+                symbol = str(record.get("ticker") or "").upper()
+                if symbol and symbol not in entries:
+                    entries[symbol] = [record.get("name") or "", int(record.get("cik") or 0),
+                                       record.get("exchange") or "", "EQUITY", ""]
+
+        path = data_dir / "company_tickers.json"
+        if path.exists():
+            with open(path, 'r') as f:
+                for record in json.load(f).values():
+                    symbol = str(record.get("ticker") or "").upper()
+                    if symbol and symbol not in entries:
+                        entries[symbol] = [record.get("title") or "", int(record.get("cik_str") or 0),
+                                           "", "EQUITY", ""]
+
+        path = data_dir / "ticker.txt"
+        if path.exists():
+            with open(path, 'r') as f:
+                for line in f:
+                    parts = line.strip().split('\t')
+                    if len(parts) != 2 or not parts[1].isdigit():
+                        continue
+                    symbol = parts[0].upper()
+                    if symbol and symbol not in entries:
+                        entries[symbol] = ["", int(parts[1]), "", "EQUITY", ""]
+
+        path = data_dir / "fund_categories_financedatabase.json"
+        if path.exists():
+            with open(path, 'r') as f:
+                funds = json.load(f)
+            for symbol, category in funds.items():
+                symbol = str(symbol).upper()
+                if not symbol:
+                    continue
+                if isinstance(category, float) and math.isnan(category):
+                    category = ""
+                entry = entries.get(symbol)
+                # Operating companies also listed in FinanceDatabase (baby bonds etc.) stay equities
+                if entry is not None and not FUND_NAME_PATTERN.search(entry[0]):
+                    continue
+                quote_type = "MUTUALFUND" if _is_mutual_fund(symbol) else "ETF"
+                if entry is None:
+                    entries[symbol] = ["", 0, "", quote_type, category or ""]
+                else:
+                    entry[3] = quote_type
+                    entry[4] = category or ""
+
+        return cls._from_entries(entries)
+
+    @classmethod
+    def _from_entries(cls, entries: Dict[str, List[Any]]) -> 'SymbolIndex':
+        """Pack symbol entries into sorted arrays"""
+        ordered = sorted(entries)
+        symbols = np.array([s.encode('ascii', 'ignore') for s in ordered], dtype='S')
+
+        encoded_names = [entries[s][0].encode('utf-8') for s in ordered]
+        name_offsets = np.zeros(len(ordered) + 1, dtype=np.int64)
+        np.cumsum([len(n) for n in encoded_names], out=name_offsets[1:])
+        name_blob = np.frombuffer(b''.join(encoded_names), dtype=np.uint8).copy()
+
+        exchanges = sorted({entries[s][2] for s in ordered})
+        categories = sorted({entries[s][4] for s in ordered})
+        exchange_lookup = {e: i for i, e in enumerate(exchanges)}
+        category_lookup = {c: i for i, c in enumerate(categories)}
+
+        # Alternative spellings of US class shares/units (foreign listings keep their
+        # '.XX' exchange suffix); a key shared by several symbols is ambiguous and left out
+        alias_targets: Dict[str, int] = {}
+        for row, symbol in enumerate(ordered):
+            if '.' in symbol:
+                continue
+            key = _alias_key(symbol)
+            if key and key != symbol:
+                alias_targets[key] = -1 if key in alias_targets else row
+        alias_items = sorted((k, r) for k, r in alias_targets.items() if r >= 0 and k not in entries)
+
+        return cls(
+            symbols=symbols,
+            name_blob=name_blob,
+            name_offsets=name_offsets,
+            ciks=np.array([entries[s][1] for s in ordered], dtype=np.int64),
+            exchange_code=np.array([exchange_lookup[entries[s][2]] for s in ordered], dtype=np.int16),
+            exchanges=exchanges,
+            quote_type_code=np.array([QUOTE_TYPES.index(entries[s][3]) for s in ordered], dtype=np.int8),
+            category_code=np.array([category_lookup[entries[s][4]] for s in ordered], dtype=np.int16),
+            categories=categories,
+            alias_keys=np.array([k.encode('ascii', 'ignore') for k, _ in alias_items], dtype='S'),
+            alias_rows=np.array([r for _, r in alias_items], dtype=np.int32)
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Write the index as a binary snapshot (uncompressed .npz) atomically.
+
+        Args:
+            path: Snapshot file path
+        """
+        arrays = {
+            'version': np.array(INDEX_VERSION),
+            'symbols': self.symbols,
+            'name_blob': self.name_blob,
+            'name_offsets': self.name_offsets,
+            'ciks': self.ciks,
+            'exchange_code': self.exchange_code,
+            'exchanges': np.array(self.exchanges, dtype=str),
+            'quote_type_code': self.quote_type_code,
+            'category_code': self.category_code,
+            'categories': np.array(self.categories, dtype=str),
+            'alias_keys': self.alias_keys,
+            'alias_rows': self.alias_rows,
+        }
+
+        atomic_write_bytes(path, lambda f: np.savez(f, **arrays))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'SymbolIndex':
+        """
+        Read a binary snapshot.
+
+        Raises:
+            ValueError: If the snapshot version is not supported
+        """
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != INDEX_VERSION:
+                raise ValueError(f"Unsupported symbol index version {version} (expected {INDEX_VERSION})")
+            return cls(
+                symbols=data['symbols'],
+                name_blob=data['name_blob'],
+                name_offsets=data['name_offsets'],
+                ciks=data['ciks'],
+                exchange_code=data['exchange_code'],
+                exchanges=data['exchanges'].tolist(),
+                quote_type_code=data['quote_type_code'],
+                category_code=data['category_code'],
+                categories=data['categories'].tolist(),
+                alias_keys=data['alias_keys'],
+                alias_rows=data['alias_rows']
+            )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: Optional[Union[str, Path]] = None,
+        data_dir: Optional[Union[str, Path]] = None
+    ) -> 'SymbolIndex':
+        """
+        Load the snapshot, rebuilding it when missing, outdated or older than a source file.
+
+        Args:
+            path: Snapshot file path (default: shared/cache/symbol_index.npz)
+            data_dir: Directory holding SOURCE_FILES (default: repo data/)
+
+        Returns:
+            SymbolIndex
+        """
+        path = Path(path) if path else DEFAULT_INDEX_PATH
+        data_dir = Path(data_dir) if data_dir else DATA_DIR
+        source_mtime = max(
+            ((data_dir / name).stat().st_mtime for name in SOURCE_FILES if (data_dir / name).exists()),
+            default=0.0
+        )
+
+        if path.exists() and path.stat().st_mtime >= source_mtime:
+            try:
+                return cls.load(path)
+            except Exception as e:
+                logger.warning(f"Rebuilding symbol index ({e})")
+
+        index = cls.build(data_dir)
+        try:
+            index.save(path)
+            logger.info(f"Built symbol index with {len(index)} symbols at {path}")
+        except OSError as e:
+            logger.warning(f"Could not persist symbol index to {path}: {e}")
+        return index
+
+    def _search(self, keys: np.ndarray, key: str) -> int:
+        """Position of key in a sorted byte-string array, or -1"""
+        try:
+            encoded = key.encode('ascii')
+        except UnicodeEncodeError:
+            return -1
+        pos = int(np.searchsorted(keys, encoded))
+        if pos < len(keys) and keys[pos] == encoded:
+            return pos
+        return -1
+
+    def _find(self, ticker: str) -> int:
+        """
+        Row of the canonical symbol for a ticker spelling, or -1.
+
+        Tries the symbol as given, then with share class separators
+        normalized to '-', then its separator-free alias.
+        """
+        if not ticker:
+            return -1
+        symbol = ticker.strip().upper()
+        row = self._search(self.symbols, symbol)
+        if row >= 0:
+            return row
+
+        dashed = CLASS_SEPARATOR_PATTERN.sub('-', symbol)
+        if dashed != symbol:
+            row = self._search(self.symbols, dashed)
+            if row >= 0:
+                return row
+
+        pos = self._search(self.alias_keys, _alias_key(symbol))
+        return int(self.alias_rows[pos]) if pos >= 0 else -1
+
+    def resolve(self, ticker: str) -> Optional[str]:
+        """
+        Resolve a ticker spelling to its canonical (Yahoo Finance) symbol.
+
+        Args:
+            ticker: Symbol as entered (e.g. 'BRK.B', 'brkb', 'BRK/B')
+
+        Returns:
+            Canonical symbol, or None if the index does not know it
+        """
+        row = self._find(ticker)
+        return self.symbols[row].decode('ascii') if row >= 0 else None
+
+    def quote_type(self, ticker: str) -> Optional[str]:
+        """Quote type (EQUITY, ETF, MUTUALFUND) of a ticker, or None if unknown"""
+        row = self._find(ticker)
+        return QUOTE_TYPES[self.quote_type_code[row]] if row >= 0 else None
+
+    def listing_count(self, cik: int, quote_type: Optional[str] = None) -> int:
+        """Number of indexed symbols registered under a CIK, optionally of one quote type"""
+        matches = self.ciks == cik
+        if quote_type is not None:
+            matches &= self.quote_type_code == QUOTE_TYPES.index(quote_type)
+        return int(matches.sum())
+
+    def lookup(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Reference data for a ticker.
+
+        Returns:
+            Dict with symbol, name, cik, exchange, quote_type and category,
+            or None if the index does not know the ticker
+        """
+        row = self._find(ticker)
+        if row < 0:
+            return None
+        start, end = self.name_offsets[row], self.name_offsets[row + 1]
+        return {
+            'symbol': self.symbols[row].decode('ascii'),
+            'name': self.name_blob[start:end].tobytes().decode('utf-8'),
+            'cik': int(self.ciks[row]) or None,
+            'exchange': self.exchanges[self.exchange_code[row]],
+            'quote_type': QUOTE_TYPES[self.quote_type_code[row]],
+            'category': self.categories[self.category_code[row]]
+        }
+
+
+# Singleton instance shared by resolvers in the same process
+_symbol_index = None
+_symbol_index_lock = threading.Lock()
+
+def get_symbol_index(path: Optional[Union[str, Path]] = None) -> SymbolIndex:
+    """Get or load the singleton SymbolIndex instance"""
+    global _symbol_index
+    with _symbol_index_lock:
+        if _symbol_index is None:
+            _symbol_index = SymbolIndex.load_or_build(path)
+    return _symbol_index
@@ -6,5 +6,6 @@ LLMs interpret results, scripts perform mechanical validation.
 from .walk_forward import WalkForwardValidator
 from .cross_validation import CombinatorialPurgedCV
 from .metrics import ValidationMetrics
+from .parallel import ParallelValidationRunner
 
-__all__ = ['WalkForwardValidator', 'CombinatorialPurgedCV', 'ValidationMetrics']
\ No newline at end of file
+__all__ = ['WalkForwardValidator', 'CombinatorialPurgedCV', 'ValidationMetrics', 'ParallelValidationRunner']
\ No newline at end of file
@@ -12,6 +12,23 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def purged_train_ranges(n_samples: int, test_start: int, test_end: int, embargo: int) -> List[tuple]:
+    """
+    Training rows around a test block, purged of the block and an embargo on both sides.
+    
+    Args:
+        n_samples: Total number of samples
+        test_start: First test row
+        test_end: End of the test block (exclusive)
+        embargo: Rows dropped before and after the test block
+        
+    Returns:
+        Non-empty (start, stop) ranges of training rows
+    """
+    ranges = [(0, max(0, test_start - embargo)), (min(test_end + embargo, n_samples), n_samples)]
+    return [(start, stop) for start, stop in ranges if stop > start]
+
+
 class CombinatorialPurgedCV:
     """
     Implements combinatorial purged cross-validation from Advances in Financial Machine Learning.
@@ -39,35 +56,29 @@ class CombinatorialPurgedCV:
         Yields:
             Tuples of (train_indices, test_indices)
         """
-        n_samples = len(X)
-        embargo_size = int(n_samples * self.embargo_pct)
-        indices = np.arange(n_samples)
-        
-        # Generate test sets
-        test_starts = self._get_test_starts(n_samples)
+        for train_ranges, test_ranges in self.split_ranges(len(X)):
+            yield (
+                np.concatenate([np.arange(start, stop) for start, stop in train_ranges]),
+                np.concatenate([np.arange(start, stop) for start, stop in test_ranges])
+            )
+    
+    def split_ranges(self, n_samples: int) -> List[tuple]:
+        """
+        Generate the splits of split() as (start, stop) row ranges, without index arrays.
         
-        for test_start, test_end in test_starts:
-            # Define test indices
-            test_indices = indices[test_start:test_end]
-            
-            # Define train indices with purging
-            train_mask = np.ones(n_samples, dtype=bool)
-            
-            # Remove test period
-            train_mask[test_start:test_end] = False
-            
-            # Add embargo after test period
-            embargo_end = min(test_end + embargo_size, n_samples)
-            train_mask[test_end:embargo_end] = False
-            
-            # Add embargo before test period (for look-ahead bias)
-            embargo_start = max(0, test_start - embargo_size)
-            train_mask[embargo_start:test_start] = False
+        Args:
+            n_samples: Number of samples to split
             
-            train_indices = indices[train_mask]
+        Yields:
+            Tuples of (train_ranges, test_ranges)
+        """
+        embargo_size = int(n_samples * self.embargo_pct)
+        
+        for test_start, test_end in self._get_test_starts(n_samples):
+            train_ranges = purged_train_ranges(n_samples, test_start, test_end, embargo_size)
             
-            if len(train_indices) > 0 and len(test_indices) > 0:
-                yield train_indices, test_indices
+            if train_ranges and test_end > test_start:
+                yield train_ranges, [(test_start, test_end)]
     
     def _get_test_starts(self, n_samples: int) -> List[tuple]:
         """
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Parallel fold execution for walk-forward and purged cross-validation.
+The returns matrix is placed in shared memory once; folds travel to the
+worker processes as index ranges and their metrics stream back as they complete.
+"""
+
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Callable, Iterator, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Half-open (start, stop) row range
+Range = Tuple[int, int]
+# (fold id, train ranges, test ranges)
+Fold = Tuple[int, List[Range], List[Range]]
+
+# Per-process state of a pool worker, set by _init_fold_worker
+_WORKER: Dict[str, Any] = {}
+
+
+def index_ranges(indices: Sequence[int]) -> List[Range]:
+    """
+    Compress sorted row positions into contiguous half-open ranges.
+
+    Args:
+        indices: Increasing integer positions
+
+    Returns:
+        List of (start, stop) ranges covering exactly the given positions
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    starts = indices[np.concatenate([[0], breaks])]
+    stops = indices[np.concatenate([breaks - 1, [len(indices) - 1]])] + 1
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def range_length(ranges: Sequence[Range]) -> int:
+    """Number of rows covered by a list of ranges."""
+    return sum(stop - start for start, stop in ranges)
+
+
+def _take_rows(returns: pd.DataFrame, ranges: Sequence[Range]) -> pd.DataFrame:
+    """Copy the rows of the given ranges (folds never see the shared buffer itself)."""
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        return returns.iloc[start:stop].copy()
+    return returns.take(np.concatenate([np.arange(start, stop) for start, stop in ranges]))
+
+
+def _evaluate_fold(returns: pd.DataFrame,
+                   optimization_func: Callable,
+                   evaluate: Callable,
+                   fold: Fold) -> Dict[str, Any]:
+    """Optimize on the fold's training rows and score in- and out-of-sample."""
+    fold_id, train_ranges, test_ranges = fold
+    train_data = _take_rows(returns, train_ranges)
+    test_data = _take_rows(returns, test_ranges)
+    weights = optimization_func(train_data)
+    return {
+        "fold": fold_id,
+        "in_sample": evaluate(train_data, weights),
+        "out_sample": evaluate(test_data, weights)
+    }
+
+
+def _init_fold_worker(shm_name: str,
+                      shape: Tuple[int, int],
+                      dtype: str,
+                      index: pd.Index,
+                      columns: pd.Index,
+                      optimization_func: Callable,
+                      evaluate: Callable,
+                      stop) -> None:
+    """Pool initializer: attach to the shared returns matrix and keep the callables and stop flag."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    values.flags.writeable = False
+    _WORKER["shm"] = shm  # keep the mapping alive for the life of the worker
+    _WORKER["returns"] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+    _WORKER["optimization_func"] = optimization_func
+    _WORKER["evaluate"] = evaluate
+    _WORKER["stop"] = stop
+
+
+def _evaluate_fold_in_worker(fold: Fold) -> Dict[str, Any]:
+    """Evaluate one fold against the worker's shared returns (skipped once the run has stopped)."""
+    if _WORKER["stop"].is_set():
+        return {"fold": fold[0], "error": "cancelled"}
+    return _evaluate_fold(_WORKER["returns"], _WORKER["optimization_func"], _WORKER["evaluate"], fold)
+
+
+class ParallelValidationRunner:
+    """
+    Runs validation folds in a process pool and streams per-fold metrics.
+
+    Each result is {"fold", "in_sample", "out_sample"} on success or
+    {"fold", "error"} on failure, yielded in completion order. With
+    early_stop_degradation set, the run stops once out-of-sample Sharpe
+    degradation is significantly above that fraction of in-sample Sharpe.
+    """
+
+    def __init__(self,
+                 n_jobs: Optional[int] = None,
+                 early_stop_degradation: Optional[float] = None,
+                 min_folds: int = 10,
+                 confidence_z: float = 1.96):
+        """
+        Initialize runner.
+
+        Args:
+            n_jobs: Worker processes (None = all CPUs, 1 = run in this process)
+            early_stop_degradation: Stop when the lower confidence bound of the mean
+                                    in-sample minus out-of-sample Sharpe exceeds this
+                                    fraction of the mean in-sample Sharpe (None = never)
+            min_folds: Completed folds required before early stopping is considered
+            confidence_z: z-score of the one-sided confidence bound
+        """
+        self.n_jobs = n_jobs
+        self.early_stop_degradation = early_stop_degradation
+        self.min_folds = min_folds
+        self.confidence_z = confidence_z
+        self.stopped_early = False
+
+    def run(self,
+            optimization_func: Callable,
+            evaluate: Callable,
+            returns: pd.DataFrame,
+            folds: Sequence[Fold]) -> Iterator[Dict[str, Any]]:
+        """
+        Evaluate folds, yielding each fold's result as it completes.
+
+        Args:
+            optimization_func: Function that takes training returns and returns weights
+            evaluate: Function (returns, weights) -> metrics dict with 'sharpe_ratio'
+            returns: Asset returns shared by all folds
+            folds: (fold id, train ranges, test ranges) per fold
+
+        Yields:
+            Per-fold result dicts in completion order
+        """
+        self.stopped_early = False
+        folds = list(folds)
+        n_jobs = self.n_jobs if self.n_jobs is not None else (os.cpu_count() or 1)
+        n_jobs = min(n_jobs, len(folds))
+        context = multiprocessing.get_context()
+
+        if n_jobs > 1 and context.get_start_method() != 'fork':
+            try:
+                pickle.dumps((optimization_func, evaluate))
+            except Exception as e:
+                logger.warning(f"Validation callables cannot be sent to worker processes ({e}) - running folds serially")
+                n_jobs = 1
+
+        if n_jobs <= 1:
+            yield from self._run_serial(optimization_func, evaluate, returns, folds)
+        else:
+            yield from self._run_pool(optimization_func, evaluate, returns, folds, n_jobs, context)
+
+    def _run_serial(self,
+                    optimization_func: Callable,
+                    evaluate: Callable,
+                    returns: pd.DataFrame,
+                    folds: List[Fold]) -> Iterator[Dict[str, Any]]:
+        """Evaluate folds one after another in this process."""
+        completed = []
+        for fold in folds:
+            try:
+                result = _evaluate_fold(returns, optimization_func, evaluate, fold)
+            except Exception as e:
+                result = {"fold": fold[0], "error": str(e)}
+            yield result
+            if self._should_stop(completed, result):
+                self.stopped_early = True
+                return
+
+    def _run_pool(self,
+                  optimization_func: Callable,
+                  evaluate: Callable,
+                  returns: pd.DataFrame,
+                  folds: List[Fold],
+                  n_jobs: int,
+                  context) -> Iterator[Dict[str, Any]]:
+        """Evaluate folds in a process pool over a shared-memory copy of the returns."""
+        values = np.ascontiguousarray(returns.to_numpy(dtype=float))
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        # Set once the run ends so folds already handed to a worker are skipped
+        stop = context.Event()
+        executor = None
+        try:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            executor = ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=context,
+                initializer=_init_fold_worker,
+                initargs=(shm.name, values.shape, values.dtype.str, returns.index, returns.columns,
+                          optimization_func, evaluate, stop)
+            )
+            futures = {executor.submit(_evaluate_fold_in_worker, fold): fold[0] for fold in folds}
+
+            completed = []
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"fold": futures[future], "error": str(e)}
+                    yield result
+                    if self._should_stop(completed, result):
+                        self.stopped_early = True
+                        return
+        finally:
+            stop.set()
+            if executor is not None:
+                # After an early stop, folds still running would only be discarded,
+                # so let them finish in the background rather than waiting on them
+                executor.shutdown(wait=not self.stopped_early, cancel_futures=True)
+            shm.close()
+            shm.unlink()
+
+    def _should_stop(self, completed: List[Dict[str, Any]], result: Dict[str, Any]) -> bool:
+        """Record a fold result and check whether degradation is already clear."""
+        if "error" in result:
+            return False
+        completed.append(result)
+        if self.early_stop_degradation is None or len(completed) < max(self.min_folds, 2):
+            return False
+
+        in_sample = np.array([r["in_sample"]["sharpe_ratio"] for r in completed])
+        gaps = in_sample - np.array([r["out_sample"]["sharpe_ratio"] for r in completed])
+        lower_bound = gaps.mean() - self.confidence_z * gaps.std(ddof=1) / np.sqrt(len(gaps))
+        return bool(lower_bound > self.early_stop_degradation * abs(in_sample.mean()))
@@ -10,6 +10,9 @@ from typing import Dict, List, Any, Callable, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from .cross_validation import purged_train_ranges
+from .parallel import ParallelValidationRunner, index_ranges, range_length
+
 # Import skfolio for advanced validation
 try:
     from skfolio import Portfolio
@@ -39,7 +42,9 @@ class WalkForwardValidator:
                 historical_data: pd.DataFrame,
                 window_size: int = 252,
                 step_size: int = 21,
-                n_splits: Optional[int] = None) -> Dict[str, Any]:
+                n_splits: Optional[int] = None,
+                n_jobs: int = 1,
+                early_stop_degradation: Optional[float] = None) -> Dict[str, Any]:
         """
         Perform walk-forward validation on optimization strategy.
         
@@ -49,17 +54,22 @@ class WalkForwardValidator:
             window_size: Training window size in days
             step_size: Step size between windows
             n_splits: Number of splits (if None, use all possible)
+            n_jobs: Worker processes for the splits (1 = sequential, None = all CPUs)
+            early_stop_degradation: Stop once out-of-sample Sharpe degradation is
+                                    significantly above this fraction (None = run all splits)
             
         Returns:
             Dict with in-sample and out-of-sample performance metrics
         """
         if SKFOLIO_AVAILABLE:
             return self._validate_with_skfolio(
-                optimization_func, historical_data, window_size, step_size, n_splits
+                optimization_func, historical_data, window_size, step_size, n_splits,
+                n_jobs, early_stop_degradation
             )
         else:
             return self._validate_manual(
-                optimization_func, historical_data, window_size, step_size, n_splits
+                optimization_func, historical_data, window_size, step_size, n_splits,
+                n_jobs, early_stop_degradation
             )
     
     def _validate_with_skfolio(self,
@@ -67,7 +77,9 @@ class WalkForwardValidator:
                               historical_data: pd.DataFrame,
                               window_size: int,
                               step_size: int,
-                              n_splits: Optional[int]) -> Dict[str, Any]:
+                              n_splits: Optional[int],
+                              n_jobs: int = 1,
+                              early_stop_degradation: Optional[float] = None) -> Dict[str, Any]:
         """
         Use skfolio for advanced walk-forward validation.
         
@@ -83,42 +95,31 @@ class WalkForwardValidator:
             test_size=step_size
         )
         
-        in_sample_metrics = []
-        out_sample_metrics = []
+        # Walk-forward splits as row ranges
+        folds = [
+            (i, index_ranges(train_idx), index_ranges(test_idx))
+            for i, (train_idx, test_idx) in enumerate(wf.split(returns))
+        ]
         
         # Perform walk-forward validation
-        for train_idx, test_idx in wf.split(returns):
-            train_data = returns.iloc[train_idx]
-            test_data = returns.iloc[test_idx]
-            
-            # Optimize on training data
-            try:
-                weights = optimization_func(train_data)
-                
-                # Calculate in-sample performance
-                in_sample_perf = self._calculate_performance(train_data, weights)
-                in_sample_metrics.append(in_sample_perf)
-                
-                # Calculate out-of-sample performance
-                out_sample_perf = self._calculate_performance(test_data, weights)
-                out_sample_metrics.append(out_sample_perf)
-                
-            except Exception as e:
-                logger.warning(f"Optimization failed in walk-forward split: {e}")
-                continue
+        in_sample_metrics, out_sample_metrics, stopped_early = self._run_folds(
+            optimization_func, returns, folds, n_jobs, early_stop_degradation
+        )
         
         if not in_sample_metrics:
             return {"error": "No successful validation splits"}
         
         # Aggregate metrics
-        return self._aggregate_metrics(in_sample_metrics, out_sample_metrics)
+        return self._aggregate_metrics(in_sample_metrics, out_sample_metrics, stopped_early)
     
     def _validate_manual(self,
                         optimization_func: Callable,
                         historical_data: pd.DataFrame,
                         window_size: int,
                         step_size: int,
-                        n_splits: Optional[int]) -> Dict[str, Any]:
+                        n_splits: Optional[int],
+                        n_jobs: int = 1,
+                        early_stop_degradation: Optional[float] = None) -> Dict[str, Any]:
         """
         Manual walk-forward validation without skfolio.
         
@@ -135,9 +136,7 @@ class WalkForwardValidator:
         else:
             n_splits = min(n_splits, max_splits)
         
-        in_sample_metrics = []
-        out_sample_metrics = []
-        
+        folds = []
         for i in range(n_splits):
             # Define train and test windows
             train_start = i * step_size
@@ -148,34 +147,24 @@ class WalkForwardValidator:
             if test_end > n_obs:
                 break
             
-            train_data = returns.iloc[train_start:train_end]
-            test_data = returns.iloc[test_start:test_end]
-            
-            try:
-                # Optimize on training data
-                weights = optimization_func(train_data)
-                
-                # Calculate performance
-                in_sample_perf = self._calculate_performance(train_data, weights)
-                out_sample_perf = self._calculate_performance(test_data, weights)
-                
-                in_sample_metrics.append(in_sample_perf)
-                out_sample_metrics.append(out_sample_perf)
-                
-            except Exception as e:
-                logger.warning(f"Optimization failed at split {i}: {e}")
-                continue
+            folds.append((i, [(train_start, train_end)], [(test_start, test_end)]))
+        
+        in_sample_metrics, out_sample_metrics, stopped_early = self._run_folds(
+            optimization_func, returns, folds, n_jobs, early_stop_degradation
+        )
         
         if not in_sample_metrics:
             return {"error": "No successful validation splits"}
         
-        return self._aggregate_metrics(in_sample_metrics, out_sample_metrics)
+        return self._aggregate_metrics(in_sample_metrics, out_sample_metrics, stopped_early)
     
     def combinatorial_purged_cv(self,
                                optimization_func: Callable,
                                historical_data: pd.DataFrame,
                                n_splits: int = 10,
-                               embargo_period: int = 5) -> Dict[str, Any]:
+                               embargo_period: int = 5,
+                               n_jobs: int = 1,
+                               early_stop_degradation: Optional[float] = None) -> Dict[str, Any]:
         """
         Combinatorial purged cross-validation to avoid data leakage.
         
@@ -184,6 +173,9 @@ class WalkForwardValidator:
             historical_data: Historical price data
             n_splits: Number of CV splits
             embargo_period: Days to embargo after each test set
+            n_jobs: Worker processes for the folds (1 = sequential, None = all CPUs)
+            early_stop_degradation: Stop once out-of-sample Sharpe degradation is
+                                    significantly above this fraction (None = run all folds)
             
         Returns:
             Cross-validation results
@@ -193,34 +185,24 @@ class WalkForwardValidator:
         
         # Create purged splits
         fold_size = n_obs // n_splits
-        cv_results = []
+        folds = []
         
         for i in range(n_splits):
             # Define test fold
             test_start = i * fold_size
             test_end = min((i + 1) * fold_size, n_obs)
             
-            # Create training set with purging
-            train_indices = []
-            for j in range(n_obs):
-                # Skip test period and embargo
-                if j < test_start - embargo_period or j >= test_end + embargo_period:
-                    train_indices.append(j)
+            # Create training set with purging (test period and embargo skipped)
+            train_ranges = purged_train_ranges(n_obs, test_start, test_end, embargo_period)
             
-            if len(train_indices) < 100:  # Minimum training size
+            if range_length(train_ranges) < 100:  # Minimum training size
                 continue
             
-            train_data = returns.iloc[train_indices]
-            test_data = returns.iloc[test_start:test_end]
-            
-            try:
-                # Optimize and evaluate
-                weights = optimization_func(train_data)
-                test_perf = self._calculate_performance(test_data, weights)
-                cv_results.append(test_perf)
-            except Exception as e:
-                logger.warning(f"CV fold {i} failed: {e}")
-                continue
+            folds.append((i, train_ranges, [(test_start, test_end)]))
+        
+        _, cv_results, stopped_early = self._run_folds(
+            optimization_func, returns, folds, n_jobs, early_stop_degradation
+        )
         
         if not cv_results:
             return {"error": "No successful CV folds"}
@@ -232,9 +214,49 @@ class WalkForwardValidator:
             "cv_return_mean": float(np.mean([r['annual_return'] for r in cv_results])),
             "cv_return_std": float(np.std([r['annual_return'] for r in cv_results])),
             "n_successful_folds": len(cv_results),
-            "n_total_folds": n_splits
+            "n_total_folds": n_splits,
+            "stopped_early": stopped_early
         }
     
+    def _run_folds(self,
+                  optimization_func: Callable,
+                  returns: pd.DataFrame,
+                  folds: List[Tuple],
+                  n_jobs: int,
+                  early_stop_degradation: Optional[float]) -> Tuple[List[Dict], List[Dict], bool]:
+        """
+        Optimize and evaluate each fold, in worker processes when n_jobs != 1.
+        
+        Args:
+            optimization_func: Function that takes training returns and returns weights
+            returns: Asset returns
+            folds: (fold id, train ranges, test ranges) per fold
+            n_jobs: Worker processes (1 = sequential, None = all CPUs)
+            early_stop_degradation: Early stopping threshold on Sharpe degradation
+            
+        Returns:
+            In-sample metrics, out-of-sample metrics (both in fold order) and
+            whether the run stopped early
+        """
+        runner = ParallelValidationRunner(
+            n_jobs=n_jobs,
+            early_stop_degradation=early_stop_degradation
+        )
+        
+        completed = []
+        for result in runner.run(optimization_func, self._calculate_performance, returns, folds):
+            if "error" in result:
+                logger.warning(f"Optimization failed at split {result['fold']}: {result['error']}")
+                continue
+            completed.append(result)
+        
+        completed.sort(key=lambda r: r["fold"])
+        return (
+            [r["in_sample"] for r in completed],
+            [r["out_sample"] for r in completed],
+            runner.stopped_early
+        )
+    
     def _calculate_performance(self,
                               returns: pd.DataFrame,
                               weights: Dict[str, float]) -> Dict[str, float]:
@@ -288,13 +310,15 @@ class WalkForwardValidator:
     
     def _aggregate_metrics(self,
                           in_sample: List[Dict],
-                          out_sample: List[Dict]) -> Dict[str, Any]:
+                          out_sample: List[Dict],
+                          stopped_early: bool = False) -> Dict[str, Any]:
         """
         Aggregate in-sample and out-of-sample metrics.
         
         Args:
             in_sample: List of in-sample performance dicts
             out_sample: List of out-of-sample performance dicts
+            stopped_early: Whether validation stopped before running every split
             
         Returns:
             Aggregated metrics with degradation analysis
@@ -321,5 +345,6 @@ class WalkForwardValidator:
             "out_sample_volatility": float(np.mean([m['annual_volatility'] for m in out_sample])),
             "n_windows": len(in_sample),
             "overfitting_risk": sharpe_degradation > 0.3,  # Flag if >30% degradation
-            "validation_quality": "good" if len(in_sample) >= 10 else "limited"
+            "validation_quality": "good" if len(in_sample) >= 10 else "limited",
+            "stopped_early": stopped_early
         }
\ No newline at end of file
@@ -33,6 +33,7 @@ except ImportError as e:
 
 # Import confidence scoring and shared services
 from confidence_scoring import ConfidenceScorer
+from state_journal import load_state_with_journal
 from tax_rate_service import get_tax_rate_service
 from portfolio_value_service import get_portfolio_value_service
 from correlation_service import get_correlation_service
@@ -104,8 +105,8 @@ async def get_portfolio_state():
         default_path = os.path.join(os.path.dirname(__file__), '..', 'portfolio-state-mcp-server', 'state', 'portfolio_state.json')
         state_file = os.getenv('PORTFOLIO_STATE_PATH', default_path)
 
-        with open(state_file, 'r') as f:
-            data = json.load(f)
+        # Include changes journaled since the last checkpoint
+        data = load_state_with_journal(state_file)
 
         # Calculate enriched fields if not present
         if 'total_value' not in data: